@@ -4,13 +4,15 @@ from jose import JWTError
 
 from app.auth.jwt import JWTUtils
 from app.models.user_model import User
+from app.monitoring.tracing import span
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token/form")
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        return await JWTUtils.get_user_from_token(token)
+        with span("jwt.decode"):
+            return await JWTUtils.get_user_from_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.encoders import jsonable_encoder
+
+from app.auth.auth_user import verify_admin
+from app.database import instrumented
+from app.dependencies.config import database
+from app.models.error_response_model import default_error_responses
+from app.models.monitoring_model import QueryInstrumentationSettingsForm, QueryInstrumentationSettingsModel
+from app.models.response_model import MessageResponseWithResultModel
+from app.models.user_model import User
+from app.monitoring.tracing import JSONResponse, TracedRoute
+
+router = APIRouter(prefix="/admin/monitoring", tags=["관리자 모니터링"], route_class=TracedRoute)
+
+
+@router.get("/query-instrumentation",
+            summary="쿼리 계측 설정 조회",
+            description="쿼리별 latency 측정 및 slow query 로그 설정을 조회합니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[QueryInstrumentationSettingsModel],
+            )
+async def get_query_instrumentation(user: User = Depends(verify_admin)):
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel(
+                message="쿼리 계측 설정 조회에 성공했습니다.",
+                result=QueryInstrumentationSettingsModel(**instrumented.settings.to_dict())
+            )
+        )
+    )
+
+
+@router.put("/query-instrumentation",
+            summary="쿼리 계측 설정 변경",
+            description="쿼리별 latency 측정을 켜고 끄거나 slow query 기준(ms)을 변경합니다. 모든 worker 프로세스에 반영됩니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[QueryInstrumentationSettingsModel],
+            )
+async def update_query_instrumentation(
+        form: QueryInstrumentationSettingsForm,
+        user: User = Depends(verify_admin),
+):
+    instrumented.settings.update(enabled=form.enabled, slow_query_threshold_ms=form.slow_query_threshold_ms)
+    # other workers pick the change up through LISTEN/NOTIFY
+    await database.get_pool().publish_settings()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel(
+                message="쿼리 계측 설정 변경에 성공했습니다.",
+                result=QueryInstrumentationSettingsModel(**instrumented.settings.to_dict())
+            )
+        )
+    )
@@ -3,18 +3,18 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, status
 from fastapi.encoders import jsonable_encoder
-from starlette.responses import JSONResponse
 
 from app.auth.auth_user import verify_admin
 from app.controllers.user_reservations import ReservationWithSlotForResponse
-from app.dependencies.config import admin_exam_management_service
+from app.dependencies.config import ADMIN_QUERY_DEADLINE, admin_exam_management_service, query_deadline
 from app.models.error_response_model import default_error_responses
-from app.models.reservation_model import ReservationDto
+from app.models.reservation_model import ReservationDto, SlotFillResult
 from app.models.response_model import MessageResponseModel, MessageResponseWithResultModel
 from app.models.user_model import User
+from app.monitoring.tracing import JSONResponse, TracedRoute
 from app.services.admin.admin_service_impl import AdminExamManagementService
 
-router = APIRouter(prefix="/admin/reservations", tags=["관리자 예약관리"])
+router = APIRouter(prefix="/admin/reservations", tags=["관리자 예약관리"], route_class=TracedRoute)
 
 InjectService: AdminExamManagementService = Depends(admin_exam_management_service)
 
@@ -25,6 +25,7 @@ InjectService: AdminExamManagementService = Depends(admin_exam_management_servic
             status_code=status.HTTP_200_OK,
             responses=default_error_responses,
             response_model=MessageResponseWithResultModel[List[ReservationWithSlotForResponse]],
+            dependencies=[Depends(query_deadline(ADMIN_QUERY_DEADLINE))],
             )
 async def get_all_reservations(
         start_at: Optional[datetime] = None,
@@ -56,6 +57,31 @@ async def get_all_reservations(
     )
 
 
+@router.post("/slots/{slot_id}/fill",
+             summary="대기중인 예약 선착순 일괄 승인",
+             description="슬롯의 대기중인 예약을 신청 순서대로, 정원을 넘기 전까지 한 번에 승인합니다. "
+                         "정원을 넘는 예약을 만나면 그 뒤의 예약은 승인하지 않습니다.",
+             status_code=status.HTTP_200_OK,
+             responses=default_error_responses,
+             response_model=MessageResponseWithResultModel[SlotFillResult]
+             )
+async def fill_slot(
+        slot_id: int,
+        user: User = Depends(verify_admin),
+        service=InjectService
+):
+    ret = await service.fill_slot(slot_id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel(
+                message=f"예약 {len(ret.confirmed_ids)}건 승인에 성공했습니다.",
+                result=ret
+            )
+        )
+    )
+
+
 @router.patch("/{id}",
               summary="대기중인 예약 승인",
               description="예약 대기중인 내역을 승인합니다.",
@@ -2,18 +2,19 @@ from argon2.exceptions import VerifyMismatchError
 from fastapi import APIRouter, Depends, Form, HTTPException, Response, status
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from starlette.responses import JSONResponse
 
 from app.auth.jwt import JWTUtils
 from app.dependencies.config import auth_service
 from app.models.error_response_model import default_error_responses
 from app.models.response_model import MessageResponseModel
 from app.models.user_model import User
+from app.monitoring.tracing import JSONResponse, TracedRoute
 from app.services.auth.auth_service_impl import AuthService, UserNotFoundException
 
 router = APIRouter(
     prefix="/auth",
     tags=["인증"],
+    route_class=TracedRoute,
 )
 
 InjectAuthService: AuthService = Depends(auth_service)
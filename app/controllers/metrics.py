@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from app.monitoring.metrics import REGISTRY
+
+router = APIRouter(tags=["모니터링"])
+
+
+@router.get("/metrics",
+            summary="Prometheus 메트릭",
+            description="요청 지연시간, DB 커넥션 풀, 서비스 예외 카운트를 Prometheus text format으로 반환합니다. 메트릭은 worker 프로세스별로 집계됩니다.",
+            include_in_schema=False,
+            )
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,21 +1,23 @@
-from datetime import UTC, datetime, timezone
+from datetime import UTC, date, datetime, timezone
 from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
-from starlette.responses import JSONResponse
+from pydantic import BaseModel, Field
 
 from app.auth.auth_user import verify_admin
-from app.dependencies.config import admin_exam_management_service, exam_management_service
+from app.dependencies.config import QUERY_DEADLINE, admin_exam_management_service, exam_management_service, \
+    query_deadline
 from app.models.error_response_model import default_error_responses
 from app.models.response_model import MessageResponseModel, MessageResponseWithResultModel
-from app.models.slot_model import Slot, SlotForResponse
+from app.models.slot_model import SLOT_LIMIT, CalendarDay, Slot, SlotForResponse
 from app.models.user_model import User
+from app.monitoring.tracing import JSONResponse, TracedRoute
 from app.services.admin.admin_service_impl import AdminExamManagementService
 from app.services.user.user_service_impl import ExamManagementService
 
-router = APIRouter(prefix="/slots", tags=["시험 슬롯 관리"])
+router = APIRouter(prefix="/slots", tags=["시험 슬롯 관리"], route_class=TracedRoute)
 
 InjectService: ExamManagementService = Depends(exam_management_service)
 InjectAdminService: AdminExamManagementService = Depends(admin_exam_management_service)
@@ -23,14 +25,20 @@ InjectAdminService: AdminExamManagementService = Depends(admin_exam_management_s
 
 @router.get("",
             summary="슬롯 조회",
-            description="슬롯을 조회합니다. ISO8601 포맷 작성시 TIME ZONE에 유의하세요!! TIME ZONE이 없으면 UTC로 간주합니다. ",
+            description="슬롯을 조회합니다. ISO8601 포맷 작성시 TIME ZONE에 유의하세요!! TIME ZONE이 없으면 UTC로 간주합니다. "
+                        "min_remaining은 남은 인원이 그 이상인 슬롯만, bookable_only는 지금 예약 가능한(시작까지 3일 이상 남은) "
+                        "슬롯만 조회하며 limit은 최대 개수를 제한합니다.",
             status_code=status.HTTP_200_OK,
             responses=default_error_responses,
-            response_model=MessageResponseWithResultModel[List[SlotForResponse]]
+            response_model=MessageResponseWithResultModel[List[SlotForResponse]],
+            dependencies=[Depends(query_deadline(QUERY_DEADLINE))],
             )
 async def get_available_slots(
         start_at: Optional[datetime] = None,
         end_at: Optional[datetime] = None,
+        min_remaining: Optional[int] = Query(default=None, ge=1),
+        bookable_only: bool = False,
+        limit: Optional[int] = Query(default=None, ge=1),
         service=InjectService
 ):
     if start_at and start_at.tzinfo is None:
@@ -41,7 +49,72 @@ async def get_available_slots(
     if start_at is not None and end_at is not None:
         if start_at > end_at:
             raise ValueError("start_at must be before end_at")
-    rows = await service.find_slots(start_at, end_at)
+    rows = await service.find_slots(start_at, end_at, min_remaining, bookable_only, limit)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel[List[SlotForResponse]](
+                message="슬롯 조회에 성공했습니다.",
+                result=list(map(lambda x: SlotForResponse.from_slot_with_amount(x), rows))
+            )
+        )
+    )
+
+
+@router.get("/calendar",
+            summary="일별 슬롯 집계 조회",
+            description="from부터 to까지(포함) tz 시간대 기준 날짜별로 시작하는 슬롯 수, 전체 정원, 확정 인원, 미확정 인원을 조회합니다. "
+                        "tz는 IANA 시간대 이름(예: Asia/Seoul)이며 기본값은 UTC입니다. 최대 366일까지 조회할 수 있습니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[List[CalendarDay]],
+            dependencies=[Depends(query_deadline(QUERY_DEADLINE))],
+            )
+async def get_slot_calendar(
+        from_date: date = Query(alias="from"),
+        to_date: date = Query(alias="to"),
+        tz: str = "UTC",
+        service=InjectService
+):
+    if from_date > to_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from must not be after to")
+    if (to_date - from_date).days >= 366:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="at most 366 days can be requested")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"unknown time zone: {tz}")
+
+    days = await service.find_calendar(from_date, to_date, tz)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel[List[CalendarDay]](
+                message="슬롯 집계 조회에 성공했습니다.",
+                result=days
+            )
+        )
+    )
+
+
+@router.get("/nearest",
+            summary="가까운 슬롯 조회",
+            description="target_at에 시작 시각이 가장 가까운 순서로, amount명을 더 확정할 수 있고 지금 예약 가능한(시작까지 3일 이상 남은) "
+                        "슬롯을 최대 k개 조회합니다. TIME ZONE이 없으면 UTC로 간주합니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[List[SlotForResponse]]
+            )
+async def get_nearest_slots(
+        target_at: datetime,
+        amount: int = Query(ge=1),
+        k: int = Query(default=5, ge=1, le=100),
+        service=InjectService
+):
+    if target_at.tzinfo is None:
+        target_at = target_at.replace(tzinfo=timezone.utc)
+
+    rows = await service.find_nearest_slots(target_at, amount, k)
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content=jsonable_encoder(
@@ -79,11 +152,17 @@ async def get_slot_by_id(
 class SlotForm(BaseModel):
     start_at: datetime
     end_at: datetime
+    capacity: int = Field(default=SLOT_LIMIT, ge=0)
+
+
+class SlotCapacityForm(BaseModel):
+    capacity: int = Field(ge=0)
 
 
 @router.post("",
              summary="슬롯 추가",
-             description="슬롯을 추가합니다. ISO8601 포맷 작성시 TIME ZONE에 유의하세요!! TIME ZONE이 없으면 UTC로 간주합니다. 관리자에게만 슬롯 추가 권한이 부여됩니다.",
+             description="슬롯을 추가합니다. ISO8601 포맷 작성시 TIME ZONE에 유의하세요!! TIME ZONE이 없으면 UTC로 간주합니다. "
+                         f"capacity는 확정 가능한 최대 인원이며 기본값은 {SLOT_LIMIT}입니다. 관리자에게만 슬롯 추가 권한이 부여됩니다.",
              status_code=status.HTTP_201_CREATED,
              responses=default_error_responses,
              response_model=MessageResponseModel
@@ -102,7 +181,7 @@ async def add_new_slot(
         end_at = slot.end_at.replace(tzinfo=UTC)
 
     ret = await service.add_exam_slot(
-        Slot.create_with_time_range(start_time=start_at, end_time=end_at)
+        Slot.create_with_time_range(start_time=start_at, end_time=end_at, capacity=slot.capacity)
     )
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
@@ -114,6 +193,31 @@ async def add_new_slot(
     )
 
 
+@router.patch("/{id}/capacity",
+              summary="슬롯 정원 변경",
+              description="슬롯의 정원(확정 가능한 최대 인원)을 변경합니다. 이미 확정된 인원보다 작게 줄일 수 없으며, "
+                          "정원이 늘면 대기열이 승격됩니다. 관리자에게만 정원 변경 권한이 부여됩니다.",
+              status_code=status.HTTP_200_OK,
+              responses=default_error_responses,
+              response_model=MessageResponseModel
+              )
+async def set_slot_capacity(
+        id: int,
+        form: SlotCapacityForm,
+        user: User = Depends(verify_admin),
+        service=InjectAdminService
+):
+    await service.set_slot_capacity(id, form.capacity)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseModel(
+                message="슬롯 정원 변경에 성공했습니다.",
+            )
+        )
+    )
+
+
 @router.delete("/{id}",
                summary="슬롯 삭제",
                description="슬롯을 삭제합니다. 관리자에게만 슬롯 삭제 권한이 부여됩니다.",
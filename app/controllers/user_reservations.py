@@ -1,22 +1,22 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Request
 from fastapi.encoders import jsonable_encoder
 from starlette import status
-from starlette.responses import JSONResponse
 
 from app.auth.auth_user import get_current_user
 from app.dependencies.config import exam_management_service
 from app.models.error_response_model import default_error_responses
-from app.models.reservation_model import Reservation, ReservationDto
+from app.models.reservation_model import Reservation, ReservationDto, ReservationTicket, WaitlistEntry
 from app.models.response_model import MessageResponseModel, MessageResponseWithResultModel
 from app.models.slot_model import TimeRangeSchema
 from app.models.slot_reservation_joined_model import ReservationWithSlot
 from app.models.user_model import User
+from app.monitoring.tracing import JSONResponse, TracedRoute
 from app.services.user.user_service_impl import ExamManagementService
 
-router = APIRouter(prefix="/users/reservations", tags=["사용자 예약관리"])
+router = APIRouter(prefix="/users/reservations", tags=["사용자 예약관리"], route_class=TracedRoute)
 
 InjectService: ExamManagementService = Depends(exam_management_service)
 
@@ -51,6 +51,74 @@ async def get_my_reservations(
     )
 
 
+@router.get("/tickets/{ticket_id}",
+            summary="비동기 예약 신청 상태 조회",
+            description="`Prefer: respond-async`로 접수된 예약 신청의 처리 상태를 조회합니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[ReservationTicket]
+            )
+async def get_reservation_ticket(
+        ticket_id: int,
+        user: User = Depends(get_current_user),
+        service=InjectService
+):
+    ret = await service.find_ticket(ticket_id, user_id=user.id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel(
+                message="예약 신청 조회에 성공했습니다.",
+                result=ret
+            )
+        )
+    )
+
+
+@router.get("/waitlist",
+            summary="자신의 대기 신청 조회",
+            description="정원 초과로 대기자 명단에 등록된 자신의 신청과 승격 여부를 조회합니다.",
+            status_code=status.HTTP_200_OK,
+            responses=default_error_responses,
+            response_model=MessageResponseWithResultModel[List[WaitlistEntry]]
+            )
+async def get_my_waitlist(
+        user: User = Depends(get_current_user),
+        service=InjectService
+):
+    ret = await service.find_waitlist(user.id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseWithResultModel(
+                message="대기 신청 조회에 성공했습니다.",
+                result=ret
+            )
+        )
+    )
+
+
+@router.delete("/waitlist/{entry_id}",
+               summary="대기 신청 취소",
+               description="아직 승격되지 않은 자신의 대기 신청을 취소합니다.",
+               status_code=status.HTTP_200_OK,
+               responses=default_error_responses,
+               response_model=MessageResponseModel
+               )
+async def leave_waitlist(
+        entry_id: int,
+        user: User = Depends(get_current_user),
+        service=InjectService
+):
+    await service.leave_waitlist(entry_id, user.id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            MessageResponseModel(message="대기 신청이 취소되었습니다."),
+        )
+    )
+
+
 @router.get("/{id}",
             summary="자신의 예약 조회",
             description="자신이 예약한 내역을 ID로 조회합니다.",
@@ -77,13 +145,22 @@ async def get_reservation_by_id(
 
 @router.post("",
              summary="새로운 예약 신청",
-             description="새로운 예약을 신청합니다.",
+             description="새로운 예약을 신청합니다. `Prefer: respond-async` 헤더를 보내면 신청을 대기열에 넣고 "
+                         "202와 함께 처리 상태를 조회할 수 있는 Location을 바로 반환합니다. `waitlist=true`이면 정원이 "
+                         "찬 슬롯의 신청은 대기자 명단에 등록되고 202와 대기 정보를 반환합니다.",
              status_code=status.HTTP_201_CREATED,
-             responses=default_error_responses,
+             responses={
+                 **default_error_responses,
+                 status.HTTP_202_ACCEPTED: {"model": MessageResponseWithResultModel[ReservationTicket]
+                                                     | MessageResponseWithResultModel[WaitlistEntry]},
+             },
              response_model=MessageResponseModel
              )
 async def submit_new_reservation(
         reservation: ReservationDto,
+        request: Request,
+        waitlist: bool = False,
+        prefer: Optional[str] = Header(None),
         user: User = Depends(get_current_user),
         service=InjectService
 ):
@@ -92,7 +169,31 @@ async def submit_new_reservation(
         user_id=user.id,
         amount=reservation.amount
     )
-    await service.add_reservation(res)
+    if prefer is not None and "respond-async" in prefer.lower():
+        ticket = await service.enqueue_reservation(res)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": str(request.url_for("get_reservation_ticket", ticket_id=ticket.id))},
+            content=jsonable_encoder(
+                MessageResponseWithResultModel(
+                    message="예약 신청이 접수되었습니다.",
+                    result=ticket
+                )
+            )
+        )
+
+    entry = await service.add_reservation(res, waitlist=waitlist)
+    if entry is not None:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(
+                MessageResponseWithResultModel(
+                    message="정원이 차서 대기자 명단에 등록되었습니다.",
+                    result=entry
+                )
+            )
+        )
+
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
         content=jsonable_encoder(
@@ -4,23 +4,36 @@ from logging import Logger
 from typing import Optional
 
 import asyncpg
-from asyncpg import Pool
 
-__pool: Optional[Pool] = None
+from app.database.instrumented import InstrumentedPool
+from app.monitoring.metrics import DB_POOL_IDLE, DB_POOL_MAX_SIZE, DB_POOL_SIZE, REGISTRY
+
+__pool: Optional[InstrumentedPool] = None
 __logger: Logger = logging.getLogger(__name__)
 
 
+def server_settings() -> dict:
+    ret = {'search_path': os.getenv("APP_DB_SCHEMA")}
+    # pool-wide backstop for statements outside any request deadline (instrumented.query_deadline), e.g. "30s"
+    if os.getenv("DB_STATEMENT_TIMEOUT"):
+        ret['statement_timeout'] = os.getenv("DB_STATEMENT_TIMEOUT")
+    return ret
+
+
 async def connect():
     global __pool
     if __pool is None:
         __logger.info("Connecting to the database...")
         try:
-            __pool = await asyncpg.create_pool(
+            pool = await asyncpg.create_pool(
                 os.getenv("DATABASE_URL"),
-                min_size=5,
-                max_size=10,
-                server_settings={'search_path': os.getenv("APP_DB_SCHEMA")}
+                # app.server divides DB_MAX_CONNECTIONS across workers and sets these per worker
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", 5)),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                server_settings=server_settings()
             )
+            __pool = InstrumentedPool(pool, connect=lambda: asyncpg.connect(os.getenv("DATABASE_URL"),
+                                                                            server_settings=server_settings()))
         except asyncpg.PostgresError as e:
             __logger.exception("Failed to connect to the database.")
             raise
@@ -45,8 +58,19 @@ async def disconnect():
         __logger.warning("No active database connection to disconnect.")
 
 
-def get_pool() -> Pool:
+def get_pool() -> InstrumentedPool:
     global __pool
     if __pool is None:
         raise ConnectionError("DB Connection Failed.. Is connect() called?")
     return __pool
+
+
+def __collect_pool_metrics():
+    if __pool is None:
+        return
+    DB_POOL_SIZE.set(__pool.get_size())
+    DB_POOL_IDLE.set(__pool.get_idle_size())
+    DB_POOL_MAX_SIZE.set(__pool.get_max_size())
+
+
+REGISTRY.add_collector(__collect_pool_metrics)
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import Logger
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from asyncpg import Connection, Pool, QueryCanceledError
+
+from app.monitoring.metrics import DB_POOL_ACQUIRE_WAIT, DB_QUERY_DURATION, DB_QUERY_ROWS, DB_SLOW_QUERIES, \
+    DB_TRANSACTIONS
+from app.monitoring.tracing import current_trace
+
+_logger: Logger = logging.getLogger(__name__)
+
+UNNAMED_QUERY = "unnamed"
+SETTINGS_CHANNEL = "ers_query_instrumentation"
+
+
+class QueryInstrumentationSettings:
+    """Runtime switches for per-query timing. Changed through the admin monitoring endpoint."""
+
+    def __init__(self, enabled: bool = True, slow_query_threshold_ms: float = 200.0):
+        self.enabled = enabled
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+
+    def to_dict(self):
+        return {"enabled": self.enabled, "slow_query_threshold_ms": self.slow_query_threshold_ms}
+
+    def update(self, enabled: Optional[bool] = None, slow_query_threshold_ms: Optional[float] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if slow_query_threshold_ms is not None:
+            self.slow_query_threshold_ms = slow_query_threshold_ms
+
+
+settings = QueryInstrumentationSettings(
+    enabled=os.getenv("QUERY_INSTRUMENTATION", "true").lower() == "true",
+    slow_query_threshold_ms=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200)),
+)
+
+
+# perf_counter() by which the current request's queries must finish; None means no deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("ers_query_deadline", default=None)
+
+
+class QueryDeadlineExceeded(Exception):
+    """A query ran past the deadline of the request. Not a PostgresError, so services let it through."""
+
+    def __init__(self, query_name: str):
+        self.query_name = query_name
+        super().__init__(f"Query deadline exceeded: {query_name}")
+
+
+@contextmanager
+def query_deadline(seconds: float):
+    """
+    Queries inside get at most `seconds` in total: each is sent with the remaining time as asyncpg
+    `timeout=` (which cancels it on the server when it fires), and connections acquired inside set
+    the same `statement_timeout`, in case the client goes away before it can cancel. A nested
+    deadline can only shorten the outer one.
+    """
+    deadline = perf_counter() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - perf_counter()
+
+
+def _param_shape(args) -> str:
+    # log the shape of the parameters, never the values (they may hold user data)
+    shapes = []
+    for arg in args:
+        if isinstance(arg, (str, bytes, list, tuple)):
+            shapes.append(f"{type(arg).__name__}[{len(arg)}]")
+        else:
+            shapes.append(type(arg).__name__)
+    return "(" + ", ".join(shapes) + ")"
+
+
+def _count_single(value) -> int:
+    return 0 if value is None else 1
+
+
+def _affected_rows(status: str) -> int:
+    # asyncpg returns command tags such as "DELETE 3" or "INSERT 0 1"
+    last = status.rsplit(" ", 1)[-1] if status else ""
+    return int(last) if last.isdigit() else 0
+
+
+class InstrumentedConnection:
+    """
+    Wraps an asyncpg Connection so every statement is timed under a stable `query_name`,
+    e.g. `slot.find` or `reservation.trigger_confirm`. Other attributes such as `transaction()`
+    are delegated to the wrapped connection.
+    """
+
+    def __init__(self, conn: Connection):
+        self.__conn = conn
+
+    @property
+    def raw(self) -> Connection:
+        return self.__conn
+
+    @staticmethod
+    async def __call(method, query_name: str, query: str, args, kwargs):
+        remaining = remaining_time()
+        if remaining is None or "timeout" in kwargs:
+            return await method(query, *args, **kwargs)
+        if remaining <= 0:
+            raise QueryDeadlineExceeded(query_name)
+        try:
+            return await method(query, *args, timeout=remaining, **kwargs)
+        except (asyncio.TimeoutError, QueryCanceledError):
+            # the client side timeout, or statement_timeout when the cancel request lost the race
+            raise QueryDeadlineExceeded(query_name) from None
+
+    async def __run(self, method, query_name: str, count_rows, query: str, args, kwargs):
+        trace = current_trace()
+        if not settings.enabled and trace is None:
+            return await self.__call(method, query_name, query, args, kwargs)
+        start = perf_counter()
+        result = await self.__call(method, query_name, query, args, kwargs)
+        end = perf_counter()
+        if trace is not None:
+            trace.record(f"sql {query_name}", start, end)
+        if settings.enabled:
+            rows = count_rows(result)
+            DB_QUERY_DURATION.observe(end - start, query_name)
+            DB_QUERY_ROWS.inc(query_name, amount=rows)
+            elapsed_ms = (end - start) * 1000
+            if elapsed_ms >= settings.slow_query_threshold_ms:
+                DB_SLOW_QUERIES.inc(query_name)
+                _logger.warning(f"Slow query {query_name}: {elapsed_ms:.1f}ms, rows={rows}, params={_param_shape(args)}")
+        return result
+
+    async def fetch(self, query: str, *args, query_name: str = UNNAMED_QUERY, **kwargs):
+        return await self.__run(self.__conn.fetch, query_name, len, query, args, kwargs)
+
+    async def fetchrow(self, query: str, *args, query_name: str = UNNAMED_QUERY, **kwargs):
+        return await self.__run(self.__conn.fetchrow, query_name, _count_single, query, args, kwargs)
+
+    async def fetchval(self, query: str, *args, query_name: str = UNNAMED_QUERY, **kwargs):
+        return await self.__run(self.__conn.fetchval, query_name, _count_single, query, args, kwargs)
+
+    async def execute(self, query: str, *args, query_name: str = UNNAMED_QUERY, **kwargs):
+        return await self.__run(self.__conn.execute, query_name, _affected_rows, query, args, kwargs)
+
+    async def executemany(self, query: str, args, query_name: str = UNNAMED_QUERY, **kwargs):
+        return await self.__run(self.__conn.executemany, query_name, lambda _: len(args), query, (args,), kwargs)
+
+    def transaction(self, **kwargs):
+        DB_TRANSACTIONS.inc()
+        return self.__conn.transaction(**kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self.__conn, item)
+
+
+class _InstrumentedAcquireContext:
+    def __init__(self, pool: Pool, timeout=None):
+        self.__pool = pool
+        self.__timeout = timeout
+        self.__conn = None
+
+    async def __aenter__(self):
+        start = perf_counter()
+        self.__conn = await self.__pool.acquire(timeout=self.__timeout)
+        end = perf_counter()
+        DB_POOL_ACQUIRE_WAIT.observe(end - start)
+        trace = current_trace()
+        if trace is not None:
+            trace.record("db.acquire", start, end)
+        conn = InstrumentedConnection(self.__conn)
+        remaining = remaining_time()
+        if remaining is not None:
+            # session level; RESET ALL on release restores the pool default
+            try:
+                await conn.execute("SELECT set_config('statement_timeout', $1, FALSE)",
+                                   f"{max(int(remaining * 1000), 1)}ms", query_name="deadline.statement_timeout")
+            except BaseException:
+                await self.__aexit__()
+                raise
+        return conn
+
+    async def __aexit__(self, *exc):
+        conn, self.__conn = self.__conn, None
+        await self.__pool.release(conn)
+
+    def __await__(self):
+        return self.__aenter__().__await__()
+
+
+class InstrumentedPool:
+    """
+    Thin wrapper around asyncpg Pool that measures how long `acquire()` waits for a connection
+    and hands out InstrumentedConnection. Everything else is delegated to the wrapped pool,
+    so repositories keep using it like a Pool.
+    """
+
+    def __init__(self, pool: Pool, connect: Optional[Callable[[], Awaitable[Connection]]] = None):
+        self.__pool = pool
+        # opens the LISTEN connection, outside the pool (app.server counts it per worker)
+        self.__connect = connect
+        self.__listener: Optional[Connection] = None
+
+    @property
+    def raw(self) -> Pool:
+        return self.__pool
+
+    def acquire(self, *, timeout=None):
+        return _InstrumentedAcquireContext(self.__pool, timeout)
+
+    async def release(self, connection, *, timeout=None):
+        if isinstance(connection, InstrumentedConnection):
+            connection = connection.raw
+        await self.__pool.release(connection, timeout=timeout)
+
+    # settings broadcast: every worker process listens, so a switch on one worker reaches all of them
+    async def publish_settings(self):
+        async with self.acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, $2)", SETTINGS_CHANNEL, json.dumps(settings.to_dict()),
+                               query_name="monitoring.publish_settings")
+
+    async def listen_settings(self):
+        if self.__listener is not None:
+            return
+        if self.__connect is None:
+            _logger.warning("No LISTEN connection configured; settings changes stay on this worker")
+            return
+
+        def on_notify(connection, pid, channel, payload):
+            settings.update(**json.loads(payload))
+            _logger.info(f"Query instrumentation settings changed: {settings.to_dict()}")
+
+        # a dedicated connection: holding a pooled one would leave a pool of 1 with nothing for requests
+        self.__listener = await self.__connect()
+        await self.__listener.add_listener(SETTINGS_CHANNEL, on_notify)
+
+    async def close(self):
+        if self.__listener is not None:
+            await self.__listener.close()
+            self.__listener = None
+        await self.__pool.close()
+
+    def __getattr__(self, item):
+        return getattr(self.__pool, item)
@@ -0,0 +1,395 @@
+"""
+In-process replacement for the Postgres schema in database/init-scripts.
+
+`MemoryDatabase` holds the three tables as dicts and enforces what the schema enforces: the slot
+exclusion constraint, foreign keys (with ON DELETE CASCADE for slots), the amount CHECK and the
+per-slot confirmed capacity of the reservation triggers. The repositories in `*/memimpl.py` add the
+per-query rules (days left, user match) on top, the same way the SQL repositories do.
+
+Every method runs without awaiting, so on the event loop each call is atomic, like a statement.
+"""
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from asyncpg import Range
+
+from app.models.slot_model import SLOT_LIMIT
+from app.repositories.reservation.exceptions import NoSuchReservationException, SlotLimitExceededException
+from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
+from app.repositories.user.exceptions import NoSuchUserException, UserNameAlreadyExistsException
+
+
+def _meets(lower, lower_inc: bool, upper, upper_inc: bool) -> bool:
+    # can a range starting at `lower` share a point with a range ending at `upper`
+    if lower is None or upper is None:
+        return True
+    return lower < upper or (lower == upper and lower_inc and upper_inc)
+
+
+def overlaps(a: Range, b: Range) -> bool:
+    """Same as the `&&` operator on two ranges."""
+    if a.isempty or b.isempty:
+        return False
+    return _meets(a.lower, a.lower_inc, b.upper, b.upper_inc) and _meets(b.lower, b.lower_inc, a.upper, a.upper_inc)
+
+
+def filter_range(start_at: Optional[datetime], end_at: Optional[datetime]) -> Range:
+    """The range the SQL repositories filter slots with: [start, end), [start, ∞) or (-∞, end]."""
+    if end_at is None:
+        return Range(start_at, None)
+    if start_at is None:
+        return Range(None, end_at, lower_inc=False, upper_inc=True)
+    return Range(start_at, end_at)
+
+
+class SlotIndex:
+    """
+    Slot ids ordered by time range. Slots never overlap, so ordering by lower bound orders the
+    upper bounds as well, and every range lookup is two bisects plus the matching slots.
+    """
+
+    def __init__(self):
+        self.__lowers: List[datetime] = []
+        self.__uppers: List[datetime] = []
+        self.__ids: List[int] = []
+
+    def add(self, slot_id: int, time_range: Range):
+        i = bisect_right(self.__lowers, time_range.lower)
+        self.__lowers.insert(i, time_range.lower)
+        self.__uppers.insert(i, time_range.upper)
+        self.__ids.insert(i, slot_id)
+
+    def remove(self, slot_id: int, time_range: Range):
+        i = bisect_left(self.__lowers, time_range.lower)
+        while self.__ids[i] != slot_id:
+            i += 1
+        del self.__lowers[i], self.__uppers[i], self.__ids[i]
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[int]:
+        """Slots with UPPER(time_range) >= start and LOWER(time_range) <= end, in time order.
+        A superset of the slots overlapping [start, end]; callers filter with `overlaps`."""
+        first = 0 if start is None else bisect_left(self.__uppers, start)
+        last = len(self.__ids) if end is None else bisect_right(self.__lowers, end)
+        return self.__ids[first:last]
+
+    def nearest(self, target: datetime, not_before: Optional[datetime] = None):
+        """Slot ids by distance of their lower bound from `target`, skipping slots starting before
+        `not_before`. Walks outwards from the bisect point, like a `<->` ordered index scan."""
+        right = bisect_left(self.__lowers, target)
+        first = 0 if not_before is None else bisect_left(self.__lowers, not_before)
+        right = max(right, first)
+        left = right - 1
+        while left >= first or right < len(self.__ids):
+            if right >= len(self.__ids) or \
+                    (left >= first and target - self.__lowers[left] <= self.__lowers[right] - target):
+                yield self.__ids[left]
+                left -= 1
+            else:
+                yield self.__ids[right]
+                right += 1
+
+    def __len__(self):
+        return len(self.__ids)
+
+
+class MemoryDatabase:
+    def __init__(self, slot_limit: int = SLOT_LIMIT):
+        # capacity of slots inserted without one (the column default)
+        self.slot_limit = slot_limit
+
+        self.users: Dict[int, dict] = {}
+        self.user_ids_by_name: Dict[str, int] = {}
+
+        self.slots: Dict[int, dict] = {}
+        self.slot_index = SlotIndex()
+
+        self.reservations: Dict[int, dict] = {}
+        # dicts used as insertion ordered sets
+        self.reservation_ids_by_slot: Dict[int, Dict[int, None]] = defaultdict(dict)
+        self.reservation_ids_by_user: Dict[int, Dict[int, None]] = defaultdict(dict)
+        # per-slot SUM(amount) WHERE confirmed, kept in step with every write
+        self.confirmed_amount: Dict[int, int] = defaultdict(int)
+
+        self.reservation_requests: Dict[int, dict] = {}
+        # the partial index on status = 'queued'
+        self.queued_request_ids: Dict[int, None] = {}
+
+        self.waitlist_entries: Dict[int, dict] = {}
+        # the partial index on (slot_id, id) WHERE status = 'waiting'
+        self.waiting_ids_by_slot: Dict[int, Dict[int, None]] = defaultdict(dict)
+        self.waitlist_ids_by_user: Dict[int, Dict[int, None]] = defaultdict(dict)
+        # record_released_seats: confirmed seats released per slot since its waitlist was last promoted
+        self.waitlist_released: Dict[int, int] = {}
+
+        self.__sequences = defaultdict(lambda: itertools.count(1))
+
+    def __next_id(self, table: str) -> int:
+        return next(self.__sequences[table])
+
+    # users
+    def insert_user(self, username: str, password: str, admin: bool = False) -> dict:
+        if username in self.user_ids_by_name:
+            raise UserNameAlreadyExistsException(username)
+        user = {"id": self.__next_id("users"), "username": username, "password": password, "admin": admin,
+                "created_at": datetime.now(timezone.utc)}
+        self.users[user["id"]] = user
+        self.user_ids_by_name[username] = user["id"]
+        return user
+
+    def find_user(self, username: str) -> Optional[dict]:
+        user_id = self.user_ids_by_name.get(username)
+        return None if user_id is None else self.users[user_id]
+
+    def delete_user(self, username: str) -> Optional[dict]:
+        user = self.find_user(username)
+        if user is None:
+            return None
+        if self.reservation_ids_by_user.get(user["id"]):
+            raise ValueError(f"User {username} is still referenced by reservations")
+        for entry_id in list(self.waitlist_ids_by_user.pop(user["id"], {})):
+            self.delete_waitlist_entry(entry_id)
+        del self.users[user["id"]], self.user_ids_by_name[username]
+        return user
+
+    # slots
+    def __check_overlap(self, time_range: Range, slot_id: Optional[int] = None):
+        for other_id in self.slot_index.between(time_range.lower, time_range.upper):
+            if other_id != slot_id and overlaps(self.slots[other_id]["time_range"], time_range):
+                raise SlotTimeRangeOverlapped(time_range)
+
+    def insert_slot(self, time_range: Range, capacity: Optional[int] = None) -> dict:
+        if time_range.lower is None or time_range.upper is None:
+            raise ValueError("Slot time range must be bounded")
+        capacity = self.slot_limit if capacity is None else capacity
+        if capacity < 0:
+            raise ValueError("capacity must not be negative")
+        self.__check_overlap(time_range)
+        slot = {"id": self.__next_id("slots"), "time_range": time_range, "capacity": capacity}
+        self.slots[slot["id"]] = slot
+        self.slot_index.add(slot["id"], time_range)
+        return slot
+
+    def update_slot(self, slot_id: int, time_range: Range) -> Optional[dict]:
+        slot = self.slots.get(slot_id)
+        if slot is None:
+            return None
+        self.__check_overlap(time_range, slot_id)
+        self.slot_index.remove(slot_id, slot["time_range"])
+        slot["time_range"] = time_range
+        self.slot_index.add(slot_id, time_range)
+        return slot
+
+    def set_slot_capacity(self, slot_id: int, capacity: int) -> Optional[dict]:
+        """check_slot_capacity and record_released_capacity"""
+        slot = self.slots.get(slot_id)
+        if slot is None:
+            return None
+        if capacity < 0:
+            raise ValueError("capacity must not be negative")
+        if capacity < slot["capacity"] and self.confirmed_amount.get(slot_id, 0) > capacity:
+            raise SlotLimitExceededException()
+        self.__release(slot_id, capacity - slot["capacity"])
+        slot["capacity"] = capacity
+        return slot
+
+    def capacity(self, slot_id: int) -> int:
+        return self.slots[slot_id]["capacity"]
+
+    def delete_slot(self, slot_id: int) -> Optional[dict]:
+        slot = self.slots.pop(slot_id, None)
+        if slot is None:
+            return None
+        self.slot_index.remove(slot_id, slot["time_range"])
+        # ON DELETE CASCADE
+        for reservation_id in list(self.reservation_ids_by_slot.pop(slot_id, {})):
+            self.delete_reservation(reservation_id)
+        for entry_id in [i for i, entry in self.waitlist_entries.items() if entry["slot_id"] == slot_id]:
+            self.delete_waitlist_entry(entry_id)
+        self.confirmed_amount.pop(slot_id, None)
+        return slot
+
+    def slot_with_amount(self, slot_id: int) -> dict:
+        slot = self.slots[slot_id]
+        return {"id": slot_id, "time_range": slot["time_range"], "capacity": slot["capacity"],
+                "amount": self.confirmed_amount.get(slot_id, 0)}
+
+    # reservations
+    @staticmethod
+    def __check_amount(amount: int):
+        if amount < 0:
+            raise ValueError("amount must not be negative")
+
+    def insert_reservation(self, slot_id: int, user_id: int, amount: int) -> dict:
+        self.__check_amount(amount)
+        if slot_id not in self.slots:
+            raise NoSuchSlotException(slot_id)
+        if user_id not in self.users:
+            raise NoSuchUserException(f"id = {user_id}")
+        # check_slot_limit_on_insert counts the new amount even though it is not confirmed yet
+        if self.confirmed_amount[slot_id] + amount > self.capacity(slot_id):
+            raise SlotLimitExceededException()
+
+        now = datetime.now(timezone.utc)
+        reservation = {"id": self.__next_id("reservations"), "slot_id": slot_id, "user_id": user_id,
+                       "amount": amount, "confirmed": False, "created_at": now, "confirmed_at": None,
+                       "updated_at": now}
+        self.reservations[reservation["id"]] = reservation
+        self.reservation_ids_by_slot[slot_id][reservation["id"]] = None
+        self.reservation_ids_by_user[user_id][reservation["id"]] = None
+        return reservation
+
+    def update_reservation(self, reservation_id: int, slot_id: Optional[int] = None, amount: Optional[int] = None,
+                           confirmed: Optional[bool] = None) -> dict:
+        """
+        Applies the changes with the check_slot_limit_on_update rules: a confirmed reservation moved to
+        another slot is checked against the target slot even when its amount is unchanged.
+        """
+        old = self.reservations.get(reservation_id)
+        if old is None:
+            raise NoSuchReservationException(reservation_id)
+        new = dict(old)
+        if slot_id is not None:
+            new["slot_id"] = slot_id
+        if amount is not None:
+            self.__check_amount(amount)
+            new["amount"] = amount
+        if confirmed is not None:
+            new["confirmed"] = confirmed
+        if new["slot_id"] not in self.slots:
+            raise NoSuchSlotException(new["slot_id"])
+
+        if new["confirmed"] and (not old["confirmed"] or new["amount"] != old["amount"]
+                                 or new["slot_id"] != old["slot_id"]):
+            others = self.confirmed_amount[new["slot_id"]]
+            if old["confirmed"] and old["slot_id"] == new["slot_id"]:
+                others -= old["amount"]
+            if others + new["amount"] > self.capacity(new["slot_id"]):
+                raise SlotLimitExceededException()
+
+        now = datetime.now(timezone.utc)
+        if new["confirmed"] and not old["confirmed"]:
+            new["confirmed_at"] = now
+        elif old["confirmed"] and not new["confirmed"]:
+            new["confirmed_at"] = None
+        new["updated_at"] = now
+
+        if old["confirmed"]:
+            self.confirmed_amount[old["slot_id"]] -= old["amount"]
+            self.__release(old["slot_id"], old["amount"] - (new["amount"] if new["confirmed"]
+                                                            and new["slot_id"] == old["slot_id"] else 0))
+        if new["confirmed"]:
+            self.confirmed_amount[new["slot_id"]] += new["amount"]
+        if new["slot_id"] != old["slot_id"]:
+            del self.reservation_ids_by_slot[old["slot_id"]][reservation_id]
+            self.reservation_ids_by_slot[new["slot_id"]][reservation_id] = None
+        old.update(new)
+        return old
+
+    def delete_reservation(self, reservation_id: int) -> Optional[dict]:
+        reservation = self.reservations.pop(reservation_id, None)
+        if reservation is None:
+            return None
+        self.reservation_ids_by_slot.get(reservation["slot_id"], {}).pop(reservation_id, None)
+        self.reservation_ids_by_user[reservation["user_id"]].pop(reservation_id, None)
+        if reservation["confirmed"]:
+            self.confirmed_amount[reservation["slot_id"]] -= reservation["amount"]
+            self.__release(reservation["slot_id"], reservation["amount"])
+        return reservation
+
+    def __release(self, slot_id: int, seats: int):
+        if seats > 0 and self.waiting_ids_by_slot.get(slot_id):
+            self.waitlist_released[slot_id] = self.waitlist_released.get(slot_id, 0) + seats
+
+    # reservation_requests
+    def insert_reservation_request(self, slot_id: int, user_id: int, amount: int) -> dict:
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        if user_id not in self.users:
+            raise NoSuchUserException(f"id = {user_id}")
+        request = {"id": self.__next_id("reservation_requests"), "slot_id": slot_id, "user_id": user_id,
+                   "amount": amount, "status": "queued", "reservation_id": None, "error": None,
+                   "created_at": datetime.now(timezone.utc), "processed_at": None}
+        self.reservation_requests[request["id"]] = request
+        self.queued_request_ids[request["id"]] = None
+        return request
+
+    def complete_reservation_request(self, request_id: int, status: str, reservation_id: Optional[int] = None,
+                                     error: Optional[str] = None) -> dict:
+        request = self.reservation_requests[request_id]
+        request.update(status=status, reservation_id=reservation_id, error=error,
+                       processed_at=datetime.now(timezone.utc))
+        self.queued_request_ids.pop(request_id, None)
+        return request
+
+    # waitlist_entries
+    def insert_waitlist_entry(self, slot_id: int, user_id: int, amount: int) -> dict:
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        if slot_id not in self.slots:
+            raise NoSuchSlotException(slot_id)
+        if user_id not in self.users:
+            raise NoSuchUserException(f"id = {user_id}")
+        entry = {"id": self.__next_id("waitlist_entries"), "slot_id": slot_id, "user_id": user_id, "amount": amount,
+                 "status": "waiting", "reservation_id": None, "created_at": datetime.now(timezone.utc),
+                 "promoted_at": None}
+        self.waitlist_entries[entry["id"]] = entry
+        self.waiting_ids_by_slot[slot_id][entry["id"]] = None
+        self.waitlist_ids_by_user[user_id][entry["id"]] = None
+        return entry
+
+    def complete_waitlist_entry(self, entry_id: int, status: str, reservation_id: Optional[int] = None) -> dict:
+        entry = self.waitlist_entries[entry_id]
+        entry.update(status=status, reservation_id=reservation_id,
+                     promoted_at=datetime.now(timezone.utc) if reservation_id is not None else None)
+        self.waiting_ids_by_slot.get(entry["slot_id"], {}).pop(entry_id, None)
+        return entry
+
+    def delete_waitlist_entry(self, entry_id: int) -> Optional[dict]:
+        entry = self.waitlist_entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        self.waiting_ids_by_slot.get(entry["slot_id"], {}).pop(entry_id, None)
+        self.waitlist_ids_by_user.get(entry["user_id"], {}).pop(entry_id, None)
+        return entry
+
+    def reservation_with_slot(self, reservation_id: int) -> dict:
+        reservation = self.reservations[reservation_id]
+        return {**reservation, "time_range": self.slots[reservation["slot_id"]]["time_range"]}
+
+    # query instrumentation settings are only broadcast between Postgres backed workers
+    async def listen_settings(self):
+        pass
+
+    async def publish_settings(self):
+        pass
+
+
+# DB_BACKEND=memory: one database per worker process, lost on restart
+__db: Optional[MemoryDatabase] = None
+
+# same test accounts as database/init-scripts (password: "password")
+DEFAULT_PASSWORD_HASH = \
+    "$argon2id$v=19$m=65536,t=3,p=4$zmxfD0y7SqFVHtQEIuNDXg$vJmxTwkDpEpQ4SPj2L6GRwozxnB0O9sngkkr1akNFic"
+
+
+async def connect():
+    global __db
+    if __db is None:
+        __db = MemoryDatabase()
+        __db.insert_user("admin", DEFAULT_PASSWORD_HASH, admin=True)
+        __db.insert_user("user", DEFAULT_PASSWORD_HASH)
+
+
+async def disconnect():
+    global __db
+    __db = None
+
+
+def get_pool() -> MemoryDatabase:
+    global __db
+    if __db is None:
+        raise ConnectionError("DB Connection Failed.. Is connect() called?")
+    return __db
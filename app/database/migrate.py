@@ -0,0 +1,332 @@
+"""
+Versioned schema migrations for the Postgres backend.
+
+Every schema change is a file in database/migrations named `NNNN_description.sql` or
+`NNNN_description.py`, applied in version order and recorded in `schema_migrations`. A fresh
+database built by database/init-scripts already has the latest schema; its last script records a
+'baseline' row at the latest version, and versions up to the newest baseline count as applied.
+Runners on several hosts serialize on a session advisory lock, so starting every container with
+`python -m app.database.migrate up` is safe.
+
+SQL files run in one transaction unless their first line is `-- migrate: no-transaction`; then
+each statement runs on its own in autocommit, which is what CREATE INDEX CONCURRENTLY needs, and
+`BEGIN; ... COMMIT;` groups the statements that must change together. Such files should be
+idempotent (IF NOT EXISTS, DROP ... IF EXISTS), because a failure half way leaves the earlier
+statements applied and the version unrecorded.
+
+Python files define `async def up(conn, ctx)` and may set `TRANSACTIONAL = False`; then
+`ctx.create_index_concurrently` builds an index without lock_timeout and repairs an INVALID one left by
+an earlier attempt, and `ctx.backfill` updates large tables in small, throttled batches, each its own
+transaction.
+
+    python -m app.database.migrate status
+    python -m app.database.migrate up [--target 3]
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import List, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent.parent / "database" / "migrations"
+# pg_advisory_lock key shared by every runner
+LOCK_KEY = 0x455253_4D4947  # "ERS" "MIG"
+NO_TRANSACTION = "-- migrate: no-transaction"
+# checksum of the row database/init-scripts/08-stamp-schema-migrations.sql inserts
+BASELINE = "baseline"
+
+__logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+    @property
+    def transactional(self) -> bool:
+        if self.path.suffix == ".sql":
+            return not self.path.read_text(encoding="utf-8").startswith(NO_TRANSACTION)
+        return getattr(self.load_module(), "TRANSACTIONAL", True)
+
+    def load_module(self):
+        spec = importlib.util.spec_from_file_location(f"ers_migration_{self.version:04d}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = {}
+    for path in sorted(directory.glob("[0-9]*_*")):
+        match = re.fullmatch(r"(\d+)_(\w+)\.(sql|py)", path.name)
+        if match is None:
+            raise MigrationError(f"Unexpected file in migrations: {path.name}")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Duplicate migration version {version}: {migrations[version].path.name}, {path.name}")
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql: str) -> List[str]:
+    """Splits on `;` outside of quotes, dollar-quoted bodies and comments."""
+    statements = []
+    current = []
+    i = 0
+    quote: Optional[str] = None
+    while i < len(sql):
+        if quote is not None:
+            end = sql.find(quote, i)
+            end = len(sql) if end < 0 else end + len(quote)
+            current.append(sql[i:end])
+            i, quote = end, None
+            continue
+        ch = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end < 0 else end
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i)
+            i = len(sql) if end < 0 else end + 2
+            continue
+        if ch == "'":
+            quote = "'"
+        elif ch == "$":
+            tag = re.match(r"\$\w*\$", sql[i:])
+            if tag:
+                current.append(tag.group(0))
+                i += len(tag.group(0))
+                quote = tag.group(0)
+                continue
+        elif ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+class MigrationContext:
+    """Helpers for Python migrations that run with `TRANSACTIONAL = False`."""
+
+    def __init__(self, conn, batch_size: int = 5000, pause: float = 0.05, max_batch_seconds: float = 0.5):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_batch_seconds = max_batch_seconds
+        self.__logger = logging.getLogger(__name__)
+
+    def __require_autocommit(self):
+        if self.conn.is_in_transaction():
+            raise MigrationError("Set TRANSACTIONAL = False in migrations that use online helpers")
+
+    async def create_index_concurrently(self, name: str, definition: str):
+        """
+        `CREATE INDEX CONCURRENTLY name ON definition`, without blocking writes. A previous attempt
+        that failed half way leaves an INVALID index behind, which is dropped and built again.
+        """
+        self.__require_autocommit()
+        valid = await self.conn.fetchval("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)", name)
+        if valid:
+            return
+        # the build only takes a SHARE UPDATE EXCLUSIVE lock, so waiting for it blocks nobody; the runner's
+        # fail-fast lock_timeout is put back afterwards (RESET would fall back to the session default)
+        lock_timeout = await self.conn.fetchval("SHOW lock_timeout")
+        await self.conn.execute("SET lock_timeout = 0")
+        try:
+            if valid is not None:
+                await self.conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            await self.conn.execute(f"CREATE INDEX CONCURRENTLY {name} ON {definition}")
+        finally:
+            await self.conn.execute("SELECT set_config('lock_timeout', $1, FALSE)", lock_timeout)
+
+    async def backfill(self, table: str, assignments: str, where: str = "TRUE", key: str = "id") -> int:
+        """
+        `UPDATE table SET assignments WHERE where` in key order, `batch_size` rows per transaction.
+        Batches slower than `max_batch_seconds` halve the batch size, and the runner sleeps `pause`
+        between batches so replication and autovacuum keep up.
+        """
+        self.__require_autocommit()
+        last = None
+        batch_size = self.batch_size
+        total = 0
+        while True:
+            start = perf_counter()
+            rows = await self.conn.fetch(f"""
+                UPDATE {table} SET {assignments}
+                WHERE {key} IN (
+                    SELECT {key} FROM {table}
+                    WHERE ($1::BIGINT IS NULL OR {key} > $1) AND ({where})
+                    ORDER BY {key} LIMIT $2
+                )
+                RETURNING {key}
+            """, last, batch_size)
+            if not rows:
+                return total
+            total += len(rows)
+            last = max(row[key] for row in rows)
+            elapsed = perf_counter() - start
+            if elapsed > self.max_batch_seconds and batch_size > 100:
+                batch_size //= 2
+            self.__logger.info("backfill %s: %d rows (batch %d, %.0fms)", table, total, batch_size, elapsed * 1000)
+            await asyncio.sleep(self.pause)
+
+
+async def ensure_version_table(conn):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations
+        (
+            version     INTEGER PRIMARY KEY,
+            name        TEXT                     NOT NULL,
+            checksum    TEXT                     NOT NULL,
+            duration_ms INTEGER                  NOT NULL,
+            applied_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+async def applied_versions(conn) -> dict:
+    return {row["version"]: row for row in await conn.fetch("SELECT * FROM schema_migrations ORDER BY version")}
+
+
+def baseline_version(applied: dict) -> int:
+    """Latest version a database was created at by database/init-scripts, 0 if it was not."""
+    return max((version for version, row in applied.items() if row["checksum"] == BASELINE), default=0)
+
+
+async def apply(conn, migration: Migration, ctx: MigrationContext):
+    transactional = migration.transactional
+    start = perf_counter()
+    transaction = conn.transaction() if transactional else None
+    if transaction is not None:
+        await transaction.start()
+    try:
+        if migration.path.suffix == ".sql":
+            sql = migration.path.read_text(encoding="utf-8")
+            if transactional:
+                await conn.execute(sql)
+            else:
+                for statement in split_statements(sql):
+                    await conn.execute(statement)
+        else:
+            await migration.load_module().up(conn, ctx)
+        await conn.execute(
+            "INSERT INTO schema_migrations(version, name, checksum, duration_ms) VALUES($1, $2, $3, $4)",
+            migration.version, migration.name, migration.checksum, int((perf_counter() - start) * 1000))
+    except BaseException:
+        if transaction is not None:
+            await transaction.rollback()
+        elif conn.is_in_transaction():
+            # a BEGIN block of a no-transaction file
+            await conn.execute("ROLLBACK")
+        raise
+    if transaction is not None:
+        await transaction.commit()
+
+
+async def migrate(conn, target: Optional[int] = None, directory: Path = MIGRATIONS_DIR,
+                  ctx: Optional[MigrationContext] = None, lock_timeout: str = "5s",
+                  lock_poll: float = 1.0) -> List[Migration]:
+    """Applies the pending migrations up to `target` while holding the advisory lock; returns them."""
+    migrations = discover(directory)
+    ctx = ctx or MigrationContext(conn)
+    # polled rather than pg_advisory_lock: a runner blocked inside that statement keeps a snapshot
+    # open, and CREATE INDEX CONCURRENTLY in the runner holding the lock would wait for it forever
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", LOCK_KEY):
+        __logger.info("Waiting for another migration runner")
+        await asyncio.sleep(lock_poll)
+    try:
+        # DDL waiting on a long transaction would block every query queued behind it; fail fast instead
+        await conn.execute(f"SET lock_timeout = '{lock_timeout}'")
+        await ensure_version_table(conn)
+        applied = await applied_versions(conn)
+        baseline = baseline_version(applied)
+        for migration in migrations:
+            row = applied.get(migration.version)
+            if row is not None and row["checksum"] not in (migration.checksum, BASELINE):
+                __logger.warning("Migration %s was changed after it was applied", migration.path.name)
+        pending = [m for m in migrations if m.version not in applied and m.version > baseline and
+                   (target is None or m.version <= target)]
+        for migration in pending:
+            __logger.info("Applying %s", migration.path.name)
+            await apply(conn, migration, ctx)
+        return pending
+    finally:
+        await conn.execute("RESET lock_timeout")
+        await conn.execute("SELECT pg_advisory_unlock($1)", LOCK_KEY)
+
+
+async def status(conn, directory: Path = MIGRATIONS_DIR) -> List[dict]:
+    await ensure_version_table(conn)
+    applied = await applied_versions(conn)
+    baseline = baseline_version(applied)
+
+    def applied_at(m: Migration):
+        row = applied.get(m.version) or (applied[baseline] if m.version <= baseline else None)
+        return row["applied_at"].isoformat() if row is not None else None
+
+    return [{"version": m.version, "name": m.name, "transactional": m.transactional, "applied_at": applied_at(m),
+             "changed": m.version in applied and applied[m.version]["checksum"] not in (m.checksum, BASELINE)}
+            for m in discover(directory)]
+
+
+async def main(args) -> int:
+    # without APP_DB_SCHEMA the database default search_path (set by 01-init-appuser.sh) applies
+    schema = os.getenv("APP_DB_SCHEMA")
+    conn = await asyncpg.connect(os.getenv("DATABASE_URL"),
+                                 server_settings={"search_path": schema} if schema else None)
+    try:
+        if args.command == "status":
+            for row in await status(conn):
+                state = row["applied_at"] or "pending"
+                flags = (" (no-transaction)" if not row["transactional"] else "") + \
+                        (" CHANGED" if row["changed"] else "")
+                print(f"{row['version']:04d} {row['name']}: {state}{flags}")
+            return 0
+        ctx = MigrationContext(conn, batch_size=args.batch_size, pause=args.pause)
+        applied = await migrate(conn, target=args.target, ctx=ctx, lock_timeout=args.lock_timeout)
+        print(f"Applied {len(applied)} migration(s)" +
+              (": " + ", ".join(m.path.name for m in applied) if applied else ""))
+        return 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", choices=("up", "status"), nargs="?", default="up")
+    parser.add_argument("--target", type=int, default=None, help="apply up to and including this version")
+    parser.add_argument("--lock-timeout", default=os.getenv("MIGRATION_LOCK_TIMEOUT", "5s"))
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per backfill transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between backfill batches")
+    sys.exit(asyncio.run(main(parser.parse_args())))
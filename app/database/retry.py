@@ -0,0 +1,93 @@
+"""
+Retries of writes that Postgres aborted with a serialization failure (SQLSTATE 40001) or a deadlock
+(40P01). Either way the whole transaction was rolled back, so running the repository method again
+from the start is safe; any other error is raised unchanged.
+
+    @retry_transaction("reservation.modify_from_admin")
+    async def modify_from_admin(self, reservation_id, reservation): ...
+
+The decorated method must open its own connection and transaction. Retries sleep a random time up to
+an exponentially growing cap (full jitter), so transactions that deadlocked on each other do not
+collide again in lock step, and stop after `attempts` tries or once the next sleep would run past
+`budget` seconds or the request's query deadline.
+"""
+import asyncio
+import functools
+import logging
+import os
+import random
+from logging import Logger
+from time import perf_counter
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from asyncpg import PostgresError
+
+from app.database.instrumented import remaining_time
+from app.monitoring.metrics import DB_TRANSACTION_RETRIES, DB_TRANSACTION_RETRY_GIVEUPS
+
+_logger: Logger = logging.getLogger(__name__)
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+RETRYABLE_SQLSTATES = frozenset({SERIALIZATION_FAILURE, DEADLOCK_DETECTED})
+
+T = TypeVar("T")
+
+
+def retryable_sqlstate(error: BaseException) -> Optional[str]:
+    sqlstate = getattr(error, "sqlstate", None) if isinstance(error, PostgresError) else None
+    return sqlstate if sqlstate in RETRYABLE_SQLSTATES else None
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 4, base_delay: float = 0.01, max_delay: float = 0.2, budget: float = 1.0,
+                 rng: Callable[[], float] = random.random):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.rng = rng
+
+    def delay(self, retry: int) -> float:
+        """Sleep before the `retry`-th retry (1-based): uniform in [0, min(max_delay, base_delay * 2^(retry-1)))."""
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+
+    async def run(self, operation: str, call: Callable[[], Awaitable[T]]) -> T:
+        start = perf_counter()
+        retry = 0
+        while True:
+            try:
+                return await call()
+            except PostgresError as e:
+                sqlstate = retryable_sqlstate(e)
+                if sqlstate is None:
+                    raise
+                retry += 1
+                delay = self.delay(retry)
+                remaining = remaining_time()
+                if retry >= self.attempts or perf_counter() - start + delay > self.budget or \
+                        (remaining is not None and delay >= remaining):
+                    DB_TRANSACTION_RETRY_GIVEUPS.inc(operation, sqlstate)
+                    _logger.warning(f"{operation} failed with {sqlstate} after {retry} attempt(s), giving up")
+                    raise
+                DB_TRANSACTION_RETRIES.inc(operation, sqlstate)
+                await asyncio.sleep(delay)
+
+
+policy = RetryPolicy(
+    attempts=int(os.getenv("DB_RETRY_ATTEMPTS", 4)),
+    budget=float(os.getenv("DB_RETRY_BUDGET", 1.0)),
+)
+
+
+def retry_transaction(operation: str):
+    """Runs the decorated coroutine method under the module `policy`, labelling metrics with `operation`."""
+
+    def decorate(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await policy.run(operation, lambda: method(*args, **kwargs))
+
+        return wrapper
+
+    return decorate
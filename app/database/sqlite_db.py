@@ -0,0 +1,154 @@
+"""
+Embedded SQLite backend (DB_BACKEND=sqlite).
+
+SQLite allows one writer at a time, so the pool keeps a single writer connection behind an
+asyncio lock and a few reader connections; in WAL mode readers never block the writer or each
+other. Run one worker process per database file (WEB_CONCURRENCY=1).
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from logging import Logger
+from pathlib import Path
+from typing import List, Optional
+
+import aiosqlite
+from argon2 import PasswordHasher
+
+SCHEMA = Path(__file__).resolve().parent.parent.parent / "database" / "sqlite" / "schema.sql"
+
+_logger: Logger = logging.getLogger(__name__)
+
+
+def to_us(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return round(value.timestamp() * 1_000_000)
+
+
+def from_us(value: Optional[int]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000, tz=timezone.utc)
+
+
+def now_us() -> int:
+    return to_us(datetime.now(timezone.utc))
+
+
+class SqlitePool:
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self.readers = readers
+        self.__writer: Optional[aiosqlite.Connection] = None
+        self.__write_lock = asyncio.Lock()
+        self.__readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self.__all: List[aiosqlite.Connection] = []
+
+    async def __open(self) -> aiosqlite.Connection:
+        # isolation_level=None: transactions are started explicitly in write()
+        conn = await aiosqlite.connect(self.path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        await conn.execute("PRAGMA foreign_keys = ON")
+        await conn.execute("PRAGMA busy_timeout = 5000")
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        self.__all.append(conn)
+        return conn
+
+    async def __upgrade(self):
+        """Columns added after a database file may have been created; CREATE TABLE IF NOT EXISTS skips them."""
+        columns = {row["name"] for row in await self.__writer.execute_fetchall("PRAGMA table_info(slots)")}
+        if columns and "capacity" not in columns:
+            await self.__writer.execute(
+                "ALTER TABLE slots ADD COLUMN capacity INTEGER NOT NULL DEFAULT 50000 CHECK (capacity >= 0)")
+
+    async def open(self):
+        self.__writer = await self.__open()
+        await self.__writer.execute("PRAGMA journal_mode = WAL")
+        await self.__upgrade()
+        await self.__writer.executescript(SCHEMA.read_text(encoding="utf-8"))
+        for _ in range(self.readers):
+            self.__readers.put_nowait(await self.__open())
+
+    @asynccontextmanager
+    async def write(self):
+        """The writer connection inside BEGIN IMMEDIATE ... COMMIT; rolled back on any exception."""
+        async with self.__write_lock:
+            await self.__writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.__writer
+            except BaseException:
+                await self.__writer.rollback()
+                raise
+            await self.__writer.commit()
+
+    @asynccontextmanager
+    async def read(self):
+        conn = await self.__readers.get()
+        try:
+            yield conn
+        finally:
+            self.__readers.put_nowait(conn)
+
+    async def ensure_admin(self, username: str, password_hash: str):
+        """Creates the admin account if no user has that name yet; an existing account is left as is."""
+        async with self.write() as conn:
+            await conn.execute("INSERT OR IGNORE INTO users(username, password, admin, created_at) VALUES (?, ?, 1, ?)",
+                               (username, password_hash, now_us()))
+
+    async def journal_mode(self) -> str:
+        async with self.read() as conn:
+            async with conn.execute("PRAGMA journal_mode") as cursor:
+                return (await cursor.fetchone())[0]
+
+    # query instrumentation settings are only broadcast between Postgres backed workers
+    async def listen_settings(self):
+        pass
+
+    async def publish_settings(self):
+        pass
+
+    async def close(self):
+        for conn in self.__all:
+            await conn.close()
+        self.__all.clear()
+
+
+__pool: Optional[SqlitePool] = None
+
+
+async def connect():
+    global __pool
+    if __pool is None:
+        path = os.getenv("SQLITE_PATH", "ers.sqlite3")
+        _logger.info(f"Opening SQLite database {path}...")
+        pool = SqlitePool(path, readers=int(os.getenv("SQLITE_READERS", 4)))
+        try:
+            await pool.open()
+            username, password = os.getenv("SQLITE_ADMIN_USERNAME"), os.getenv("SQLITE_ADMIN_PASSWORD")
+            if username and password:
+                await pool.ensure_admin(username, PasswordHasher().hash(password))
+        except sqlite3.Error:
+            _logger.exception("Failed to open the SQLite database.")
+            await pool.close()
+            raise
+        __pool = pool
+
+
+async def disconnect():
+    global __pool
+    if __pool:
+        await __pool.close()
+        __pool = None
+    else:
+        _logger.warning("No active database connection to disconnect.")
+
+
+def get_pool() -> SqlitePool:
+    global __pool
+    if __pool is None:
+        raise ConnectionError("DB Connection Failed.. Is connect() called?")
+    return __pool
@@ -1,54 +1,94 @@
 from __future__ import annotations
 
+import os
 # To Prevent Circular Import Problem
-from typing import Annotated, TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
-from asyncpg import Pool
-from fastapi import Depends
-
-from app.database import ers_db
+from app.database import ers_db, instrumented, memory_db, sqlite_db
+from app.dependencies import container as app_container
+from app.services.auto_fill_worker import AutoFillWorker
+from app.services.expiry_worker import ExpiryWorker, pool_load
+from app.services.periodic_worker import PeriodicWorker
+from app.services.reservation_queue_worker import ReservationQueueWorker
+from app.services.waitlist_worker import WaitlistWorker
 
 if TYPE_CHECKING:
-    from app.repositories.reservation.dbimpl import ReservationRepository
-    from app.repositories.slot.dbimpl import SlotRepository
-    from app.repositories.user.dbimpl import UserRepository
-    from app.services.auth.auth_service_impl import AuthService
-    from app.services.user.user_service_impl import ExamManagementService
-    from app.services.admin.admin_service_impl import AdminExamManagementService
+    from app.repositories.reservation.interface import ReservationRepository
+    from app.repositories.slot.interface import SlotRepository
+    from app.repositories.user.interface import UserRepository
+    from app.services.auth.interface import AuthService
+    from app.services.user.interface import ExamManagementService
+    from app.services.admin.interface import AdminExamManagementService
+
+# database: postgres (default), sqlite (single node, see app/database/sqlite_db.py) or memory (no I/O, per worker)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres")
+database = {"sqlite": sqlite_db, "memory": memory_db}.get(DB_BACKEND, ers_db)
+
+# user reservation writes on postgres: procedure (one function call, default) or transaction (BEGIN, SELECT, write,
+# COMMIT; for databases without migration 0007)
+RESERVATION_WRITES = os.getenv("RESERVATION_WRITES", "procedure")
+
+# seconds the queries of one request may take in total, for endpoints that can scan a lot
+QUERY_DEADLINE = float(os.getenv("QUERY_DEADLINE", 5))
+ADMIN_QUERY_DEADLINE = float(os.getenv("ADMIN_QUERY_DEADLINE", 30))
+
+# application-lifetime objects, built once in lifespan
+container = app_container
+
+
+def build_container() -> app_container.Container:
+    if DB_BACKEND == "sqlite":
+        return container.Container.from_sqlite(database.get_pool())
+    if DB_BACKEND == "memory":
+        return container.Container.in_memory(database.get_pool())
+    return container.Container.from_pool(database.get_pool(), procedures=RESERVATION_WRITES != "transaction")
 
-# database
-database = ers_db
 
+def build_workers(built: app_container.Container) -> List[PeriodicWorker]:
+    # every worker process runs its own; SKIP LOCKED and the per-slot row locks keep them from colliding
+    return [
+        ExpiryWorker(built.reservation_repository, load=pool_load(database.get_pool()),
+                     calendar_cache=built.calendar_cache),
+        AutoFillWorker(built.admin_exam_management_service, built.reservation_repository),
+        ReservationQueueWorker(built.exam_management_service),
+        WaitlistWorker(built.exam_management_service),
+    ]
+
+
+# providers are `async def` so FastAPI calls them inline instead of dispatching them to the threadpool
 
 # repositories
-def user_repository(pool: Annotated[Pool, Depends(database.get_pool)]) -> UserRepository:
-    from app.repositories.user.dbimpl import UserRepositoryImpl
-    return UserRepositoryImpl(pool)
+async def user_repository() -> UserRepository:
+    return container.get_container().user_repository
 
 
-def slot_repository(pool: Annotated[Pool, Depends(database.get_pool)]) -> SlotRepository:
-    from app.repositories.slot.dbimpl import SlotRepositoryImpl
-    return SlotRepositoryImpl(pool)
+async def slot_repository() -> SlotRepository:
+    return container.get_container().slot_repository
 
 
-def reservation_repository(pool: Annotated[Pool, Depends(database.get_pool)]) -> ReservationRepository:
-    from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
-    return ReservationRepositoryTransactionImpl(pool)
+async def reservation_repository() -> ReservationRepository:
+    return container.get_container().reservation_repository
 
 
 # services
-def auth_service(user_repo=Depends(user_repository)) -> AuthService:
-    from app.services.auth.auth_service_impl import AuthServiceImpl
-    return AuthServiceImpl(user_repo)
+async def auth_service() -> AuthService:
+    return container.get_container().auth_service
+
+
+async def exam_management_service() -> ExamManagementService:
+    return container.get_container().exam_management_service
+
+
+async def admin_exam_management_service() -> AdminExamManagementService:
+    return container.get_container().admin_exam_management_service
 
 
-def exam_management_service(slot_repo=Depends(slot_repository),
-                            reservation_repo=Depends(reservation_repository)) -> ExamManagementService:
-    from app.services.user.user_service_impl import ExamManagementServiceImpl
-    return ExamManagementServiceImpl(slot_repo=slot_repo, reservation_repo=reservation_repo)
+# request scoped
+def query_deadline(seconds: float):
+    """Dependency bounding the Postgres queries of the request, see instrumented.query_deadline."""
 
+    async def dependency():
+        with instrumented.query_deadline(seconds):
+            yield
 
-def admin_exam_management_service(slot_repo=Depends(slot_repository),
-                                  reservation_repo=Depends(reservation_repository)) -> AdminExamManagementService:
-    from app.services.admin.admin_service_impl import AdminExamManagementServiceImpl
-    return AdminExamManagementServiceImpl(slot_repo=slot_repo, reservation_repo=reservation_repo)
+    return dependency
@@ -0,0 +1,126 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from argon2 import PasswordHasher
+from asyncpg import Pool
+
+from app.database.memory_db import MemoryDatabase
+from app.database.sqlite_db import SqlitePool
+from app.repositories.reservation.dbimpl_procedure import ReservationRepositoryProcedureImpl
+from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
+from app.repositories.reservation.interface import ReservationRepository
+from app.repositories.reservation.memimpl import ReservationRepositoryMemoryImpl
+from app.repositories.reservation.sqliteimpl import ReservationRepositorySqliteImpl
+from app.repositories.reservation_queue.dbimpl import ReservationQueueRepositoryImpl
+from app.repositories.reservation_queue.interface import ReservationQueueRepository
+from app.repositories.reservation_queue.memimpl import ReservationQueueRepositoryMemoryImpl
+from app.repositories.reservation_queue.sqliteimpl import ReservationQueueRepositorySqliteImpl
+from app.repositories.slot.dbimpl import SlotRepositoryImpl
+from app.repositories.slot.interface import SlotRepository
+from app.repositories.slot.memimpl import SlotRepositoryMemoryImpl
+from app.repositories.slot.sqliteimpl import SlotRepositorySqliteImpl
+from app.repositories.user.dbimpl import UserRepositoryImpl
+from app.repositories.user.interface import UserRepository
+from app.repositories.user.memimpl import UserRepositoryMemoryImpl
+from app.repositories.user.sqliteimpl import UserRepositorySqliteImpl
+from app.repositories.waitlist.dbimpl import WaitlistRepositoryImpl
+from app.repositories.waitlist.interface import WaitlistRepository
+from app.repositories.waitlist.memimpl import WaitlistRepositoryMemoryImpl
+from app.repositories.waitlist.sqliteimpl import WaitlistRepositorySqliteImpl
+from app.services.admin.admin_service_impl import AdminExamManagementServiceImpl
+from app.services.admin.interface import AdminExamManagementService
+from app.services.auth.auth_service_impl import AuthServiceImpl
+from app.services.auth.interface import AuthService
+from app.services.calendar_cache import CalendarCache
+from app.services.user.interface import ExamManagementService
+from app.services.user.user_service_impl import ExamManagementServiceImpl
+
+
+class Container:
+    """
+    Application-lifetime holder of the repositories and services.
+    Every object here is stateless (the pool is shared) apart from the calendar cache, so they are
+    built once in lifespan instead of on every request.
+    """
+
+    def __init__(self,
+                 user_repository: UserRepository,
+                 slot_repository: SlotRepository,
+                 reservation_repository: ReservationRepository,
+                 reservation_queue_repository: ReservationQueueRepository,
+                 waitlist_repository: WaitlistRepository,
+                 password_hasher: Optional[PasswordHasher] = None):
+        self.user_repository = user_repository
+        self.slot_repository = slot_repository
+        self.reservation_repository = reservation_repository
+        self.reservation_queue_repository = reservation_queue_repository
+        self.waitlist_repository = waitlist_repository
+        self.password_hasher = password_hasher or PasswordHasher()
+        # shared so that admin writes invalidate the calendars users read
+        self.calendar_cache = CalendarCache()
+
+        self.auth_service: AuthService = AuthServiceImpl(user_repository, self.password_hasher)
+        self.exam_management_service: ExamManagementService = ExamManagementServiceImpl(
+            slot_repo=slot_repository, reservation_repo=reservation_repository, calendar_cache=self.calendar_cache,
+            queue_repo=reservation_queue_repository, waitlist_repo=waitlist_repository)
+        self.admin_exam_management_service: AdminExamManagementService = AdminExamManagementServiceImpl(
+            slot_repo=slot_repository, reservation_repo=reservation_repository, calendar_cache=self.calendar_cache)
+
+    @classmethod
+    def from_pool(cls, pool: Pool, procedures: bool = True):
+        """`procedures`: user reservation writes call the functions of 07-create-reservation-functions.sql."""
+        return cls(
+            user_repository=UserRepositoryImpl(pool),
+            slot_repository=SlotRepositoryImpl(pool),
+            reservation_repository=ReservationRepositoryProcedureImpl(pool) if procedures
+            else ReservationRepositoryTransactionImpl(pool),
+            reservation_queue_repository=ReservationQueueRepositoryImpl(pool),
+            waitlist_repository=WaitlistRepositoryImpl(pool),
+        )
+
+    @classmethod
+    def from_sqlite(cls, pool: SqlitePool):
+        return cls(
+            user_repository=UserRepositorySqliteImpl(pool),
+            slot_repository=SlotRepositorySqliteImpl(pool),
+            reservation_repository=ReservationRepositorySqliteImpl(pool),
+            reservation_queue_repository=ReservationQueueRepositorySqliteImpl(pool),
+            waitlist_repository=WaitlistRepositorySqliteImpl(pool),
+        )
+
+    @classmethod
+    def in_memory(cls, db: Optional[MemoryDatabase] = None, password_hasher: Optional[PasswordHasher] = None):
+        """No I/O at all; for service tests and CPU benchmarks of the HTTP stack."""
+        db = db or MemoryDatabase()
+        return cls(
+            user_repository=UserRepositoryMemoryImpl(db),
+            slot_repository=SlotRepositoryMemoryImpl(db),
+            reservation_repository=ReservationRepositoryMemoryImpl(db),
+            reservation_queue_repository=ReservationQueueRepositoryMemoryImpl(db),
+            waitlist_repository=WaitlistRepositoryMemoryImpl(db),
+            password_hasher=password_hasher,
+        )
+
+
+__container: Optional[Container] = None
+__logger: Logger = logging.getLogger(__name__)
+
+
+def init(container: Container):
+    global __container
+    if __container is not None:
+        __logger.warning("Container is already initialized. Replacing it.")
+    __container = container
+
+
+def reset():
+    global __container
+    __container = None
+
+
+def get_container() -> Container:
+    global __container
+    if __container is None:
+        raise ConnectionError("Container is not initialized.. Is init() called in lifespan?")
+    return __container
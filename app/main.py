@@ -6,10 +6,16 @@ from fastapi import FastAPI, status
 from fastapi.responses import JSONResponse, RedirectResponse
 from pydantic import ValidationError
 
+from app.controllers.admin_monitoring import router as admin_monitoring_controller
 from app.controllers.admin_reservations import router as admin_controller
 from app.controllers.auth import router as auth_controller
+from app.controllers.metrics import router as metrics_controller
 from app.controllers.slot import router as slot_controller
 from app.controllers.user_reservations import router as reservation_controller
+from app.monitoring.metrics import SERVICE_EXCEPTIONS
+from app.database.instrumented import QueryDeadlineExceeded
+from app.monitoring.middleware import DisconnectMiddleware, MetricsMiddleware
+from app.monitoring.tracing import TracingMiddleware
 from app.services.exceptions import DBConflictException, DBUnknownException, NotFoundException, UserNotFoundException
 
 load_dotenv()
@@ -17,12 +23,21 @@ load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    from app.dependencies.config import database
+    from app.dependencies.config import build_container, build_workers, container, database
+    workers = []
     try:
         await database.connect()
+        await database.get_pool().listen_settings()
+        container.init(build_container())
+        workers = build_workers(container.get_container())
+        for worker in workers:
+            worker.start()
     except Exception as e:
         print(e)
     yield
+    for worker in workers:
+        await worker.stop()
+    container.reset()
     await database.disconnect()
 
 
@@ -34,8 +49,16 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# added last = outermost, so the sampled trace also covers the metrics middleware, which in turn sees
+# requests cancelled on disconnect as 499
+app.add_middleware(DisconnectMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 app.include_router(admin_controller)
+app.include_router(admin_monitoring_controller)
 app.include_router(auth_controller)
+app.include_router(metrics_controller)
 app.include_router(slot_controller)
 app.include_router(reservation_controller)
 
@@ -58,6 +81,7 @@ async def exception_handler(request, exc):
 
 @app.exception_handler(DBUnknownException)
 async def db_unknown_exception_handler(request, exc):
+    SERVICE_EXCEPTIONS.inc("db_unknown")
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Database error: " + str(exc)}
@@ -66,6 +90,7 @@ async def db_unknown_exception_handler(request, exc):
 
 @app.exception_handler(DBConflictException)
 async def db_conflict_exception_handler(request, exc):
+    SERVICE_EXCEPTIONS.inc("conflict")
     return JSONResponse(
         status_code=status.HTTP_409_CONFLICT,
         content={"detail": str(exc)}
@@ -74,6 +99,7 @@ async def db_conflict_exception_handler(request, exc):
 
 @app.exception_handler(NotFoundException)
 async def db_unknown_exception_handler(request, exc):
+    SERVICE_EXCEPTIONS.inc("not_found")
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={"detail": str(exc)}
@@ -82,12 +108,22 @@ async def db_unknown_exception_handler(request, exc):
 
 @app.exception_handler(UserNotFoundException)
 async def user_not_found_exception_handler(request, exc):
+    SERVICE_EXCEPTIONS.inc("user_not_found")
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={"detail": str(exc)}
     )
 
 
+@app.exception_handler(QueryDeadlineExceeded)
+async def query_deadline_exceeded_handler(request, exc):
+    SERVICE_EXCEPTIONS.inc("deadline")
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": str(exc)}
+    )
+
+
 @app.exception_handler(ValueError)
 async def value_error_exception_handler(request, exc):
     return JSONResponse(
@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class QueryInstrumentationSettingsModel(BaseModel):
+    enabled: bool
+    slow_query_threshold_ms: float
+
+
+class QueryInstrumentationSettingsForm(BaseModel):
+    enabled: Optional[bool] = None
+    slow_query_threshold_ms: Optional[float] = Field(default=None, ge=0)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -23,3 +23,52 @@ class Reservation(BaseModel):
 class ReservationDto(BaseModel):
     slot_id: int
     amount: int
+
+
+class SlotFillResult(BaseModel):
+    slot_id: int
+    confirmed_ids: List[int]
+    confirmed_amount: int
+
+    @classmethod
+    def from_rows(cls, slot_id: int, rows: List[dict]):
+        return cls(slot_id=slot_id, confirmed_ids=[row["id"] for row in rows],
+                   confirmed_amount=sum(row["amount"] for row in rows))
+
+
+# reservation_requests.status
+TICKET_QUEUED = "queued"
+TICKET_ACCEPTED = "accepted"
+TICKET_REJECTED = "rejected"
+
+
+class ReservationTicket(BaseModel):
+    """A reservation request queued with `Prefer: respond-async`; `reservation_id` is set once accepted."""
+    id: int
+    slot_id: int
+    amount: int
+    status: str
+    reservation_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+
+# waitlist_entries.status
+WAITLIST_WAITING = "waiting"
+WAITLIST_PROMOTED = "promoted"
+WAITLIST_EXPIRED = "expired"
+
+
+class WaitlistEntry(BaseModel):
+    """
+    A reservation that hit the slot limit. It becomes an unconfirmed reservation (`reservation_id`) when
+    confirmed seats of the slot are released, or expires when the slot gets too close.
+    """
+    id: int
+    slot_id: int
+    amount: int
+    status: str
+    reservation_id: Optional[int] = None
+    created_at: datetime
+    promoted_at: Optional[datetime] = None
@@ -3,6 +3,9 @@ from typing import Optional
 from pydantic import BaseModel, field_serializer, field_validator
 from asyncpg.types import Range
 
+# default capacity of a slot: the confirmed amount it can hold, enforced by the reservation triggers
+SLOT_LIMIT = 50000
+
 
 class _Slot(BaseModel):
     model_config = {"arbitrary_types_allowed": True}
@@ -27,11 +30,13 @@ class _Slot(BaseModel):
 
 class Slot(_Slot):
     id: Optional[int] = None
+    capacity: int = SLOT_LIMIT
 
     @classmethod
-    def create_with_time_range(cls, start_time: datetime, end_time: datetime, id: Optional[int] = None):
+    def create_with_time_range(cls, start_time: datetime, end_time: datetime, id: Optional[int] = None,
+                               capacity: int = SLOT_LIMIT):
         time_range = Range(lower=start_time, upper=end_time, lower_inc=True, upper_inc=False)
-        return cls(id=id, time_range=time_range)
+        return cls(id=id, time_range=time_range, capacity=capacity)
 
 
 class SlotWithAmount(Slot):
@@ -49,6 +54,8 @@ class SlotForResponse(BaseModel):
     id: int
     time_range: TimeRangeSchema
     amount: int
+    capacity: int
+    remaining: int
 
     @classmethod
     def from_slot_with_amount(cls, slot_with_amount: SlotWithAmount):
@@ -60,5 +67,20 @@ class SlotForResponse(BaseModel):
                 start_inclusive=slot_with_amount.time_range.lower_inc,
                 end_inclusive=slot_with_amount.time_range.upper_inc,
             ),
-            amount=slot_with_amount.amount
+            amount=slot_with_amount.amount,
+            capacity=slot_with_amount.capacity,
+            remaining=slot_with_amount.capacity - slot_with_amount.amount,
         )
+
+
+class CalendarDay(BaseModel):
+    day: datetime.date
+    slots: int
+    capacity: int
+    confirmed: int
+    pending: int
+
+    @classmethod
+    def from_daily_totals(cls, row):
+        return cls(day=row["day"], slots=row["slots"], capacity=row["capacity"],
+                   confirmed=row["confirmed"], pending=row["pending"])
@@ -0,0 +1,224 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text exposition format (0.0.4).
+
+Metrics are kept per worker process. Labels are passed positionally in the order of `labelnames`
+so the hot path is a dict lookup on a tuple, without building label dicts per observation.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._values.items()]
+
+    def clear(self):
+        self._values.clear()
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        self._values[labelvalues] = value
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) - amount
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label tuple: [bucket counts (non-cumulative, last one is +Inf)..., sum]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues):
+        state = self._values.get(labelvalues)
+        if state is None:
+            state = self._values[labelvalues] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, *labelvalues) -> int:
+        state = self._values.get(labelvalues)
+        return int(sum(state[:-1])) if state else 0
+
+    def counts(self) -> Dict[Tuple, int]:
+        return {key: int(sum(state[:-1])) for key, state in self._values.items()}
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def clear(self):
+        self._values.clear()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes gauges right before rendering, e.g. pool size."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# http
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "ers_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "ers_http_requests_total", "HTTP responses by route template and status code", ("method", "route", "status")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "ers_http_requests_in_flight", "HTTP requests currently being served"))
+HTTP_DISCONNECTS = REGISTRY.register(Counter(
+    "ers_http_client_disconnects_total", "Requests cancelled because the client went away before the response",
+    ("method", "route")))
+
+# database pool
+DB_POOL_ACQUIRE_WAIT = REGISTRY.register(Histogram(
+    "ers_db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)))
+DB_POOL_SIZE = REGISTRY.register(Gauge(
+    "ers_db_pool_size", "Open connections in the pool"))
+DB_POOL_IDLE = REGISTRY.register(Gauge(
+    "ers_db_pool_idle", "Idle connections in the pool"))
+DB_POOL_MAX_SIZE = REGISTRY.register(Gauge(
+    "ers_db_pool_max_size", "Configured maximum pool size"))
+
+# queries, tagged with a stable name by the repositories
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "ers_db_query_duration_seconds", "Query latency by query name", ("query",)))
+DB_QUERY_ROWS = REGISTRY.register(Counter(
+    "ers_db_query_rows_total", "Rows returned or affected by query name", ("query",)))
+DB_SLOW_QUERIES = REGISTRY.register(Counter(
+    "ers_db_slow_queries_total", "Queries slower than the slow query threshold", ("query",)))
+DB_TRANSACTIONS = REGISTRY.register(Counter(
+    "ers_db_transactions_total", "Explicit transactions started, each two extra round trips (BEGIN and COMMIT)"))
+
+# serialization failures and deadlocks retried by app.database.retry
+DB_TRANSACTION_RETRIES = REGISTRY.register(Counter(
+    "ers_db_transaction_retries_total", "Transactions run again after a serialization failure or deadlock",
+    ("operation", "sqlstate")))
+DB_TRANSACTION_RETRY_GIVEUPS = REGISTRY.register(Counter(
+    "ers_db_transaction_retry_giveups_total", "Serialization failures and deadlocks raised after the retry budget",
+    ("operation", "sqlstate")))
+
+# service exceptions mapped to responses in app.main
+SERVICE_EXCEPTIONS = REGISTRY.register(Counter(
+    "ers_service_exceptions_total", "Service exceptions mapped to error responses", ("kind",)))
+
+# calendar buckets cached by app.services.calendar_cache
+CALENDAR_CACHE = REGISTRY.register(Counter(
+    "ers_calendar_cache_total", "Calendar bucket lookups by result", ("result",)))
+
+# background workers in app.services, started from lifespan
+WORKER_RUNS = REGISTRY.register(Counter(
+    "ers_worker_runs_total", "Background worker runs by worker and result", ("worker", "result")))
+
+# pending reservation expiry, app.services.expiry_worker
+EXPIRED_RESERVATIONS = REGISTRY.register(Counter(
+    "ers_expired_reservations_total", "Unconfirmed reservations deleted by the expiry worker"))
+EXPIRY_BATCH_DURATION = REGISTRY.register(Histogram(
+    "ers_expiry_batch_duration_seconds", "Duration of one expiry worker batch"))
+EXPIRY_BATCH_SIZE = REGISTRY.register(Gauge(
+    "ers_expiry_batch_size", "Rows the expiry worker asks for per batch, lowered while the database is slow"))
+EXPIRY_THROTTLED = REGISTRY.register(Counter(
+    "ers_expiry_throttled_total", "Expiry worker slowdowns by reason", ("reason",)))
+EXPIRY_LAST_RUN = REGISTRY.register(Gauge(
+    "ers_expiry_last_run_timestamp_seconds", "Unix time the expiry worker last finished a run"))
+
+# FIFO slot fill, app.services.admin and app.services.auto_fill_worker
+FILLED_RESERVATIONS = REGISTRY.register(Counter(
+    "ers_filled_reservations_total", "Reservations confirmed by a FIFO slot fill", ("trigger",)))
+
+# reservations queued with Prefer: respond-async, app.services.reservation_queue_worker
+QUEUED_RESERVATIONS = REGISTRY.register(Counter(
+    "ers_queued_reservations_total", "Queued reservation tickets by outcome", ("status",)))
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "ers_reservation_queue_wait_seconds", "Time from enqueue to processing of a reservation ticket",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)))
+WAITLIST_ENTRIES = REGISTRY.register(Counter(
+    "ers_waitlist_entries_total", "Waitlist entries added and promoted to reservations", ("event",)))
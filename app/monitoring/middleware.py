@@ -0,0 +1,106 @@
+import asyncio
+from time import perf_counter
+
+from app.monitoring.metrics import HTTP_DISCONNECTS, HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_REQUEST_DURATION
+
+# nginx's "client closed request": the app returned without a response because the client went away
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _route_path(scope) -> str:
+    # the router stores the matched route into the shared scope
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status codes and in-flight requests.
+    Routes are labelled by their template (e.g. `/slots/{id}`) so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException:
+            status_code = status_code or 500
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            path = _route_path(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(elapsed, method, path)
+            HTTP_REQUESTS.inc(method, path, CLIENT_CLOSED_REQUEST if status_code is None else status_code)
+
+
+class DisconnectMiddleware:
+    """
+    Pure ASGI middleware cancelling reads whose client disconnects before the response starts. The
+    cancellation reaches the awaited asyncpg query, which sends a cancel request to the server, so an
+    abandoned scan gives its pooled connection back right away instead of when it would have finished.
+
+    Only `methods` (GET and HEAD by default) are cancelled: a write may span several transactions and a
+    cache invalidation, and is left to finish. The request's receive channel is read by a listener task
+    and handed to the app through a queue, so the app still sees every message.
+    """
+
+    def __init__(self, app, methods=("GET", "HEAD")):
+        self.app = app
+        self.methods = frozenset(methods)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        messages: "asyncio.Queue[dict]" = asyncio.Queue()
+        response_started = False
+        disconnected = False
+
+        async def send_tracking(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+
+        async def listen():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not response_started:
+                        disconnected = True
+                        app_task.cancel()
+                    return
+
+        listener = asyncio.create_task(listen())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            # cancelled from outside (server shutdown) rather than by the listener
+            if not disconnected:
+                raise
+            HTTP_DISCONNECTS.inc(scope["method"], _route_path(scope))
+        finally:
+            listener.cancel()
@@ -0,0 +1,252 @@
+"""
+Sampled, in-process request tracing.
+
+A sampled request gets a trace stored in a ContextVar; `span()` records a phase only when a trace is
+active, otherwise it returns a shared no-op context manager, so unsampled requests pay one ContextVar
+lookup per span.
+
+Traces are written as Chrome Trace Event "complete" events (ph="X"), one event per line. The file
+starts with "[" and every line ends with ",", which chrome://tracing and Perfetto load as a JSON
+array (the closing bracket is optional in that format). Strip the trailing comma to read a line
+as plain JSON.
+"""
+import asyncio
+import atexit
+import functools
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from logging import Logger
+from time import perf_counter
+from typing import List, Optional
+
+from fastapi.routing import APIRoute
+from starlette import responses
+
+_logger: Logger = logging.getLogger(__name__)
+
+# perf_counter() is monotonic but has no epoch; convert once so events carry wall-clock microseconds
+_EPOCH_OFFSET = time.time() - perf_counter()
+_trace_ids = itertools.count(1)
+
+
+class Trace:
+    def __init__(self):
+        self.id = next(_trace_ids)
+        self.pid = os.getpid()
+        self.events: List[dict] = []
+        self.route_start: Optional[float] = None
+
+    def record(self, name: str, start: float, end: float, **args):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round((start + _EPOCH_OFFSET) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": self.pid,
+            "tid": self.id,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("ers_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace: Trace, name: str, args: dict):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.record(self.name, self.start, perf_counter(), **self.args)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **args):
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, args)
+
+
+class TraceExporter:
+    """
+    Appends finished traces to a local file. `{pid}` in the path is replaced per worker process.
+
+    `export()` only queues the trace; a daemon thread serializes and writes it, so a sampled request
+    never waits on disk I/O inside the event loop. When the writer falls `max_pending` traces behind,
+    new traces are dropped instead of growing the queue.
+    """
+
+    def __init__(self, path: str, max_pending: int = 10000):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.__queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_pending)
+        self.__lock = threading.Lock()
+        self.__thread: Optional[threading.Thread] = None
+        self.__file = None
+
+    def export(self, trace: Trace):
+        if self.__thread is None:
+            with self.__lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.__run, name="trace-exporter", daemon=True)
+                    self.__thread.start()
+                    atexit.register(self.close)
+        try:
+            self.__queue.put_nowait(trace)
+        except queue.Full:
+            _logger.debug("Trace exporter is behind, dropping a trace")
+
+    def __run(self):
+        while True:
+            traces = [self.__queue.get()]
+            # drain what queued up meanwhile, so a burst costs one flush
+            while traces[-1] is not None:
+                try:
+                    traces.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.__write([trace for trace in traces if trace is not None])
+            except OSError:
+                _logger.exception("Failed to export trace")
+            if traces[-1] is None:
+                return
+
+    def __write(self, traces: List[Trace]):
+        if not traces:
+            return
+        if self.__file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.__file = open(self.path, "a", encoding="utf-8")
+            if self.__file.tell() == 0:
+                self.__file.write("[\n")
+        self.__file.write("".join(json.dumps(event, default=str) + ",\n" for trace in traces for event in trace.events))
+        self.__file.flush()
+
+    def close(self):
+        """Writes what is still queued, then stops the writer thread and closes the file."""
+        with self.__lock:
+            thread, self.__thread = self.__thread, None
+            if thread is not None:
+                atexit.unregister(self.close)
+                self.__queue.put(None)
+                thread.join()
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that decides sampling per request and exports sampled traces.
+    TRACE_SAMPLE_RATE (0.0 ~ 1.0, default 0) and TRACE_FILE configure it.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None, exporter: Optional[TraceExporter] = None):
+        self.app = app
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", 0)) if sample_rate is None else sample_rate
+        self.exporter = exporter or TraceExporter(os.getenv("TRACE_FILE", "traces/ers-trace-{pid}.jsonl"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current.set(trace)
+        start = perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else scope["path"]
+            trace.record(f"{scope['method']} {path}", start, perf_counter(), status=status_code, path=scope["path"])
+            self.exporter.export(trace)
+
+
+class JSONResponse(responses.JSONResponse):
+    """starlette's JSONResponse, recording its serialization as a `json.encode` span of a sampled request."""
+
+    def render(self, content) -> bytes:
+        with span("json.encode"):
+            return super().render(content)
+
+
+class TracedRoute(APIRoute):
+    """
+    Route class that splits a sampled request into `fastapi.dependencies` (from route matching until
+    the endpoint starts: dependency resolution, auth, body parsing) and `endpoint`.
+    """
+
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "__traced__", False):
+            @functools.wraps(endpoint)
+            async def traced_endpoint(**values):
+                trace = _current.get()
+                if trace is None:
+                    return await endpoint(**values)
+                if trace.route_start is not None:
+                    trace.record("fastapi.dependencies", trace.route_start, perf_counter())
+                with _Span(trace, "endpoint", {}):
+                    return await endpoint(**values)
+
+            traced_endpoint.__traced__ = True
+            self.dependant.call = traced_endpoint
+
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current.get()
+            if trace is not None:
+                trace.route_start = perf_counter()
+            return await handler(request)
+
+        return traced_handler
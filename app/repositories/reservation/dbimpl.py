@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 from asyncpg import Connection, Pool, PostgresError
 
+from app.database.retry import retry_transaction
 from app.models.reservation_model import Reservation, ReservationDto
 from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
     ReservationAlreadyConfirmedException, \
@@ -41,22 +42,24 @@ class ReservationRepositoryImpl(ReservationRepository):
             params.append(user_id)
             conditions.append(f"r.user_id = ${len(params)}")
 
+        # every shape is `&&` against a (half-unbounded) range, so the GiST index of the exclusion
+        # constraint on slots.time_range can serve it
         if start_at is not None and end_at is not None:
             params.extend([start_at, end_at])
             conditions.append(f"s.time_range && TSTZRANGE(${len(params) - 1}, ${len(params)})")
         elif start_at is not None:
             params.append(start_at)
-            conditions.append(f"UPPER(s.time_range) >= ${len(params)}")
+            conditions.append(f"s.time_range && TSTZRANGE(${len(params)}, NULL, '[)')")
         elif end_at is not None:
             params.append(end_at)
-            conditions.append(f"LOWER(s.time_range) <= ${len(params)}")
+            conditions.append(f"s.time_range && TSTZRANGE(NULL, ${len(params)}, '(]')")
 
         base_query = self.__joined_query()
         if conditions:
             base_query += "\nWHERE " + " AND ".join(conditions)
 
         async with self.__pool.acquire() as conn:  # type: Connection
-            rows = await conn.fetch(base_query, *params)
+            rows = await conn.fetch(base_query, *params, query_name="reservation.find")
             return rows
 
     async def find_by_id(self, reservation_id: int, user_id: Optional[int] = None):
@@ -70,7 +73,7 @@ class ReservationRepositoryImpl(ReservationRepository):
             params.append(user_id)
 
         async with self.__pool.acquire() as conn:  # type: Connection
-            row = await conn.fetchrow(base_query, *params)
+            row = await conn.fetchrow(base_query, *params, query_name="reservation.find_by_id")
             if row is None:
                 raise NoSuchReservationException(reservation_id)
             return row
@@ -79,20 +82,23 @@ class ReservationRepositoryImpl(ReservationRepository):
         base_query = self.__joined_query()
         base_query += "\nWHERE slot_id = $1 AND confirmed = $2"
         async with self.__pool.acquire() as conn:
-            return await conn.fetch(base_query, slot_id, confirmed)
+            return await conn.fetch(base_query, slot_id, confirmed, query_name="reservation.find_by_slot")
 
+    @retry_transaction("reservation.insert")
     async def insert(self, reservation: Reservation):
         async with self.__pool.acquire() as conn:  # type: Connection
             try:
                 ret = await conn.fetchrow(
                     "INSERT INTO reservations(slot_id, user_id, amount) VALUES($1, $2, $3) RETURNING id",
-                    reservation.slot_id, reservation.user_id, reservation.amount)
+                    reservation.slot_id, reservation.user_id, reservation.amount,
+                    query_name="reservation.insert")
                 return ret
             except PostgresError as e:
                 if "SlotLimitExceeded" in str(e):
                     raise SlotLimitExceededException() from None
                 raise
 
+    @retry_transaction("reservation.insert_if_days_left")
     async def insert_if_days_left(self, reservation: Reservation, days_left: int = 3):
         async with self.__pool.acquire() as conn:  # type: Connection
             try:
@@ -123,7 +129,8 @@ LEFT JOIN inserted i ON TRUE
 """
                 ret = await conn.fetchrow(
                     query,
-                    reservation.slot_id, reservation.user_id, reservation.amount)
+                    reservation.slot_id, reservation.user_id, reservation.amount,
+                    query_name="reservation.insert_if_days_left")
 
                 if ret is None:
                     raise NoSuchSlotException(reservation.slot_id)
@@ -136,6 +143,7 @@ LEFT JOIN inserted i ON TRUE
                     raise SlotLimitExceededException() from None
                 raise
 
+    @retry_transaction("reservation.modify_unconfirmed")
     async def modify_unconfirmed_if_days_left_and_user_match(self, reservation_id: int, reservation: ReservationDto,
                                                              user_id: int,
                                                              days: int):
@@ -182,7 +190,8 @@ LEFT JOIN slot_check s ON s.id = $4
             try:
                 ret = await conn.fetchrow(
                     query,
-                    reservation_id, user_id, reservation.amount, reservation.slot_id, days)
+                    reservation_id, user_id, reservation.amount, reservation.slot_id, days,
+                    query_name="reservation.modify_unconfirmed")
                 if ret is None:
                     raise NoSuchReservationException(reservation_id)
                 elif ret["status"] == "already_confirmed":
@@ -202,6 +211,7 @@ LEFT JOIN slot_check s ON s.id = $4
                     raise SlotLimitExceededException() from None
                 raise
 
+    @retry_transaction("reservation.delete_unconfirmed")
     async def delete_unconfirmed(self, reservation_id: int, user_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
             ret = await conn.fetchrow(
@@ -223,7 +233,8 @@ LEFT JOIN slot_check s ON s.id = $4
                     FROM target t
                     LEFT JOIN deleted d ON t.id = d.id
                 """,
-                reservation_id, user_id)
+                reservation_id, user_id,
+                query_name="reservation.delete_unconfirmed")
             if ret is None:
                 raise NoSuchReservationException(reservation_id)
             elif ret["status"] == "already_confirmed":
@@ -232,11 +243,13 @@ LEFT JOIN slot_check s ON s.id = $4
                 raise UserMismatchException(user_id)
 
     # Only for admin
+    @retry_transaction("reservation.confirm_by_id")
     async def confirm_by_id(self, reservation_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
             try:
+                # fires check_slot_limit_after_update, which locks the slot and sums confirmed amounts
                 ret = await conn.fetchrow("UPDATE reservations SET confirmed = $1 WHERE id = $2 RETURNING id", True,
-                                          reservation_id)
+                                          reservation_id, query_name="reservation.trigger_confirm")
                 if ret is None:
                     raise NoSuchReservationException(reservation_id)
                 return ret
@@ -245,23 +258,109 @@ LEFT JOIN slot_check s ON s.id = $4
                     raise SlotLimitExceededException() from None
                 raise
 
+    @retry_transaction("reservation.modify_from_admin")
     async def modify_from_admin(self, reservation_id: int, reservation: ReservationDto):
         async with self.__pool.acquire() as conn:  # type: Connection
-            try:
-                ret = await conn.fetchrow(
-                    "UPDATE reservations SET (amount, slot_id) = ($1, $2) WHERE id = $3 RETURNING id",
-                    reservation.amount, reservation.slot_id, reservation_id)
+            async with conn.transaction():
+                # the reservation row first, then the source and target slot rows in id order: the order
+                # confirm_by_id, confirm_pending_fifo, the stored functions and the slot limit triggers take
+                # them in, so two writes never hold them the other way round
+                current = await conn.fetchval("SELECT slot_id FROM reservations WHERE id = $1 FOR UPDATE",
+                                              reservation_id, query_name="reservation.modify_from_admin.current")
+                if current is None:
+                    raise NoSuchReservationException(reservation_id)
+                await conn.fetch("SELECT id FROM slots WHERE id = ANY($1::INTEGER[]) ORDER BY id FOR NO KEY UPDATE",
+                                 [current, reservation.slot_id], query_name="reservation.modify_from_admin.lock_slots")
+                try:
+                    ret = await conn.fetchrow(
+                        "UPDATE reservations SET (amount, slot_id) = ($1, $2) WHERE id = $3 RETURNING id",
+                        reservation.amount, reservation.slot_id, reservation_id,
+                        query_name="reservation.modify_from_admin")
+                except PostgresError as e:
+                    if "SlotLimitExceeded" in str(e):
+                        raise SlotLimitExceededException() from None
+                    raise
                 if ret is None:
                     raise NoSuchReservationException(reservation_id)
                 return ret
-            except PostgresError as e:
-                if "SlotLimitExceeded" in str(e):
-                    raise SlotLimitExceededException() from None
-                raise
 
+    @retry_transaction("reservation.delete_from_admin")
     async def delete_from_admin(self, reservation_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
-            ret = await conn.fetchrow("DELETE FROM reservations WHERE id = $1 RETURNING id", reservation_id)
+            ret = await conn.fetchrow("DELETE FROM reservations WHERE id = $1 RETURNING id", reservation_id,
+                                      query_name="reservation.delete_from_admin")
             if ret is None:
                 raise NoSuchReservationException(reservation_id)
             return ret
+
+    async def expire_unconfirmed(self, days_left: int, limit: int) -> int:
+        async with self.__pool.acquire() as conn:  # type: Connection
+            # SKIP LOCKED: rows a user or admin is changing right now are left for the next batch,
+            # so the worker never waits on request traffic and several workers can run at once
+            rows = await conn.fetch("""
+                WITH stale AS (
+                    SELECT r.id
+                    FROM reservations r
+                    JOIN slots s ON s.id = r.slot_id
+                    WHERE r.confirmed = FALSE
+                      AND LOWER(s.time_range) < NOW() + make_interval(days => $1)
+                    LIMIT $2
+                    FOR UPDATE OF r SKIP LOCKED
+                )
+                DELETE FROM reservations r
+                USING stale
+                WHERE r.id = stale.id
+                RETURNING r.id
+            """, days_left, limit, query_name="reservation.expire_unconfirmed")
+            return len(rows)
+
+    @retry_transaction("reservation.fill")
+    async def confirm_pending_fifo(self, slot_id: int) -> List[dict]:
+        async with self.__pool.acquire() as conn:  # type: Connection
+            async with conn.transaction():
+                # the slot's reservation rows first, then the slot row the triggers take, the same order as
+                # every other write; the slot lock keeps the capacity read here current until commit, and
+                # check_slot_limit_after_update checks the slot once more after the whole statement
+                await conn.fetchval("SELECT COUNT(*) FROM (SELECT 1 FROM reservations WHERE slot_id = $1 "
+                                    "ORDER BY id FOR UPDATE) locked", slot_id, query_name="reservation.fill.lock")
+                slot = await conn.fetchrow("SELECT capacity FROM slots WHERE id = $1 FOR NO KEY UPDATE",
+                                           slot_id, query_name="reservation.fill.slot")
+                if slot is None:
+                    raise NoSuchSlotException(slot_id)
+                # the running sum confirms the longest prefix of the queue that fits
+                rows = await conn.fetch("""
+                    WITH locked AS (
+                        SELECT id, amount, confirmed, created_at
+                        FROM reservations
+                        WHERE slot_id = $1
+                        ORDER BY id
+                        FOR UPDATE
+                    ), queue AS (
+                        SELECT id, SUM(amount) OVER (ORDER BY created_at, id) AS running
+                        FROM locked
+                        WHERE NOT confirmed
+                    )
+                    UPDATE reservations r
+                    SET confirmed = TRUE
+                    FROM queue
+                    WHERE r.id = queue.id
+                      AND queue.running <= $2 - (SELECT COALESCE(SUM(amount), 0) FROM locked WHERE confirmed)
+                    RETURNING r.id, r.amount, r.created_at
+                """, slot_id, slot["capacity"], query_name="reservation.fill")
+                return [{"id": row["id"], "amount": row["amount"]}
+                        for row in sorted(rows, key=lambda row: (row["created_at"], row["id"]))]
+
+    async def find_fillable_slot_ids(self, limit: int) -> List[int]:
+        async with self.__pool.acquire() as conn:  # type: Connection
+            rows = await conn.fetch("""
+                SELECT r.slot_id
+                FROM reservations r
+                JOIN slots s ON s.id = r.slot_id
+                WHERE LOWER(s.time_range) > NOW()
+                GROUP BY r.slot_id
+                HAVING COALESCE(SUM(r.amount) FILTER (WHERE r.confirmed), 0)
+                           + MIN(r.amount) FILTER (WHERE NOT r.confirmed) <= MIN(s.capacity)
+                ORDER BY MIN(r.created_at) FILTER (WHERE NOT r.confirmed)
+                LIMIT $1
+            """, limit, query_name="reservation.find_fillable_slots")
+            return [row["slot_id"] for row in rows]
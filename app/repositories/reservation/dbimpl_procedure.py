@@ -0,0 +1,76 @@
+from asyncpg import Connection, PostgresError
+
+from app.database.retry import retry_transaction
+from app.models.reservation_model import Reservation, ReservationDto
+from app.repositories.reservation.dbimpl import ReservationRepositoryImpl
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, \
+    SlotLimitExceededException, UserMismatchException
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+
+class ReservationRepositoryProcedureImpl(ReservationRepositoryImpl):
+    """
+    The user writes of ReservationRepositoryTransactionImpl, each as one call to a function in
+    database/init-scripts/07-create-reservation-functions.sql: one round trip instead of BEGIN, SELECT,
+    write and COMMIT. The function returns a reservation_write_status, raised here as the same exception
+    the transactional implementation raises.
+    """
+
+    def __init__(self, pool):
+        super().__init__(pool)
+        self.__pool = pool
+
+    @staticmethod
+    def __check(row, reservation_id=None, slot_id=None, user_id=None, days_left=None):
+        status = row["status"]
+        if status == "ok":
+            return row
+        if status == "no_reservation":
+            raise NoSuchReservationException(reservation_id)
+        if status == "no_slot":
+            raise NoSuchSlotException(slot_id)
+        if status == "user_mismatch":
+            raise UserMismatchException(user_id)
+        if status == "already_confirmed":
+            raise ReservationAlreadyConfirmedException(reservation_id)
+        if status == "days_not_left":
+            raise DaysNotLeftEnoughException(days_left)
+        raise ValueError(f"Unknown reservation_write_status {status}")
+
+    async def __call(self, query: str, *args, query_name: str):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            try:
+                return await conn.fetchrow(query, *args, query_name=query_name)
+            except PostgresError as e:
+                if "SlotLimitExceeded" in str(e):
+                    raise SlotLimitExceededException() from None
+                raise
+
+    # Override
+    @retry_transaction("reservation.insert_if_days_left")
+    async def insert_if_days_left(self, reservation: Reservation, days_left: int = 3):
+        row = await self.__call(
+            "SELECT status, reservation_id AS id FROM reservation_insert_if_days_left($1, $2, $3, $4)",
+            reservation.slot_id, reservation.user_id, reservation.amount, days_left,
+            query_name="reservation.insert_if_days_left")
+        return self.__check(row, slot_id=reservation.slot_id, days_left=days_left)
+
+    # Override
+    @retry_transaction("reservation.modify_unconfirmed")
+    async def modify_unconfirmed_if_days_left_and_user_match(self, reservation_id: int, reservation: ReservationDto,
+                                                             user_id: int,
+                                                             days_left: int = 3):
+        row = await self.__call(
+            "SELECT status, reservation_id AS id FROM reservation_modify_unconfirmed($1, $2, $3, $4, $5)",
+            reservation_id, user_id, reservation.slot_id, reservation.amount, days_left,
+            query_name="reservation.modify_unconfirmed")
+        return self.__check(row, reservation_id=reservation_id, slot_id=reservation.slot_id, user_id=user_id,
+                            days_left=days_left)
+
+    # Override
+    @retry_transaction("reservation.delete_unconfirmed")
+    async def delete_unconfirmed(self, reservation_id: int, user_id: int):
+        row = await self.__call("SELECT status, reservation_id AS id FROM reservation_delete_unconfirmed($1, $2)",
+                                reservation_id, user_id, query_name="reservation.delete_unconfirmed")
+        return self.__check(row, reservation_id=reservation_id, user_id=user_id)
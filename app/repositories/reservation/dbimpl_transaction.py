@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 
 from asyncpg import Connection, PostgresError
 
+from app.database.retry import retry_transaction
 from app.models.reservation_model import Reservation, ReservationDto
 from app.repositories.reservation.dbimpl import ReservationRepositoryImpl
 from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
@@ -16,10 +17,12 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
         self.__pool = pool
 
     # Override
+    @retry_transaction("reservation.insert_if_days_left")
     async def insert_if_days_left(self, reservation: Reservation, days_left: int = 3):
         async with self.__pool.acquire() as conn:  # type: Connection
             async with conn.transaction():
-                slot_row = await conn.fetchrow("SELECT * FROM slots WHERE id = $1", reservation.slot_id)
+                slot_row = await conn.fetchrow("SELECT * FROM slots WHERE id = $1", reservation.slot_id,
+                                                query_name="reservation.insert_if_days_left.slot")
                 if slot_row is None:
                     raise NoSuchSlotException(reservation.slot_id) from None
 
@@ -29,20 +32,22 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
                 try:
                     return await conn.fetchrow(
                         "INSERT INTO reservations(slot_id, user_id, amount) VALUES($1, $2, $3) RETURNING id",
-                        reservation.slot_id, reservation.user_id, reservation.amount)
+                        reservation.slot_id, reservation.user_id, reservation.amount,
+                        query_name="reservation.insert_if_days_left")
                 except PostgresError as e:
                     if "SlotLimitExceeded" in str(e):
                         raise SlotLimitExceededException() from None
                     raise
 
     # Override
+    @retry_transaction("reservation.modify_unconfirmed")
     async def modify_unconfirmed_if_days_left_and_user_match(self, reservation_id: int, reservation: ReservationDto,
                                                              user_id: int,
                                                              days_left: int = 3):
         async with self.__pool.acquire() as conn:  # type: Connection
             async with conn.transaction():
                 res_row = await conn.fetchrow("SELECT id, user_id, confirmed FROM reservations WHERE id = $1",
-                                              reservation_id)
+                                              reservation_id, query_name="reservation.modify_unconfirmed.reservation")
                 if res_row is None:
                     raise NoSuchReservationException(reservation_id)
                 if res_row["user_id"] != user_id:
@@ -50,7 +55,8 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
                 if res_row["confirmed"]:
                     raise ReservationAlreadyConfirmedException(reservation_id)
 
-                slot_row = await conn.fetchrow("SELECT * FROM slots WHERE id = $1", reservation.slot_id)
+                slot_row = await conn.fetchrow("SELECT * FROM slots WHERE id = $1", reservation.slot_id,
+                                                query_name="reservation.modify_unconfirmed.slot")
 
                 if slot_row is None:
                     raise NoSuchSlotException(reservation.slot_id)
@@ -61,7 +67,8 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
                 try:
                     ret = await conn.fetchrow(
                         "UPDATE reservations SET (amount, slot_id) = ($1, $2) WHERE id = $3 RETURNING id",
-                        reservation.amount, reservation.slot_id, reservation_id)
+                        reservation.amount, reservation.slot_id, reservation_id,
+                        query_name="reservation.modify_unconfirmed")
                     return ret
                 except PostgresError as e:
                     if "SlotLimitExceeded" in str(e):
@@ -69,11 +76,12 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
                     raise
 
     # Override
+    @retry_transaction("reservation.delete_unconfirmed")
     async def delete_unconfirmed(self, reservation_id: int, user_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
             async with conn.transaction():
                 ret = await conn.fetchrow("SELECT id, user_id, confirmed FROM reservations WHERE id = $1",
-                                          reservation_id)
+                                          reservation_id, query_name="reservation.delete_unconfirmed.reservation")
                 if ret is None:
                     raise NoSuchReservationException(reservation_id)
                 if ret["user_id"] != user_id:
@@ -81,4 +89,5 @@ class ReservationRepositoryTransactionImpl(ReservationRepositoryImpl):
                 if ret["confirmed"]:
                     raise ReservationAlreadyConfirmedException(reservation_id)
 
-                return await conn.fetchrow("DELETE FROM reservations WHERE id = $1 RETURNING id", reservation_id)
+                return await conn.fetchrow("DELETE FROM reservations WHERE id = $1 RETURNING id", reservation_id,
+                                           query_name="reservation.delete_unconfirmed")
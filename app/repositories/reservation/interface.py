@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from app.models.reservation_model import Reservation, ReservationDto
 
@@ -37,3 +37,20 @@ class ReservationRepository(ABC):
 
     @abstractmethod
     async def delete_unconfirmed(self, reservation_id: int, user_id: int): pass
+
+    @abstractmethod
+    async def expire_unconfirmed(self, days_left: int, limit: int) -> int:
+        """Deletes up to `limit` unconfirmed reservations of slots starting within `days_left` days
+        (or already started); returns how many were deleted."""
+        pass
+
+    @abstractmethod
+    async def confirm_pending_fifo(self, slot_id: int) -> List[dict]:
+        """Confirms the slot's unconfirmed reservations oldest first, stopping at the first one that would
+        exceed the slot limit; returns the confirmed `id` and `amount` in that order."""
+        pass
+
+    @abstractmethod
+    async def find_fillable_slot_ids(self, limit: int) -> List[int]:
+        """Slots that have not started and can take at least their smallest unconfirmed reservation."""
+        pass
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import List, Optional
+
+from app.database.memory_db import MemoryDatabase, filter_range, overlaps
+from app.models.reservation_model import Reservation, ReservationDto
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, UserMismatchException
+from app.repositories.reservation.interface import ReservationRepository
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+
+class ReservationRepositoryMemoryImpl(ReservationRepository):
+    def __init__(self, db: MemoryDatabase):
+        self.__db = db
+
+    def __joined(self, reservation_ids):
+        return [self.__db.reservation_with_slot(reservation_id) for reservation_id in reservation_ids]
+
+    def __check_days_left(self, slot_id: int, days_left: int):
+        slot = self.__db.slots.get(slot_id)
+        if slot is None:
+            raise NoSuchSlotException(slot_id)
+        if slot["time_range"].lower < datetime.now(timezone.utc) + timedelta(days=days_left):
+            raise DaysNotLeftEnoughException(days_left)
+
+    def __owned_unconfirmed(self, reservation_id: int, user_id: int) -> dict:
+        reservation = self.__db.reservations.get(reservation_id)
+        if reservation is None:
+            raise NoSuchReservationException(reservation_id)
+        if reservation["user_id"] != user_id:
+            raise UserMismatchException(user_id)
+        if reservation["confirmed"]:
+            raise ReservationAlreadyConfirmedException(reservation_id)
+        return reservation
+
+    async def find(self, user_id: Optional[int] = None, start_at: Optional[datetime] = None,
+                   end_at: Optional[datetime] = None):
+        if start_at is None and end_at is None:
+            if user_id is None:
+                return self.__joined(list(self.__db.reservations))
+            return self.__joined(list(self.__db.reservation_ids_by_user.get(user_id, ())))
+
+        query_range = filter_range(start_at, end_at)
+        slot_ids = [i for i in self.__db.slot_index.between(start_at, end_at)
+                    if overlaps(self.__db.slots[i]["time_range"], query_range)]
+
+        reservation_ids = []
+        for slot_id in slot_ids:
+            for reservation_id in self.__db.reservation_ids_by_slot.get(slot_id, ()):
+                if user_id is None or self.__db.reservations[reservation_id]["user_id"] == user_id:
+                    reservation_ids.append(reservation_id)
+        return self.__joined(reservation_ids)
+
+    async def find_by_id(self, reservation_id: int, user_id: Optional[int] = None):
+        reservation = self.__db.reservations.get(reservation_id)
+        if reservation is None or (user_id is not None and reservation["user_id"] != user_id):
+            raise NoSuchReservationException(reservation_id)
+        return self.__db.reservation_with_slot(reservation_id)
+
+    async def find_reservation_by_slot(self, slot_id: int, confirmed: bool):
+        return self.__joined([reservation_id for reservation_id in self.__db.reservation_ids_by_slot.get(slot_id, ())
+                              if self.__db.reservations[reservation_id]["confirmed"] == confirmed])
+
+    async def insert(self, reservation: Reservation):
+        ret = self.__db.insert_reservation(reservation.slot_id, reservation.user_id, reservation.amount)
+        return {"id": ret["id"]}
+
+    async def insert_if_days_left(self, reservation: Reservation, days_left: int = 3):
+        self.__check_days_left(reservation.slot_id, days_left)
+        ret = self.__db.insert_reservation(reservation.slot_id, reservation.user_id, reservation.amount)
+        return {"id": ret["id"]}
+
+    async def modify_unconfirmed_if_days_left_and_user_match(self, reservation_id: int, reservation: ReservationDto,
+                                                             user_id: int, days_left: int = 3):
+        self.__owned_unconfirmed(reservation_id, user_id)
+        self.__check_days_left(reservation.slot_id, days_left)
+        ret = self.__db.update_reservation(reservation_id, slot_id=reservation.slot_id, amount=reservation.amount)
+        return {"id": ret["id"]}
+
+    async def delete_unconfirmed(self, reservation_id: int, user_id: int):
+        self.__owned_unconfirmed(reservation_id, user_id)
+        return {"id": self.__db.delete_reservation(reservation_id)["id"]}
+
+    # Only for admin
+    async def confirm_by_id(self, reservation_id: int):
+        return {"id": self.__db.update_reservation(reservation_id, confirmed=True)["id"]}
+
+    async def modify_from_admin(self, reservation_id: int, reservation: ReservationDto):
+        ret = self.__db.update_reservation(reservation_id, slot_id=reservation.slot_id, amount=reservation.amount)
+        return {"id": ret["id"]}
+
+    async def delete_from_admin(self, reservation_id: int):
+        ret = self.__db.delete_reservation(reservation_id)
+        if ret is None:
+            raise NoSuchReservationException(reservation_id)
+        return {"id": ret["id"]}
+
+    async def expire_unconfirmed(self, days_left: int, limit: int) -> int:
+        horizon = datetime.now(timezone.utc) + timedelta(days=days_left)
+        stale = (reservation_id
+                 for slot_id in self.__db.slot_index.between(None, horizon)
+                 if self.__db.slots[slot_id]["time_range"].lower < horizon
+                 for reservation_id in self.__db.reservation_ids_by_slot.get(slot_id, ())
+                 if not self.__db.reservations[reservation_id]["confirmed"])
+        reservation_ids = list(islice(stale, limit))
+        for reservation_id in reservation_ids:
+            self.__db.delete_reservation(reservation_id)
+        return len(reservation_ids)
+
+    def __pending_fifo(self, slot_id: int) -> List[dict]:
+        pending = [self.__db.reservations[reservation_id]
+                   for reservation_id in self.__db.reservation_ids_by_slot.get(slot_id, ())]
+        return sorted((r for r in pending if not r["confirmed"]), key=lambda r: (r["created_at"], r["id"]))
+
+    async def confirm_pending_fifo(self, slot_id: int) -> List[dict]:
+        if slot_id not in self.__db.slots:
+            raise NoSuchSlotException(slot_id)
+        remaining = self.__db.capacity(slot_id) - self.__db.confirmed_amount[slot_id]
+        confirmed = []
+        for reservation in self.__pending_fifo(slot_id):
+            if reservation["amount"] > remaining:
+                break
+            remaining -= reservation["amount"]
+            self.__db.update_reservation(reservation["id"], confirmed=True)
+            confirmed.append({"id": reservation["id"], "amount": reservation["amount"]})
+        return confirmed
+
+    async def find_fillable_slot_ids(self, limit: int) -> List[int]:
+        now = datetime.now(timezone.utc)
+        heads = []
+        for slot_id in self.__db.slot_index.between(now, None):
+            if self.__db.slots[slot_id]["time_range"].lower <= now:
+                continue
+            pending = self.__pending_fifo(slot_id)
+            if pending and self.__db.confirmed_amount[slot_id] + min(r["amount"] for r in pending) \
+                    <= self.__db.capacity(slot_id):
+                heads.append((pending[0]["created_at"], slot_id))
+        return [slot_id for _, slot_id in sorted(heads)[:limit]]
@@ -0,0 +1,211 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from asyncpg import Range
+
+from app.database.sqlite_db import SqlitePool, from_us, now_us, to_us
+from app.models.reservation_model import Reservation, ReservationDto
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, SlotLimitExceededException, UserMismatchException
+from app.repositories.reservation.interface import ReservationRepository
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+JOINED_QUERY = """
+    SELECT r.id, r.slot_id, r.user_id, r.amount, r.confirmed, r.created_at, r.confirmed_at, r.updated_at,
+           s.start_at, s.end_at
+    FROM reservations r
+    JOIN slots s ON r.slot_id = s.id
+"""
+
+
+def reservation_row(row) -> dict:
+    return {
+        "id": row["id"],
+        "slot_id": row["slot_id"],
+        "user_id": row["user_id"],
+        "amount": row["amount"],
+        "confirmed": bool(row["confirmed"]),
+        "created_at": from_us(row["created_at"]),
+        "confirmed_at": from_us(row["confirmed_at"]),
+        "updated_at": from_us(row["updated_at"]),
+        "time_range": Range(from_us(row["start_at"]), from_us(row["end_at"])),
+    }
+
+
+def _raise_translated(e: sqlite3.IntegrityError):
+    if "SlotLimitExceeded" in str(e):
+        raise SlotLimitExceededException() from None
+    raise e
+
+
+class ReservationRepositorySqliteImpl(ReservationRepository):
+    def __init__(self, pool: SqlitePool):
+        self.__pool = pool
+
+    async def __fetch(self, query: str, params=()):
+        async with self.__pool.read() as conn:
+            return [reservation_row(row) for row in await conn.execute_fetchall(query, params)]
+
+    @staticmethod
+    async def __check_slot(conn, slot_id: int, days_left: Optional[int] = None):
+        rows = await conn.execute_fetchall("SELECT start_at FROM slots WHERE id = ?", (slot_id,))
+        if not rows:
+            raise NoSuchSlotException(slot_id)
+        if days_left is not None and \
+                from_us(rows[0]["start_at"]) < datetime.now(timezone.utc) + timedelta(days=days_left):
+            raise DaysNotLeftEnoughException(days_left)
+
+    @staticmethod
+    async def __check_owned_unconfirmed(conn, reservation_id: int, user_id: int):
+        rows = await conn.execute_fetchall("SELECT user_id, confirmed FROM reservations WHERE id = ?",
+                                           (reservation_id,))
+        if not rows:
+            raise NoSuchReservationException(reservation_id)
+        if rows[0]["user_id"] != user_id:
+            raise UserMismatchException(user_id)
+        if rows[0]["confirmed"]:
+            raise ReservationAlreadyConfirmedException(reservation_id)
+
+    async def find(self, user_id: Optional[int] = None, start_at: Optional[datetime] = None,
+                   end_at: Optional[datetime] = None):
+        conditions = []
+        params = []
+        if user_id is not None:
+            params.append(user_id)
+            conditions.append("r.user_id = ?")
+        if start_at is not None:
+            params.append(to_us(start_at))
+            conditions.append("s.end_at > ?")
+        if end_at is not None:
+            params.append(to_us(end_at))
+            conditions.append("s.start_at < ?" if start_at is not None else "s.start_at <= ?")
+        query = JOINED_QUERY
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return await self.__fetch(query, params)
+
+    async def find_by_id(self, reservation_id: int, user_id: Optional[int] = None):
+        query = JOINED_QUERY + " WHERE r.id = ?"
+        params = [reservation_id]
+        if user_id is not None:
+            query += " AND r.user_id = ?"
+            params.append(user_id)
+        rows = await self.__fetch(query, params)
+        if not rows:
+            raise NoSuchReservationException(reservation_id)
+        return rows[0]
+
+    async def find_reservation_by_slot(self, slot_id: int, confirmed: bool):
+        return await self.__fetch(JOINED_QUERY + " WHERE r.slot_id = ? AND r.confirmed = ?", (slot_id, confirmed))
+
+    async def __insert(self, conn, reservation: Reservation) -> dict:
+        now = now_us()
+        try:
+            rows = await conn.execute_fetchall(
+                "INSERT INTO reservations(slot_id, user_id, amount, created_at, updated_at) "
+                "VALUES(?, ?, ?, ?, ?) RETURNING id",
+                (reservation.slot_id, reservation.user_id, reservation.amount, now, now))
+        except sqlite3.IntegrityError as e:
+            _raise_translated(e)
+        return {"id": rows[0]["id"]}
+
+    async def insert(self, reservation: Reservation):
+        async with self.__pool.write() as conn:
+            await self.__check_slot(conn, reservation.slot_id)
+            return await self.__insert(conn, reservation)
+
+    async def insert_if_days_left(self, reservation: Reservation, days_left: int = 3):
+        async with self.__pool.write() as conn:
+            await self.__check_slot(conn, reservation.slot_id, days_left)
+            return await self.__insert(conn, reservation)
+
+    async def __update(self, conn, reservation_id: int, reservation: ReservationDto) -> dict:
+        try:
+            rows = await conn.execute_fetchall(
+                "UPDATE reservations SET amount = ?, slot_id = ?, updated_at = ? WHERE id = ? RETURNING id",
+                (reservation.amount, reservation.slot_id, now_us(), reservation_id))
+        except sqlite3.IntegrityError as e:
+            _raise_translated(e)
+        if not rows:
+            raise NoSuchReservationException(reservation_id)
+        return {"id": rows[0]["id"]}
+
+    async def modify_unconfirmed_if_days_left_and_user_match(self, reservation_id: int, reservation: ReservationDto,
+                                                             user_id: int, days_left: int = 3):
+        async with self.__pool.write() as conn:
+            await self.__check_owned_unconfirmed(conn, reservation_id, user_id)
+            await self.__check_slot(conn, reservation.slot_id, days_left)
+            return await self.__update(conn, reservation_id, reservation)
+
+    async def delete_unconfirmed(self, reservation_id: int, user_id: int):
+        async with self.__pool.write() as conn:
+            await self.__check_owned_unconfirmed(conn, reservation_id, user_id)
+            await conn.execute("DELETE FROM reservations WHERE id = ?", (reservation_id,))
+            return {"id": reservation_id}
+
+    # Only for admin
+    async def confirm_by_id(self, reservation_id: int):
+        now = now_us()
+        async with self.__pool.write() as conn:
+            try:
+                rows = await conn.execute_fetchall(
+                    "UPDATE reservations SET confirmed = 1, updated_at = ?, "
+                    "confirmed_at = CASE WHEN confirmed THEN confirmed_at ELSE ? END "
+                    "WHERE id = ? RETURNING id",
+                    (now, now, reservation_id))
+            except sqlite3.IntegrityError as e:
+                _raise_translated(e)
+        if not rows:
+            raise NoSuchReservationException(reservation_id)
+        return {"id": rows[0]["id"]}
+
+    async def modify_from_admin(self, reservation_id: int, reservation: ReservationDto):
+        async with self.__pool.write() as conn:
+            await self.__check_slot(conn, reservation.slot_id)
+            return await self.__update(conn, reservation_id, reservation)
+
+    async def delete_from_admin(self, reservation_id: int):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall("DELETE FROM reservations WHERE id = ? RETURNING id",
+                                               (reservation_id,))
+        if not rows:
+            raise NoSuchReservationException(reservation_id)
+        return {"id": rows[0]["id"]}
+
+    async def expire_unconfirmed(self, days_left: int, limit: int) -> int:
+        horizon = to_us(datetime.now(timezone.utc) + timedelta(days=days_left))
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall(
+                "DELETE FROM reservations WHERE id IN ("
+                "SELECT r.id FROM slots s JOIN reservations r ON r.slot_id = s.id "
+                "WHERE s.start_at < ? AND r.confirmed = 0 LIMIT ?) RETURNING id",
+                (horizon, limit))
+        return len(rows)
+
+    async def confirm_pending_fifo(self, slot_id: int) -> List[dict]:
+        now = now_us()
+        async with self.__pool.write() as conn:
+            await self.__check_slot(conn, slot_id)
+            # the per-row triggers only compare against the slot's confirmed_amount counter, so they stay cheap
+            rows = await conn.execute_fetchall(
+                "UPDATE reservations SET confirmed = 1, confirmed_at = ?, updated_at = ? "
+                "WHERE id IN ("
+                "SELECT id FROM ("
+                "SELECT id, SUM(amount) OVER (ORDER BY created_at, id) AS running "
+                "FROM reservations WHERE slot_id = ? AND confirmed = 0) "
+                "WHERE running <= (SELECT capacity - confirmed_amount FROM slots WHERE id = ?)"
+                ") RETURNING id, amount, created_at",
+                (now, now, slot_id, slot_id))
+        return [{"id": row["id"], "amount": row["amount"]}
+                for row in sorted(rows, key=lambda row: (row["created_at"], row["id"]))]
+
+    async def find_fillable_slot_ids(self, limit: int) -> List[int]:
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall(
+                "SELECT s.id FROM slots s JOIN reservations r ON r.slot_id = s.id "
+                "WHERE s.start_at > ? AND r.confirmed = 0 "
+                "GROUP BY s.id HAVING s.confirmed_amount + MIN(r.amount) <= s.capacity "
+                "ORDER BY MIN(r.created_at) LIMIT ?",
+                (now_us(), limit))
+        return [row["id"] for row in rows]
@@ -0,0 +1,91 @@
+from typing import List, Optional, Tuple
+
+from asyncpg import Connection, Pool, PostgresError
+
+from app.models.reservation_model import Reservation, TICKET_ACCEPTED, TICKET_REJECTED
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, SlotLimitExceededException
+from app.repositories.reservation_queue.exceptions import NoSuchTicketException
+from app.repositories.reservation_queue.interface import ReservationQueueRepository
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+TICKET_COLUMNS = "q.id, q.slot_id, q.user_id, q.amount, q.status, q.reservation_id, q.error, " \
+                 "q.created_at, q.processed_at"
+
+
+class ReservationQueueRepositoryImpl(ReservationQueueRepository):
+    def __init__(self, pool: Pool):
+        self.__pool = pool
+
+    async def enqueue(self, reservation: Reservation):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            return await conn.fetchrow(
+                f"INSERT INTO reservation_requests AS q (slot_id, user_id, amount) VALUES($1, $2, $3) "
+                f"RETURNING {TICKET_COLUMNS}",
+                reservation.slot_id, reservation.user_id, reservation.amount, query_name="reservation_queue.enqueue")
+
+    async def find_by_id(self, ticket_id: int, user_id: int):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            row = await conn.fetchrow(
+                f"SELECT {TICKET_COLUMNS} FROM reservation_requests q WHERE q.id = $1 AND q.user_id = $2",
+                ticket_id, user_id, query_name="reservation_queue.find_by_id")
+            if row is None:
+                raise NoSuchTicketException(ticket_id)
+            return row
+
+    @staticmethod
+    async def __apply(conn, ticket, days_left: int) -> Tuple[str, Optional[int], Optional[str]]:
+        # a savepoint, so a rejected ticket can still be marked in the same transaction
+        try:
+            async with conn.transaction():
+                bookable = await conn.fetchval(
+                    "SELECT LOWER(time_range) >= NOW() + make_interval(days => $2) FROM slots WHERE id = $1",
+                    ticket["slot_id"], days_left, query_name="reservation_queue.slot")
+                if bookable is None:
+                    raise NoSuchSlotException(ticket["slot_id"])
+                if not bookable:
+                    raise DaysNotLeftEnoughException(days_left)
+                reservation_id = await conn.fetchval(
+                    "INSERT INTO reservations(slot_id, user_id, amount) VALUES($1, $2, $3) RETURNING id",
+                    ticket["slot_id"], ticket["user_id"], ticket["amount"], query_name="reservation_queue.insert")
+                return TICKET_ACCEPTED, reservation_id, None
+        except (NoSuchSlotException, DaysNotLeftEnoughException) as e:
+            return TICKET_REJECTED, None, str(e)
+        except PostgresError as e:
+            if "SlotLimitExceeded" in str(e):
+                return TICKET_REJECTED, None, str(SlotLimitExceededException())
+            raise
+
+    async def process(self, days_left: int, limit: int) -> List[dict]:
+        rows = []
+        async with self.__pool.acquire() as conn:  # type: Connection
+            for _ in range(limit):
+                row = await self.__process_next(conn, days_left)
+                if row is None:
+                    break
+                rows.append(row)
+        return rows
+
+    async def __process_next(self, conn, days_left: int):
+        # one transaction per ticket: its insert locks the slot row (FOR NO KEY UPDATE in the slot limit
+        # trigger) until commit, so the lock is released right away instead of being held while the rest
+        # of a batch is applied, and a worker never holds two slots at once
+        async with conn.transaction():
+            # another worker's claimed ticket is skipped, not waited for; a crash rolls the claim back
+            ticket = await conn.fetchrow(f"""
+                SELECT {TICKET_COLUMNS}
+                FROM reservation_requests q
+                WHERE q.status = 'queued'
+                ORDER BY q.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, query_name="reservation_queue.claim")
+            if ticket is None:
+                return None
+
+            status, reservation_id, error = await self.__apply(conn, ticket, days_left)
+            return await conn.fetchrow(f"""
+                UPDATE reservation_requests q
+                SET status = $2, reservation_id = $3, error = $4, processed_at = NOW()
+                WHERE q.id = $1
+                RETURNING {TICKET_COLUMNS}
+            """, ticket["id"], status, reservation_id, error, query_name="reservation_queue.complete")
@@ -0,0 +1,6 @@
+from app.repositories.exception import NoSuchElementException
+
+
+class NoSuchTicketException(NoSuchElementException):
+    def __init__(self, ticket_id: int):
+        super().__init__(elem_name="Ticket", condition=f"id = {ticket_id}")
@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from app.models.reservation_model import Reservation
+
+
+class ReservationQueueRepository(ABC):
+    @abstractmethod
+    async def enqueue(self, reservation: Reservation):
+        """Stores the request as a queued ticket and returns the ticket row."""
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, ticket_id: int, user_id: int): pass
+
+    @abstractmethod
+    async def process(self, days_left: int, limit: int) -> List[dict]:
+        """
+        Claims up to `limit` of the oldest queued tickets and applies each with the rules of
+        `ReservationRepository.insert_if_days_left`. A ticket whose slot is missing, too close or full is
+        rejected with the reason; returns the processed ticket rows.
+        """
+        pass
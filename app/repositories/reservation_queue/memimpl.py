@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import List
+
+from app.database.memory_db import MemoryDatabase
+from app.models.reservation_model import Reservation, TICKET_ACCEPTED, TICKET_REJECTED
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, SlotLimitExceededException
+from app.repositories.reservation_queue.exceptions import NoSuchTicketException
+from app.repositories.reservation_queue.interface import ReservationQueueRepository
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+
+class ReservationQueueRepositoryMemoryImpl(ReservationQueueRepository):
+    def __init__(self, db: MemoryDatabase):
+        self.__db = db
+
+    async def enqueue(self, reservation: Reservation):
+        return dict(self.__db.insert_reservation_request(reservation.slot_id, reservation.user_id,
+                                                         reservation.amount))
+
+    async def find_by_id(self, ticket_id: int, user_id: int):
+        ticket = self.__db.reservation_requests.get(ticket_id)
+        if ticket is None or ticket["user_id"] != user_id:
+            raise NoSuchTicketException(ticket_id)
+        return dict(ticket)
+
+    def __insert(self, ticket: dict, days_left: int) -> int:
+        slot = self.__db.slots.get(ticket["slot_id"])
+        if slot is None:
+            raise NoSuchSlotException(ticket["slot_id"])
+        if slot["time_range"].lower < datetime.now(timezone.utc) + timedelta(days=days_left):
+            raise DaysNotLeftEnoughException(days_left)
+        return self.__db.insert_reservation(ticket["slot_id"], ticket["user_id"], ticket["amount"])["id"]
+
+    async def process(self, days_left: int, limit: int) -> List[dict]:
+        processed = []
+        for ticket_id in list(islice(self.__db.queued_request_ids, limit)):
+            ticket = self.__db.reservation_requests[ticket_id]
+            try:
+                ret = self.__db.complete_reservation_request(ticket_id, TICKET_ACCEPTED,
+                                                             reservation_id=self.__insert(ticket, days_left))
+            except (NoSuchSlotException, DaysNotLeftEnoughException, SlotLimitExceededException) as e:
+                ret = self.__db.complete_reservation_request(ticket_id, TICKET_REJECTED, error=str(e))
+            processed.append(dict(ret))
+        return processed
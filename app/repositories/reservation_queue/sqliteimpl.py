@@ -0,0 +1,78 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.database.sqlite_db import SqlitePool, from_us, now_us
+from app.models.reservation_model import Reservation, TICKET_ACCEPTED, TICKET_REJECTED
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, SlotLimitExceededException
+from app.repositories.reservation_queue.exceptions import NoSuchTicketException
+from app.repositories.reservation_queue.interface import ReservationQueueRepository
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+TICKET_COLUMNS = "id, slot_id, user_id, amount, status, reservation_id, error, created_at, processed_at"
+
+
+def ticket_row(row) -> dict:
+    return {**dict(row), "created_at": from_us(row["created_at"]), "processed_at": from_us(row["processed_at"])}
+
+
+class ReservationQueueRepositorySqliteImpl(ReservationQueueRepository):
+    def __init__(self, pool: SqlitePool):
+        self.__pool = pool
+
+    async def enqueue(self, reservation: Reservation):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall(
+                f"INSERT INTO reservation_requests(slot_id, user_id, amount, created_at) VALUES(?, ?, ?, ?) "
+                f"RETURNING {TICKET_COLUMNS}",
+                (reservation.slot_id, reservation.user_id, reservation.amount, now_us()))
+        return ticket_row(rows[0])
+
+    async def find_by_id(self, ticket_id: int, user_id: int):
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall(
+                f"SELECT {TICKET_COLUMNS} FROM reservation_requests WHERE id = ? AND user_id = ?", (ticket_id, user_id))
+        if not rows:
+            raise NoSuchTicketException(ticket_id)
+        return ticket_row(rows[0])
+
+    @staticmethod
+    async def __insert(conn, ticket, days_left: int) -> int:
+        rows = await conn.execute_fetchall("SELECT start_at FROM slots WHERE id = ?", (ticket["slot_id"],))
+        if not rows:
+            raise NoSuchSlotException(ticket["slot_id"])
+        if from_us(rows[0]["start_at"]) < datetime.now(timezone.utc) + timedelta(days=days_left):
+            raise DaysNotLeftEnoughException(days_left)
+        now = now_us()
+        try:
+            rows = await conn.execute_fetchall(
+                "INSERT INTO reservations(slot_id, user_id, amount, created_at, updated_at) "
+                "VALUES(?, ?, ?, ?, ?) RETURNING id",
+                (ticket["slot_id"], ticket["user_id"], ticket["amount"], now, now))
+        except sqlite3.IntegrityError as e:
+            if "SlotLimitExceeded" in str(e):
+                raise SlotLimitExceededException() from None
+            raise
+        return rows[0]["id"]
+
+    async def process(self, days_left: int, limit: int) -> List[dict]:
+        # the single writer already serializes workers; RAISE(ABORT) only undoes the failing statement
+        async with self.__pool.write() as conn:
+            tickets = await conn.execute_fetchall(
+                f"SELECT {TICKET_COLUMNS} FROM reservation_requests WHERE status = 'queued' ORDER BY id LIMIT ?",
+                (limit,))
+            processed = []
+            for ticket in tickets:
+                reservation_id: Optional[int] = None
+                error: Optional[str] = None
+                try:
+                    reservation_id = await self.__insert(conn, ticket, days_left)
+                except (NoSuchSlotException, DaysNotLeftEnoughException, SlotLimitExceededException) as e:
+                    error = str(e)
+                rows = await conn.execute_fetchall(
+                    f"UPDATE reservation_requests SET status = ?, reservation_id = ?, error = ?, processed_at = ? "
+                    f"WHERE id = ? RETURNING {TICKET_COLUMNS}",
+                    (TICKET_ACCEPTED if error is None else TICKET_REJECTED, reservation_id, error, now_us(),
+                     ticket["id"]))
+                processed.append(ticket_row(rows[0]))
+        return processed
@@ -1,8 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
 from asyncpg import Connection, ExclusionViolationError, Pool, PostgresError
 
+from app.database.retry import retry_transaction
 from app.models.slot_model import Slot
+from app.repositories.reservation.exceptions import SlotLimitExceededException
 from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
 from app.repositories.slot.interface import SlotRepository
 
@@ -14,39 +17,101 @@ class SlotRepositoryImpl(SlotRepository):
     @staticmethod
     def __base_query():
         return """
-                SELECT s.id AS id, s.time_range AS time_range, COALESCE(SUM(r.amount), 0) AS amount 
+                SELECT s.id AS id, s.time_range AS time_range, s.capacity AS capacity, COALESCE(SUM(r.amount), 0) AS amount
                 FROM slots AS s LEFT JOIN reservations AS r ON r.slot_id = s.id AND r.confirmed = TRUE
             """
 
-    async def find(self, start_at: datetime = None, end_at: datetime = None):
+    async def find(self, start_at: datetime = None, end_at: datetime = None, min_remaining: Optional[int] = None,
+                   days_left: Optional[int] = None, limit: Optional[int] = None):
         async with self.__pool.acquire() as conn:  # type: Connection
             conditions = []
             params = []
+            # every shape is `&&` against a (half-unbounded) range, so the GiST index of the exclusion
+            # constraint on slots.time_range can serve it
             if start_at is not None and end_at is not None:
                 params.extend([start_at, end_at])
                 conditions.append(f"s.time_range && TSTZRANGE(${len(params) - 1}, ${len(params)})")
             elif start_at is not None:
                 params.append(start_at)
-                conditions.append(f"UPPER(s.time_range) >= ${len(params)}")
+                conditions.append(f"s.time_range && TSTZRANGE(${len(params)}, NULL, '[)')")
             elif end_at is not None:
                 params.append(end_at)
-                conditions.append(f"LOWER(s.time_range) <= ${len(params)}")
+                conditions.append(f"s.time_range && TSTZRANGE(NULL, ${len(params)}, '(]')")
+            if days_left is not None:
+                # LOWER(time_range) >= NOW() + days, written as `&>` so the same index applies
+                params.append(days_left)
+                conditions.append(
+                    f"s.time_range &> TSTZRANGE(NOW() + make_interval(days => ${len(params)}), NULL, '[)')")
             base_query = self.__base_query()
             if conditions:
                 base_query += "\nWHERE " + " AND ".join(conditions)
-            base_query += "\nGROUP BY s.id, s.time_range"
+            base_query += "\nGROUP BY s.id, s.time_range, s.capacity"
+            if min_remaining is not None:
+                params.append(min_remaining)
+                base_query += f"\nHAVING s.capacity - COALESCE(SUM(r.amount), 0) >= ${len(params)}"
             base_query += "\nORDER BY s.time_range"
+            if limit is not None:
+                params.append(limit)
+                base_query += f"\nLIMIT ${len(params)}"
 
-            return await conn.fetch(base_query, *params)
+            return await conn.fetch(base_query, *params, query_name="slot.find")
+
+    async def find_nearest(self, target: datetime, amount: int, days_left: Optional[int] = None, k: int = 5):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            params = [target, amount, k]
+            conditions = ["s.capacity - a.amount >= $2"]
+            if days_left is not None:
+                params.append(days_left)
+                conditions.append(f"LOWER(s.time_range) >= NOW() + make_interval(days => ${len(params)})")
+            # the btree_gist index on LOWER(time_range) yields slots in distance order; the confirmed
+            # amount is summed per candidate so the scan stops after k slots with enough room
+            query = f"""
+                SELECT s.id AS id, s.time_range AS time_range, s.capacity AS capacity, a.amount AS amount
+                FROM slots AS s
+                CROSS JOIN LATERAL (
+                    SELECT COALESCE(SUM(r.amount), 0) AS amount
+                    FROM reservations AS r
+                    WHERE r.slot_id = s.id AND r.confirmed = TRUE
+                ) AS a
+                WHERE {" AND ".join(conditions)}
+                ORDER BY LOWER(s.time_range) <-> $1::TIMESTAMPTZ
+                LIMIT $3
+            """
+            return await conn.fetch(query, *params, query_name="slot.find_nearest")
+
+    async def daily_totals(self, start: date, end: date, tz: str):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            # day boundaries are local midnights in tz, so DST days are 23 or 25 hours long; the
+            # start-of-day bounds are served by the LOWER(time_range) index. Amounts are summed per slot
+            # first so each slot's capacity is counted once
+            return await conn.fetch("""
+                SELECT d.day::DATE AS day,
+                       COUNT(s.id) AS slots,
+                       COALESCE(SUM(s.capacity), 0) AS capacity,
+                       COALESCE(SUM(a.confirmed), 0) AS confirmed,
+                       COALESCE(SUM(a.pending), 0) AS pending
+                FROM generate_series($1::DATE::TIMESTAMP, $2::DATE::TIMESTAMP, INTERVAL '1 day') AS d(day)
+                LEFT JOIN slots AS s
+                       ON LOWER(s.time_range) >= d.day AT TIME ZONE $3
+                      AND LOWER(s.time_range) < (d.day + INTERVAL '1 day') AT TIME ZONE $3
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(SUM(r.amount) FILTER (WHERE r.confirmed), 0) AS confirmed,
+                           COALESCE(SUM(r.amount) FILTER (WHERE NOT r.confirmed), 0) AS pending
+                    FROM reservations AS r
+                    WHERE r.slot_id = s.id
+                ) AS a ON TRUE
+                GROUP BY d.day
+                ORDER BY d.day
+            """, start, end, tz, query_name="slot.daily_totals")
 
     async def find_by_id(self, slot_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
             base_query = self.__base_query()
             base_query += "WHERE s.id = $1"
-            base_query += "\nGROUP BY s.id, s.time_range"
+            base_query += "\nGROUP BY s.id, s.time_range, s.capacity"
             base_query += "\nORDER BY s.time_range"
 
-            ret = await conn.fetchrow(base_query, slot_id)
+            ret = await conn.fetchrow(base_query, slot_id, query_name="slot.find_by_id")
             if ret is None:
                 raise NoSuchSlotException(slot_id)
             return ret
@@ -54,21 +119,36 @@ class SlotRepositoryImpl(SlotRepository):
     async def insert(self, slot: Slot):
         async with self.__pool.acquire() as conn:  # type: Connection
             try:
-                return await conn.fetchrow("INSERT INTO slots(time_range) VALUES($1) RETURNING id", slot.time_range)
+                return await conn.fetchrow("INSERT INTO slots(time_range, capacity) VALUES($1, $2) RETURNING id",
+                                           slot.time_range, slot.capacity, query_name="slot.insert")
             except ExclusionViolationError as e:
                 raise SlotTimeRangeOverlapped(slot.time_range) from None
 
     async def modify(self, slot: Slot):
         async with self.__pool.acquire() as conn:  # type: Connection
             ret = await conn.fetchrow("UPDATE slots SET time_range = $1 WHERE id = $2 RETURNING id", slot.time_range,
-                                      slot.id)
+                                      slot.id, query_name="slot.modify")
             if ret is None:
                 raise NoSuchSlotException(slot.id)
             return ret
 
+    @retry_transaction("slot.set_capacity")
+    async def set_capacity(self, slot_id: int, capacity: int):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            try:
+                ret = await conn.fetchrow("UPDATE slots SET capacity = $1 WHERE id = $2 RETURNING id, capacity",
+                                          capacity, slot_id, query_name="slot.set_capacity")
+            except PostgresError as e:
+                if "SlotLimitExceeded" in str(e):
+                    raise SlotLimitExceededException() from None
+                raise
+            if ret is None:
+                raise NoSuchSlotException(slot_id)
+            return ret
+
     async def delete(self, slot_id: int):
         async with self.__pool.acquire() as conn:  # type: Connection
-            ret = await conn.fetchrow("DELETE FROM slots WHERE id = $1 RETURNING id", slot_id)
+            ret = await conn.fetchrow("DELETE FROM slots WHERE id = $1 RETURNING id", slot_id, query_name="slot.delete")
             if ret is None:
                 raise NoSuchSlotException(slot_id)
             return ret
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from app.models.slot_model import Slot
@@ -7,8 +7,28 @@ from app.models.slot_model import Slot
 
 class SlotRepository(ABC):
     @abstractmethod
-    async def find(self, start_at: Optional[datetime] = None,
-                   end_at: Optional[datetime] = None): pass
+    async def find(self, start_at: Optional[datetime] = None, end_at: Optional[datetime] = None,
+                   min_remaining: Optional[int] = None, days_left: Optional[int] = None,
+                   limit: Optional[int] = None):
+        """
+        Slots overlapping [start_at, end_at) in time order. `min_remaining` keeps slots whose
+        confirmed amount leaves at least that many seats of their capacity, `days_left` keeps slots starting at least
+        that many days from now (the rule insert_if_days_left applies) and `limit` caps the rows.
+        """
+
+    @abstractmethod
+    async def find_nearest(self, target: datetime, amount: int, days_left: Optional[int] = None, k: int = 5):
+        """
+        The k slots starting closest to `target` (either side) that can still confirm `amount`,
+        nearest first, optionally only those starting at least `days_left` days from now.
+        """
+
+    @abstractmethod
+    async def daily_totals(self, start: date, end: date, tz: str):
+        """
+        One row per day from `start` to `end` (inclusive) in time zone `tz`, with the number of
+        slots starting that day, their total capacity and their confirmed and pending (unconfirmed) amounts.
+        """
 
     @abstractmethod
     async def find_by_id(self, slot_id: int): pass
@@ -19,5 +39,12 @@ class SlotRepository(ABC):
     @abstractmethod
     async def modify(self, slot: Slot): pass
 
+    @abstractmethod
+    async def set_capacity(self, slot_id: int, capacity: int):
+        """
+        Sets how much a slot can confirm. Raises SlotLimitExceededException when more than `capacity`
+        is confirmed already and NoSuchSlotException for an unknown slot.
+        """
+
     @abstractmethod
     async def delete(self, slot_id: int): pass
@@ -0,0 +1,96 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from app.database.memory_db import MemoryDatabase, filter_range, overlaps
+from app.models.slot_model import Slot
+from app.repositories.slot.exceptions import NoSuchSlotException
+from app.repositories.slot.interface import SlotRepository
+
+
+class SlotRepositoryMemoryImpl(SlotRepository):
+    def __init__(self, db: MemoryDatabase):
+        self.__db = db
+
+    async def find(self, start_at: Optional[datetime] = None, end_at: Optional[datetime] = None,
+                   min_remaining: Optional[int] = None, days_left: Optional[int] = None,
+                   limit: Optional[int] = None):
+        starts_from = None
+        scan_from = start_at
+        if days_left is not None:
+            starts_from = datetime.now(timezone.utc) + timedelta(days=days_left)
+            # slots starting from starts_from all end after it, so the scan can skip everything before
+            scan_from = starts_from if start_at is None else max(start_at, starts_from)
+        if start_at is None and end_at is None:
+            slot_ids = self.__db.slot_index.between(scan_from)
+        else:
+            # the index narrows by bounds; && also honours bound inclusivity
+            query_range = filter_range(start_at, end_at)
+            slot_ids = [i for i in self.__db.slot_index.between(scan_from, end_at)
+                        if overlaps(self.__db.slots[i]["time_range"], query_range)]
+
+        ret = []
+        for slot_id in slot_ids:
+            if limit is not None and len(ret) >= limit:
+                break
+            if starts_from is not None and self.__db.slots[slot_id]["time_range"].lower < starts_from:
+                continue
+            if min_remaining is not None and \
+                    self.__db.confirmed_amount.get(slot_id, 0) > self.__db.capacity(slot_id) - min_remaining:
+                continue
+            ret.append(self.__db.slot_with_amount(slot_id))
+        return ret
+
+    async def find_nearest(self, target: datetime, amount: int, days_left: Optional[int] = None, k: int = 5):
+        not_before = None if days_left is None else datetime.now(timezone.utc) + timedelta(days=days_left)
+        ret = []
+        for slot_id in self.__db.slot_index.nearest(target, not_before):
+            if len(ret) >= k:
+                break
+            if self.__db.confirmed_amount.get(slot_id, 0) + amount <= self.__db.capacity(slot_id):
+                ret.append(self.__db.slot_with_amount(slot_id))
+        return ret
+
+    async def daily_totals(self, start: date, end: date, tz: str):
+        zone = ZoneInfo(tz)
+        days = {start + timedelta(days=i): {"slots": 0, "capacity": 0, "confirmed": 0, "pending": 0}
+                for i in range((end - start).days + 1)}
+        first = datetime.combine(start, time(), zone)
+        last = datetime.combine(end + timedelta(days=1), time(), zone)
+        for slot_id in self.__db.slot_index.between(first, last):
+            lower = self.__db.slots[slot_id]["time_range"].lower
+            if not first <= lower < last:
+                continue
+            totals = days[lower.astimezone(zone).date()]
+            totals["slots"] += 1
+            totals["capacity"] += self.__db.capacity(slot_id)
+            for reservation_id in self.__db.reservation_ids_by_slot.get(slot_id, ()):
+                reservation = self.__db.reservations[reservation_id]
+                totals["confirmed" if reservation["confirmed"] else "pending"] += reservation["amount"]
+        return [{"day": day, **totals} for day, totals in days.items()]
+
+    async def find_by_id(self, slot_id: int):
+        if slot_id not in self.__db.slots:
+            raise NoSuchSlotException(slot_id)
+        return self.__db.slot_with_amount(slot_id)
+
+    async def insert(self, slot: Slot):
+        return {"id": self.__db.insert_slot(slot.time_range, slot.capacity)["id"]}
+
+    async def modify(self, slot: Slot):
+        ret = self.__db.update_slot(slot.id, slot.time_range)
+        if ret is None:
+            raise NoSuchSlotException(slot.id)
+        return {"id": ret["id"]}
+
+    async def set_capacity(self, slot_id: int, capacity: int):
+        ret = self.__db.set_slot_capacity(slot_id, capacity)
+        if ret is None:
+            raise NoSuchSlotException(slot_id)
+        return {"id": ret["id"], "capacity": ret["capacity"]}
+
+    async def delete(self, slot_id: int):
+        ret = self.__db.delete_slot(slot_id)
+        if ret is None:
+            raise NoSuchSlotException(slot_id)
+        return {"id": ret["id"]}
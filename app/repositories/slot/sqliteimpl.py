@@ -0,0 +1,150 @@
+import sqlite3
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from asyncpg import Range
+
+from app.database.sqlite_db import SqlitePool, from_us, to_us
+from app.models.slot_model import Slot
+from app.repositories.reservation.exceptions import SlotLimitExceededException
+from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
+from app.repositories.slot.interface import SlotRepository
+
+
+def slot_row(row) -> dict:
+    return {"id": row["id"], "time_range": Range(from_us(row["start_at"]), from_us(row["end_at"])),
+            "capacity": row["capacity"], "amount": row["confirmed_amount"]}
+
+
+class SlotRepositorySqliteImpl(SlotRepository):
+    def __init__(self, pool: SqlitePool):
+        self.__pool = pool
+
+    async def find(self, start_at: Optional[datetime] = None, end_at: Optional[datetime] = None,
+                   min_remaining: Optional[int] = None, days_left: Optional[int] = None,
+                   limit: Optional[int] = None):
+        conditions = []
+        params = []
+        # slots are stored half-open, so && becomes two comparisons
+        if start_at is not None:
+            params.append(to_us(start_at))
+            conditions.append("end_at > ?")
+        if end_at is not None:
+            params.append(to_us(end_at))
+            conditions.append("start_at < ?" if start_at is not None else "start_at <= ?")
+        if days_left is not None:
+            params.append(to_us(datetime.now(timezone.utc) + timedelta(days=days_left)))
+            conditions.append("start_at >= ?")
+        if min_remaining is not None:
+            # the confirmed_amount counter stands in for the SUM the Postgres query aggregates
+            params.append(min_remaining)
+            conditions.append("capacity - confirmed_amount >= ?")
+        query = "SELECT id, start_at, end_at, capacity, confirmed_amount FROM slots"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY start_at"
+        if limit is not None:
+            params.append(limit)
+            query += " LIMIT ?"
+
+        async with self.__pool.read() as conn:
+            return [slot_row(row) for row in await conn.execute_fetchall(query, params)]
+
+    async def find_nearest(self, target: datetime, amount: int, days_left: Optional[int] = None, k: int = 5):
+        params = [amount]
+        condition = "capacity - confirmed_amount >= ?"
+        if days_left is not None:
+            params.append(to_us(datetime.now(timezone.utc) + timedelta(days=days_left)))
+            condition += " AND start_at >= ?"
+        # no distance operator: walk the start_at index both ways from the target and merge
+        query = "SELECT id, start_at, end_at, capacity, confirmed_amount FROM slots WHERE " + condition
+        target_us = to_us(target)
+        async with self.__pool.read() as conn:
+            later = await conn.execute_fetchall(query + " AND start_at >= ? ORDER BY start_at LIMIT ?",
+                                                (*params, target_us, k))
+            earlier = await conn.execute_fetchall(query + " AND start_at < ? ORDER BY start_at DESC LIMIT ?",
+                                                  (*params, target_us, k))
+        rows = sorted([*earlier, *later], key=lambda row: abs(row["start_at"] - target_us))
+        return [slot_row(row) for row in rows[:k]]
+
+    async def daily_totals(self, start: date, end: date, tz: str):
+        # SQLite has no time zones: the local day boundaries are computed here and joined as VALUES
+        zone = ZoneInfo(tz)
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        params = []
+        for day in days:
+            params.extend([day.isoformat(), to_us(datetime.combine(day, time(), zone)),
+                           to_us(datetime.combine(day + timedelta(days=1), time(), zone))])
+        values = ", ".join(["(?, ?, ?)"] * len(days))
+        query = f"""
+            WITH d(day, lower, upper) AS (VALUES {values})
+            SELECT d.day AS day,
+                   COUNT(s.id) AS slots,
+                   COALESCE(SUM(s.capacity), 0) AS capacity,
+                   COALESCE(SUM(s.confirmed_amount), 0) AS confirmed,
+                   COALESCE(SUM((SELECT SUM(r.amount) FROM reservations AS r
+                                 WHERE r.slot_id = s.id AND NOT r.confirmed)), 0) AS pending
+            FROM d
+            LEFT JOIN slots AS s ON s.start_at >= d.lower AND s.start_at < d.upper
+            GROUP BY d.day
+            ORDER BY d.day
+        """
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall(query, params)
+        return [{"day": date.fromisoformat(row["day"]), "slots": row["slots"], "capacity": row["capacity"],
+                 "confirmed": row["confirmed"], "pending": row["pending"]} for row in rows]
+
+    async def find_by_id(self, slot_id: int):
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall(
+                "SELECT id, start_at, end_at, capacity, confirmed_amount FROM slots WHERE id = ?", (slot_id,))
+        if not rows:
+            raise NoSuchSlotException(slot_id)
+        return slot_row(rows[0])
+
+    async def insert(self, slot: Slot):
+        try:
+            async with self.__pool.write() as conn:
+                rows = await conn.execute_fetchall(
+                    "INSERT INTO slots(start_at, end_at, capacity) VALUES(?, ?, ?) RETURNING id",
+                    (to_us(slot.time_range.lower), to_us(slot.time_range.upper), slot.capacity))
+                return {"id": rows[0]["id"]}
+        except sqlite3.IntegrityError as e:
+            if "SlotTimeRangeOverlapped" in str(e):
+                raise SlotTimeRangeOverlapped(slot.time_range) from None
+            raise
+
+    async def modify(self, slot: Slot):
+        try:
+            async with self.__pool.write() as conn:
+                rows = await conn.execute_fetchall(
+                    "UPDATE slots SET start_at = ?, end_at = ? WHERE id = ? RETURNING id",
+                    (to_us(slot.time_range.lower), to_us(slot.time_range.upper), slot.id))
+        except sqlite3.IntegrityError as e:
+            if "SlotTimeRangeOverlapped" in str(e):
+                raise SlotTimeRangeOverlapped(slot.time_range) from None
+            raise
+        if not rows:
+            raise NoSuchSlotException(slot.id)
+        return {"id": rows[0]["id"]}
+
+    async def set_capacity(self, slot_id: int, capacity: int):
+        try:
+            async with self.__pool.write() as conn:
+                rows = await conn.execute_fetchall(
+                    "UPDATE slots SET capacity = ? WHERE id = ? RETURNING id, capacity", (capacity, slot_id))
+        except sqlite3.IntegrityError as e:
+            if "SlotLimitExceeded" in str(e):
+                raise SlotLimitExceededException() from None
+            raise
+        if not rows:
+            raise NoSuchSlotException(slot_id)
+        return {"id": rows[0]["id"], "capacity": rows[0]["capacity"]}
+
+    async def delete(self, slot_id: int):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall("DELETE FROM slots WHERE id = ? RETURNING id", (slot_id,))
+        if not rows:
+            raise NoSuchSlotException(slot_id)
+        return {"id": rows[0]["id"]}
@@ -10,7 +10,7 @@ class UserRepositoryImpl(UserRepository):
 
     async def find(self, username: str):
         async with self.__pool.acquire() as conn:  # type: Connection
-            user = await conn.fetchrow("SELECT * FROM users WHERE username = $1", username)
+            user = await conn.fetchrow("SELECT * FROM users WHERE username = $1", username, query_name="user.find")
             if user is None:
                 raise NoSuchUserException(f"username = {username}")
             return user
@@ -21,7 +21,8 @@ class UserRepositoryImpl(UserRepository):
                 async with conn.transaction():
                     ret_id = await conn.fetchrow("INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
                                                  username,
-                                                 hashed_password)
+                                                 hashed_password,
+                                                 query_name="user.insert")
                     return ret_id
             except UniqueViolationError as e:
                 raise UserNameAlreadyExistsException(username) from None
@@ -30,14 +31,16 @@ class UserRepositoryImpl(UserRepository):
         async with self.__pool.acquire() as conn:  # type: Connection
             ret_id = await conn.fetchrow("UPDATE users SET password = $1 WHERE username = $2 RETURNING id",
                                          hashed_password,
-                                         username)
+                                         username,
+                                         query_name="user.update_password")
             if ret_id is None:
                 raise NoSuchUserException(f"username = {username}")
             return ret_id
 
     async def delete(self, username: str):
         async with self.__pool.acquire() as conn:  # type: Connection
-            ret_id = await conn.fetchrow("DELETE FROM users WHERE username = $1 RETURNING id", username)
+            ret_id = await conn.fetchrow("DELETE FROM users WHERE username = $1 RETURNING id", username,
+                                         query_name="user.delete")
             if ret_id is None:
                 raise NoSuchUserException(f"username = {username}")
             return ret_id
@@ -0,0 +1,30 @@
+from app.database.memory_db import MemoryDatabase
+from app.repositories.user.exceptions import NoSuchUserException
+from app.repositories.user.interface import UserRepository
+
+
+class UserRepositoryMemoryImpl(UserRepository):
+    def __init__(self, db: MemoryDatabase):
+        self.__db = db
+
+    async def find(self, username: str):
+        user = self.__db.find_user(username)
+        if user is None:
+            raise NoSuchUserException(f"username = {username}")
+        return dict(user)
+
+    async def insert(self, username, hashed_password):
+        return {"id": self.__db.insert_user(username, hashed_password)["id"]}
+
+    async def update_password(self, username: str, hashed_password: str):
+        user = self.__db.find_user(username)
+        if user is None:
+            raise NoSuchUserException(f"username = {username}")
+        user["password"] = hashed_password
+        return {"id": user["id"]}
+
+    async def delete(self, username: str):
+        user = self.__db.delete_user(username)
+        if user is None:
+            raise NoSuchUserException(f"username = {username}")
+        return {"id": user["id"]}
@@ -0,0 +1,47 @@
+import sqlite3
+
+from app.database.sqlite_db import SqlitePool, from_us, now_us
+from app.repositories.user.exceptions import NoSuchUserException, UserNameAlreadyExistsException
+from app.repositories.user.interface import UserRepository
+
+
+class UserRepositorySqliteImpl(UserRepository):
+    def __init__(self, pool: SqlitePool):
+        self.__pool = pool
+
+    async def find(self, username: str):
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall("SELECT * FROM users WHERE username = ?", (username,))
+        if not rows:
+            raise NoSuchUserException(f"username = {username}")
+        user = dict(rows[0])
+        user["admin"] = bool(user["admin"])
+        user["created_at"] = from_us(user["created_at"])
+        return user
+
+    async def insert(self, username, hashed_password):
+        try:
+            async with self.__pool.write() as conn:
+                rows = await conn.execute_fetchall(
+                    "INSERT INTO users(username, password, created_at) VALUES(?, ?, ?) RETURNING id",
+                    (username, hashed_password, now_us()))
+                return {"id": rows[0]["id"]}
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" in str(e):
+                raise UserNameAlreadyExistsException(username) from None
+            raise
+
+    async def update_password(self, username: str, hashed_password: str):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall("UPDATE users SET password = ? WHERE username = ? RETURNING id",
+                                               (hashed_password, username))
+        if not rows:
+            raise NoSuchUserException(f"username = {username}")
+        return {"id": rows[0]["id"]}
+
+    async def delete(self, username: str):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall("DELETE FROM users WHERE username = ? RETURNING id", (username,))
+        if not rows:
+            raise NoSuchUserException(f"username = {username}")
+        return {"id": rows[0]["id"]}
@@ -0,0 +1,116 @@
+from typing import List
+
+from asyncpg import Connection, ForeignKeyViolationError, Pool, PostgresError
+
+from app.models.reservation_model import Reservation, WAITLIST_EXPIRED, WAITLIST_PROMOTED
+from app.repositories.slot.exceptions import NoSuchSlotException
+from app.repositories.waitlist.exceptions import NoSuchWaitlistEntryException
+from app.repositories.waitlist.interface import WaitlistRepository
+
+ENTRY_COLUMNS = "e.id, e.slot_id, e.user_id, e.amount, e.status, e.reservation_id, e.created_at, e.promoted_at"
+
+
+class WaitlistRepositoryImpl(WaitlistRepository):
+    def __init__(self, pool: Pool):
+        self.__pool = pool
+
+    async def insert(self, reservation: Reservation):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            try:
+                return await conn.fetchrow(
+                    f"INSERT INTO waitlist_entries AS e (slot_id, user_id, amount) VALUES($1, $2, $3) "
+                    f"RETURNING {ENTRY_COLUMNS}",
+                    reservation.slot_id, reservation.user_id, reservation.amount, query_name="waitlist.insert")
+            except ForeignKeyViolationError:
+                raise NoSuchSlotException(reservation.slot_id)
+
+    async def find(self, user_id: int) -> List[dict]:
+        async with self.__pool.acquire() as conn:  # type: Connection
+            return await conn.fetch(
+                f"SELECT {ENTRY_COLUMNS} FROM waitlist_entries e WHERE e.user_id = $1 ORDER BY e.id",
+                user_id, query_name="waitlist.find")
+
+    async def delete_waiting(self, entry_id: int, user_id: int):
+        async with self.__pool.acquire() as conn:  # type: Connection
+            deleted = await conn.fetchval(
+                "DELETE FROM waitlist_entries WHERE id = $1 AND user_id = $2 AND status = 'waiting' RETURNING id",
+                entry_id, user_id, query_name="waitlist.delete_waiting")
+            if deleted is None:
+                raise NoSuchWaitlistEntryException(entry_id)
+
+    @staticmethod
+    async def __promote_slot(conn, slot_id: int, days_left: int) -> List[dict]:
+        # the slot row first, the lock the slot limit triggers take: an admin raising the capacity holds it
+        # before record_released_capacity locks the waitlist_released row
+        bookable = await conn.fetchval(
+            "SELECT LOWER(time_range) >= NOW() + make_interval(days => $2) FROM slots WHERE id = $1 "
+            "FOR NO KEY UPDATE", slot_id, days_left, query_name="waitlist.lock_slot")
+        released = await conn.fetchval(
+            "DELETE FROM waitlist_released WHERE slot_id = $1 RETURNING released",
+            slot_id, query_name="waitlist.take_released")
+        if released is None:
+            # promoted by another worker meanwhile
+            return []
+        if bookable is None:
+            return []
+        if not bookable:
+            await conn.execute("UPDATE waitlist_entries SET status = $2 WHERE slot_id = $1 AND status = 'waiting'",
+                               slot_id, WAITLIST_EXPIRED, query_name="waitlist.expire")
+            return []
+
+        waiting = await conn.fetch("""
+            SELECT id, user_id, amount
+            FROM waitlist_entries
+            WHERE slot_id = $1 AND status = 'waiting'
+            ORDER BY id
+            FOR UPDATE
+        """, slot_id, query_name="waitlist.lock_waiting")
+        ids, reservation_ids = [], []
+        for entry in waiting:
+            if entry["amount"] > released:
+                # keeps the rest of the released seats for the head
+                await conn.execute("INSERT INTO waitlist_released(slot_id, released) VALUES($1, $2)",
+                                   slot_id, released, query_name="waitlist.keep_released")
+                break
+            try:
+                async with conn.transaction():
+                    reservation_id = await conn.fetchval(
+                        "INSERT INTO reservations(slot_id, user_id, amount) VALUES($1, $2, $3) RETURNING id",
+                        slot_id, entry["user_id"], entry["amount"], query_name="waitlist.insert_reservation")
+            except PostgresError as e:
+                if "SlotLimitExceeded" in str(e):
+                    # the seats were confirmed to someone else in the meantime
+                    break
+                raise
+            released -= entry["amount"]
+            ids.append(entry["id"])
+            reservation_ids.append(reservation_id)
+        if not ids:
+            return []
+
+        return await conn.fetch(f"""
+            UPDATE waitlist_entries e
+            SET status = $3, reservation_id = p.reservation_id, promoted_at = NOW()
+            FROM UNNEST($1::BIGINT[], $2::INTEGER[]) AS p(id, reservation_id)
+            WHERE e.id = p.id
+            RETURNING {ENTRY_COLUMNS}
+        """, ids, reservation_ids, WAITLIST_PROMOTED, query_name="waitlist.complete")
+
+    async def promote(self, days_left: int, limit: int) -> List[dict]:
+        async with self.__pool.acquire() as conn:  # type: Connection
+            # only slots whose released seats cover the head move; the rest wait for the next release
+            slot_ids = await conn.fetch("""
+                SELECT w.slot_id
+                FROM waitlist_released w
+                WHERE w.released >= COALESCE((SELECT e.amount FROM waitlist_entries e
+                                              WHERE e.slot_id = w.slot_id AND e.status = 'waiting'
+                                              ORDER BY e.id LIMIT 1), 0)
+                ORDER BY w.slot_id
+                LIMIT $1
+            """, limit, query_name="waitlist.candidates")
+            promoted = []
+            for row in slot_ids:
+                # one transaction per slot keeps the slot locks short
+                async with conn.transaction():
+                    promoted.extend(await self.__promote_slot(conn, row["slot_id"], days_left))
+            return sorted(promoted, key=lambda entry: entry["id"])
@@ -0,0 +1,6 @@
+from app.repositories.exception import NoSuchElementException
+
+
+class NoSuchWaitlistEntryException(NoSuchElementException):
+    def __init__(self, entry_id: int):
+        super().__init__(elem_name="Waitlist entry", condition=f"id = {entry_id}")
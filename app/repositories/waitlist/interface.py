@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from app.models.reservation_model import Reservation
+
+
+class WaitlistRepository(ABC):
+    @abstractmethod
+    async def insert(self, reservation: Reservation):
+        """Puts a reservation that hit the slot limit at the end of its slot's waitlist; returns the entry row."""
+        pass
+
+    @abstractmethod
+    async def find(self, user_id: int) -> List[dict]: pass
+
+    @abstractmethod
+    async def delete_waiting(self, entry_id: int, user_id: int):
+        """Removes the user's entry while it is still waiting; raises NoSuchWaitlistEntryException otherwise."""
+        pass
+
+    @abstractmethod
+    async def promote(self, days_left: int, limit: int) -> List[dict]:
+        """
+        Promotes the waitlists of up to `limit` slots whose released seats (recorded by the
+        record_released_seats trigger whenever a slot's confirmed amount drops) now cover the head entry.
+        Entries become unconfirmed reservations in request order while they fit in the released seats;
+        the first one that does not fit waits for more, so later, smaller entries never jump the queue.
+        Waitlists of slots starting within `days_left` days expire. Returns the promoted entry rows.
+        """
+        pass
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.database.memory_db import MemoryDatabase
+from app.models.reservation_model import Reservation, WAITLIST_EXPIRED, WAITLIST_PROMOTED, WAITLIST_WAITING
+from app.repositories.reservation.exceptions import SlotLimitExceededException
+from app.repositories.waitlist.exceptions import NoSuchWaitlistEntryException
+from app.repositories.waitlist.interface import WaitlistRepository
+
+
+class WaitlistRepositoryMemoryImpl(WaitlistRepository):
+    def __init__(self, db: MemoryDatabase):
+        self.__db = db
+
+    async def insert(self, reservation: Reservation):
+        return dict(self.__db.insert_waitlist_entry(reservation.slot_id, reservation.user_id, reservation.amount))
+
+    async def find(self, user_id: int) -> List[dict]:
+        return [dict(self.__db.waitlist_entries[entry_id])
+                for entry_id in self.__db.waitlist_ids_by_user.get(user_id, {})]
+
+    async def delete_waiting(self, entry_id: int, user_id: int):
+        entry = self.__db.waitlist_entries.get(entry_id)
+        if entry is None or entry["user_id"] != user_id or entry["status"] != WAITLIST_WAITING:
+            raise NoSuchWaitlistEntryException(entry_id)
+        self.__db.delete_waitlist_entry(entry_id)
+
+    def __head_fits(self, slot_id: int) -> bool:
+        waiting = self.__db.waiting_ids_by_slot.get(slot_id)
+        return not waiting or self.__db.waitlist_entries[next(iter(waiting))]["amount"] <= \
+            self.__db.waitlist_released[slot_id]
+
+    async def promote(self, days_left: int, limit: int) -> List[dict]:
+        db = self.__db
+        promoted = []
+        slot_ids = sorted(slot_id for slot_id in db.waitlist_released if self.__head_fits(slot_id))[:limit]
+        for slot_id in slot_ids:
+            released = db.waitlist_released.pop(slot_id)
+            slot = db.slots.get(slot_id)
+            if slot is None:
+                continue
+            waiting = list(db.waiting_ids_by_slot.get(slot_id, {}))
+            if slot["time_range"].lower < datetime.now(timezone.utc) + timedelta(days=days_left):
+                for entry_id in waiting:
+                    db.complete_waitlist_entry(entry_id, WAITLIST_EXPIRED)
+                continue
+
+            for entry_id in waiting:
+                entry = db.waitlist_entries[entry_id]
+                if entry["amount"] > released:
+                    # keeps the rest of the released seats for the head
+                    db.waitlist_released[slot_id] = released
+                    break
+                try:
+                    reservation = db.insert_reservation(slot_id, entry["user_id"], entry["amount"])
+                except SlotLimitExceededException:
+                    # the seats were confirmed to someone else in the meantime
+                    break
+                released -= entry["amount"]
+                promoted.append(dict(db.complete_waitlist_entry(entry_id, WAITLIST_PROMOTED, reservation["id"])))
+        return promoted
@@ -0,0 +1,103 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.database.sqlite_db import SqlitePool, from_us, now_us
+from app.models.reservation_model import Reservation, WAITLIST_EXPIRED, WAITLIST_PROMOTED
+from app.repositories.slot.exceptions import NoSuchSlotException
+from app.repositories.waitlist.exceptions import NoSuchWaitlistEntryException
+from app.repositories.waitlist.interface import WaitlistRepository
+
+ENTRY_COLUMNS = "id, slot_id, user_id, amount, status, reservation_id, created_at, promoted_at"
+
+
+def entry_row(row) -> dict:
+    return {**dict(row), "created_at": from_us(row["created_at"]), "promoted_at": from_us(row["promoted_at"])}
+
+
+class WaitlistRepositorySqliteImpl(WaitlistRepository):
+    def __init__(self, pool: SqlitePool):
+        self.__pool = pool
+
+    async def insert(self, reservation: Reservation):
+        async with self.__pool.write() as conn:
+            try:
+                rows = await conn.execute_fetchall(
+                    f"INSERT INTO waitlist_entries(slot_id, user_id, amount, created_at) VALUES(?, ?, ?, ?) "
+                    f"RETURNING {ENTRY_COLUMNS}",
+                    (reservation.slot_id, reservation.user_id, reservation.amount, now_us()))
+            except sqlite3.IntegrityError as e:
+                if "FOREIGN KEY" in str(e):
+                    raise NoSuchSlotException(reservation.slot_id) from None
+                raise
+        return entry_row(rows[0])
+
+    async def find(self, user_id: int) -> List[dict]:
+        async with self.__pool.read() as conn:
+            rows = await conn.execute_fetchall(
+                f"SELECT {ENTRY_COLUMNS} FROM waitlist_entries WHERE user_id = ? ORDER BY id", (user_id,))
+        return [entry_row(row) for row in rows]
+
+    async def delete_waiting(self, entry_id: int, user_id: int):
+        async with self.__pool.write() as conn:
+            rows = await conn.execute_fetchall(
+                "DELETE FROM waitlist_entries WHERE id = ? AND user_id = ? AND status = 'waiting' RETURNING id",
+                (entry_id, user_id))
+        if not rows:
+            raise NoSuchWaitlistEntryException(entry_id)
+
+    @staticmethod
+    async def __promote_slot(conn, slot_id: int, released: int, days_left: int) -> List[dict]:
+        slots = await conn.execute_fetchall("SELECT start_at FROM slots WHERE id = ?", (slot_id,))
+        await conn.execute("DELETE FROM waitlist_released WHERE slot_id = ?", (slot_id,))
+        if not slots:
+            return []
+        if from_us(slots[0]["start_at"]) < datetime.now(timezone.utc) + timedelta(days=days_left):
+            await conn.execute("UPDATE waitlist_entries SET status = ? WHERE slot_id = ? AND status = 'waiting'",
+                               (WAITLIST_EXPIRED, slot_id))
+            return []
+
+        promoted = []
+        waiting = await conn.execute_fetchall(
+            "SELECT id, user_id, amount FROM waitlist_entries WHERE slot_id = ? AND status = 'waiting' ORDER BY id",
+            (slot_id,))
+        for entry in waiting:
+            if entry["amount"] > released:
+                # keeps the rest of the released seats for the head
+                await conn.execute("INSERT INTO waitlist_released(slot_id, released) VALUES(?, ?)", (slot_id, released))
+                break
+            now = now_us()
+            try:
+                rows = await conn.execute_fetchall(
+                    "INSERT INTO reservations(slot_id, user_id, amount, created_at, updated_at) "
+                    "VALUES(?, ?, ?, ?, ?) RETURNING id",
+                    (slot_id, entry["user_id"], entry["amount"], now, now))
+            except sqlite3.IntegrityError as e:
+                if "SlotLimitExceeded" in str(e):
+                    # the seats were confirmed to someone else in the meantime
+                    break
+                raise
+            released -= entry["amount"]
+            rows = await conn.execute_fetchall(
+                f"UPDATE waitlist_entries SET status = ?, reservation_id = ?, promoted_at = ? WHERE id = ? "
+                f"RETURNING {ENTRY_COLUMNS}",
+                (WAITLIST_PROMOTED, rows[0]["id"], now, entry["id"]))
+            promoted.append(entry_row(rows[0]))
+        return promoted
+
+    async def promote(self, days_left: int, limit: int) -> List[dict]:
+        async with self.__pool.write() as conn:
+            candidates = await conn.execute_fetchall("""
+                SELECT w.slot_id, w.released
+                FROM waitlist_released w
+                WHERE w.released >= COALESCE((SELECT e.amount FROM waitlist_entries e
+                                              WHERE e.slot_id = w.slot_id AND e.status = 'waiting'
+                                              ORDER BY e.id LIMIT 1), 0)
+                ORDER BY w.slot_id
+                LIMIT ?
+            """, (limit,))
+            promoted = []
+            for candidate in candidates:
+                promoted.extend(await self.__promote_slot(conn, candidate["slot_id"], candidate["released"],
+                                                          days_left))
+        return promoted
@@ -0,0 +1,102 @@
+import logging
+import os
+from logging import Logger
+
+import uvicorn
+from dotenv import load_dotenv
+
+__logger: Logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    # respects cpu affinity / container cpusets where the platform exposes it
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# per worker, outside its pool: the LISTEN connection of InstrumentedPool.listen_settings
+LISTENER_CONNECTIONS = 1
+# per worker pool: build_workers starts the expiry, auto-fill, queue and waitlist workers in every process,
+# and each can hold a pooled connection at the same time, so the pool keeps one for requests on top of them
+BACKGROUND_WORKER_CONNECTIONS = 4
+MIN_REQUEST_CONNECTIONS = 1
+MIN_POOL_SIZE = BACKGROUND_WORKER_CONNECTIONS + MIN_REQUEST_CONNECTIONS
+# sqlite and memory keep their data (and the slot locks) inside one process
+SINGLE_PROCESS_BACKENDS = ("sqlite", "memory")
+
+
+def connection_budget() -> int:
+    """Connections the workers may open together; the reserved ones are left for admin sessions, migrations and psql."""
+    return int(os.getenv("DB_MAX_CONNECTIONS", 100)) - int(os.getenv("DB_RESERVED_CONNECTIONS", 10))
+
+
+def max_workers(budget: int) -> int:
+    return budget // (MIN_POOL_SIZE + LISTENER_CONNECTIONS)
+
+
+def worker_count() -> int:
+    # WEB_CONCURRENCY is the conventional override used by uvicorn/gunicorn deployments
+    workers = os.getenv("WEB_CONCURRENCY")
+    backend = os.getenv("DB_BACKEND", "postgres")
+    if backend in SINGLE_PROCESS_BACKENDS:
+        if workers and int(workers) > 1:
+            raise ValueError(f"DB_BACKEND={backend} runs in a single process; set WEB_CONCURRENCY=1 or use postgres")
+        return 1
+    if workers:
+        return max(int(workers), 1)
+    # one per core, but no more than the connection budget can give a usable pool
+    return max(min(available_cores(), max_workers(connection_budget())), 1)
+
+
+def pool_size_per_worker(workers: int) -> tuple[int, int]:
+    """
+    Divide the postgres connection budget across workers so that
+    `workers * (max_size + LISTENER_CONNECTIONS)` never exceeds `DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS`.
+    """
+    budget = connection_budget()
+    max_size = budget // workers - LISTENER_CONNECTIONS
+    if max_size < MIN_POOL_SIZE:
+        raise ValueError(
+            f"DB connection budget {budget} leaves {max(max_size, 0)} pooled connection(s) per worker for {workers} "
+            f"workers; each worker needs {MIN_POOL_SIZE} ({BACKGROUND_WORKER_CONNECTIONS} for background workers, "
+            f"{MIN_REQUEST_CONNECTIONS} for requests) plus {LISTENER_CONNECTIONS} for LISTEN. "
+            f"Set WEB_CONCURRENCY to at most {max_workers(budget)} or raise DB_MAX_CONNECTIONS")
+    min_size = min(int(os.getenv("DB_POOL_MIN_SIZE", 5)), max_size)
+    return min_size, max_size
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    workers = worker_count()
+    min_size, max_size = pool_size_per_worker(workers)
+
+    # worker processes are spawned with a copy of this environment; ers_db.connect() reads these
+    os.environ["DB_POOL_MIN_SIZE"] = str(min_size)
+    os.environ["DB_POOL_MAX_SIZE"] = str(max_size)
+
+    __logger.info(f"Starting {workers} workers, db pool {min_size}..{max_size} per worker")
+
+    # SIGHUP restarts workers one by one. Each old worker stops accepting, finishes in-flight requests
+    # (up to timeout_graceful_shutdown) and closes its pool before the new one is spawned,
+    # so the shared socket keeps serving and the pool budget holds during a reload.
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 8000)),
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=int(os.getenv("BACKLOG", 2048)),
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_SEC", 75)),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SEC", 30)),
+        proxy_headers=True,
+        access_log=os.getenv("ACCESS_LOG", "false").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,32 @@ from typing import Optional
 
 from asyncpg import PostgresError
 
-from app.models.reservation_model import ReservationDto
+from app.models.reservation_model import ReservationDto, SlotFillResult
 from app.models.slot_model import Slot
 from app.models.slot_reservation_joined_model import ReservationWithSlot
+from app.monitoring.metrics import FILLED_RESERVATIONS
+from app.monitoring.tracing import span
 from app.repositories.reservation.dbimpl import ReservationRepository
 from app.repositories.reservation.exceptions import NoSuchReservationException, SlotLimitExceededException
 from app.repositories.slot.dbimpl import SlotRepository
 from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
 from app.services.admin.interface import AdminExamManagementService
+from app.services.calendar_cache import CalendarCache
 from app.services.exceptions import DBConflictException, DBUnknownException, NotFoundException
 
 
 class AdminExamManagementServiceImpl(AdminExamManagementService):
-    def __init__(self, slot_repo: SlotRepository, reservation_repo: ReservationRepository):
+    def __init__(self, slot_repo: SlotRepository, reservation_repo: ReservationRepository,
+                 calendar_cache: Optional[CalendarCache] = None):
         self.slot_repo = slot_repo
         self.reservation_repo = reservation_repo
+        self.calendar_cache = calendar_cache or CalendarCache()
         self.__logger = logging.getLogger(__name__)
 
     async def add_exam_slot(self, slot: Slot):
         try:
             ret = await self.slot_repo.insert(slot)
+            self.calendar_cache.invalidate()
             if ret is None:
                 self.__logger.exception("Failed to insert slot.")
                 raise DBUnknownException()
@@ -36,15 +42,29 @@ class AdminExamManagementServiceImpl(AdminExamManagementService):
     async def delete_exam_slot(self, slot_id: int):
         try:
             await self.slot_repo.delete(slot_id)
+            self.calendar_cache.invalidate()
         except NoSuchSlotException as e:
             raise NotFoundException(str(e))
         except PostgresError as e:
             raise DBUnknownException()
 
+    async def set_slot_capacity(self, slot_id: int, capacity: int):
+        try:
+            await self.slot_repo.set_capacity(slot_id, capacity)
+            # capacity is part of the calendar buckets
+            self.calendar_cache.invalidate()
+        except NoSuchSlotException as e:
+            raise NotFoundException(str(e))
+        except SlotLimitExceededException as e:
+            raise DBConflictException(str(e))
+        except PostgresError as e:
+            raise DBUnknownException()
+
     async def find_reservations(self, start_at: Optional[datetime], end_at: Optional[datetime]):
         try:
             rows = await self.reservation_repo.find(start_at=start_at, end_at=end_at)
-            return [ReservationWithSlot(**dict(row)) for row in rows]
+            with span("pydantic.build", rows=len(rows)):
+                return [ReservationWithSlot(**dict(row)) for row in rows]
         except PostgresError as e:
             raise DBUnknownException()
 
@@ -52,6 +72,7 @@ class AdminExamManagementServiceImpl(AdminExamManagementService):
         # admin can modify both confirmed/unconfirmed reservation
         try:
             await self.reservation_repo.modify_from_admin(id, reservation)
+            self.calendar_cache.invalidate()
         except (NoSuchReservationException, NoSuchSlotException) as e:
             raise NotFoundException(str(e))
         except SlotLimitExceededException as e:
@@ -63,6 +84,7 @@ class AdminExamManagementServiceImpl(AdminExamManagementService):
         # admin can delete both confirmed/unconfirmed reservation
         try:
             await self.reservation_repo.delete_from_admin(reservation_id)
+            self.calendar_cache.invalidate()
         except NoSuchReservationException as e:
             raise NotFoundException(str(e))
         except PostgresError as e:
@@ -72,9 +94,25 @@ class AdminExamManagementServiceImpl(AdminExamManagementService):
         # only admin can confirm reservation
         try:
             await self.reservation_repo.confirm_by_id(reservation_id)
+            self.calendar_cache.invalidate()
         except NoSuchReservationException as e:
             raise NotFoundException(str(e))
         except SlotLimitExceededException as e:
             raise DBConflictException(str(e))
         except PostgresError as e:
             raise DBUnknownException()
+
+    async def fill_slot(self, slot_id: int, trigger: str = "api") -> SlotFillResult:
+        # confirms the oldest unconfirmed reservations of the slot while they fit
+        try:
+            rows = await self.reservation_repo.confirm_pending_fifo(slot_id)
+            if rows:
+                self.calendar_cache.invalidate()
+            FILLED_RESERVATIONS.inc(trigger, amount=len(rows))
+            return SlotFillResult.from_rows(slot_id, rows)
+        except NoSuchSlotException as e:
+            raise NotFoundException(str(e))
+        except SlotLimitExceededException as e:
+            raise DBConflictException(str(e))
+        except PostgresError as e:
+            raise DBUnknownException()
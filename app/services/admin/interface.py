@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Optional
 
-from app.models.reservation_model import ReservationDto
+from app.models.reservation_model import ReservationDto, SlotFillResult
 from app.models.slot_model import Slot
 
 
@@ -13,6 +13,9 @@ class AdminExamManagementService(ABC):
     @abstractmethod
     async def delete_exam_slot(self, slot_id: int): pass
 
+    @abstractmethod
+    async def set_slot_capacity(self, slot_id: int, capacity: int): pass
+
     @abstractmethod
     async def find_reservations(self, start_at: Optional[datetime], end_at: Optional[datetime]): pass
 
@@ -24,3 +27,6 @@ class AdminExamManagementService(ABC):
 
     @abstractmethod
     async def confirm_reservation(self, reservation_id: int): pass
+
+    @abstractmethod
+    async def fill_slot(self, slot_id: int, trigger: str = "api") -> SlotFillResult: pass
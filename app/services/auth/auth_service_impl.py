@@ -1,10 +1,12 @@
 import asyncio
+from typing import Optional
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from asyncpg import PostgresError
 
 from app.models.user_model import User
+from app.monitoring.tracing import span
 from app.repositories.user.dbimpl import UserRepository
 from app.repositories.user.exceptions import NoSuchUserException, UserNameAlreadyExistsException
 from app.services.auth.interface import AuthService
@@ -12,13 +14,15 @@ from app.services.exceptions import DBConflictException, DBUnknownException, Use
 
 
 class AuthServiceImpl(AuthService):
-    def __init__(self, repo: UserRepository):
+    def __init__(self, repo: UserRepository, ph: Optional[PasswordHasher] = None):
         self.repo = repo
-        self.ph = PasswordHasher()
+        # PasswordHasher is immutable after construction; share one per application
+        self.ph = ph or PasswordHasher()
 
     # Non-Login State
     async def add_user(self, user: User):
-        hashed_password = self.ph.hash(user.password)
+        with span("argon2.hash"):
+            hashed_password = self.ph.hash(user.password)
         try:
             ret = await self.repo.insert(user.username, hashed_password)
             if ret is None:
@@ -36,10 +40,12 @@ class AuthServiceImpl(AuthService):
         except PostgresError as e:
             raise DBUnknownException()
 
-        user = User(**dict(user))
+        with span("pydantic.build", rows=1):
+            user = User(**dict(user))
 
         try:
-            self.ph.verify(user.password, password)
+            with span("argon2.verify"):
+                self.ph.verify(user.password, password)
             if self.ph.check_needs_rehash(user.password):
                 new_pass = self.ph.hash(password)
                 # 실패해도 큰 문제 없음.. 비동기
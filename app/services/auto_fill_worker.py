@@ -0,0 +1,35 @@
+import os
+from typing import Optional
+
+from app.repositories.reservation.interface import ReservationRepository
+from app.services.admin.interface import AdminExamManagementService
+from app.services.exceptions import NotFoundException
+from app.services.periodic_worker import PeriodicWorker
+
+
+class AutoFillWorker(PeriodicWorker):
+    """
+    Runs the FIFO slot fill of the admin service on every upcoming slot whose queue head could fit,
+    `slots_per_run` slots per run. Off unless AUTO_FILL_INTERVAL is set, since it takes the admin's
+    decision away.
+    """
+
+    name = "auto_fill"
+
+    def __init__(self, admin_service: AdminExamManagementService, reservation_repo: ReservationRepository,
+                 interval: Optional[float] = None, slots_per_run: Optional[int] = None):
+        super().__init__(float(os.getenv("AUTO_FILL_INTERVAL", 0)) if interval is None else interval)
+        self.admin_service = admin_service
+        self.reservation_repo = reservation_repo
+        self.slots_per_run = int(os.getenv("AUTO_FILL_SLOTS_PER_RUN", 100)) if slots_per_run is None \
+            else slots_per_run
+
+    async def run_once(self) -> int:
+        confirmed = 0
+        for slot_id in await self.reservation_repo.find_fillable_slot_ids(self.slots_per_run):
+            try:
+                confirmed += len((await self.admin_service.fill_slot(slot_id, trigger="auto")).confirmed_ids)
+            except NotFoundException:
+                # deleted since it was listed
+                continue
+        return confirmed
@@ -0,0 +1,45 @@
+import os
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from app.monitoring.metrics import CALENDAR_CACHE
+
+
+class CalendarCache:
+    """
+    Per (month, tz) calendar buckets shared by the user and admin services.
+
+    Any reservation or slot write in this process bumps the generation, which drops every bucket
+    at once. Writes served by other workers cannot reach this process, so buckets also expire
+    after `ttl` seconds; that bounds how stale a calendar can be under multiple workers.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl = float(os.getenv("CALENDAR_CACHE_TTL", 30)) if ttl is None else ttl
+        self.__clock = clock
+        self.__generation = 0
+        self.__buckets: Dict[Hashable, Tuple[int, float, object]] = {}
+
+    def get(self, key: Hashable):
+        entry = self.__buckets.get(key)
+        if entry is not None:
+            generation, stored_at, value = entry
+            if generation == self.__generation and self.__clock() - stored_at < self.ttl:
+                CALENDAR_CACHE.inc("hit")
+                return value
+            del self.__buckets[key]
+        CALENDAR_CACHE.inc("miss")
+        return None
+
+    def put(self, key: Hashable, value, generation: int):
+        # a write that landed while the bucket was being computed makes it stale already
+        if generation == self.__generation:
+            self.__buckets[key] = (generation, self.__clock(), value)
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    def invalidate(self):
+        self.__generation += 1
+        self.__buckets.clear()
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+from time import perf_counter
+from typing import Callable, Optional
+
+from app.monitoring.metrics import EXPIRED_RESERVATIONS, EXPIRY_BATCH_DURATION, EXPIRY_BATCH_SIZE, EXPIRY_LAST_RUN, \
+    EXPIRY_THROTTLED
+from app.repositories.reservation.interface import ReservationRepository
+from app.services.calendar_cache import CalendarCache
+from app.services.periodic_worker import PeriodicWorker
+from app.services.user.user_service_impl import DAYS_LEFT
+
+MIN_BATCH_SIZE = 10
+
+
+def pool_load(pool) -> Optional[Callable[[], float]]:
+    """Share of the pool's connections in use, for pools that report it (the asyncpg pool)."""
+    if not all(hasattr(pool, name) for name in ("get_size", "get_idle_size", "get_max_size")):
+        return None
+    return lambda: (pool.get_size() - pool.get_idle_size()) / max(pool.get_max_size(), 1)
+
+
+class ExpiryWorker(PeriodicWorker):
+    """
+    Deletes unconfirmed reservations whose slot starts within DAYS_LEFT days. Their users can no longer
+    change or cancel them, so they only bloat the trigger scans and admin listings.
+
+    Each run deletes in batches until a batch comes back short. The worker backs off while request
+    traffic holds most of the pool (`load` above `max_load`), halves the batch when a batch takes longer
+    than `max_batch_seconds` and sleeps as long as the last batch took between batches, so it never
+    uses more than half of one connection.
+    """
+
+    name = "expiry"
+
+    def __init__(self, reservation_repo: ReservationRepository, days_left: int = DAYS_LEFT,
+                 interval: Optional[float] = None, batch_size: Optional[int] = None,
+                 max_batch_seconds: float = 0.25, load: Optional[Callable[[], float]] = None, max_load: float = 0.8,
+                 calendar_cache: Optional[CalendarCache] = None):
+        super().__init__(float(os.getenv("EXPIRY_INTERVAL", 60)) if interval is None else interval)
+        self.reservation_repo = reservation_repo
+        self.days_left = days_left
+        self.max_batch_size = int(os.getenv("EXPIRY_BATCH_SIZE", 500)) if batch_size is None else batch_size
+        self.batch_size = self.max_batch_size
+        self.max_batch_seconds = max_batch_seconds
+        self.load = load or (lambda: 0.0)
+        self.max_load = max_load
+        self.calendar_cache = calendar_cache
+
+    async def run_once(self) -> int:
+        """One pass over the stale reservations; returns how many were deleted."""
+        total = 0
+        while True:
+            if self.load() > self.max_load:
+                EXPIRY_THROTTLED.inc("pool_busy")
+                break
+
+            requested = self.batch_size
+            start = perf_counter()
+            deleted = await self.reservation_repo.expire_unconfirmed(self.days_left, requested)
+            elapsed = perf_counter() - start
+            EXPIRY_BATCH_DURATION.observe(elapsed)
+            EXPIRED_RESERVATIONS.inc(amount=deleted)
+            total += deleted
+
+            if elapsed > self.max_batch_seconds:
+                EXPIRY_THROTTLED.inc("slow_batch")
+                self.batch_size = max(self.batch_size // 2, MIN_BATCH_SIZE)
+            elif deleted == requested:
+                self.batch_size = min(self.batch_size * 2, self.max_batch_size)
+            EXPIRY_BATCH_SIZE.set(self.batch_size)
+
+            if deleted < requested:
+                break
+            await asyncio.sleep(elapsed)
+
+        # pending amounts are part of the calendar buckets
+        if total and self.calendar_cache is not None:
+            self.calendar_cache.invalidate()
+        EXPIRY_LAST_RUN.set(time.time())
+        return total
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.monitoring.metrics import WORKER_RUNS
+
+
+class PeriodicWorker(ABC):
+    """Runs `run_once` on the event loop every `interval` seconds between `start()` and `stop()`; 0 disables it."""
+
+    name = "worker"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.__task: Optional[asyncio.Task] = None
+        self.__logger = logging.getLogger(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    @abstractmethod
+    async def run_once(self) -> int:
+        """One pass; returns how many rows it changed."""
+        pass
+
+    async def run(self):
+        while True:
+            try:
+                changed = await self.run_once()
+                WORKER_RUNS.inc(self.name, "ok")
+                if changed:
+                    self.__logger.info(f"{self.name}: {changed} reservations")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                WORKER_RUNS.inc(self.name, "error")
+                self.__logger.exception(f"{self.name} run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled and self.__task is None:
+            self.__task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
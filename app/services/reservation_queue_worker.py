@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+
+from app.monitoring.metrics import QUEUE_WAIT, QUEUED_RESERVATIONS
+from app.services.periodic_worker import PeriodicWorker
+from app.services.user.interface import ExamManagementService
+
+
+class ReservationQueueWorker(PeriodicWorker):
+    """
+    Applies tickets queued with `Prefer: respond-async`, `batch_size` per run of the repository, until the
+    queue is empty. Each ticket commits on its own and workers in other processes skip tickets already
+    claimed (SKIP LOCKED), so throughput follows what the database sustains rather than how many requests
+    are waiting on slot locks.
+    """
+
+    name = "reservation_queue"
+
+    def __init__(self, service: ExamManagementService, interval: Optional[float] = None,
+                 batch_size: Optional[int] = None):
+        super().__init__(float(os.getenv("RESERVATION_QUEUE_INTERVAL", 0.5)) if interval is None else interval)
+        self.service = service
+        self.batch_size = int(os.getenv("RESERVATION_QUEUE_BATCH_SIZE", 50)) if batch_size is None else batch_size
+
+    async def run_once(self) -> int:
+        total = 0
+        while True:
+            tickets = await self.service.process_reservation_queue(self.batch_size)
+            for ticket in tickets:
+                QUEUED_RESERVATIONS.inc(ticket.status)
+                QUEUE_WAIT.observe((ticket.processed_at - ticket.created_at).total_seconds())
+            total += len(tickets)
+            if len(tickets) < self.batch_size:
+                return total
@@ -1,13 +1,20 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from app.models.reservation_model import Reservation, ReservationDto
+from app.models.reservation_model import Reservation, ReservationDto, ReservationTicket, WaitlistEntry
 
 
 class ExamManagementService(ABC):
     @abstractmethod
-    async def find_slots(self, start_at: datetime, end_at: datetime): pass
+    async def find_slots(self, start_at: datetime, end_at: datetime, min_remaining: Optional[int] = None,
+                         bookable_only: bool = False, limit: Optional[int] = None): pass
+
+    @abstractmethod
+    async def find_nearest_slots(self, target: datetime, amount: int, k: int = 5): pass
+
+    @abstractmethod
+    async def find_calendar(self, start: date, end: date, tz: str): pass
 
     @abstractmethod
     async def find_slot_by_id(self, slot_id: int): pass
@@ -20,10 +27,30 @@ class ExamManagementService(ABC):
     async def find_reservation_by_id(self, reservation_id: int, user_id: Optional[int] = None): pass
 
     @abstractmethod
-    async def add_reservation(self, reservation: Reservation): pass
+    async def add_reservation(self, reservation: Reservation, waitlist: bool = False) -> Optional[WaitlistEntry]:
+        """With `waitlist`, a reservation over the slot limit joins the slot's waitlist and its entry is returned."""
+        pass
 
     @abstractmethod
     async def modify_reservation(self, id: int, reservation: ReservationDto, user_id: int): pass
 
     @abstractmethod
     async def delete_reservation(self, reservation_id: int, user_id: int): pass
+
+    @abstractmethod
+    async def enqueue_reservation(self, reservation: Reservation) -> ReservationTicket: pass
+
+    @abstractmethod
+    async def find_ticket(self, ticket_id: int, user_id: int) -> ReservationTicket: pass
+
+    @abstractmethod
+    async def process_reservation_queue(self, limit: int) -> List[ReservationTicket]: pass
+
+    @abstractmethod
+    async def find_waitlist(self, user_id: int) -> List[WaitlistEntry]: pass
+
+    @abstractmethod
+    async def leave_waitlist(self, entry_id: int, user_id: int): pass
+
+    @abstractmethod
+    async def promote_waitlist(self, limit: int) -> List[WaitlistEntry]: pass
@@ -1,44 +1,100 @@
 import logging
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
 from asyncpg import PostgresError
 from fastapi import Depends
 
-from app.models.reservation_model import Reservation, ReservationDto
-from app.models.slot_model import SlotWithAmount
+from app.models.reservation_model import Reservation, ReservationDto, ReservationTicket, TICKET_ACCEPTED, \
+    TICKET_QUEUED, WaitlistEntry
+from app.models.slot_model import CalendarDay, SlotWithAmount
 from app.models.slot_reservation_joined_model import ReservationWithSlot
+from app.monitoring.metrics import QUEUED_RESERVATIONS, WAITLIST_ENTRIES
+from app.monitoring.tracing import span
 from app.repositories.reservation.dbimpl import ReservationRepository
 from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
     ReservationAlreadyConfirmedException, \
     SlotLimitExceededException, UserMismatchException
+from app.repositories.reservation_queue.exceptions import NoSuchTicketException
+from app.repositories.reservation_queue.interface import ReservationQueueRepository
 from app.repositories.slot.dbimpl import SlotRepository
 from app.repositories.slot.exceptions import NoSuchSlotException
+from app.repositories.waitlist.exceptions import NoSuchWaitlistEntryException
+from app.repositories.waitlist.interface import WaitlistRepository
+from app.services.calendar_cache import CalendarCache
 from app.services.exceptions import DBConflictException, DBUnknownException, NotFoundException
 from app.services.user.interface import ExamManagementService
 
+# reservations can be made or changed only this many days before the slot starts
+DAYS_LEFT = 3
+
 
 class ExamManagementServiceImpl(ExamManagementService):
-    def __init__(self, slot_repo: SlotRepository = Depends(), reservation_repo: ReservationRepository = Depends()):
+    def __init__(self, slot_repo: SlotRepository = Depends(), reservation_repo: ReservationRepository = Depends(),
+                 calendar_cache: Optional[CalendarCache] = None,
+                 queue_repo: Optional[ReservationQueueRepository] = None,
+                 waitlist_repo: Optional[WaitlistRepository] = None):
         self.slot_repo = slot_repo
         self.reservation_repo = reservation_repo
+        self.calendar_cache = calendar_cache or CalendarCache()
+        self.queue_repo = queue_repo
+        self.waitlist_repo = waitlist_repo
         self.__logger = logging.getLogger(__name__)
 
     async def find_slots(
             self,
             start_at: datetime,
-            end_at: datetime
+            end_at: datetime,
+            min_remaining: Optional[int] = None,
+            bookable_only: bool = False,
+            limit: Optional[int] = None
     ):
         try:
-            rows = await self.slot_repo.find(start_at=start_at, end_at=end_at)
-            return [SlotWithAmount(**dict(row)) for row in rows]
+            rows = await self.slot_repo.find(start_at=start_at, end_at=end_at, min_remaining=min_remaining,
+                                             days_left=DAYS_LEFT if bookable_only else None, limit=limit)
+            with span("pydantic.build", rows=len(rows)):
+                return [SlotWithAmount(**dict(row)) for row in rows]
         except PostgresError as e:
             raise DBUnknownException()
 
+    async def find_nearest_slots(self, target: datetime, amount: int, k: int = 5):
+        try:
+            rows = await self.slot_repo.find_nearest(target, amount, days_left=DAYS_LEFT, k=k)
+            with span("pydantic.build", rows=len(rows)):
+                return [SlotWithAmount(**dict(row)) for row in rows]
+        except PostgresError as e:
+            raise DBUnknownException(str(e))
+
+    async def find_calendar(self, start: date, end: date, tz: str):
+        # one query per month, each cached as a whole so neighbouring ranges share buckets
+        days = []
+        month = start.replace(day=1)
+        while month <= end:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            days.extend(day for day in await self.__calendar_month(month, next_month - timedelta(days=1), tz)
+                        if start <= day.day <= end)
+            month = next_month
+        return days
+
+    async def __calendar_month(self, first: date, last: date, tz: str):
+        key = (first, tz)
+        days = self.calendar_cache.get(key)
+        if days is None:
+            generation = self.calendar_cache.generation
+            try:
+                rows = await self.slot_repo.daily_totals(first, last, tz)
+            except PostgresError as e:
+                raise DBUnknownException(str(e))
+            with span("pydantic.build", rows=len(rows)):
+                days = [CalendarDay.from_daily_totals(row) for row in rows]
+            self.calendar_cache.put(key, days, generation)
+        return days
+
     async def find_slot_by_id(self, slot_id: int):
         try:
             row = await self.slot_repo.find_by_id(slot_id)
-            return SlotWithAmount(**dict(row))
+            with span("pydantic.build", rows=1):
+                return SlotWithAmount(**dict(row))
         except NoSuchSlotException as e:
             raise NotFoundException(str(e))
         except PostgresError as e:
@@ -48,32 +104,53 @@ class ExamManagementServiceImpl(ExamManagementService):
                                 end_at: Optional[datetime]):
         try:
             rows = await self.reservation_repo.find(user_id=user_id, start_at=start_at, end_at=end_at)
-            return [ReservationWithSlot(**dict(row)) for row in rows]
+            with span("pydantic.build", rows=len(rows)):
+                return [ReservationWithSlot(**dict(row)) for row in rows]
         except PostgresError as e:
             raise DBUnknownException(str(e))
 
     async def find_reservation_by_id(self, reservation_id: int, user_id: Optional[int] = None):
         try:
             row = await self.reservation_repo.find_by_id(reservation_id, user_id=user_id)
-            return ReservationWithSlot(**dict(row))
+            with span("pydantic.build", rows=1):
+                return ReservationWithSlot(**dict(row))
         except NoSuchReservationException as e:
             raise NotFoundException(str(e))
 
-    async def add_reservation(self, reservation: Reservation):
+    async def add_reservation(self, reservation: Reservation, waitlist: bool = False) -> Optional[WaitlistEntry]:
         try:
-            await self.reservation_repo.insert_if_days_left(reservation, 3)
+            await self.reservation_repo.insert_if_days_left(reservation, DAYS_LEFT)
+            self.calendar_cache.invalidate()
+            return None
+        except SlotLimitExceededException as e:
+            if not waitlist:
+                raise DBConflictException(str(e))
+            return await self.__join_waitlist(reservation)
         except NoSuchSlotException as e:
             raise NotFoundException(str(e))
-        except (DaysNotLeftEnoughException, SlotLimitExceededException) as e:
+        except DaysNotLeftEnoughException as e:
             raise DBConflictException(str(e))
         except PostgresError as e:
             raise DBUnknownException(str(e))
 
+    async def __join_waitlist(self, reservation: Reservation) -> WaitlistEntry:
+        try:
+            entry = WaitlistEntry(**dict(await self.waitlist_repo.insert(reservation)))
+            WAITLIST_ENTRIES.inc("added")
+            return entry
+        except NoSuchSlotException as e:
+            # deleted since the insert
+            raise NotFoundException(str(e))
+        except PostgresError as e:
+            raise DBUnknownException(str(e))
+
     async def modify_reservation(self, id: int, reservation: ReservationDto, user_id: int):
         # async def modify_reservation(self, reservation: Reservation, user_id: int):
         # user can modify only user's own unconfirmed reservation
         try:
-            await self.reservation_repo.modify_unconfirmed_if_days_left_and_user_match(id, reservation, user_id, 3)
+            await self.reservation_repo.modify_unconfirmed_if_days_left_and_user_match(id, reservation, user_id,
+                                                                                       DAYS_LEFT)
+            self.calendar_cache.invalidate()
         except (NoSuchReservationException, NoSuchSlotException) as e:
             raise NotFoundException(str(e))
         except (SlotLimitExceededException, ReservationAlreadyConfirmedException, UserMismatchException,
@@ -86,9 +163,53 @@ class ExamManagementServiceImpl(ExamManagementService):
         # user can delete only user's own unconfirmed reservation
         try:
             await self.reservation_repo.delete_unconfirmed(reservation_id, user_id)
+            self.calendar_cache.invalidate()
         except NoSuchReservationException as e:
             raise NotFoundException(str(e))
         except (ReservationAlreadyConfirmedException, UserMismatchException) as e:
             raise DBConflictException(str(e))
         except PostgresError as e:
             raise DBUnknownException(str(e))
+
+    async def enqueue_reservation(self, reservation: Reservation) -> ReservationTicket:
+        # the slot rules are applied later by the queue worker, see process_reservation_queue
+        try:
+            row = await self.queue_repo.enqueue(reservation)
+            QUEUED_RESERVATIONS.inc(TICKET_QUEUED)
+            return ReservationTicket(**dict(row))
+        except PostgresError as e:
+            raise DBUnknownException(str(e))
+
+    async def find_ticket(self, ticket_id: int, user_id: int) -> ReservationTicket:
+        try:
+            return ReservationTicket(**dict(await self.queue_repo.find_by_id(ticket_id, user_id)))
+        except NoSuchTicketException as e:
+            raise NotFoundException(str(e))
+
+    async def process_reservation_queue(self, limit: int) -> List[ReservationTicket]:
+        rows = await self.queue_repo.process(DAYS_LEFT, limit)
+        tickets = [ReservationTicket(**dict(row)) for row in rows]
+        if any(ticket.status == TICKET_ACCEPTED for ticket in tickets):
+            self.calendar_cache.invalidate()
+        return tickets
+
+    async def find_waitlist(self, user_id: int) -> List[WaitlistEntry]:
+        try:
+            return [WaitlistEntry(**dict(row)) for row in await self.waitlist_repo.find(user_id)]
+        except PostgresError as e:
+            raise DBUnknownException(str(e))
+
+    async def leave_waitlist(self, entry_id: int, user_id: int):
+        try:
+            await self.waitlist_repo.delete_waiting(entry_id, user_id)
+        except NoSuchWaitlistEntryException as e:
+            raise NotFoundException(str(e))
+        except PostgresError as e:
+            raise DBUnknownException(str(e))
+
+    async def promote_waitlist(self, limit: int) -> List[WaitlistEntry]:
+        entries = [WaitlistEntry(**dict(row)) for row in await self.waitlist_repo.promote(DAYS_LEFT, limit)]
+        # promoted entries are unconfirmed reservations, which the calendar counts
+        if entries:
+            self.calendar_cache.invalidate()
+        return entries
@@ -0,0 +1,28 @@
+import os
+from typing import Optional
+
+from app.monitoring.metrics import WAITLIST_ENTRIES
+from app.services.periodic_worker import PeriodicWorker
+from app.services.user.interface import ExamManagementService
+
+
+class WaitlistWorker(PeriodicWorker):
+    """
+    Promotes waitlisted reservations of the slots that released confirmed seats, `slots_per_run` slots
+    per run. Only slots whose released seats cover the head of their waitlist are visited, so an idle
+    run is one query on the small waitlist_released table.
+    """
+
+    name = "waitlist"
+
+    def __init__(self, service: ExamManagementService, interval: Optional[float] = None,
+                 slots_per_run: Optional[int] = None):
+        super().__init__(float(os.getenv("WAITLIST_INTERVAL", 1)) if interval is None else interval)
+        self.service = service
+        self.slots_per_run = int(os.getenv("WAITLIST_SLOTS_PER_RUN", 100)) if slots_per_run is None \
+            else slots_per_run
+
+    async def run_once(self) -> int:
+        promoted = await self.service.promote_waitlist(self.slots_per_run)
+        WAITLIST_ENTRIES.inc("promoted", amount=len(promoted))
+        return len(promoted)
@@ -2,5 +2,10 @@ CREATE TABLE slots
 (
     id         SERIAL PRIMARY KEY NOT NULL,
     time_range TSTZRANGE          NOT NULL,
+    -- confirmed amount the slot can hold, read by the slot limit triggers in 04-create-reservation-table.sql
+    capacity   INTEGER            NOT NULL DEFAULT 50000 CHECK (capacity >= 0),
     EXCLUDE USING gist (time_range WITH &&)
-);
\ No newline at end of file
+);
+
+-- btree_gist: nearest-start search (ORDER BY LOWER(time_range) <-> $1) walks this index in distance order
+CREATE INDEX slots_lower_time_range_gist_idx ON slots USING gist (LOWER(time_range));
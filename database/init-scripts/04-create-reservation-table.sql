@@ -5,13 +5,18 @@ CREATE TABLE reservations
         CONSTRAINT "reservations__slots.id_fk" REFERENCES slots (id) ON DELETE CASCADE,
     user_id      INTEGER                                            NOT NULL
         CONSTRAINT "reservations__users.id_fk" REFERENCES users (id),
-    amount       INTEGER                  DEFAULT 0                 NOT NULL CHECK (amount >= 0 AND amount <= 50000),
+    amount       INTEGER                  DEFAULT 0                 NOT NULL CHECK (amount >= 0),
     confirmed    bool                     DEFAULT FALSE             NOT NULL,
     created_at   TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
     confirmed_at TIMESTAMP WITH TIME ZONE                           NULL,
     updated_at   TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL
 );
 
+-- the slot limit triggers, the per-slot confirmed SUM of every slot query and find_reservation_by_slot
+-- all look reservations up by (slot_id, confirmed); users list their own reservations by user_id
+CREATE INDEX reservations_slot_id_confirmed_idx ON reservations (slot_id, confirmed);
+CREATE INDEX reservations_user_id_idx ON reservations (user_id);
+
 -- reservations table TRIGGER: update modification
 CREATE OR REPLACE FUNCTION update_modified_col()
     RETURNS TRIGGER AS
@@ -32,9 +37,6 @@ EXECUTE FUNCTION update_modified_col();
 CREATE OR REPLACE FUNCTION update_confirmed_col()
     RETURNS TRIGGER AS
 $$
-DECLARE
-    slot_count INTEGER;
-    dummy      INTEGER;
 BEGIN
     IF (NEW.confirmed = TRUE AND OLD.confirmed = FALSE) THEN
         NEW.confirmed_at = CURRENT_TIMESTAMP;
@@ -42,29 +44,6 @@ BEGIN
         NEW.confirmed_at = NULL;
     END IF;
 
-    -- admin
-    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경된 경우
-    IF (NEW.confirmed = TRUE AND (OLD.confirmed = FALSE OR NEW.amount != OLD.amount)) THEN
-        -- lock rows with same slot_id
-        SELECT 1
-        INTO dummy
-        FROM reservations
-        WHERE slot_id = NEW.slot_id
-        ORDER BY id FOR UPDATE;
-
-        -- slot_count = count reserved population
-        SELECT COALESCE(SUM(amount), 0)
-        INTO slot_count
-        FROM reservations
-        WHERE slot_id = NEW.slot_id
-          AND confirmed = TRUE
-          AND id != OLD.id;
-
-        IF (slot_count + NEW.amount > 50000) THEN
-            RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = 'Slot population limit 50000 exceeded';
-        END IF;
-    END IF;
-
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -75,20 +54,69 @@ CREATE TRIGGER update_user_confirmedtime
     FOR EACH ROW
 EXECUTE FUNCTION update_confirmed_col();
 
+-- reservations table TRIGGER: check slot limit on update, once per statement and slot, so a FIFO fill that
+-- confirms thousands of rows locks and sums its slot once instead of once per row
+CREATE OR REPLACE FUNCTION check_slot_limit_on_update()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_ids INTEGER[];
+    exceeded RECORD;
+BEGIN
+    -- admin
+    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경되거나 다른 슬롯으로 옮겨진 예약의 슬롯
+    SELECT ARRAY_AGG(DISTINCT n.slot_id ORDER BY n.slot_id)
+    INTO slot_ids
+    FROM new_rows n
+             JOIN old_rows o ON o.id = n.id
+    WHERE n.confirmed = TRUE
+      AND (o.confirmed = FALSE OR n.amount != o.amount OR n.slot_id != o.slot_id);
+    IF slot_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- lock the slot rows in id order: every write that can raise a slot's confirmed amount serializes on it
+    PERFORM 1 FROM slots WHERE id = ANY (slot_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    -- a new query, so the sums see what the writers this one waited for committed
+    SELECT s.capacity
+    INTO exceeded
+    FROM slots s
+    WHERE s.id = ANY (slot_ids)
+      AND (SELECT COALESCE(SUM(r.amount), 0)
+           FROM reservations r
+           WHERE r.slot_id = s.id
+             AND r.confirmed = TRUE) > s.capacity
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', exceeded.capacity);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER check_slot_limit_after_update
+    AFTER UPDATE
+    ON reservations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION check_slot_limit_on_update();
+
 -- reservations table TRIGGER: check slot limit on insert
 CREATE OR REPLACE FUNCTION check_slot_limit_on_insert()
     RETURNS TRIGGER AS
 $$
 DECLARE
-    slot_count INTEGER;
-    dummy      INTEGER;
+    slot_count    INTEGER;
+    slot_capacity INTEGER;
 BEGIN
-    -- lock rows with same slot_id
-    SELECT 1
-    INTO dummy
-    FROM reservations
-    WHERE slot_id = NEW.slot_id
-    ORDER BY id FOR UPDATE;
+    -- lock the slot row (see check_slot_limit_on_update)
+    SELECT capacity
+    INTO slot_capacity
+    FROM slots
+    WHERE id = NEW.slot_id
+        FOR NO KEY UPDATE;
 
     -- slot_count = count reserved population
     SELECT COALESCE(SUM(amount), 0)
@@ -98,8 +126,8 @@ BEGIN
       AND confirmed = TRUE;
 
     -- check if adding new reservation would exceed the limit
-    IF (slot_count + NEW.amount > 50000) THEN
-        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = 'Slot population limit 50000 exceeded';
+    IF (slot_count + NEW.amount > slot_capacity) THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', slot_capacity);
     END IF;
 
     RETURN NEW;
@@ -110,4 +138,33 @@ CREATE TRIGGER check_slot_limit_before_insert
     BEFORE INSERT
     ON reservations
     FOR EACH ROW
-EXECUTE FUNCTION check_slot_limit_on_insert();
\ No newline at end of file
+EXECUTE FUNCTION check_slot_limit_on_insert();
+
+-- slots table TRIGGER: capacity can not drop below the confirmed amount
+CREATE OR REPLACE FUNCTION check_slot_capacity()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count INTEGER;
+BEGIN
+    -- the UPDATE already holds the slot row lock the reservation triggers take
+    SELECT COALESCE(SUM(amount), 0)
+    INTO slot_count
+    FROM reservations
+    WHERE slot_id = NEW.id
+      AND confirmed = TRUE;
+
+    IF (slot_count > NEW.capacity) THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('%s already confirmed', slot_count);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER check_slot_capacity_before_update
+    BEFORE UPDATE OF capacity
+    ON slots
+    FOR EACH ROW
+    WHEN (NEW.capacity < OLD.capacity)
+EXECUTE FUNCTION check_slot_capacity();
\ No newline at end of file
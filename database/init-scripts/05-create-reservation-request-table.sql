@@ -0,0 +1,19 @@
+-- reservations submitted with `Prefer: respond-async`, applied later by the queue workers.
+-- slot_id has no foreign key: a request for a missing slot is kept and rejected with a reason
+CREATE TABLE reservation_requests
+(
+    id             BIGSERIAL PRIMARY KEY                              NOT NULL,
+    slot_id        INTEGER                                            NOT NULL,
+    user_id        INTEGER                                            NOT NULL
+        CONSTRAINT "reservation_requests__users.id_fk" REFERENCES users (id) ON DELETE CASCADE,
+    amount         INTEGER                                            NOT NULL CHECK (amount > 0),
+    status         VARCHAR(16)              DEFAULT 'queued'          NOT NULL,
+    reservation_id INTEGER                                            NULL,
+    error          TEXT                                               NULL,
+    created_at     TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    processed_at   TIMESTAMP WITH TIME ZONE                           NULL
+);
+
+-- the workers claim the oldest queued requests; processed ones drop out of the index
+CREATE INDEX reservation_requests_queued_idx ON reservation_requests (id) WHERE status = 'queued';
+CREATE INDEX reservation_requests_user_id_idx ON reservation_requests (user_id);
@@ -0,0 +1,78 @@
+-- reservations that did not fit when they were made (SlotLimitExceeded), promoted in request order
+-- once confirmed seats of their slot are released
+CREATE TABLE waitlist_entries
+(
+    id             BIGSERIAL PRIMARY KEY                              NOT NULL,
+    slot_id        INTEGER                                            NOT NULL
+        CONSTRAINT "waitlist_entries__slots.id_fk" REFERENCES slots (id) ON DELETE CASCADE,
+    user_id        INTEGER                                            NOT NULL
+        CONSTRAINT "waitlist_entries__users.id_fk" REFERENCES users (id) ON DELETE CASCADE,
+    amount         INTEGER                                            NOT NULL CHECK (amount > 0),
+    status         VARCHAR(16)              DEFAULT 'waiting'         NOT NULL,
+    reservation_id INTEGER                                            NULL,
+    created_at     TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    promoted_at    TIMESTAMP WITH TIME ZONE                           NULL
+);
+
+-- the head of each slot's waitlist; promoted and expired entries drop out of the index
+CREATE INDEX waitlist_entries_waiting_idx ON waitlist_entries (slot_id, id) WHERE status = 'waiting';
+CREATE INDEX waitlist_entries_user_id_idx ON waitlist_entries (user_id);
+
+-- confirmed seats released per slot since its waitlist was last promoted. No foreign key: the trigger
+-- below also writes it while a slot delete cascades to the slot's reservations
+CREATE TABLE waitlist_released
+(
+    slot_id  INTEGER PRIMARY KEY NOT NULL,
+    released INTEGER             NOT NULL
+);
+
+-- reservations table TRIGGER: record the drop of a slot's confirmed amount for its waitlist
+CREATE OR REPLACE FUNCTION record_released_seats()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    freed INTEGER;
+BEGIN
+    freed = OLD.amount;
+    IF (TG_OP = 'UPDATE' AND NEW.confirmed = TRUE AND NEW.slot_id = OLD.slot_id) THEN
+        freed = freed - NEW.amount;
+    END IF;
+
+    IF (freed > 0 AND EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = OLD.slot_id AND status = 'waiting')) THEN
+        INSERT INTO waitlist_released(slot_id, released)
+        VALUES (OLD.slot_id, freed)
+        ON CONFLICT (slot_id) DO UPDATE SET released = waitlist_released.released + EXCLUDED.released;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER record_released_seats_after_change
+    AFTER UPDATE OF slot_id, amount, confirmed OR DELETE
+    ON reservations
+    FOR EACH ROW
+    WHEN (OLD.confirmed = TRUE)
+EXECUTE FUNCTION record_released_seats();
+
+-- slots table TRIGGER: a raised capacity releases seats as well
+CREATE OR REPLACE FUNCTION record_released_capacity()
+    RETURNS TRIGGER AS
+$$
+BEGIN
+    IF (EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = NEW.id AND status = 'waiting')) THEN
+        INSERT INTO waitlist_released(slot_id, released)
+        VALUES (NEW.id, NEW.capacity - OLD.capacity)
+        ON CONFLICT (slot_id) DO UPDATE SET released = waitlist_released.released + EXCLUDED.released;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER record_released_capacity_after_update
+    AFTER UPDATE OF capacity
+    ON slots
+    FOR EACH ROW
+    WHEN (NEW.capacity > OLD.capacity)
+EXECUTE FUNCTION record_released_capacity();
@@ -0,0 +1,14 @@
+-- the scripts above already build the schema every file in database/migrations leads to, so the database
+-- starts at the latest version instead of 0 (app/database/migrate.py treats versions up to a 'baseline'
+-- row as applied). Raise the version here together with each new migration.
+CREATE TABLE schema_migrations
+(
+    version     INTEGER PRIMARY KEY,
+    name        TEXT                     NOT NULL,
+    checksum    TEXT                     NOT NULL,
+    duration_ms INTEGER                  NOT NULL,
+    applied_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations(version, name, checksum, duration_ms)
+VALUES (10, 'init_scripts', 'baseline', 0);
@@ -0,0 +1,6 @@
+"""Nearest-slot search index (03-create-slot-table.sql has it for new databases)."""
+TRANSACTIONAL = False
+
+
+async def up(conn, ctx):
+    await ctx.create_index_concurrently("slots_lower_time_range_gist_idx", "slots USING gist (LOWER(time_range))")
@@ -0,0 +1,8 @@
+"""Indexes for the per-slot and per-user reservation lookups (04-create-reservation-table.sql has them
+for new databases)."""
+TRANSACTIONAL = False
+
+
+async def up(conn, ctx):
+    await ctx.create_index_concurrently("reservations_slot_id_confirmed_idx", "reservations (slot_id, confirmed)")
+    await ctx.create_index_concurrently("reservations_user_id_idx", "reservations (user_id)")
@@ -0,0 +1,42 @@
+-- update_confirmed_col leaves the limit check to the FIFO fill statement while ers.fill_slot is set for the slot
+CREATE OR REPLACE FUNCTION update_confirmed_col()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count INTEGER;
+    dummy      INTEGER;
+BEGIN
+    IF (NEW.confirmed = TRUE AND OLD.confirmed = FALSE) THEN
+        NEW.confirmed_at = CURRENT_TIMESTAMP;
+    ELSIF (NEW.confirmed = FALSE AND OLD.confirmed = TRUE) THEN
+        NEW.confirmed_at = NULL;
+    END IF;
+
+    -- admin
+    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경된 경우
+    -- ers.fill_slot: the FIFO fill statement already locked the slot's rows and checked the limit for all of them
+    IF (NEW.confirmed = TRUE AND (OLD.confirmed = FALSE OR NEW.amount != OLD.amount)
+        AND current_setting('ers.fill_slot', TRUE) IS DISTINCT FROM NEW.slot_id::TEXT) THEN
+        -- lock rows with same slot_id
+        SELECT 1
+        INTO dummy
+        FROM reservations
+        WHERE slot_id = NEW.slot_id
+        ORDER BY id FOR UPDATE;
+
+        -- slot_count = count reserved population
+        SELECT COALESCE(SUM(amount), 0)
+        INTO slot_count
+        FROM reservations
+        WHERE slot_id = NEW.slot_id
+          AND confirmed = TRUE
+          AND id != OLD.id;
+
+        IF (slot_count + NEW.amount > 50000) THEN
+            RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = 'Slot population limit 50000 exceeded';
+        END IF;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
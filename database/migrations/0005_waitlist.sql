@@ -0,0 +1,58 @@
+-- waitlist tables and trigger (06-create-waitlist-table.sql has them for new databases)
+-- reservations that did not fit when they were made (SlotLimitExceeded), promoted in request order
+-- once confirmed seats of their slot are released
+CREATE TABLE IF NOT EXISTS waitlist_entries
+(
+    id             BIGSERIAL PRIMARY KEY                              NOT NULL,
+    slot_id        INTEGER                                            NOT NULL
+        CONSTRAINT "waitlist_entries__slots.id_fk" REFERENCES slots (id) ON DELETE CASCADE,
+    user_id        INTEGER                                            NOT NULL
+        CONSTRAINT "waitlist_entries__users.id_fk" REFERENCES users (id) ON DELETE CASCADE,
+    amount         INTEGER                                            NOT NULL CHECK (amount > 0 AND amount <= 50000),
+    status         VARCHAR(16)              DEFAULT 'waiting'         NOT NULL,
+    reservation_id INTEGER                                            NULL,
+    created_at     TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    promoted_at    TIMESTAMP WITH TIME ZONE                           NULL
+);
+
+-- the head of each slot's waitlist; promoted and expired entries drop out of the index
+CREATE INDEX IF NOT EXISTS waitlist_entries_waiting_idx ON waitlist_entries (slot_id, id) WHERE status = 'waiting';
+CREATE INDEX IF NOT EXISTS waitlist_entries_user_id_idx ON waitlist_entries (user_id);
+
+-- confirmed seats released per slot since its waitlist was last promoted. No foreign key: the trigger
+-- below also writes it while a slot delete cascades to the slot's reservations
+CREATE TABLE IF NOT EXISTS waitlist_released
+(
+    slot_id  INTEGER PRIMARY KEY NOT NULL,
+    released INTEGER             NOT NULL
+);
+
+-- reservations table TRIGGER: record the drop of a slot's confirmed amount for its waitlist
+CREATE OR REPLACE FUNCTION record_released_seats()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    freed INTEGER;
+BEGIN
+    freed = OLD.amount;
+    IF (TG_OP = 'UPDATE' AND NEW.confirmed = TRUE AND NEW.slot_id = OLD.slot_id) THEN
+        freed = freed - NEW.amount;
+    END IF;
+
+    IF (freed > 0 AND EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = OLD.slot_id AND status = 'waiting')) THEN
+        INSERT INTO waitlist_released(slot_id, released)
+        VALUES (OLD.slot_id, freed)
+        ON CONFLICT (slot_id) DO UPDATE SET released = waitlist_released.released + EXCLUDED.released;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_released_seats_after_change ON reservations;
+CREATE TRIGGER record_released_seats_after_change
+    AFTER UPDATE OF slot_id, amount, confirmed OR DELETE
+    ON reservations
+    FOR EACH ROW
+    WHEN (OLD.confirmed = TRUE)
+EXECUTE FUNCTION record_released_seats();
@@ -0,0 +1,149 @@
+-- migrate: no-transaction
+-- per-slot capacity (03/04/05/06 init-scripts have it for new databases). The table changes run on their own:
+-- the column has a constant default, so adding it does not rewrite slots, and the relaxed amount checks are
+-- added NOT VALID, then validated under a lock that does not block writes.
+ALTER TABLE slots ADD COLUMN IF NOT EXISTS capacity INTEGER NOT NULL DEFAULT 50000 CHECK (capacity >= 0);
+
+ALTER TABLE reservations
+    DROP CONSTRAINT IF EXISTS reservations_amount_check,
+    ADD CONSTRAINT reservations_amount_check CHECK (amount >= 0) NOT VALID;
+ALTER TABLE reservations VALIDATE CONSTRAINT reservations_amount_check;
+
+ALTER TABLE reservation_requests
+    DROP CONSTRAINT IF EXISTS reservation_requests_amount_check,
+    ADD CONSTRAINT reservation_requests_amount_check CHECK (amount > 0) NOT VALID;
+ALTER TABLE reservation_requests VALIDATE CONSTRAINT reservation_requests_amount_check;
+
+ALTER TABLE waitlist_entries
+    DROP CONSTRAINT IF EXISTS waitlist_entries_amount_check,
+    ADD CONSTRAINT waitlist_entries_amount_check CHECK (amount > 0) NOT VALID;
+ALTER TABLE waitlist_entries VALIDATE CONSTRAINT waitlist_entries_amount_check;
+
+-- the slot limit triggers lock the slot row and compare against its capacity. The functions and triggers
+-- are swapped in one transaction, so no write sees a mix of old and new checks.
+BEGIN;
+
+CREATE OR REPLACE FUNCTION update_confirmed_col()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count    INTEGER;
+    slot_capacity INTEGER;
+BEGIN
+    IF (NEW.confirmed = TRUE AND OLD.confirmed = FALSE) THEN
+        NEW.confirmed_at = CURRENT_TIMESTAMP;
+    ELSIF (NEW.confirmed = FALSE AND OLD.confirmed = TRUE) THEN
+        NEW.confirmed_at = NULL;
+    END IF;
+
+    -- admin
+    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경된 경우
+    -- ers.fill_slot: the FIFO fill statement already locked the slot and checked the limit for all of its rows
+    IF (NEW.confirmed = TRUE AND (OLD.confirmed = FALSE OR NEW.amount != OLD.amount)
+        AND current_setting('ers.fill_slot', TRUE) IS DISTINCT FROM NEW.slot_id::TEXT) THEN
+        -- lock the slot row: every write that can raise its confirmed amount serializes on it
+        SELECT capacity
+        INTO slot_capacity
+        FROM slots
+        WHERE id = NEW.slot_id
+            FOR NO KEY UPDATE;
+
+        -- slot_count = count reserved population
+        SELECT COALESCE(SUM(amount), 0)
+        INTO slot_count
+        FROM reservations
+        WHERE slot_id = NEW.slot_id
+          AND confirmed = TRUE
+          AND id != OLD.id;
+
+        IF (slot_count + NEW.amount > slot_capacity) THEN
+            RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', slot_capacity);
+        END IF;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION check_slot_limit_on_insert()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count    INTEGER;
+    slot_capacity INTEGER;
+BEGIN
+    -- lock the slot row (see update_confirmed_col)
+    SELECT capacity
+    INTO slot_capacity
+    FROM slots
+    WHERE id = NEW.slot_id
+        FOR NO KEY UPDATE;
+
+    -- slot_count = count reserved population
+    SELECT COALESCE(SUM(amount), 0)
+    INTO slot_count
+    FROM reservations
+    WHERE slot_id = NEW.slot_id
+      AND confirmed = TRUE;
+
+    -- check if adding new reservation would exceed the limit
+    IF (slot_count + NEW.amount > slot_capacity) THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', slot_capacity);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION check_slot_capacity()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count INTEGER;
+BEGIN
+    -- the UPDATE already holds the slot row lock the reservation triggers take
+    SELECT COALESCE(SUM(amount), 0)
+    INTO slot_count
+    FROM reservations
+    WHERE slot_id = NEW.id
+      AND confirmed = TRUE;
+
+    IF (slot_count > NEW.capacity) THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('%s already confirmed', slot_count);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS check_slot_capacity_before_update ON slots;
+CREATE TRIGGER check_slot_capacity_before_update
+    BEFORE UPDATE OF capacity
+    ON slots
+    FOR EACH ROW
+    WHEN (NEW.capacity < OLD.capacity)
+EXECUTE FUNCTION check_slot_capacity();
+
+CREATE OR REPLACE FUNCTION record_released_capacity()
+    RETURNS TRIGGER AS
+$$
+BEGIN
+    IF (EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = NEW.id AND status = 'waiting')) THEN
+        INSERT INTO waitlist_released(slot_id, released)
+        VALUES (NEW.id, NEW.capacity - OLD.capacity)
+        ON CONFLICT (slot_id) DO UPDATE SET released = waitlist_released.released + EXCLUDED.released;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_released_capacity_after_update ON slots;
+CREATE TRIGGER record_released_capacity_after_update
+    AFTER UPDATE OF capacity
+    ON slots
+    FOR EACH ROW
+    WHEN (NEW.capacity > OLD.capacity)
+EXECUTE FUNCTION record_released_capacity();
+
+COMMIT;
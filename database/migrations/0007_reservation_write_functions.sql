@@ -0,0 +1,110 @@
+-- single round trip user reservation writes (07-create-reservation-functions.sql has them for new databases)
+DO
+$$
+    BEGIN
+        CREATE TYPE reservation_write_status AS ENUM (
+            'ok',
+            'no_reservation',
+            'no_slot',
+            'user_mismatch',
+            'already_confirmed',
+            'days_not_left');
+    EXCEPTION
+        WHEN duplicate_object THEN NULL;
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION reservation_insert_if_days_left(p_slot_id INTEGER, p_user_id INTEGER, p_amount INTEGER,
+                                                           p_days_left INTEGER,
+                                                           OUT status reservation_write_status,
+                                                           OUT reservation_id INTEGER)
+AS
+$$
+DECLARE
+    slot_start TIMESTAMP WITH TIME ZONE;
+BEGIN
+    SELECT LOWER(s.time_range) INTO slot_start FROM slots s WHERE s.id = p_slot_id;
+    IF NOT FOUND THEN
+        status := 'no_slot';
+        RETURN;
+    END IF;
+    IF slot_start < NOW() + make_interval(days => p_days_left) THEN
+        status := 'days_not_left';
+        RETURN;
+    END IF;
+
+    INSERT INTO reservations(slot_id, user_id, amount)
+    VALUES (p_slot_id, p_user_id, p_amount)
+    RETURNING id INTO reservation_id;
+    status := 'ok';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reservation_modify_unconfirmed(p_reservation_id INTEGER, p_user_id INTEGER,
+                                                          p_slot_id INTEGER, p_amount INTEGER, p_days_left INTEGER,
+                                                          OUT status reservation_write_status,
+                                                          OUT reservation_id INTEGER)
+AS
+$$
+DECLARE
+    target     reservations%ROWTYPE;
+    slot_start TIMESTAMP WITH TIME ZONE;
+BEGIN
+    -- locked, so an admin confirm can not slip in between the check and the update
+    SELECT * INTO target FROM reservations r WHERE r.id = p_reservation_id FOR UPDATE;
+    IF NOT FOUND THEN
+        status := 'no_reservation';
+        RETURN;
+    END IF;
+    IF target.user_id != p_user_id THEN
+        status := 'user_mismatch';
+        RETURN;
+    END IF;
+    IF target.confirmed THEN
+        status := 'already_confirmed';
+        RETURN;
+    END IF;
+
+    SELECT LOWER(s.time_range) INTO slot_start FROM slots s WHERE s.id = p_slot_id;
+    IF NOT FOUND THEN
+        status := 'no_slot';
+        RETURN;
+    END IF;
+    IF slot_start < NOW() + make_interval(days => p_days_left) THEN
+        status := 'days_not_left';
+        RETURN;
+    END IF;
+
+    UPDATE reservations r SET (amount, slot_id) = (p_amount, p_slot_id) WHERE r.id = p_reservation_id;
+    reservation_id := p_reservation_id;
+    status := 'ok';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reservation_delete_unconfirmed(p_reservation_id INTEGER, p_user_id INTEGER,
+                                                          OUT status reservation_write_status,
+                                                          OUT reservation_id INTEGER)
+AS
+$$
+DECLARE
+    target reservations%ROWTYPE;
+BEGIN
+    SELECT * INTO target FROM reservations r WHERE r.id = p_reservation_id FOR UPDATE;
+    IF NOT FOUND THEN
+        status := 'no_reservation';
+        RETURN;
+    END IF;
+    IF target.user_id != p_user_id THEN
+        status := 'user_mismatch';
+        RETURN;
+    END IF;
+    IF target.confirmed THEN
+        status := 'already_confirmed';
+        RETURN;
+    END IF;
+
+    DELETE FROM reservations r WHERE r.id = p_reservation_id;
+    reservation_id := p_reservation_id;
+    status := 'ok';
+END;
+$$ LANGUAGE plpgsql;
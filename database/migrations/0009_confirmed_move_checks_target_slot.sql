@@ -0,0 +1,41 @@
+-- update_confirmed_col also checks a confirmed reservation moved to another slot with its amount unchanged
+-- (04-create-reservation-table.sql has it for new databases); before, the target slot could go over its capacity.
+CREATE OR REPLACE FUNCTION update_confirmed_col()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_count    INTEGER;
+    slot_capacity INTEGER;
+BEGIN
+    IF (NEW.confirmed = TRUE AND OLD.confirmed = FALSE) THEN
+        NEW.confirmed_at = CURRENT_TIMESTAMP;
+    ELSIF (NEW.confirmed = FALSE AND OLD.confirmed = TRUE) THEN
+        NEW.confirmed_at = NULL;
+    END IF;
+
+    -- admin
+    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경되거나 다른 슬롯으로 옮겨진 경우
+    IF (NEW.confirmed = TRUE AND (OLD.confirmed = FALSE OR NEW.amount != OLD.amount OR NEW.slot_id != OLD.slot_id)) THEN
+        -- lock the slot row: every write that can raise its confirmed amount serializes on it
+        SELECT capacity
+        INTO slot_capacity
+        FROM slots
+        WHERE id = NEW.slot_id
+            FOR NO KEY UPDATE;
+
+        -- slot_count = count reserved population, without OLD's amount when it already counted in this slot
+        SELECT COALESCE(SUM(amount), 0)
+        INTO slot_count
+        FROM reservations
+        WHERE slot_id = NEW.slot_id
+          AND confirmed = TRUE
+          AND (id != OLD.id OR OLD.slot_id != NEW.slot_id);
+
+        IF (slot_count + NEW.amount > slot_capacity) THEN
+            RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', slot_capacity);
+        END IF;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
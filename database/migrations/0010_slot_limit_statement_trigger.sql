@@ -0,0 +1,68 @@
+-- the slot limit check on update moves from the row trigger update_confirmed_col to the statement trigger
+-- check_slot_limit_after_update (04-create-reservation-table.sql has it for new databases): a FIFO fill that
+-- confirms n rows locks and sums its slot once instead of n times, without any setting that skips the check.
+
+-- update_confirmed_col only keeps confirmed_at
+CREATE OR REPLACE FUNCTION update_confirmed_col()
+    RETURNS TRIGGER AS
+$$
+BEGIN
+    IF (NEW.confirmed = TRUE AND OLD.confirmed = FALSE) THEN
+        NEW.confirmed_at = CURRENT_TIMESTAMP;
+    ELSIF (NEW.confirmed = FALSE AND OLD.confirmed = TRUE) THEN
+        NEW.confirmed_at = NULL;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- reservations table TRIGGER: check slot limit on update, once per statement and slot, so a FIFO fill that
+-- confirms thousands of rows locks and sums its slot once instead of once per row
+CREATE OR REPLACE FUNCTION check_slot_limit_on_update()
+    RETURNS TRIGGER AS
+$$
+DECLARE
+    slot_ids INTEGER[];
+    exceeded RECORD;
+BEGIN
+    -- admin
+    -- 컨펌됐거나, 이미 컨펌된 상태에서 amount가 변경되거나 다른 슬롯으로 옮겨진 예약의 슬롯
+    SELECT ARRAY_AGG(DISTINCT n.slot_id ORDER BY n.slot_id)
+    INTO slot_ids
+    FROM new_rows n
+             JOIN old_rows o ON o.id = n.id
+    WHERE n.confirmed = TRUE
+      AND (o.confirmed = FALSE OR n.amount != o.amount OR n.slot_id != o.slot_id);
+    IF slot_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- lock the slot rows in id order: every write that can raise a slot's confirmed amount serializes on it
+    PERFORM 1 FROM slots WHERE id = ANY (slot_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    -- a new query, so the sums see what the writers this one waited for committed
+    SELECT s.capacity
+    INTO exceeded
+    FROM slots s
+    WHERE s.id = ANY (slot_ids)
+      AND (SELECT COALESCE(SUM(r.amount), 0)
+           FROM reservations r
+           WHERE r.slot_id = s.id
+             AND r.confirmed = TRUE) > s.capacity
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'SlotLimitExceeded' USING DETAIL = format('Slot capacity %s exceeded', exceeded.capacity);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS check_slot_limit_after_update ON reservations;
+CREATE TRIGGER check_slot_limit_after_update
+    AFTER UPDATE
+    ON reservations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION check_slot_limit_on_update();
@@ -0,0 +1,198 @@
+-- SQLite schema for the embedded backend (app/database/sqlite_db.py).
+-- Timestamps are INTEGER microseconds since the epoch (UTC); slots are half-open [start_at, end_at).
+
+CREATE TABLE IF NOT EXISTS users
+(
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    username   TEXT    NOT NULL UNIQUE CHECK (LENGTH(username) <= 50),
+    password   TEXT    NOT NULL,
+    admin      INTEGER NOT NULL DEFAULT 0,
+    created_at INTEGER NOT NULL
+);
+
+-- no accounts are seeded; app/database/sqlite_db.py creates the admin from SQLITE_ADMIN_USERNAME and
+-- SQLITE_ADMIN_PASSWORD on startup
+
+CREATE TABLE IF NOT EXISTS slots
+(
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_at         INTEGER NOT NULL,
+    end_at           INTEGER NOT NULL,
+    -- SUM(amount) of confirmed reservations, maintained by the triggers below
+    confirmed_amount INTEGER NOT NULL DEFAULT 0,
+    -- confirmed amount the slot can hold; SqlitePool.open adds it to files created without it
+    capacity         INTEGER NOT NULL DEFAULT 50000 CHECK (capacity >= 0),
+    CHECK (start_at < end_at)
+);
+
+CREATE INDEX IF NOT EXISTS slots_start_at_idx ON slots (start_at);
+CREATE INDEX IF NOT EXISTS slots_end_at_idx ON slots (end_at);
+
+-- Replaces the Postgres EXCLUDE constraint. Slots never overlap, so they are ordered by both bounds
+-- and only the last slot starting before NEW.end_at can overlap NEW: one index probe.
+CREATE TRIGGER IF NOT EXISTS slots_no_overlap_insert
+    BEFORE INSERT
+    ON slots
+BEGIN
+    SELECT RAISE(ABORT, 'SlotTimeRangeOverlapped')
+    WHERE (SELECT end_at FROM slots WHERE start_at < NEW.end_at ORDER BY start_at DESC LIMIT 1) > NEW.start_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS slots_no_overlap_update
+    BEFORE UPDATE OF start_at, end_at
+    ON slots
+BEGIN
+    SELECT RAISE(ABORT, 'SlotTimeRangeOverlapped')
+    WHERE (SELECT end_at FROM slots WHERE start_at < NEW.end_at AND id != NEW.id
+           ORDER BY start_at DESC LIMIT 1) > NEW.start_at;
+END;
+
+CREATE TABLE IF NOT EXISTS reservations
+(
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    slot_id      INTEGER NOT NULL REFERENCES slots (id) ON DELETE CASCADE,
+    user_id      INTEGER NOT NULL REFERENCES users (id),
+    amount       INTEGER NOT NULL DEFAULT 0 CHECK (amount >= 0),
+    confirmed    INTEGER NOT NULL DEFAULT 0,
+    created_at   INTEGER NOT NULL,
+    confirmed_at INTEGER NULL,
+    updated_at   INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS reservations_slot_id_idx ON reservations (slot_id, confirmed);
+CREATE INDEX IF NOT EXISTS reservations_user_id_idx ON reservations (user_id);
+
+-- the slot limit triggers are recreated on every open, so files created with the fixed 50,000 limit pick up capacity
+
+-- check_slot_limit_on_insert: the new amount counts even though it is not confirmed yet
+DROP TRIGGER IF EXISTS reservations_slot_limit_insert;
+CREATE TRIGGER reservations_slot_limit_insert
+    BEFORE INSERT
+    ON reservations
+BEGIN
+    SELECT RAISE(ABORT, 'SlotLimitExceeded')
+    FROM slots
+    WHERE id = NEW.slot_id AND confirmed_amount + NEW.amount > capacity;
+END;
+
+-- check_slot_limit_on_update: also checks confirmed reservations moved to another slot
+DROP TRIGGER IF EXISTS reservations_slot_limit_update;
+CREATE TRIGGER reservations_slot_limit_update
+    BEFORE UPDATE
+    ON reservations
+    WHEN NEW.confirmed AND (NOT OLD.confirmed OR NEW.amount != OLD.amount OR NEW.slot_id != OLD.slot_id)
+BEGIN
+    SELECT RAISE(ABORT, 'SlotLimitExceeded')
+    FROM slots
+    WHERE id = NEW.slot_id
+      AND confirmed_amount - CASE WHEN OLD.confirmed AND OLD.slot_id = NEW.slot_id THEN OLD.amount ELSE 0 END
+              + NEW.amount > capacity;
+END;
+
+-- check_slot_capacity
+CREATE TRIGGER IF NOT EXISTS slots_capacity_update
+    BEFORE UPDATE OF capacity
+    ON slots
+    WHEN NEW.capacity < NEW.confirmed_amount
+BEGIN
+    SELECT RAISE(ABORT, 'SlotLimitExceeded');
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservations_confirmed_amount_insert
+    AFTER INSERT
+    ON reservations
+    WHEN NEW.confirmed
+BEGIN
+    UPDATE slots SET confirmed_amount = confirmed_amount + NEW.amount WHERE id = NEW.slot_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservations_confirmed_amount_update
+    AFTER UPDATE OF slot_id, amount, confirmed
+    ON reservations
+BEGIN
+    UPDATE slots SET confirmed_amount = confirmed_amount - OLD.amount WHERE OLD.confirmed AND id = OLD.slot_id;
+    UPDATE slots SET confirmed_amount = confirmed_amount + NEW.amount WHERE NEW.confirmed AND id = NEW.slot_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservations_confirmed_amount_delete
+    AFTER DELETE
+    ON reservations
+    WHEN OLD.confirmed
+BEGIN
+    UPDATE slots SET confirmed_amount = confirmed_amount - OLD.amount WHERE id = OLD.slot_id;
+END;
+
+-- 05-create-reservation-request-table.sql: requests queued with `Prefer: respond-async`
+CREATE TABLE IF NOT EXISTS reservation_requests
+(
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    slot_id        INTEGER NOT NULL,
+    user_id        INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    amount         INTEGER NOT NULL CHECK (amount > 0),
+    status         TEXT    NOT NULL DEFAULT 'queued',
+    reservation_id INTEGER NULL,
+    error          TEXT    NULL,
+    created_at     INTEGER NOT NULL,
+    processed_at   INTEGER NULL
+);
+
+CREATE INDEX IF NOT EXISTS reservation_requests_queued_idx ON reservation_requests (id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS reservation_requests_user_id_idx ON reservation_requests (user_id);
+
+-- 06-create-waitlist-table.sql: requests that hit the slot limit, promoted once confirmed seats are released
+CREATE TABLE IF NOT EXISTS waitlist_entries
+(
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    slot_id        INTEGER NOT NULL REFERENCES slots (id) ON DELETE CASCADE,
+    user_id        INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    amount         INTEGER NOT NULL CHECK (amount > 0),
+    status         TEXT    NOT NULL DEFAULT 'waiting',
+    reservation_id INTEGER NULL,
+    created_at     INTEGER NOT NULL,
+    promoted_at    INTEGER NULL
+);
+
+CREATE INDEX IF NOT EXISTS waitlist_entries_waiting_idx ON waitlist_entries (slot_id, id) WHERE status = 'waiting';
+CREATE INDEX IF NOT EXISTS waitlist_entries_user_id_idx ON waitlist_entries (user_id);
+
+CREATE TABLE IF NOT EXISTS waitlist_released
+(
+    slot_id  INTEGER PRIMARY KEY,
+    released INTEGER NOT NULL
+);
+
+-- record_released_seats
+CREATE TRIGGER IF NOT EXISTS reservations_released_seats_update
+    AFTER UPDATE OF slot_id, amount, confirmed
+    ON reservations
+    WHEN OLD.confirmed
+BEGIN
+    INSERT INTO waitlist_released(slot_id, released)
+    SELECT OLD.slot_id, OLD.amount - CASE WHEN NEW.confirmed AND NEW.slot_id = OLD.slot_id THEN NEW.amount ELSE 0 END
+    WHERE OLD.amount - CASE WHEN NEW.confirmed AND NEW.slot_id = OLD.slot_id THEN NEW.amount ELSE 0 END > 0
+      AND EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = OLD.slot_id AND status = 'waiting')
+    ON CONFLICT (slot_id) DO UPDATE SET released = released + excluded.released;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservations_released_seats_delete
+    AFTER DELETE
+    ON reservations
+    WHEN OLD.confirmed
+BEGIN
+    INSERT INTO waitlist_released(slot_id, released)
+    SELECT OLD.slot_id, OLD.amount
+    WHERE EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = OLD.slot_id AND status = 'waiting')
+    ON CONFLICT (slot_id) DO UPDATE SET released = released + excluded.released;
+END;
+
+-- record_released_capacity
+CREATE TRIGGER IF NOT EXISTS slots_released_capacity_update
+    AFTER UPDATE OF capacity
+    ON slots
+    WHEN NEW.capacity > OLD.capacity
+BEGIN
+    INSERT INTO waitlist_released(slot_id, released)
+    SELECT NEW.id, NEW.capacity - OLD.capacity
+    WHERE EXISTS (SELECT 1 FROM waitlist_entries WHERE slot_id = NEW.id AND status = 'waiting')
+    ON CONFLICT (slot_id) DO UPDATE SET released = released + excluded.released;
+END;
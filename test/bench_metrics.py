@@ -0,0 +1,88 @@
+"""
+Overhead benchmark for MetricsMiddleware.
+
+Calls a FastAPI app directly through the ASGI interface (no sockets, no httpx) so the measured
+difference is the middleware itself, and prints the per-request overhead as JSON.
+
+    python -m test.bench_metrics --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from time import perf_counter
+
+from fastapi import FastAPI
+
+from app.monitoring.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION
+from app.monitoring.middleware import MetricsMiddleware
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/slots/{id}")
+    async def get_slot(id: int):
+        return {"id": id}
+
+    return app
+
+
+async def run_requests(app, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = perf_counter()
+    for i in range(n):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/slots/{i}", "raw_path": f"/slots/{i}".encode(), "root_path": "",
+            "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return perf_counter() - start
+
+
+async def main(n: int, rounds: int):
+    plain, metered = build_app(False), build_app(True)
+    # warm up routing/pydantic caches
+    await run_requests(plain, 1000)
+    await run_requests(metered, 1000)
+
+    plain_times, metered_times = [], []
+    for _ in range(rounds):
+        plain_times.append(await run_requests(plain, n))
+        metered_times.append(await run_requests(metered, n))
+
+    plain_us = statistics.median(plain_times) / n * 1e6
+    metered_us = statistics.median(metered_times) / n * 1e6
+
+    # raw cost of one observation, without the app
+    start = perf_counter()
+    for _ in range(n):
+        HTTP_REQUEST_DURATION.observe(0.003, "GET", "/bench")
+        HTTP_REQUESTS.inc("GET", "/bench", 200)
+    record_us = (perf_counter() - start) / n * 1e6
+
+    print(json.dumps({
+        "requests_per_round": n,
+        "rounds": rounds,
+        "plain_us_per_request": round(plain_us, 2),
+        "metered_us_per_request": round(metered_us, 2),
+        "overhead_us_per_request": round(metered_us - plain_us, 2),
+        "overhead_ratio": round(metered_us / plain_us - 1, 4),
+        "record_only_us": round(record_us, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MetricsMiddleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
@@ -0,0 +1,404 @@
+"""
+Repository microbenchmarks at realistic data volumes.
+
+For every scale (slots x reservations) the harness recreates a scratch schema from
+database/init-scripts, seeds it with generate_series, then times each repository method and counts
+the statements it sends (from the query instrumentation in app/database/instrumented.py) and its round
+trips, which also include BEGIN and COMMIT of explicit transactions.
+The report is JSON; `scaling` holds the log-log slope of p50 latency against the reservation count,
+so ~0 means O(1), ~1 means linear in the table size.
+
+    python -m test.bench_repositories --scales 100x1000 1000x100000 10000x1000000 --output bench.json
+    python -m test.bench_repositories --scales 100x1000 --baseline bench.json
+
+The scratch schema (default ers_bench) is dropped and recreated for every scale; it must not be the
+application schema.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.database import ers_db, instrumented
+from app.models.reservation_model import Reservation, ReservationDto
+from app.models.slot_model import Slot
+from app.monitoring.metrics import DB_QUERY_DURATION, DB_TRANSACTIONS
+from app.repositories.reservation.dbimpl import ReservationRepositoryImpl
+from app.repositories.reservation.dbimpl_procedure import ReservationRepositoryProcedureImpl
+from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
+from app.repositories.slot.dbimpl import SlotRepositoryImpl
+from app.repositories.user.dbimpl import UserRepositoryImpl
+
+INIT_SCRIPTS = Path(__file__).resolve().parent.parent / "database" / "init-scripts"
+BENCH_PASSWORD_HASH = "$argon2id$v=19$m=65536,t=3,p=4$zmxfD0y7SqFVHtQEIuNDXg$vJmxTwkDpEpQ4SPj2L6GRwozxnB0O9sngkkr1akNFic"
+
+
+# schema / seed
+async def create_schema(conn, schema: str):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {schema}")
+    await conn.execute(f"SET search_path TO {schema}, public")
+    for script in sorted(INIT_SCRIPTS.glob("*.sql")):
+        await conn.execute(script.read_text(encoding="utf-8"))
+
+
+async def seed(conn, slots: int, reservations: int, users: int):
+    """
+    Uniformly spreads reservations over hourly slots, half of them at least a week ahead so the
+    3 day rule passes. Amounts stay small enough that no slot reaches the 50,000 cap.
+    Triggers are disabled while loading; the checks they perform are satisfied by construction.
+    """
+    await conn.execute("""
+        INSERT INTO users(username, password)
+        SELECT 'bench_user_' || g, $1 FROM generate_series(1, $2) g
+    """, BENCH_PASSWORD_HASH, users)
+    await conn.execute("""
+        INSERT INTO slots(time_range)
+        SELECT TSTZRANGE(base + (g || ' hours')::INTERVAL, base + (g + 1 || ' hours')::INTERVAL, '[)')
+        FROM generate_series(0, $1 - 1) g,
+             (SELECT DATE_TRUNC('hour', NOW()) + INTERVAL '7 days' - ($1 / 2 || ' hours')::INTERVAL AS base) b
+    """, slots)
+    await conn.execute("ALTER TABLE reservations DISABLE TRIGGER USER")
+    try:
+        await conn.execute("""
+            INSERT INTO reservations(slot_id, user_id, amount, confirmed, confirmed_at)
+            SELECT s.id, u.id, 1 + g % 5, g % 2 = 0, CASE WHEN g % 2 = 0 THEN NOW() END
+            FROM generate_series(0, $1 - 1) g
+            JOIN (SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n FROM slots) s ON s.n = g % $2
+            JOIN (SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n FROM users WHERE username LIKE 'bench_user_%') u
+                ON u.n = (g::BIGINT * 7919) % $3
+        """, reservations, slots, users)
+    finally:
+        await conn.execute("ALTER TABLE reservations ENABLE TRIGGER USER")
+    await conn.execute("ANALYZE")
+
+
+# cases
+class Context:
+    def __init__(self, pool):
+        self.pool = pool
+        self.raw = pool.raw
+        self.slot_repo = SlotRepositoryImpl(pool)
+        self.user_repo = UserRepositoryImpl(pool)
+        self.reservation_repos = {
+            "reservation": ReservationRepositoryImpl(pool),
+            "reservation_transaction": ReservationRepositoryTransactionImpl(pool),
+            "reservation_procedure": ReservationRepositoryProcedureImpl(pool),
+        }
+        self.hot_slot_id: int = 0
+        self.hot_slot_start: Optional[datetime] = None
+        self.user_id: int = 0
+        self.username: str = ""
+        self.reservation_id: int = 0
+        self.scratch_start = datetime(2200, 1, 1, tzinfo=timezone.utc)
+        self.counter = 0
+
+    async def load(self):
+        row = await self.raw.fetchrow("""
+            SELECT id, LOWER(time_range) AS start FROM slots
+            WHERE LOWER(time_range) >= NOW() + INTERVAL '7 days' ORDER BY time_range LIMIT 1
+        """)
+        self.hot_slot_id, self.hot_slot_start = row["id"], row["start"]
+        row = await self.raw.fetchrow("SELECT id, username FROM users WHERE username = 'bench_user_1'")
+        self.user_id, self.username = row["id"], row["username"]
+        self.reservation_id = await self.raw.fetchval(
+            "SELECT id FROM reservations WHERE slot_id = $1 ORDER BY id LIMIT 1", self.hot_slot_id)
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    async def scratch_slot(self) -> int:
+        start = self.scratch_start + timedelta(hours=self.next())
+        return await self.raw.fetchval("INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                                       Slot.create_with_time_range(start, start + timedelta(hours=1)).time_range)
+
+    async def scratch_reservation(self) -> int:
+        return await self.raw.fetchval(
+            "INSERT INTO reservations(slot_id, user_id, amount) VALUES($1, $2, 1) RETURNING id",
+            self.hot_slot_id, self.user_id)
+
+    async def drop_reservation(self, reservation_id):
+        await self.raw.execute("DELETE FROM reservations WHERE id = $1", reservation_id)
+
+
+class Case:
+    """`call` is timed; `prepare` builds its argument and `cleanup` restores the data, both untimed."""
+
+    def __init__(self, name: str, call: Callable[[Context, object], Awaitable],
+                 prepare: Optional[Callable[[Context], Awaitable]] = None,
+                 cleanup: Optional[Callable[[Context, object], Awaitable]] = None,
+                 heavy: bool = False):
+        self.name = name
+        self.call = call
+        self.prepare = prepare
+        self.cleanup = cleanup
+        self.heavy = heavy
+
+
+def _window(ctx: Context):
+    return ctx.hot_slot_start - timedelta(hours=12), ctx.hot_slot_start + timedelta(hours=12)
+
+
+def slot_cases() -> List[Case]:
+    async def drop_slot(ctx, slot_id):
+        await ctx.raw.execute("DELETE FROM slots WHERE id = $1", slot_id)
+
+    async def insert(ctx, _):
+        start = ctx.scratch_start + timedelta(hours=ctx.next())
+        return (await ctx.slot_repo.insert(Slot.create_with_time_range(start, start + timedelta(hours=1))))["id"]
+
+    async def modify(ctx, slot_id):
+        start = ctx.scratch_start + timedelta(hours=ctx.next())
+        await ctx.slot_repo.modify(Slot.create_with_time_range(start, start + timedelta(hours=1), slot_id))
+
+    return [
+        Case("slot.find", lambda ctx, _: ctx.slot_repo.find(), heavy=True),
+        Case("slot.find_window", lambda ctx, _: ctx.slot_repo.find(*_window(ctx))),
+        Case("slot.find_start_only", lambda ctx, _: ctx.slot_repo.find(start_at=ctx.hot_slot_start), heavy=True),
+        Case("slot.find_end_only", lambda ctx, _: ctx.slot_repo.find(end_at=ctx.hot_slot_start), heavy=True),
+        Case("slot.find_by_id", lambda ctx, _: ctx.slot_repo.find_by_id(ctx.hot_slot_id)),
+        Case("slot.insert", insert, cleanup=lambda ctx, slot_id: drop_slot(ctx, slot_id)),
+        Case("slot.modify", modify, prepare=Context.scratch_slot, cleanup=drop_slot),
+        Case("slot.delete", lambda ctx, slot_id: ctx.slot_repo.delete(slot_id), prepare=Context.scratch_slot),
+    ]
+
+
+def reservation_cases(label: str) -> List[Case]:
+    def repo(ctx: Context):
+        return ctx.reservation_repos[label]
+
+    def reservation(ctx):
+        return Reservation(slot_id=ctx.hot_slot_id, user_id=ctx.user_id, amount=1)
+
+    async def insert(ctx, _):
+        return (await repo(ctx).insert(reservation(ctx)))["id"]
+
+    async def insert_if_days_left(ctx, _):
+        ret = await repo(ctx).insert_if_days_left(reservation(ctx), 3)
+        return ret["id"] if not isinstance(ret, int) else ret
+
+    async def modify_unconfirmed(ctx, reservation_id):
+        await repo(ctx).modify_unconfirmed_if_days_left_and_user_match(
+            reservation_id, ReservationDto(slot_id=ctx.hot_slot_id, amount=2), ctx.user_id, 3)
+
+    async def drop(ctx, reservation_id):
+        if reservation_id is not None:
+            await ctx.drop_reservation(reservation_id)
+
+    return [
+        Case(f"{label}.find", lambda ctx, _: repo(ctx).find(), heavy=True),
+        Case(f"{label}.find_by_user", lambda ctx, _: repo(ctx).find(user_id=ctx.user_id)),
+        Case(f"{label}.find_window", lambda ctx, _: repo(ctx).find(None, *_window(ctx))),
+        Case(f"{label}.find_by_id", lambda ctx, _: repo(ctx).find_by_id(ctx.reservation_id)),
+        Case(f"{label}.find_reservation_by_slot",
+             lambda ctx, _: repo(ctx).find_reservation_by_slot(ctx.hot_slot_id, True)),
+        Case(f"{label}.insert", insert, cleanup=drop),
+        Case(f"{label}.insert_if_days_left", insert_if_days_left, cleanup=drop),
+        Case(f"{label}.confirm_by_id", lambda ctx, rid: repo(ctx).confirm_by_id(rid),
+             prepare=Context.scratch_reservation, cleanup=drop),
+        Case(f"{label}.modify_from_admin",
+             lambda ctx, rid: repo(ctx).modify_from_admin(rid, ReservationDto(slot_id=ctx.hot_slot_id, amount=2)),
+             prepare=Context.scratch_reservation, cleanup=drop),
+        Case(f"{label}.modify_unconfirmed_if_days_left_and_user_match", modify_unconfirmed,
+             prepare=Context.scratch_reservation, cleanup=drop),
+        Case(f"{label}.delete_from_admin", lambda ctx, rid: repo(ctx).delete_from_admin(rid),
+             prepare=Context.scratch_reservation, cleanup=drop),
+        Case(f"{label}.delete_unconfirmed", lambda ctx, rid: repo(ctx).delete_unconfirmed(rid, ctx.user_id),
+             prepare=Context.scratch_reservation, cleanup=drop),
+    ]
+
+
+def user_cases() -> List[Case]:
+    async def scratch_user(ctx):
+        username = f"bench_scratch_{ctx.next()}"
+        await ctx.raw.execute("INSERT INTO users(username, password) VALUES($1, $2)", username, BENCH_PASSWORD_HASH)
+        return username
+
+    async def drop_user(ctx, username):
+        await ctx.raw.execute("DELETE FROM users WHERE username = $1", username)
+
+    async def insert(ctx, _):
+        username = f"bench_scratch_{ctx.next()}"
+        await ctx.user_repo.insert(username, BENCH_PASSWORD_HASH)
+        return username
+
+    return [
+        Case("user.find", lambda ctx, _: ctx.user_repo.find(ctx.username)),
+        Case("user.insert", insert, cleanup=drop_user),
+        Case("user.update_password",
+             lambda ctx, _: ctx.user_repo.update_password(ctx.username, BENCH_PASSWORD_HASH)),
+        Case("user.delete", lambda ctx, username: ctx.user_repo.delete(username), prepare=scratch_user),
+    ]
+
+
+def all_cases() -> List[Case]:
+    return slot_cases() + reservation_cases("reservation") + reservation_cases("reservation_transaction") + \
+        reservation_cases("reservation_procedure") + user_cases()
+
+
+# measurement
+def _query_counts() -> Dict[str, int]:
+    return {key[0]: count for key, count in DB_QUERY_DURATION.counts().items()}
+
+
+async def run_case(ctx: Context, case: Case, iterations: int, warmup: int) -> dict:
+    latencies = []
+    errors: Dict[str, int] = {}
+    before = None
+    for i in range(warmup + iterations):
+        if i == warmup:
+            before = _query_counts()
+            transactions_before = DB_TRANSACTIONS.get()
+        prepared = await case.prepare(ctx) if case.prepare else None
+        result = None
+        start = perf_counter()
+        try:
+            result = await case.call(ctx, prepared)
+            elapsed = perf_counter() - start
+        except Exception as e:
+            elapsed = perf_counter() - start
+            if i >= warmup:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+        if i >= warmup:
+            latencies.append(elapsed)
+        if case.cleanup:
+            await case.cleanup(ctx, result if case.prepare is None else prepared)
+
+    after = _query_counts()
+    queries = {name: round((after[name] - before.get(name, 0)) / iterations, 2)
+               for name in after if after[name] != before.get(name, 0)}
+    transactions = (DB_TRANSACTIONS.get() - transactions_before) / iterations
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, math.ceil(len(latencies) * 0.95) - 1)] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "queries_per_call": round(sum(queries.values()), 2),
+        # BEGIN and COMMIT of explicit transactions are round trips too
+        "round_trips_per_call": round(sum(queries.values()) + 2 * transactions, 2),
+        "queries": queries,
+        "errors": errors,
+    }
+
+
+def fit_scaling(scales: List[dict]) -> Dict[str, float]:
+    """Least-squares slope of log(p50) over log(reservations) for every method."""
+    slopes = {}
+    names = set().union(*(scale["methods"].keys() for scale in scales)) if scales else set()
+    for name in sorted(names):
+        points = [(math.log(s["reservations"]), math.log(max(s["methods"][name]["p50_ms"], 1e-3)))
+                  for s in scales if name in s["methods"]]
+        if len({x for x, _ in points}) < 2:
+            continue
+        mean_x = statistics.fmean(x for x, _ in points)
+        mean_y = statistics.fmean(y for _, y in points)
+        slopes[name] = round(sum((x - mean_x) * (y - mean_y) for x, y in points) /
+                             sum((x - mean_x) ** 2 for x, _ in points), 3)
+    return slopes
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    regressions = []
+    base_scales = {(s["slots"], s["reservations"]): s for s in baseline.get("scales", [])}
+    for scale in report["scales"]:
+        base = base_scales.get((scale["slots"], scale["reservations"]))
+        if base is None:
+            continue
+        for name, stats in scale["methods"].items():
+            base_stats = base["methods"].get(name)
+            if base_stats is None:
+                continue
+            if stats["p50_ms"] > base_stats["p50_ms"] * (1 + max_regression):
+                regressions.append(f"{scale['slots']}x{scale['reservations']} {name}: "
+                                   f"p50 {base_stats['p50_ms']}ms -> {stats['p50_ms']}ms")
+            if stats["queries_per_call"] > base_stats["queries_per_call"]:
+                regressions.append(f"{scale['slots']}x{scale['reservations']} {name}: "
+                                   f"queries {base_stats['queries_per_call']} -> {stats['queries_per_call']}")
+    return regressions
+
+
+async def run_scale(args, slots: int, reservations: int) -> dict:
+    users = max(100, reservations // 10)
+    await ers_db.connect()
+    pool = ers_db.get_pool()
+    try:
+        start = perf_counter()
+        async with pool.raw.acquire() as conn:
+            await create_schema(conn, args.schema)
+            await seed(conn, slots, reservations, users)
+        seed_seconds = perf_counter() - start
+
+        ctx = Context(pool)
+        await ctx.load()
+        methods = {}
+        for case in all_cases():
+            if args.only and not any(case.name.startswith(prefix) for prefix in args.only):
+                continue
+            iterations = max(3, args.iterations // 10) if case.heavy else args.iterations
+            methods[case.name] = await run_case(ctx, case, iterations, args.warmup)
+            print(f"{slots}x{reservations} {case.name}: p50 {methods[case.name]['p50_ms']}ms", file=sys.stderr)
+    finally:
+        await ers_db.disconnect()
+
+    return {"slots": slots, "reservations": reservations, "users": users,
+            "seed_seconds": round(seed_seconds, 2), "methods": methods}
+
+
+async def main(args) -> int:
+    app_schema = os.getenv("APP_DB_SCHEMA")
+    if args.schema == app_schema:
+        print(f"Refusing to drop the application schema {app_schema}", file=sys.stderr)
+        return 2
+    # every pooled connection resolves the unqualified table names to the scratch schema
+    os.environ["APP_DB_SCHEMA"] = f"{args.schema}, public"
+    instrumented.settings.update(enabled=True, slow_query_threshold_ms=float("inf"))
+
+    scales = []
+    for spec in args.scales:
+        slots, reservations = (int(part) for part in spec.lower().split("x"))
+        scales.append(await run_scale(args, slots, reservations))
+
+    report = {"started_at": datetime.now(timezone.utc).isoformat(), "label": args.label,
+              "iterations": args.iterations, "scales": scales, "scaling": fit_scaling(scales)}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Repository benchmarks at several data volumes")
+    parser.add_argument("--scales", nargs="+", default=["100x1000", "1000x10000", "1000x100000", "10000x1000000"],
+                        help="SLOTSxRESERVATIONS")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="method name prefixes, e.g. slot. reservation_transaction.")
+    parser.add_argument("--schema", default="ers_bench", help="scratch schema, dropped and recreated per scale")
+    parser.add_argument("--label", default=None, help="build identifier stored in the report, e.g. a git sha")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="previous report to compare p50 and query counts against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,284 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Recreates a scratch schema from database/init-scripts and fills it with N users, M back-to-back
+slots and R reservations drawn from a skewed distribution:
+
+- `--hot-slots` slots are filled with confirmed reservations up to exactly the 50,000 cap,
+- every other reservation picks its slot from a Zipf-like popularity curve (`--skew`), so a few
+  slots are crowded and most see a handful of reservations,
+- `--confirmed-ratio` of them are confirmed, as long as the slot still has room; the rest stay pending.
+
+Every table draws from its own `random.Random` seeded from --seed and rows are streamed with binary
+COPY, so the same seed and --anchor always give the same rows. Users get precomputed Argon2 hashes of "password": a small pool
+(`--hash-pool`) hashed once with the application's parameters, so logins do not trigger a rehash.
+
+    python -m test.datagen --users 100000 --slots 10000 --reservations 5000000 --seed 7 --snapshot fixtures/5m
+    python -m test.datagen --restore fixtures/5m --schema ers_bench
+
+--snapshot DIR writes the tables as binary COPY files plus a manifest; --restore DIR loads them into a
+fresh schema without generating anything.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator, List, Optional
+
+import asyncpg
+from argon2 import PasswordHasher, Type
+from argon2.low_level import hash_secret
+from asyncpg import Range
+from dotenv import load_dotenv
+
+from app.models.slot_model import SLOT_LIMIT
+from test.bench_repositories import create_schema
+
+TABLES = ("users", "slots", "reservations")
+COLUMNS = {
+    "users": ("id", "username", "password", "admin", "created_at"),
+    "slots": ("id", "time_range"),
+    "reservations": ("id", "slot_id", "user_id", "amount", "confirmed", "created_at", "confirmed_at", "updated_at"),
+}
+PASSWORD = "password"
+CHUNK = 10_000
+
+
+def password_hashes(rng: random.Random, count: int) -> List[str]:
+    """Argon2id hashes of PASSWORD with the parameters PasswordHasher() verifies without rehashing."""
+    ph = PasswordHasher()
+    return [hash_secret(PASSWORD.encode(), rng.randbytes(ph.salt_len), time_cost=ph.time_cost,
+                        memory_cost=ph.memory_cost, parallelism=ph.parallelism, hash_len=ph.hash_len,
+                        type=Type.ID).decode()
+            for _ in range(count)]
+
+
+class Dataset:
+    """
+    Row generators for one seed. Ids are assigned here, starting after the rows the init scripts
+    insert, so the reservations can reference users and slots without reading them back.
+    """
+
+    def __init__(self, users: int, slots: int, reservations: int, seed: int = 0, hot_slots: int = 10,
+                 skew: float = 1.1, confirmed_ratio: float = 0.5, max_amount: int = 2000,
+                 slot_minutes: int = 60, anchor: Optional[datetime] = None, hash_pool: int = 8,
+                 first_user_id: int = 1, first_slot_id: int = 1, first_reservation_id: int = 1):
+        if hot_slots > slots:
+            raise ValueError("hot_slots must not exceed slots")
+        self.users, self.slots, self.reservations = users, slots, reservations
+        self.seed = seed
+        self.hot_slots = hot_slots
+        self.skew = skew
+        self.confirmed_ratio = confirmed_ratio
+        self.max_amount = max_amount
+        self.slot_minutes = slot_minutes
+        # the dataset's "now": half of the slots are before it, half after
+        self.anchor = anchor or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.anchor - timedelta(minutes=slot_minutes * (slots // 2))
+        self.hash_pool = hash_pool
+        self.first_user_id, self.first_slot_id, self.first_reservation_id = \
+            first_user_id, first_slot_id, first_reservation_id
+
+        self.confirmed_amount = [0] * slots
+        self.pending_amount = [0] * slots
+        self.generated_reservations = 0
+
+    def rng(self, stream: str) -> random.Random:
+        # one independent stream per table, so changing one table's size leaves the others unchanged
+        return random.Random(f"{self.seed}:{stream}")
+
+    def slot_start(self, index: int) -> datetime:
+        return self.start + timedelta(minutes=self.slot_minutes * index)
+
+    def user_rows(self) -> Iterator[tuple]:
+        hashes = password_hashes(self.rng("hashes"), self.hash_pool)
+        rng = self.rng("users")
+        for i in range(self.users):
+            created_at = self.anchor - timedelta(seconds=rng.randrange(365 * 86400))
+            yield self.first_user_id + i, f"datagen_user_{i}", hashes[i % len(hashes)], False, created_at
+
+    def slot_rows(self) -> Iterator[tuple]:
+        for i in range(self.slots):
+            yield self.first_slot_id + i, Range(self.slot_start(i), self.slot_start(i + 1), lower_inc=True,
+                                                upper_inc=False)
+
+    def __amount(self, rng: random.Random) -> int:
+        # mostly small groups with an exponential tail up to max_amount
+        return min(self.max_amount, 1 + int(rng.expovariate(5 / self.max_amount)))
+
+    def __reservation(self, rng: random.Random, slot: int, amount: int, confirmed: bool) -> tuple:
+        lower = self.slot_start(slot)
+        created_at = min(lower, self.anchor) - timedelta(seconds=rng.randrange(30 * 86400))
+        confirmed_at = created_at + timedelta(seconds=rng.randrange(86400)) if confirmed else None
+        if confirmed:
+            self.confirmed_amount[slot] += amount
+        else:
+            self.pending_amount[slot] += amount
+        row = (self.first_reservation_id + self.generated_reservations, self.first_slot_id + slot,
+               self.first_user_id + rng.randrange(self.users), amount, confirmed, created_at, confirmed_at,
+               confirmed_at or created_at)
+        self.generated_reservations += 1
+        return row
+
+    def reservation_rows(self) -> Iterator[tuple]:
+        rng = self.rng("reservations")
+        popularity = list(range(self.slots))
+        rng.shuffle(popularity)
+
+        # hot slots: the most popular ones, confirmed up to exactly the cap
+        for slot in popularity[:self.hot_slots]:
+            while self.confirmed_amount[slot] < SLOT_LIMIT and self.generated_reservations < self.reservations:
+                amount = min(self.__amount(rng), SLOT_LIMIT - self.confirmed_amount[slot])
+                yield self.__reservation(rng, slot, amount, True)
+
+        # everything else follows the popularity curve; a full slot only gets pending reservations
+        cum_weights = list(accumulate(1 / (rank + 1) ** self.skew for rank in range(self.slots)))
+        while self.generated_reservations < self.reservations:
+            batch = min(CHUNK, self.reservations - self.generated_reservations)
+            for slot in rng.choices(popularity, cum_weights=cum_weights, k=batch):
+                amount = self.__amount(rng)
+                confirmed = rng.random() < self.confirmed_ratio and \
+                    self.confirmed_amount[slot] + amount <= SLOT_LIMIT
+                yield self.__reservation(rng, slot, amount, confirmed)
+
+    def summary(self) -> dict:
+        return {
+            "users": self.users, "slots": self.slots, "reservations": self.generated_reservations,
+            "seed": self.seed, "anchor": self.anchor.isoformat(), "hot_slots": self.hot_slots,
+            "slots_at_cap": sum(1 for amount in self.confirmed_amount if amount == SLOT_LIMIT),
+            "confirmed_amount": sum(self.confirmed_amount), "pending_amount": sum(self.pending_amount),
+        }
+
+
+# loading
+async def reset_sequences(conn):
+    for table in TABLES:
+        await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                           f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)")
+
+
+async def generate(conn, args) -> dict:
+    first_user_id = await conn.fetchval("SELECT COALESCE(MAX(id), 0) + 1 FROM users")
+    dataset = Dataset(args.users, args.slots, args.reservations, seed=args.seed, hot_slots=args.hot_slots,
+                      skew=args.skew, confirmed_ratio=args.confirmed_ratio, max_amount=args.max_amount,
+                      slot_minutes=args.slot_minutes, anchor=args.anchor, hash_pool=args.hash_pool,
+                      first_user_id=first_user_id)
+    timings = {}
+    for table, rows in (("users", dataset.user_rows()), ("slots", dataset.slot_rows()),
+                        ("reservations", dataset.reservation_rows())):
+        start = perf_counter()
+        await copy_rows(conn, table, rows)
+        timings[table] = round(perf_counter() - start, 2)
+    return {**dataset.summary(), "copy_seconds": timings}
+
+
+async def copy_rows(conn, table: str, rows):
+    # the cap checks hold by construction; with the triggers on, every row would lock its slot
+    if table == "reservations":
+        await conn.execute("ALTER TABLE reservations DISABLE TRIGGER USER")
+    try:
+        await conn.copy_records_to_table(table, records=rows, columns=COLUMNS[table])
+    finally:
+        if table == "reservations":
+            await conn.execute("ALTER TABLE reservations ENABLE TRIGGER USER")
+
+
+async def snapshot(conn, directory: Path, summary: dict):
+    directory.mkdir(parents=True, exist_ok=True)
+    for table in TABLES:
+        await conn.copy_from_table(table, output=str(directory / f"{table}.copy"), format="binary",
+                                   columns=COLUMNS[table])
+    with open(directory / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+async def restore(conn, directory: Path) -> dict:
+    with open(directory / "manifest.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    # the snapshot carries the rows the init scripts insert as well
+    await conn.execute("TRUNCATE reservations, slots, users RESTART IDENTITY CASCADE")
+    timings = {}
+    for table in TABLES:
+        start = perf_counter()
+        if table == "reservations":
+            await conn.execute("ALTER TABLE reservations DISABLE TRIGGER USER")
+        try:
+            await conn.copy_to_table(table, source=str(directory / f"{table}.copy"), format="binary",
+                                     columns=COLUMNS[table])
+        finally:
+            if table == "reservations":
+                await conn.execute("ALTER TABLE reservations ENABLE TRIGGER USER")
+        timings[table] = round(perf_counter() - start, 2)
+    return {**summary, "copy_seconds": timings, "restored_from": str(directory)}
+
+
+async def verify(conn) -> dict:
+    row = await conn.fetchrow(f"""
+        SELECT MAX(confirmed) AS max_confirmed, COUNT(*) FILTER (WHERE confirmed = {SLOT_LIMIT}) AS slots_at_cap
+        FROM (SELECT SUM(amount) AS confirmed FROM reservations WHERE confirmed GROUP BY slot_id) t
+    """)
+    overlapping = await conn.fetchval("""
+        SELECT COUNT(*) FROM slots a JOIN slots b ON a.id < b.id AND a.time_range && b.time_range
+    """)
+    return {"max_confirmed": row["max_confirmed"], "slots_at_cap": row["slots_at_cap"], "overlapping": overlapping}
+
+
+async def main(args) -> int:
+    if args.anchor is not None and args.anchor.tzinfo is None:
+        args.anchor = args.anchor.replace(tzinfo=timezone.utc)
+    app_schema = os.getenv("APP_DB_SCHEMA")
+    if args.schema == app_schema and not args.replace_app_schema:
+        print(f"Refusing to drop the application schema {app_schema} (pass --replace-app-schema)", file=sys.stderr)
+        return 2
+
+    conn = await asyncpg.connect(os.getenv("DATABASE_URL"))
+    try:
+        start = perf_counter()
+        await create_schema(conn, args.schema)
+        if args.restore:
+            summary = await restore(conn, Path(args.restore))
+        else:
+            summary = await generate(conn, args)
+        await reset_sequences(conn)
+        await conn.execute("ANALYZE")
+        summary["schema"] = args.schema
+        summary["load_seconds"] = round(perf_counter() - start, 2)
+        summary["verified"] = await verify(conn)
+        if args.snapshot:
+            await snapshot(conn, Path(args.snapshot), summary)
+    finally:
+        await conn.close()
+
+    print(json.dumps(summary, indent=2))
+    if summary["verified"]["max_confirmed"] is not None and summary["verified"]["max_confirmed"] > SLOT_LIMIT:
+        return 1
+    return 0 if summary["verified"]["overlapping"] == 0 else 1
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Seed a schema with a large synthetic dataset")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--slots", type=int, default=1_000)
+    parser.add_argument("--reservations", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hot-slots", type=int, default=10, help="slots confirmed up to the 50,000 cap")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of slot popularity")
+    parser.add_argument("--confirmed-ratio", type=float, default=0.5)
+    parser.add_argument("--max-amount", type=int, default=2000)
+    parser.add_argument("--slot-minutes", type=int, default=60)
+    parser.add_argument("--anchor", type=datetime.fromisoformat, default=None,
+                        help="the dataset's 'now' (ISO8601, default today 00:00 UTC); fix it for identical rows")
+    parser.add_argument("--hash-pool", type=int, default=8, help="distinct password hashes shared by the users")
+    parser.add_argument("--schema", default="ers_datagen", help="dropped and recreated")
+    parser.add_argument("--replace-app-schema", action="store_true",
+                        help="allow --schema to be APP_DB_SCHEMA, e.g. to load test the running app")
+    parser.add_argument("--snapshot", default=None, help="directory to write the loaded tables to")
+    parser.add_argument("--restore", default=None, help="snapshot directory to load instead of generating")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,318 @@
+"""
+HTTP load generator modeled on registration-day traffic.
+
+Runs scripted scenarios against a running server (app + postgres) and prints throughput and
+p50/p95/p99 latency per endpoint as JSON, so builds can be compared.
+
+    python -m test.loadtest --base-url http://localhost:8000/api --scenario all --output load.json
+    python -m test.loadtest --scenario slot_listing_storm --baseline load.json --max-regression 0.2
+
+Scenarios
+- slot_listing_storm: many clients polling GET /slots
+- hot_slot_booking_race: users book one slot while an admin confirms them, racing for the slot's capacity
+- admin_bulk_confirm: an admin confirms a large backlog of pending reservations concurrently
+- login_storm: many users logging in at once (argon2 verify bound)
+
+The default admin account from database/init-scripts (admin / password) is used for admin calls.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.models.slot_model import SLOT_LIMIT
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label: str, seconds: float, status: int):
+        self.latencies[label].append(seconds)
+        self.statuses[label][status] += 1
+
+    def summary(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        for label, values in self.latencies.items():
+            values = sorted(values)
+            statuses = self.statuses[label]
+            endpoints[label] = {
+                "count": len(values),
+                "errors": sum(count for status, count in statuses.items() if status >= 500 or status == 0),
+                "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+                "throughput_rps": round(len(values) / wall_seconds, 2) if wall_seconds else 0,
+                "mean_ms": round(statistics.fmean(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return {"wall_seconds": round(wall_seconds, 3), "endpoints": endpoints}
+
+
+class LoadClient:
+    def __init__(self, base_url: str, recorder: LatencyRecorder, concurrency: int):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        self.http = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+        self.recorder = recorder
+
+    async def request(self, label: str, method: str, url: str, token: Optional[str] = None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        start = perf_counter()
+        try:
+            response = await self.http.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(label, perf_counter() - start, 0)
+            return None
+        self.recorder.record(label, perf_counter() - start, response.status_code)
+        return response
+
+    async def login(self, username: str, password: str, label: str = "POST /auth/token/form") -> Optional[str]:
+        # the form endpoint returns the token in the body
+        response = await self.request(label, "POST", "/auth/token/form",
+                                      data={"username": username, "password": password})
+        if response is None or response.status_code != 200:
+            return None
+        return response.json()["access_token"]
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+# fixtures
+async def run_concurrently(concurrency: int, jobs):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(job):
+        async with semaphore:
+            return await job
+
+    return await asyncio.gather(*(guarded(job) for job in jobs))
+
+
+async def register_users(client: LoadClient, prefix: str, n: int, concurrency: int) -> List[str]:
+    usernames = [f"{prefix}_{i}" for i in range(n)]
+    await run_concurrently(concurrency, [
+        client.request("setup POST /auth/register", "POST", "/auth/register",
+                       json={"username": username, "password": "password"})
+        for username in usernames
+    ])
+    return usernames
+
+
+async def create_slot(client: LoadClient, admin_token: str) -> dict:
+    # far enough in the future for the 3 day rule, spread out so runs never overlap
+    for _ in range(20):
+        start = datetime.now(timezone.utc) + timedelta(days=30, hours=random.randint(0, 24 * 365 * 50))
+        response = await client.request("setup POST /slots", "POST", "/slots", token=admin_token, json={
+            "start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat(), "capacity": SLOT_LIMIT})
+        if response is not None and response.status_code == 201:
+            break
+    else:
+        raise RuntimeError("Could not create a slot for the scenario")
+
+    slots = await client.request("setup GET /slots", "GET", "/slots", params={
+        "start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat()})
+    return slots.json()["result"][0]
+
+
+async def pending_reservation_ids(client: LoadClient, admin_token: str, slot_id: int) -> List[int]:
+    slot = (await client.request("setup GET /slots/{id}", "GET", f"/slots/{slot_id}")).json()["result"]
+    response = await client.request("setup GET /admin/reservations", "GET", "/admin/reservations", token=admin_token,
+                                    params={"start_at": slot["time_range"]["start"],
+                                            "end_at": slot["time_range"]["end"]})
+    return [r["id"] for r in response.json()["result"] if r["slot_id"] == slot_id and not r["confirmed"]]
+
+
+# scenarios
+async def slot_listing_storm(client: LoadClient, args) -> dict:
+    deadline = perf_counter() + args.duration
+
+    async def poller():
+        while perf_counter() < deadline:
+            await client.request("GET /slots", "GET", "/slots")
+
+    await asyncio.gather(*(poller() for _ in range(args.concurrency)))
+    return {}
+
+
+async def hot_slot_booking_race(client: LoadClient, args) -> dict:
+    admin_token = await client.login(args.admin_username, args.admin_password, "setup POST /auth/token/form")
+    slot = await create_slot(client, admin_token)
+    slot_id, capacity = slot["id"], slot["capacity"]
+    usernames = await register_users(client, f"load_{args.run_id}_race", args.users, args.concurrency)
+    tokens = await run_concurrently(args.concurrency, [
+        client.login(username, "password", "setup POST /auth/token/form") for username in usernames])
+
+    # every user asks for enough seats that only part of them can be confirmed
+    amount = max(1, capacity * 2 // max(len(usernames), 1))
+    booked: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def book(token):
+        response = await client.request("POST /users/reservations", "POST", "/users/reservations", token=token,
+                                        json={"slot_id": slot_id, "amount": amount})
+        if response is not None and response.status_code == 201:
+            await booked.put(True)
+
+    async def confirmer():
+        # bookings do not return their id, so list the pending ones once per batch of bookings that
+        # arrived meanwhile instead of once per booking
+        confirmed = 0
+        seen = set()
+        finished = False
+        while not finished:
+            batch = [await booked.get()]
+            while not booked.empty():
+                batch.append(booked.get_nowait())
+            finished = done in batch
+            ids = [i for i in await pending_reservation_ids(client, admin_token, slot_id) if i not in seen]
+            for reservation_id in ids:
+                seen.add(reservation_id)
+                response = await client.request("PATCH /admin/reservations/{id}", "PATCH",
+                                                f"/admin/reservations/{reservation_id}", token=admin_token)
+                if response is not None and response.status_code == 200:
+                    confirmed += 1
+        return confirmed
+
+    confirm_task = asyncio.create_task(confirmer())
+    await run_concurrently(args.concurrency, [book(token) for token in tokens if token])
+    await booked.put(done)
+    confirmed = await confirm_task
+
+    slot = (await client.request("setup GET /slots/{id}", "GET", f"/slots/{slot_id}")).json()["result"]
+    return {
+        "slot_id": slot_id,
+        "amount_per_booking": amount,
+        "confirmed_reservations": confirmed,
+        "confirmed_total": slot["amount"],
+        "capacity": slot["capacity"],
+        "cap_respected": slot["amount"] <= slot["capacity"],
+    }
+
+
+async def admin_bulk_confirm(client: LoadClient, args) -> dict:
+    admin_token = await client.login(args.admin_username, args.admin_password, "setup POST /auth/token/form")
+    slot = await create_slot(client, admin_token)
+    slot_id, capacity = slot["id"], slot["capacity"]
+    usernames = await register_users(client, f"load_{args.run_id}_bulk", args.users, args.concurrency)
+    tokens = await run_concurrently(args.concurrency, [
+        client.login(username, "password", "setup POST /auth/token/form") for username in usernames])
+
+    per_user = max(1, args.reservations // max(len(usernames), 1))
+    amount = max(1, capacity // max(per_user * len(usernames), 1))
+    await run_concurrently(args.concurrency, [
+        client.request("setup POST /users/reservations", "POST", "/users/reservations", token=token,
+                       json={"slot_id": slot_id, "amount": amount})
+        for token in tokens if token for _ in range(per_user)
+    ])
+
+    ids = await pending_reservation_ids(client, admin_token, slot_id)
+    await run_concurrently(args.concurrency, [
+        client.request("PATCH /admin/reservations/{id}", "PATCH", f"/admin/reservations/{reservation_id}",
+                       token=admin_token)
+        for reservation_id in ids
+    ])
+    return {"slot_id": slot_id, "pending_before": len(ids), "amount_per_reservation": amount}
+
+
+async def login_storm(client: LoadClient, args) -> dict:
+    usernames = await register_users(client, f"load_{args.run_id}_login", args.users, args.concurrency)
+    deadline = perf_counter() + args.duration
+
+    async def user_loop():
+        while perf_counter() < deadline:
+            await client.login(random.choice(usernames), "password")
+
+    await asyncio.gather(*(user_loop() for _ in range(args.concurrency)))
+    return {}
+
+
+SCENARIOS = {
+    "slot_listing_storm": slot_listing_storm,
+    "hot_slot_booking_race": hot_slot_booking_race,
+    "admin_bulk_confirm": admin_bulk_confirm,
+    "login_storm": login_storm,
+}
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return endpoints whose p95 grew more than `max_regression` (0.2 = 20%) over the baseline."""
+    regressions = []
+    for name, scenario in report["scenarios"].items():
+        base_endpoints = baseline.get("scenarios", {}).get(name, {}).get("endpoints", {})
+        for label, stats in scenario["endpoints"].items():
+            if label.startswith("setup ") or label not in base_endpoints:
+                continue
+            base_p95 = base_endpoints[label]["p95_ms"]
+            if base_p95 > 0 and stats["p95_ms"] > base_p95 * (1 + max_regression):
+                regressions.append(f"{name} {label}: p95 {base_p95}ms -> {stats['p95_ms']}ms")
+    return regressions
+
+
+async def main(args) -> int:
+    names = list(SCENARIOS) if args.scenario == ["all"] else args.scenario
+    report = {"label": args.label, "base_url": args.base_url, "concurrency": args.concurrency,
+              "started_at": datetime.now(timezone.utc).isoformat(), "scenarios": {}}
+
+    for name in names:
+        recorder = LatencyRecorder()
+        client = LoadClient(args.base_url, recorder, args.concurrency)
+        try:
+            start = perf_counter()
+            details = await SCENARIOS[name](client, args)
+            wall = perf_counter() - start
+        finally:
+            await client.aclose()
+        report["scenarios"][name] = {**recorder.summary(wall), "details": details}
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registration-day load test")
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--scenario", nargs="+", default=["all"], choices=["all", *SCENARIOS])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30, help="seconds, for the storm scenarios")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--reservations", type=int, default=2000, help="pending backlog for admin_bulk_confirm")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="password")
+    parser.add_argument("--label", default=None, help="build identifier stored in the report, e.g. a git sha")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="previous report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--run-id", default=uuid.uuid4().hex[:8], help=argparse.SUPPRESS)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,305 @@
+"""
+Concurrency stress test for the slot limit triggers (check_slot_limit_on_insert,
+check_slot_limit_after_update).
+
+Many workers share one hot slot (and a second slot used for cross-slot moves) and run a random mix
+of user inserts, admin confirms, admin amount changes and admin moves between the two slots
+through the repositories. Meanwhile a monitor polls the committed confirmed totals and the
+backends waiting on locks. The report is JSON; the exit code is 1 if any slot was ever seen above
+its capacity.
+
+    python -m test.stress_slot_limit --operations 5000 --concurrency 64 --output stress.json
+    python -m test.stress_slot_limit --mix insert=5 confirm=5 move=1 --seed 7
+
+Runs in a scratch schema (default ers_stress) recreated from database/init-scripts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from asyncpg import DeadlockDetectedError, SerializationError
+from dotenv import load_dotenv
+
+from app.database import ers_db, instrumented
+from app.database.retry import RETRYABLE_SQLSTATES
+from app.models.reservation_model import Reservation, ReservationDto
+from app.models.slot_model import SLOT_LIMIT, Slot
+from app.monitoring.metrics import DB_TRANSACTION_RETRIES
+from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
+from app.repositories.reservation.exceptions import NoSuchReservationException, SlotLimitExceededException
+from test.bench_repositories import BENCH_PASSWORD_HASH, create_schema
+
+# retry_transaction names of the repository methods the operations call
+RETRIED_OPERATIONS = ("reservation.insert_if_days_left", "reservation.confirm_by_id", "reservation.modify_from_admin")
+
+
+class Book:
+    """What the workers believe about the reservations they created. Only used to pick targets."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.pending: Dict[int, int] = {}
+        self.confirmed: Dict[int, int] = {}
+        self.slot_of: Dict[int, int] = {}
+
+    def pick(self, group: Dict[int, int]):
+        if not group:
+            return None
+        return self.rng.choice(list(group))
+
+
+class Stress:
+    def __init__(self, args, pool, slot_ids: List[int], user_ids: List[int]):
+        self.args = args
+        self.pool = pool
+        self.repo = ReservationRepositoryTransactionImpl(pool)
+        self.rng = random.Random(args.seed)
+        self.hot_slot, self.other_slot = slot_ids
+        self.user_ids = user_ids
+        self.book = Book(self.rng)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.remaining = args.operations
+        ops, weights = zip(*args.mix.items())
+        self.ops, self.weights = list(ops), list(weights)
+
+    # operations; each returns the outcome label
+    async def op_insert(self):
+        slot_id = self.hot_slot if self.rng.random() < 0.8 else self.other_slot
+        amount = self.rng.randint(1, self.args.max_amount)
+        ret = await self.repo.insert_if_days_left(
+            Reservation(slot_id=slot_id, user_id=self.rng.choice(self.user_ids), amount=amount), 3)
+        self.book.pending[ret["id"]] = amount
+        self.book.slot_of[ret["id"]] = slot_id
+
+    async def op_confirm(self):
+        reservation_id = self.book.pick(self.book.pending)
+        if reservation_id is None:
+            return "skipped"
+        amount = self.book.pending.pop(reservation_id)
+        try:
+            await self.repo.confirm_by_id(reservation_id)
+        except SlotLimitExceededException:
+            self.book.pending[reservation_id] = amount
+            raise
+        self.book.confirmed[reservation_id] = amount
+
+    async def op_modify(self):
+        reservation_id = self.book.pick(self.book.confirmed)
+        if reservation_id is None:
+            return "skipped"
+        amount = self.rng.randint(1, self.args.max_amount)
+        await self.repo.modify_from_admin(
+            reservation_id, ReservationDto(slot_id=self.book.slot_of[reservation_id], amount=amount))
+        self.book.confirmed[reservation_id] = amount
+
+    async def op_move(self):
+        reservation_id = self.book.pick(self.book.confirmed)
+        if reservation_id is None:
+            return "skipped"
+        target = self.other_slot if self.book.slot_of[reservation_id] == self.hot_slot else self.hot_slot
+        # same amount: only the slot changes
+        await self.repo.modify_from_admin(
+            reservation_id, ReservationDto(slot_id=target, amount=self.book.confirmed[reservation_id]))
+        self.book.slot_of[reservation_id] = target
+
+    async def worker(self):
+        while self.remaining > 0:
+            self.remaining -= 1
+            name = self.rng.choices(self.ops, self.weights)[0]
+            start = perf_counter()
+            try:
+                outcome = await getattr(self, f"op_{name}")() or "ok"
+            except SlotLimitExceededException:
+                outcome = "slot_limit"
+            except DeadlockDetectedError:
+                outcome = "deadlock"
+            except SerializationError:
+                outcome = "serialization"
+            except NoSuchReservationException:
+                outcome = "not_found"
+            except Exception as e:
+                outcome = type(e).__name__
+            if outcome != "skipped":
+                self.latencies[name].append(perf_counter() - start)
+            self.outcomes[name][outcome] += 1
+
+
+class Monitor:
+    """Polls committed confirmed totals and lock waiters on its own connection."""
+
+    def __init__(self, conn, interval: float):
+        self.conn = conn
+        self.interval = interval
+        self.max_total: Dict[int, int] = defaultdict(int)
+        self.violations: List[dict] = []
+        self.lock_wait_seconds = 0.0
+        self.max_lock_waiters = 0
+        self.samples = 0
+        self.stopped = asyncio.Event()
+
+    async def run(self):
+        while not self.stopped.is_set():
+            await self.sample()
+            try:
+                await asyncio.wait_for(self.stopped.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sample(self):
+        start = perf_counter()
+        for row in await self.conn.fetch("""
+            SELECT r.slot_id, SUM(r.amount) AS total, s.capacity
+            FROM reservations r JOIN slots s ON s.id = r.slot_id
+            WHERE r.confirmed GROUP BY r.slot_id, s.capacity
+        """):
+            self.max_total[row["slot_id"]] = max(self.max_total[row["slot_id"]], row["total"])
+            if row["total"] > row["capacity"]:
+                self.violations.append({"slot_id": row["slot_id"], "total": row["total"], "capacity": row["capacity"],
+                                        "at": datetime.now(timezone.utc).isoformat()})
+        waiters = await self.conn.fetchval("""
+            SELECT COUNT(*) FROM pg_stat_activity
+            WHERE datname = current_database() AND wait_event_type = 'Lock' AND pid != pg_backend_pid()
+        """)
+        self.max_lock_waiters = max(self.max_lock_waiters, waiters)
+        # waiters x elapsed approximates the lock wait accumulated since the previous sample
+        self.lock_wait_seconds += waiters * (self.interval + perf_counter() - start)
+        self.samples += 1
+
+
+async def deadlock_count(conn) -> int:
+    return await conn.fetchval("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+
+
+async def setup(conn, users: int) -> Tuple[List[int], List[int]]:
+    await conn.execute("""
+        INSERT INTO users(username, password)
+        SELECT 'stress_user_' || g, $1 FROM generate_series(1, $2) g
+    """, BENCH_PASSWORD_HASH, users)
+    user_ids = [r["id"] for r in await conn.fetch("SELECT id FROM users WHERE username LIKE 'stress_user_%'")]
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=30)
+    slot_ids = []
+    for i in range(2):
+        slot = Slot.create_with_time_range(start + timedelta(hours=i), start + timedelta(hours=i + 1))
+        slot_ids.append(await conn.fetchval("INSERT INTO slots(time_range, capacity) VALUES($1, $2) RETURNING id",
+                                            slot.time_range, SLOT_LIMIT))
+    return slot_ids, user_ids
+
+
+def summarize(values: List[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(values[len(values) // 2] * 1000, 3),
+        "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+    }
+
+
+async def main(args) -> int:
+    app_schema = os.getenv("APP_DB_SCHEMA")
+    if args.schema == app_schema:
+        print(f"Refusing to drop the application schema {app_schema}", file=sys.stderr)
+        return 2
+    os.environ["APP_DB_SCHEMA"] = f"{args.schema}, public"
+    os.environ["DB_POOL_MIN_SIZE"] = str(args.concurrency + 1)
+    os.environ["DB_POOL_MAX_SIZE"] = str(args.concurrency + 1)
+    instrumented.settings.update(enabled=False)
+
+    await ers_db.connect()
+    pool = ers_db.get_pool()
+    try:
+        async with pool.raw.acquire() as conn:
+            await create_schema(conn, args.schema)
+            slot_ids, user_ids = await setup(conn, args.users)
+
+        stress = Stress(args, pool, slot_ids, user_ids)
+        async with pool.raw.acquire() as monitor_conn:
+            monitor = Monitor(monitor_conn, args.sample_interval)
+            deadlocks_before = await deadlock_count(monitor_conn)
+            monitor_task = asyncio.create_task(monitor.run())
+
+            start = perf_counter()
+            await asyncio.gather(*(stress.worker() for _ in range(args.concurrency)))
+            wall = perf_counter() - start
+
+            monitor.stopped.set()
+            await monitor_task
+            await monitor.sample()
+            # pg_stat_database is flushed lazily, so this can lag behind the client side count
+            deadlocks_server = await deadlock_count(monitor_conn) - deadlocks_before
+    finally:
+        await ers_db.disconnect()
+
+    executed = sum(sum(v for k, v in outcomes.items() if k != "skipped") for outcomes in stress.outcomes.values())
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "label": args.label,
+        "operations": args.operations,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "seed": args.seed,
+        "wall_seconds": round(wall, 3),
+        "throughput_ops": round(executed / wall, 2) if wall else 0,
+        "deadlocks": sum(outcomes.get("deadlock", 0) for outcomes in stress.outcomes.values()),
+        "deadlocks_server": deadlocks_server,
+        # deadlocks and serialization failures the repositories absorbed by running the transaction again
+        "retries": {sqlstate: sum(DB_TRANSACTION_RETRIES.get(op, sqlstate) for op in RETRIED_OPERATIONS)
+                    for sqlstate in sorted(RETRYABLE_SQLSTATES)},
+        "lock_wait_seconds": round(monitor.lock_wait_seconds, 3),
+        "max_lock_waiters": monitor.max_lock_waiters,
+        "monitor_samples": monitor.samples,
+        "operations_by_type": {
+            name: {"outcomes": dict(stress.outcomes[name]), **summarize(stress.latencies[name])}
+            for name in stress.ops
+        },
+        "max_confirmed_total": {str(slot_id): monitor.max_total.get(slot_id, 0) for slot_id in slot_ids},
+        "violations": monitor.violations[:100],
+        "cap_respected": not monitor.violations,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 0 if report["cap_respected"] else 1
+
+
+def parse_mix(values: List[str]) -> Dict[str, float]:
+    mix = {}
+    for value in values:
+        name, weight = value.split("=")
+        if name not in ("insert", "confirm", "modify", "move"):
+            raise argparse.ArgumentTypeError(f"unknown operation {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Stress the slot limit triggers with concurrent writers")
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mix", nargs="+", default=["insert=4", "confirm=4", "modify=1", "move=1"],
+                        help="operation=weight, operations: insert confirm modify move")
+    parser.add_argument("--max-amount", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-interval", type=float, default=0.01, help="monitor poll interval in seconds")
+    parser.add_argument("--schema", default="ers_stress", help="scratch schema, dropped and recreated")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--output", default=None)
+    arguments = parser.parse_args()
+    arguments.mix = parse_mix(arguments.mix)
+    sys.exit(asyncio.run(main(arguments)))
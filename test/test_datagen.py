@@ -0,0 +1,83 @@
+import logging
+import sys
+import unittest
+from datetime import datetime, timezone
+
+from argon2 import PasswordHasher
+
+from app.models.slot_model import SLOT_LIMIT
+from test.datagen import Dataset, PASSWORD
+
+
+class TestDatagen(unittest.TestCase):
+    """합성 데이터 생성기에 대한 테스트 클래스 (DB 없이 생성되는 행만 검사)"""
+
+    logger = logging.getLogger('TestDatagen')
+    anchor = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+    def dataset(self, seed: int) -> Dataset:
+        return Dataset(users=50, slots=40, reservations=5000, seed=seed, hot_slots=3, anchor=self.anchor,
+                       hash_pool=1)
+
+    def test_same_seed_same_rows(self):
+        """같은 시드와 기준 시각이면 같은 행이, 다른 시드면 다른 행이 생성되는지 테스트"""
+        # when
+        first = list(self.dataset(7).reservation_rows())
+        second = list(self.dataset(7).reservation_rows())
+        other = list(self.dataset(8).reservation_rows())
+
+        # then
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(first), 5000)
+
+    def test_skewed_distribution_respects_cap(self):
+        """인기 슬롯은 정확히 상한까지 확정되고, 어떤 슬롯도 상한을 넘지 않으며 분포가 치우쳐 있는지 테스트"""
+        # given
+        dataset = self.dataset(7)
+
+        # when
+        rows = list(dataset.reservation_rows())
+        per_slot = {}
+        for row in rows:
+            per_slot[row[1]] = per_slot.get(row[1], 0) + 1
+
+        # then
+        self.assertGreaterEqual(dataset.summary()["slots_at_cap"], 3)
+        self.assertLessEqual(max(dataset.confirmed_amount), SLOT_LIMIT)
+        self.assertTrue(all(row[3] >= 1 for row in rows))
+        counts = sorted(per_slot.values(), reverse=True)
+        # 상위 10% 슬롯이 하위 절반보다 많은 예약을 가짐
+        self.assertGreater(sum(counts[:4]), sum(counts[len(counts) // 2:]))
+
+    def test_slots_and_users(self):
+        """슬롯은 겹치지 않고 이어지며, 사용자 비밀번호 해시가 재해시 없이 검증되는지 테스트"""
+        # given
+        dataset = self.dataset(7)
+
+        # when
+        slots = list(dataset.slot_rows())
+        users = list(dataset.user_rows())
+
+        # then
+        self.assertTrue(all(a[1].upper == b[1].lower for a, b in zip(slots, slots[1:])))
+        self.assertEqual(slots[len(slots) // 2][1].lower, self.anchor)
+        ph = PasswordHasher()
+        self.assertTrue(ph.verify(users[0][2], PASSWORD))
+        self.assertFalse(ph.check_needs_rehash(users[0][2]))
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDatagen)
+    runner.run(suite)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import sys
+import unittest
+from time import perf_counter
+
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI
+
+from app.database.instrumented import InstrumentedConnection, QueryDeadlineExceeded, query_deadline
+from app.dependencies import config
+from app.monitoring.metrics import HTTP_DISCONNECTS, HTTP_REQUESTS
+from app.monitoring.middleware import DisconnectMiddleware, MetricsMiddleware
+
+
+class FakeConnection:
+    """asyncpg처럼 timeout이 지나면 asyncio.TimeoutError를 내는 연결"""
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.timeouts = []
+
+    async def fetch(self, query, *args, timeout=None):
+        self.timeouts.append(timeout)
+        await asyncio.wait_for(asyncio.sleep(self.duration), timeout)
+        return []
+
+
+class TestDeadlines(unittest.IsolatedAsyncioTestCase):
+    """요청 단위 쿼리 데드라인과 클라이언트 연결 종료 시 취소에 대한 테스트 클래스 (DB 불필요)"""
+
+    logger = logging.getLogger('TestDeadlines')
+
+    async def asyncSetUp(self):
+        """각 테스트 실행 전 메트릭 초기화 및 느린 엔드포인트를 가진 테스트용 앱 생성"""
+        HTTP_REQUESTS.clear()
+        HTTP_DISCONNECTS.clear()
+        self.events = []
+
+        self.app = FastAPI()
+
+        @self.app.get("/slow", dependencies=[Depends(config.query_deadline(0.05))])
+        async def slow_read():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.events.append("read cancelled")
+                raise
+            return {}
+
+        @self.app.post("/slow")
+        async def slow_write():
+            await asyncio.sleep(0.05)
+            self.events.append("write finished")
+            return {}
+
+        self.asgi = MetricsMiddleware(DisconnectMiddleware(self.app))
+
+    async def call_and_disconnect(self, method: str, after: float) -> list:
+        """요청 본문을 보낸 뒤 after초 후에 연결을 끊고 앱이 보낸 메시지를 반환"""
+        sent = []
+        disconnect = asyncio.Event()
+        inbox = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if inbox:
+                return inbox.pop()
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+                 "scheme": "http", "path": "/slow", "raw_path": b"/slow", "root_path": "", "query_string": b"",
+                 "headers": [], "client": ("test", 1), "server": ("test", 80)}
+        asyncio.get_running_loop().call_later(after, disconnect.set)
+        await asyncio.wait_for(self.asgi(scope, receive, send), timeout=2)
+        return sent
+
+    async def test_queries_get_remaining_time(self):
+        """데드라인 안의 쿼리는 남은 시간을 timeout으로 받고, 넘으면 QueryDeadlineExceeded가 나는지 테스트"""
+        # given
+        fast = InstrumentedConnection(FakeConnection(0))
+        slow = InstrumentedConnection(FakeConnection(1))
+
+        # when
+        await fast.fetch("SELECT 1", query_name="test.fast")
+        with query_deadline(0.1):
+            with query_deadline(5):
+                await fast.fetch("SELECT 1", query_name="test.fast")
+            start = perf_counter()
+            with self.assertRaises(QueryDeadlineExceeded):
+                await slow.fetch("SELECT pg_sleep(1)", query_name="test.slow")
+            elapsed = perf_counter() - start
+            await asyncio.sleep(0.01)
+            with self.assertRaises(QueryDeadlineExceeded):
+                await fast.fetch("SELECT 1", query_name="test.fast")
+
+        # then: 바깥 데드라인보다 늘어나지 않고, 데드라인이 지난 뒤의 쿼리는 보내지 않음
+        timeouts = fast.raw.timeouts
+        self.assertEqual(len(timeouts), 2)
+        self.assertIsNone(timeouts[0])
+        self.assertLessEqual(timeouts[1], 0.1)
+        self.assertLess(elapsed, 0.5)
+
+    async def test_disconnect_cancels_read(self):
+        """응답 전에 연결이 끊긴 GET은 즉시 취소되고 499와 연결 종료 카운터로 기록되는지 테스트"""
+        # when
+        start = perf_counter()
+        sent = await self.call_and_disconnect("GET", after=0.02)
+        elapsed = perf_counter() - start
+
+        # then
+        self.assertEqual(self.events, ["read cancelled"])
+        self.assertEqual(sent, [])
+        self.assertLess(elapsed, 1)
+        self.assertEqual(HTTP_DISCONNECTS.get("GET", "/slow"), 1)
+        self.assertEqual(HTTP_REQUESTS.get("GET", "/slow", 499), 1)
+
+    async def test_disconnect_leaves_write_running(self):
+        """쓰기 요청은 연결이 끊겨도 끝까지 실행되는지 테스트"""
+        # when
+        sent = await self.call_and_disconnect("POST", after=0.01)
+
+        # then
+        self.assertEqual(self.events, ["write finished"])
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(HTTP_DISCONNECTS.get("POST", "/slow"), 0)
+
+
+class TestDeadlinesPostgres(unittest.IsolatedAsyncioTestCase):
+    """실제 Postgres에서 데드라인이 statement_timeout과 쿼리 취소로 이어지는지 테스트하는 클래스"""
+
+    logger = logging.getLogger('TestDeadlinesPostgres')
+
+    async def asyncSetUp(self):
+        """데이터베이스 연결"""
+        load_dotenv()
+        await config.ers_db.connect()
+        self.pool = config.ers_db.get_pool()
+
+    async def asyncTearDown(self):
+        """데이터베이스 연결 해제"""
+        await config.ers_db.disconnect()
+
+    async def test_deadline_cancels_query_and_releases_connection(self):
+        """데드라인을 넘긴 쿼리가 서버에서 취소되고, 연결은 풀에 돌아가 기본 statement_timeout으로 복구되는지 테스트"""
+        # given
+        async with self.pool.acquire() as conn:
+            default_timeout = await conn.fetchval("SHOW statement_timeout")
+
+        # when
+        start = perf_counter()
+        with query_deadline(0.3):
+            with self.assertRaises(QueryDeadlineExceeded):
+                async with self.pool.acquire() as conn:
+                    session_timeout = await conn.fetchval("SHOW statement_timeout")
+                    await conn.fetchval("SELECT pg_sleep(5)", query_name="test.sleep")
+        elapsed = perf_counter() - start
+        async with self.pool.acquire() as conn:
+            restored_timeout = await conn.fetchval("SHOW statement_timeout")
+            sleeping = await conn.fetchval(
+                "SELECT COUNT(*) FROM pg_stat_activity WHERE query = 'SELECT pg_sleep(5)' AND state = 'active'")
+
+        # then
+        self.assertTrue(session_timeout.endswith("ms"), session_timeout)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(restored_timeout, default_timeout)
+        self.assertEqual(sleeping, 0)
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDeadlines))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDeadlinesPostgres))
+    runner.run(suite)
@@ -0,0 +1,505 @@
+import logging
+import sys
+import unittest
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import httpx
+from argon2 import PasswordHasher
+
+from app.database.memory_db import MemoryDatabase
+from app.dependencies import container
+from app.models.reservation_model import Reservation, ReservationDto
+from app.models.slot_model import Slot
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, SlotLimitExceededException, UserMismatchException
+from app.repositories.reservation.memimpl import ReservationRepositoryMemoryImpl
+from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
+from app.repositories.slot.memimpl import SlotRepositoryMemoryImpl
+from app.repositories.user.exceptions import UserNameAlreadyExistsException
+from app.repositories.user.memimpl import UserRepositoryMemoryImpl
+from app.services.auto_fill_worker import AutoFillWorker
+from app.services.calendar_cache import CalendarCache
+from app.services.exceptions import NotFoundException
+from app.services.expiry_worker import ExpiryWorker
+from app.services.reservation_queue_worker import ReservationQueueWorker
+from app.services.waitlist_worker import WaitlistWorker
+
+
+class TestMemoryRepositories(unittest.IsolatedAsyncioTestCase):
+    """인메모리 레포지토리 구현체에 대한 테스트 클래스"""
+
+    logger = logging.getLogger('TestMemoryRepositories')
+
+    async def asyncSetUp(self):
+        """각 테스트 실행 전 빈 인메모리 DB와 기본 데이터 생성"""
+        self.db = MemoryDatabase()
+        self.slot_repo = SlotRepositoryMemoryImpl(self.db)
+        self.user_repo = UserRepositoryMemoryImpl(self.db)
+        self.repo = ReservationRepositoryMemoryImpl(self.db)
+
+        self.user_id = (await self.user_repo.insert("test_user", "test_password"))["id"]
+        self.other_user_id = (await self.user_repo.insert("other_user", "test_password"))["id"]
+        self.start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=10)
+        self.slot_id = await self.add_slot(self.start)
+        self.next_slot_id = await self.add_slot(self.start + timedelta(hours=1))
+
+    async def add_slot(self, start: datetime, hours: int = 1) -> int:
+        slot = Slot.create_with_time_range(start, start + timedelta(hours=hours))
+        return (await self.slot_repo.insert(slot))["id"]
+
+    async def test_slot_overlap_and_range_filters(self):
+        """겹치는 슬롯은 거부되고, 구간 조회가 SQL과 같은 조건으로 동작하는지 테스트"""
+        # when / then: 30분 겹치는 슬롯
+        with self.assertRaises(SlotTimeRangeOverlapped):
+            await self.add_slot(self.start + timedelta(minutes=30))
+        # 끝점이 맞닿는 '[)' 구간은 겹치지 않음
+        await self.add_slot(self.start + timedelta(hours=2))
+
+        # then
+        window = await self.slot_repo.find(self.start + timedelta(minutes=59), self.start + timedelta(minutes=61))
+        self.assertEqual([row["id"] for row in window], [self.slot_id, self.next_slot_id])
+        # [start, ∞)와 겹치는 슬롯만: start에 끝나는 슬롯은 제외
+        after = await self.slot_repo.find(start_at=self.start + timedelta(hours=1))
+        self.assertEqual([row["id"] for row in after][:1], [self.next_slot_id])
+        before = await self.slot_repo.find(end_at=self.start)
+        self.assertEqual([row["id"] for row in before], [self.slot_id])
+
+    async def test_bookable_slot_filters(self):
+        """남은 인원, 예약 가능 기간, 개수 제한 조건으로 슬롯을 거르는지 테스트"""
+        # given: 확정 45,000명인 슬롯과 시작까지 하루 남은 빈 슬롯
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1))
+        full = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=45000)))["id"]
+        await self.repo.confirm_by_id(full)
+
+        # when
+        roomy = await self.slot_repo.find(min_remaining=5001)
+        exact = await self.slot_repo.find(min_remaining=5000)
+        bookable = await self.slot_repo.find(days_left=3)
+        first = await self.slot_repo.find(min_remaining=5001, days_left=3, limit=1)
+
+        # then
+        self.assertEqual([row["id"] for row in roomy], [near_slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in exact], [near_slot_id, self.slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in bookable], [self.slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in first], [self.next_slot_id])
+        # 종료 시각만 주어진 구간 조회와 함께 써도 같은 조건
+        self.assertEqual([row["id"] for row in await self.slot_repo.find(end_at=self.start, days_left=3)],
+                         [self.slot_id])
+
+    async def test_find_nearest(self):
+        """목표 시각에 가까운 순서로, 인원이 남아 있고 예약 가능한 슬롯만 조회하는지 테스트"""
+        # given: start-1h, start, start+1h(가득 참), start+3h, 시작까지 하루 남은 슬롯
+        before_id = await self.add_slot(self.start - timedelta(hours=1))
+        after_id = await self.add_slot(self.start + timedelta(hours=3))
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1))
+        full = (await self.repo.insert(Reservation(slot_id=self.next_slot_id, user_id=self.user_id,
+                                                   amount=49000)))["id"]
+        await self.repo.confirm_by_id(full)
+        target = self.start + timedelta(hours=1, minutes=10)
+
+        # when
+        nearest = await self.slot_repo.find_nearest(target, 1001, days_left=3, k=3)
+        with_full = await self.slot_repo.find_nearest(target, 1000, days_left=3, k=1)
+        anytime = await self.slot_repo.find_nearest(datetime.now(timezone.utc), 1, k=1)
+
+        # then
+        self.assertEqual([row["id"] for row in nearest], [self.slot_id, after_id, before_id])
+        self.assertEqual([row["id"] for row in with_full], [self.next_slot_id])
+        self.assertEqual([row["id"] for row in anytime], [near_slot_id])
+        self.assertEqual(await self.slot_repo.find_nearest(target, 1, days_left=365), [])
+
+    async def test_slot_limit_on_insert_confirm_and_move(self):
+        """확정 인원 50,000명 상한이 신청, 확정, 수정, 슬롯 이동에서 모두 지켜지는지 테스트"""
+        # given
+        first = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=30000)))["id"]
+        await self.repo.confirm_by_id(first)
+        second = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=20000)))["id"]
+        await self.repo.confirm_by_id(second)
+
+        # then
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 50000)
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=1))
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.modify_from_admin(second, ReservationDto(slot_id=self.slot_id, amount=20001))
+
+        # 다른 슬롯의 확정 예약을 같은 수량 그대로 옮기는 경우도 검사
+        moved = (await self.repo.insert(Reservation(slot_id=self.next_slot_id, user_id=self.user_id, amount=1)))["id"]
+        await self.repo.confirm_by_id(moved)
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.modify_from_admin(moved, ReservationDto(slot_id=self.slot_id, amount=1))
+
+        # 감소는 허용되고 집계가 갱신됨
+        await self.repo.modify_from_admin(second, ReservationDto(slot_id=self.slot_id, amount=10000))
+        await self.repo.modify_from_admin(moved, ReservationDto(slot_id=self.slot_id, amount=1))
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 40001)
+        self.assertEqual((await self.slot_repo.find_by_id(self.next_slot_id))["amount"], 0)
+
+    async def test_user_rules(self):
+        """사용자 수정/삭제 시 남은 일수, 본인 여부, 확정 여부를 검사하는지 테스트"""
+        # given
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        reservation_id = (await self.repo.insert_if_days_left(
+            Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=10), 3))["id"]
+
+        # then
+        with self.assertRaises(DaysNotLeftEnoughException):
+            await self.repo.insert_if_days_left(Reservation(slot_id=near_slot_id, user_id=self.user_id, amount=1), 3)
+        with self.assertRaises(NoSuchSlotException):
+            await self.repo.insert_if_days_left(Reservation(slot_id=999, user_id=self.user_id, amount=1), 3)
+        with self.assertRaises(UserMismatchException):
+            await self.repo.delete_unconfirmed(reservation_id, self.other_user_id)
+        with self.assertRaises(DaysNotLeftEnoughException):
+            await self.repo.modify_unconfirmed_if_days_left_and_user_match(
+                reservation_id, ReservationDto(slot_id=near_slot_id, amount=10), self.user_id, 3)
+        with self.assertRaises(NoSuchReservationException):
+            await self.repo.find_by_id(reservation_id, user_id=self.other_user_id)
+
+        await self.repo.modify_unconfirmed_if_days_left_and_user_match(
+            reservation_id, ReservationDto(slot_id=self.next_slot_id, amount=20), self.user_id, 3)
+        row = await self.repo.find_by_id(reservation_id)
+        self.assertEqual((row["slot_id"], row["amount"]), (self.next_slot_id, 20))
+
+        await self.repo.confirm_by_id(reservation_id)
+        with self.assertRaises(ReservationAlreadyConfirmedException):
+            await self.repo.delete_unconfirmed(reservation_id, self.user_id)
+
+    async def test_delete_slot_cascades(self):
+        """슬롯 삭제 시 예약과 인덱스가 함께 정리되는지 테스트"""
+        # given
+        reservation_id = (await self.repo.insert(
+            Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=5)))["id"]
+        await self.repo.confirm_by_id(reservation_id)
+
+        # when
+        await self.slot_repo.delete(self.slot_id)
+
+        # then
+        with self.assertRaises(NoSuchReservationException):
+            await self.repo.find_by_id(reservation_id)
+        self.assertEqual(await self.repo.find(user_id=self.user_id), [])
+        self.assertEqual([row["id"] for row in await self.slot_repo.find()], [self.next_slot_id])
+        with self.assertRaises(UserNameAlreadyExistsException):
+            await self.user_repo.insert("test_user", "test_password")
+
+    async def test_http_stack_without_database(self):
+        """인메모리 컨테이너로 DB 없이 HTTP 요청 흐름이 동작하는지 테스트"""
+        # given
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        try:
+            # when
+            await client.post("/auth/register", json={"username": "http_user", "password": "password"})
+            login = await client.post("/auth/token/form", data={"username": "http_user", "password": "password"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            created = await client.post("/users/reservations", headers=headers,
+                                        json={"slot_id": self.slot_id, "amount": 3})
+            slots = await client.get("/slots")
+            mine = await client.get("/users/reservations", headers=headers)
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual([slot["id"] for slot in slots.json()["result"]], [self.slot_id, self.next_slot_id])
+        self.assertEqual([r["amount"] for r in mine.json()["result"]], [3])
+
+    async def test_daily_totals_and_cached_calendar(self):
+        """시간대 기준 일별 집계와, 예약 변경 시 캐시가 무효화되는 캘린더 응답을 테스트"""
+        # given: 서울 기준 자정 직전/직후에 시작하는 두 슬롯
+        seoul = ZoneInfo("Asia/Seoul")
+        day = self.start.astimezone(seoul).date() + timedelta(days=30)
+        late = await self.add_slot(datetime.combine(day, time(23), seoul))
+        early = await self.add_slot(datetime.combine(day + timedelta(days=1), time(0), seoul))
+        pending = (await self.repo.insert(Reservation(slot_id=late, user_id=self.user_id, amount=7)))["id"]
+        confirmed = (await self.repo.insert(Reservation(slot_id=early, user_id=self.user_id, amount=5)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+
+        # when
+        rows = await self.slot_repo.daily_totals(day, day + timedelta(days=2), "Asia/Seoul")
+        utc_rows = await self.slot_repo.daily_totals(day, day + timedelta(days=1), "UTC")
+
+        # then
+        self.assertEqual([(r["day"], r["slots"], r["confirmed"], r["pending"]) for r in rows],
+                         [(day, 1, 0, 7), (day + timedelta(days=1), 1, 5, 0), (day + timedelta(days=2), 0, 0, 0)])
+        # UTC로는 두 슬롯 모두 같은 날(서울 날짜의 전날 14시, 15시)에 시작
+        self.assertEqual([r["slots"] for r in utc_rows], [2, 0])
+
+        # given: HTTP 캘린더
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        query = {"from": day.isoformat(), "to": (day + timedelta(days=1)).isoformat(), "tz": "Asia/Seoul"}
+        try:
+            # when: 서비스를 거치지 않은 변경은 캐시에 가려지고, 서비스의 예약 변경은 캐시를 무효화
+            first = (await client.get("/slots/calendar", params=query)).json()["result"]
+            self.db.update_reservation(confirmed, amount=6)
+            cached = (await client.get("/slots/calendar", params=query)).json()["result"]
+            await container.get_container().admin_exam_management_service.confirm_reservation(pending)
+            fresh = (await client.get("/slots/calendar", params=query)).json()["result"]
+            bad_tz = await client.get("/slots/calendar", params={**query, "tz": "Mars/Olympus"})
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then
+        self.assertEqual(first[0], {"day": day.isoformat(), "slots": 1, "capacity": 50000, "confirmed": 0,
+                                    "pending": 7})
+        self.assertEqual(cached, first)
+        self.assertEqual([(d["confirmed"], d["pending"]) for d in fresh], [(7, 0), (6, 0)])
+        self.assertEqual(bad_tz.status_code, 400)
+
+    async def test_expiry_worker_deletes_stale_pending(self):
+        """3일 이내에 시작하거나 이미 시작한 슬롯의 미확정 예약만 배치로 삭제되고 캘린더 캐시가 무효화되는지 테스트"""
+        # given
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        started = await self.add_slot(now - timedelta(hours=2))
+        soon = await self.add_slot(now + timedelta(days=1))
+        stale = [(await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id, amount=1)))["id"]
+                 for slot_id in (started, soon, soon)]
+        kept_confirmed = (await self.repo.insert(Reservation(slot_id=soon, user_id=self.user_id, amount=2)))["id"]
+        await self.repo.confirm_by_id(kept_confirmed)
+        kept_pending = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                           amount=3)))["id"]
+        cache = CalendarCache()
+        worker = ExpiryWorker(self.repo, batch_size=2, calendar_cache=cache)
+
+        # when
+        deleted = await worker.run_once()
+        again = await worker.run_once()
+
+        # then
+        self.assertEqual((deleted, again), (3, 0))
+        self.assertEqual(cache.generation, 1)
+        self.assertEqual(sorted(r["id"] for r in await self.repo.find()), [kept_confirmed, kept_pending])
+        for reservation_id in stale:
+            with self.assertRaises(NoSuchReservationException):
+                await self.repo.find_by_id(reservation_id)
+
+    async def test_expiry_worker_backs_off_when_pool_is_busy(self):
+        """커넥션 풀 사용률이 높으면 삭제하지 않고 다음 주기로 미루는지 테스트"""
+        # given
+        soon = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        await self.repo.insert(Reservation(slot_id=soon, user_id=self.user_id, amount=1))
+        worker = ExpiryWorker(self.repo, load=lambda: 0.9, max_load=0.8)
+
+        # when
+        deleted = await worker.run_once()
+
+        # then
+        self.assertEqual(deleted, 0)
+        self.assertEqual(len(await self.repo.find()), 1)
+
+    async def test_fifo_fill_endpoint_and_auto_fill(self):
+        """슬롯의 대기 예약이 신청 순서대로 정원까지만 승인되고, 자동 승인 작업도 같은 규칙을 따르는지 테스트"""
+        # given: 20,000명 확정 후 10,000 / 15,000 / 6,000 / 1,000명 순으로 신청
+        confirmed = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                        amount=20000)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        queue = [(await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                     amount=amount)))["id"] for amount in (10000, 15000, 6000, 1000)]
+        later = (await self.repo.insert(Reservation(slot_id=self.next_slot_id, user_id=self.user_id,
+                                                    amount=7)))["id"]
+        self.db.insert_user("fill_admin", PasswordHasher().hash("password"), admin=True)
+
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        try:
+            # when
+            login = await client.post("/auth/token/form", data={"username": "fill_admin", "password": "password"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            filled = await client.post(f"/admin/reservations/slots/{self.slot_id}/fill", headers=headers)
+            again = await client.post(f"/admin/reservations/slots/{self.slot_id}/fill", headers=headers)
+            missing = await client.post("/admin/reservations/slots/9999/fill", headers=headers)
+            worker = AutoFillWorker(container.get_container().admin_exam_management_service, self.repo)
+            fillable = await self.repo.find_fillable_slot_ids(10)
+            auto_filled = await worker.run_once()
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then: 6,000명은 넘치므로 그 뒤의 1,000명도 순서를 지켜 대기
+        self.assertEqual(filled.status_code, 200)
+        self.assertEqual(filled.json()["result"], {"slot_id": self.slot_id, "confirmed_ids": queue[:2],
+                                                   "confirmed_amount": 25000})
+        self.assertEqual(again.json()["result"]["confirmed_ids"], [])
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(fillable, [self.slot_id, self.next_slot_id])
+        self.assertEqual(auto_filled, 1)
+        self.assertTrue((await self.repo.find_by_id(later))["confirmed"])
+        self.assertEqual([(await self.repo.find_by_id(i))["confirmed"] for i in queue], [True, True, False, False])
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 45000)
+
+    async def test_async_reservation_queue(self):
+        """Prefer: respond-async 신청이 202로 접수되고, 작업자가 정원 안의 신청만 승인하는지 테스트"""
+        # given: 49,990명 확정된 슬롯
+        confirmed = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                        amount=49990)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        try:
+            await client.post("/auth/register", json={"username": "queue_user", "password": "password"})
+            login = await client.post("/auth/token/form", data={"username": "queue_user", "password": "password"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}", "Prefer": "respond-async"}
+
+            # when
+            accepted = await client.post("/users/reservations", headers=headers,
+                                         json={"slot_id": self.slot_id, "amount": 10})
+            overflow = await client.post("/users/reservations", headers=headers,
+                                         json={"slot_id": self.slot_id, "amount": 11})
+            pending = await client.get(accepted.headers["location"], headers=headers)
+            processed = await ReservationQueueWorker(container.get_container().exam_management_service).run_once()
+            first = await client.get(accepted.headers["location"], headers=headers)
+            second = await client.get(overflow.headers["location"], headers=headers)
+            other = await client.get(f"/users/reservations/tickets/{overflow.json()['result']['id'] + 1}",
+                                     headers=headers)
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then
+        self.assertEqual(accepted.status_code, 202)
+        self.assertTrue(accepted.headers["location"].endswith(
+            f"/users/reservations/tickets/{accepted.json()['result']['id']}"))
+        self.assertEqual(pending.json()["result"]["status"], "queued")
+        self.assertEqual(processed, 2)
+        self.assertEqual(first.json()["result"]["status"], "accepted")
+        self.assertEqual((await self.repo.find_by_id(first.json()["result"]["reservation_id"]))["amount"], 10)
+        self.assertEqual(second.json()["result"]["status"], "rejected")
+        self.assertIsNone(second.json()["result"]["reservation_id"])
+        self.assertEqual(other.status_code, 404)
+
+    async def test_waitlist_promotion_on_released_seats(self):
+        """정원 초과 신청이 대기자 명단에 등록되고, 확정 인원이 줄어든 만큼만 신청 순서대로 승격되는지 테스트"""
+        # given: 40,000 + 9,995명 확정
+        first = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.other_user_id,
+                                                    amount=40000)))["id"]
+        second = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.other_user_id,
+                                                     amount=9995)))["id"]
+        await self.repo.confirm_by_id(first)
+        await self.repo.confirm_by_id(second)
+
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        try:
+            await client.post("/auth/register", json={"username": "wait_user", "password": "password"})
+            login = await client.post("/auth/token/form", data={"username": "wait_user", "password": "password"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            worker = WaitlistWorker(container.get_container().exam_management_service)
+
+            # when: 20명, 10명 순으로 대기 등록 후 확정 인원이 10명, 10명, 40,000명씩 줄어듦
+            rejected = await client.post("/users/reservations", headers=headers,
+                                         json={"slot_id": self.slot_id, "amount": 20})
+            head = await client.post("/users/reservations?waitlist=true", headers=headers,
+                                     json={"slot_id": self.slot_id, "amount": 20})
+            tail = await client.post("/users/reservations?waitlist=true", headers=headers,
+                                     json={"slot_id": self.slot_id, "amount": 10})
+            await self.repo.modify_from_admin(second, ReservationDto(slot_id=self.slot_id, amount=9985))
+            not_enough = await worker.run_once()
+            await self.repo.modify_from_admin(second, ReservationDto(slot_id=self.slot_id, amount=9975))
+            head_only = await worker.run_once()
+            await self.repo.delete_from_admin(first)
+            rest = await worker.run_once()
+            idle = await worker.run_once()
+            mine = await client.get("/users/reservations/waitlist", headers=headers)
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then: 10명은 먼저 온 20명보다 앞서 승격되지 않음
+        self.assertEqual(rejected.status_code, 409)
+        self.assertEqual((head.status_code, head.json()["result"]["status"]), (202, "waiting"))
+        self.assertEqual((not_enough, head_only, rest, idle), (0, 1, 1, 0))
+        entries = mine.json()["result"]
+        self.assertEqual([(e["amount"], e["status"]) for e in entries], [(20, "promoted"), (10, "promoted")])
+        promoted = [await self.repo.find_by_id(e["reservation_id"]) for e in entries]
+        self.assertEqual([(r["amount"], r["confirmed"]) for r in promoted], [(20, False), (10, False)])
+        self.assertEqual(self.db.waitlist_released, {})
+
+    async def test_leave_waitlist(self):
+        """대기 중인 본인 신청만 취소할 수 있고, 대기자가 없는 슬롯은 확정 인원이 줄어도 기록되지 않는지 테스트"""
+        # given
+        confirmed = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                        amount=50000)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        await self.repo.modify_from_admin(confirmed, ReservationDto(slot_id=self.slot_id, amount=49000))
+        service = container.Container.in_memory(self.db).exam_management_service
+        entry = await service.add_reservation(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=2000),
+                                              waitlist=True)
+
+        # when / then
+        with self.assertRaises(NotFoundException):
+            await service.leave_waitlist(entry.id, self.other_user_id)
+        await service.leave_waitlist(entry.id, self.user_id)
+        self.assertEqual(await service.find_waitlist(self.user_id), [])
+        await self.repo.delete_from_admin(confirmed)
+        self.assertEqual(self.db.waitlist_released, {})
+
+
+    async def test_slot_capacity(self):
+        """슬롯별 정원이 제한에 쓰이고, 확정 인원 아래로는 줄일 수 없으며, 정원을 늘리면 대기자가 승격되는지 테스트"""
+        # given: 정원 100명 슬롯에 80명 확정, 30명은 대기
+        self.db.insert_user("capacity_admin", PasswordHasher().hash("password"), admin=True)
+        start = self.start + timedelta(days=2)
+
+        from app.main import app
+        container.init(container.Container.in_memory(self.db))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api")
+        try:
+            login = await client.post("/auth/token/form", data={"username": "capacity_admin", "password": "password"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            created = await client.post("/slots", headers=headers, json={
+                "start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat(), "capacity": 100})
+            slot_id = (await self.slot_repo.find(start_at=start, end_at=start + timedelta(minutes=1)))[0]["id"]
+            confirmed = (await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id, amount=80)))["id"]
+            await self.repo.confirm_by_id(confirmed)
+            service = container.get_container().exam_management_service
+            worker = WaitlistWorker(service)
+
+            # when
+            entry = await service.add_reservation(Reservation(slot_id=slot_id, user_id=self.other_user_id,
+                                                              amount=30), waitlist=True)
+            below_confirmed = await client.patch(f"/slots/{slot_id}/capacity", headers=headers, json={"capacity": 79})
+            missing = await client.patch("/slots/9999/capacity", headers=headers, json={"capacity": 100})
+            raised = await client.patch(f"/slots/{slot_id}/capacity", headers=headers, json={"capacity": 130})
+            promoted = await worker.run_once()
+            slot = await client.get(f"/slots/{slot_id}")
+            calendar = await client.get("/slots/calendar", params={"from": start.date().isoformat(),
+                                                                   "to": start.date().isoformat()})
+        finally:
+            await client.aclose()
+            container.reset()
+
+        # then
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(entry.status, "waiting")
+        self.assertEqual((below_confirmed.status_code, missing.status_code, raised.status_code), (409, 404, 200))
+        self.assertEqual(promoted, 1)
+        result = slot.json()["result"]
+        self.assertEqual((result["capacity"], result["amount"], result["remaining"]), (130, 80, 50))
+        self.assertEqual(calendar.json()["result"][0]["capacity"], 130)
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id, amount=51))
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestMemoryRepositories)
+    runner.run(suite)
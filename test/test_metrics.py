@@ -0,0 +1,165 @@
+import logging
+import sys
+import unittest
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.database import instrumented
+from app.database.instrumented import InstrumentedConnection, InstrumentedPool
+from app.monitoring.metrics import Counter, DB_QUERY_DURATION, DB_QUERY_ROWS, DB_SLOW_QUERIES, Histogram, \
+    HTTP_REQUESTS, HTTP_REQUEST_DURATION, Registry
+from app.monitoring.middleware import MetricsMiddleware
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    """메트릭 레지스트리와 ASGI 미들웨어에 대한 테스트 클래스"""
+
+    logger = logging.getLogger('TestMetrics')
+
+    async def asyncSetUp(self):
+        """각 테스트 실행 전 메트릭 초기화 및 테스트용 앱 생성"""
+        HTTP_REQUESTS.clear()
+        HTTP_REQUEST_DURATION.clear()
+
+        self.app = FastAPI()
+        self.app.add_middleware(MetricsMiddleware)
+
+        @self.app.get("/items/{id}")
+        async def get_item(id: int):
+            if id == 0:
+                raise HTTPException(status_code=404)
+            return {"id": id}
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def test_render_prometheus_format(self):
+        """카운터와 히스토그램이 Prometheus text format으로 출력되는지 테스트"""
+        # given
+        registry = Registry()
+        counter = registry.register(Counter("test_total", "test counter", ("kind",)))
+        histogram = registry.register(Histogram("test_seconds", "test histogram", buckets=(0.1, 1.0)))
+
+        # when
+        counter.inc("conflict")
+        counter.inc("conflict")
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        text = registry.render()
+
+        # then
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{kind="conflict"} 2', text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_seconds_count 3", text)
+
+    async def test_middleware_labels_route_template(self):
+        """미들웨어가 경로 파라미터가 아닌 라우트 템플릿과 상태코드로 기록하는지 테스트"""
+        # when
+        await self.client.get("/items/1")
+        await self.client.get("/items/2")
+        await self.client.get("/items/0")
+        await self.client.get("/unknown")
+
+        # then
+        self.assertEqual(HTTP_REQUESTS.get("GET", "/items/{id}", 200), 2)
+        self.assertEqual(HTTP_REQUESTS.get("GET", "/items/{id}", 404), 1)
+        self.assertEqual(HTTP_REQUESTS.get("GET", "unmatched", 404), 1)
+        self.assertEqual(HTTP_REQUEST_DURATION.count("GET", "/items/{id}"), 3)
+
+    async def test_instrumented_connection_records_named_query(self):
+        """쿼리 이름별로 latency, row 수, slow query가 기록되는지 테스트"""
+
+        # given
+        class FakeConnection:
+            async def fetch(self, query, *args):
+                return [{"id": 1}, {"id": 2}]
+
+            async def execute(self, query, *args):
+                return "DELETE 3"
+
+        conn = InstrumentedConnection(FakeConnection())
+        instrumented.settings.update(enabled=True, slow_query_threshold_ms=0)
+
+        # when
+        await conn.fetch("SELECT 1", 1, query_name="test.fetch")
+        await conn.execute("DELETE", query_name="test.delete")
+
+        # then
+        self.assertEqual(DB_QUERY_DURATION.count("test.fetch"), 1)
+        self.assertEqual(DB_QUERY_ROWS.get("test.fetch"), 2)
+        self.assertEqual(DB_QUERY_ROWS.get("test.delete"), 3)
+        self.assertEqual(DB_SLOW_QUERIES.get("test.delete"), 1)
+
+        # when disabled, nothing is recorded
+        instrumented.settings.update(enabled=False, slow_query_threshold_ms=200)
+        await conn.fetch("SELECT 1", query_name="test.fetch")
+        instrumented.settings.update(enabled=True)
+        self.assertEqual(DB_QUERY_DURATION.count("test.fetch"), 1)
+
+
+    async def test_settings_listener_does_not_use_pool(self):
+        """설정 변경 LISTEN 연결이 풀 밖의 별도 연결이고, 종료 시 닫히는지 테스트"""
+
+        # given
+        class FakeListener:
+            def __init__(self):
+                self.channels = []
+                self.closed = False
+
+            async def add_listener(self, channel, callback):
+                self.channels.append(channel)
+
+            async def close(self):
+                self.closed = True
+
+        class FakePool:
+            def __init__(self):
+                self.acquired = 0
+                self.closed = False
+
+            async def acquire(self, timeout=None):
+                self.acquired += 1
+
+            async def close(self):
+                self.closed = True
+
+        listener = FakeListener()
+        raw_pool = FakePool()
+
+        async def connect():
+            return listener
+
+        pool = InstrumentedPool(raw_pool, connect=connect)
+
+        # when
+        await pool.listen_settings()
+        await pool.listen_settings()
+        await pool.close()
+
+        # then
+        self.assertEqual(listener.channels, [instrumented.SETTINGS_CHANNEL])
+        self.assertEqual(raw_pool.acquired, 0)
+        self.assertTrue(listener.closed)
+        self.assertTrue(raw_pool.closed)
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestMetrics)
+    runner.run(suite)
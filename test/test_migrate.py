@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+from app.database.migrate import BASELINE, MigrationContext, MigrationError, discover, ensure_version_table, \
+    migrate, split_statements, status
+
+MIGRATE_SCHEMA = "ers_migrate_test"
+INIT_SCRIPTS = Path(__file__).resolve().parent.parent / "database" / "init-scripts"
+
+
+class TestMigrationFiles(unittest.TestCase):
+    """마이그레이션 파일 탐색과 SQL 문장 분리에 대한 테스트 클래스 (DB 불필요)"""
+
+    def test_split_statements(self):
+        """따옴표, 달러 인용 함수 본문, 주석 안의 세미콜론에서는 나누지 않는지 테스트"""
+        # given
+        sql = """-- migrate: no-transaction
+            CREATE INDEX CONCURRENTLY a_idx ON a (x); -- trailing; comment
+            CREATE FUNCTION f() RETURNS INT AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;
+            SELECT 'a;b''c' /* ; */;
+        """
+
+        # when
+        statements = split_statements(sql)
+
+        # then
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(statements[0], "CREATE INDEX CONCURRENTLY a_idx ON a (x)")
+        self.assertIn("RETURN 1; END;", statements[1])
+        self.assertTrue(statements[2].startswith("SELECT 'a;b''c'"))
+
+    def test_discover_orders_and_rejects_duplicates(self):
+        """버전 순으로 정렬되고, 중복 버전이나 형식이 다른 파일은 거부되는지 테스트"""
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            (directory / "0010_later.sql").write_text("SELECT 1;")
+            (directory / "0002_earlier.py").write_text("async def up(conn, ctx): pass")
+            self.assertEqual([(m.version, m.name) for m in discover(directory)], [(2, "earlier"), (10, "later")])
+
+            (directory / "0002_again.sql").write_text("SELECT 1;")
+            with self.assertRaises(MigrationError):
+                discover(directory)
+
+    def test_repository_migrations_are_valid(self):
+        """저장소의 database/migrations 파일이 모두 형식에 맞는지 테스트"""
+        migrations = discover()
+        self.assertEqual([m.version for m in migrations], sorted({m.version for m in migrations}))
+
+    def test_init_scripts_stamp_latest_version(self):
+        """init-scripts가 새 DB를 최신 마이그레이션 버전으로 기록하는지 테스트"""
+        # given
+        stamp = (INIT_SCRIPTS / "08-stamp-schema-migrations.sql").read_text(encoding="utf-8")
+
+        # when
+        stamped = re.search(r"VALUES \((\d+), '\w+', '(\w+)', 0\)", stamp)
+
+        # then
+        self.assertEqual(stamped.group(2), BASELINE)
+        self.assertEqual(int(stamped.group(1)), discover()[-1].version,
+                         "새 마이그레이션을 추가하면 08-stamp-schema-migrations.sql의 버전도 올려야 합니다.")
+        self.assertEqual(sorted(INIT_SCRIPTS.glob("*.sql"))[-1].name, "08-stamp-schema-migrations.sql")
+
+
+class TestMigrate(unittest.IsolatedAsyncioTestCase):
+    """별도 스키마에서 마이그레이션 실행기를 검증하는 테스트 클래스"""
+
+    logger = logging.getLogger('TestMigrate')
+
+    async def asyncSetUp(self):
+        """빈 스키마와 임시 마이그레이션 디렉터리 생성"""
+        load_dotenv()
+        self.url = os.getenv("DATABASE_URL")
+        self.conn = await self.connect()
+        await self.conn.execute(f"DROP SCHEMA IF EXISTS {MIGRATE_SCHEMA} CASCADE")
+        await self.conn.execute(f"CREATE SCHEMA {MIGRATE_SCHEMA}")
+        await self.conn.execute("CREATE TABLE items(id SERIAL PRIMARY KEY, value INTEGER, doubled INTEGER)")
+        await self.conn.execute("INSERT INTO items(value) SELECT g FROM generate_series(1, 1000) g")
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        (self.directory / "0001_add_flag.sql").write_text("ALTER TABLE items ADD COLUMN flag BOOLEAN;")
+        (self.directory / "0002_index_value.sql").write_text(
+            "-- migrate: no-transaction\n"
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS items_value_idx ON items (value);\n")
+        (self.directory / "0003_backfill.py").write_text(
+            "TRANSACTIONAL = False\n\n\n"
+            "async def up(conn, ctx):\n"
+            "    await ctx.create_index_concurrently('items_doubled_idx', 'items (doubled)')\n"
+            "    await ctx.backfill('items', 'doubled = value * 2', 'doubled IS NULL')\n")
+
+    async def asyncTearDown(self):
+        """스키마 삭제 및 연결 종료"""
+        await self.conn.execute(f"DROP SCHEMA IF EXISTS {MIGRATE_SCHEMA} CASCADE")
+        await self.conn.close()
+        self.tmp.cleanup()
+
+    async def connect(self):
+        return await asyncpg.connect(self.url, server_settings={"search_path": MIGRATE_SCHEMA})
+
+    async def test_applies_in_order_once(self):
+        """트랜잭션/비트랜잭션/백필 마이그레이션이 순서대로 한 번만 적용되는지 테스트"""
+        # when
+        first = await migrate(self.conn, target=2, directory=self.directory)
+        second = await migrate(self.conn, directory=self.directory,
+                               ctx=MigrationContext(self.conn, batch_size=64, pause=0))
+        third = await migrate(self.conn, directory=self.directory)
+
+        # then
+        self.assertEqual([m.version for m in first], [1, 2])
+        self.assertEqual([m.version for m in second], [3])
+        self.assertEqual(third, [])
+        self.assertEqual(await self.conn.fetchval("SELECT COUNT(*) FROM items WHERE doubled = value * 2"), 1000)
+        indexes = await self.conn.fetch("SELECT indexname FROM pg_indexes WHERE schemaname = $1", MIGRATE_SCHEMA)
+        self.assertTrue({"items_value_idx", "items_doubled_idx"} <= {row["indexname"] for row in indexes})
+        self.assertTrue(all(row["applied_at"] for row in await status(self.conn, self.directory)))
+
+    async def test_baseline_skips_versions_built_by_init_scripts(self):
+        """init-scripts로 만든 DB(baseline 기록)에서는 그 버전까지의 마이그레이션을 다시 실행하지 않는지 테스트"""
+        # given
+        await ensure_version_table(self.conn)
+        await self.conn.execute("ALTER TABLE items ADD COLUMN flag BOOLEAN")
+        await self.conn.execute(
+            "INSERT INTO schema_migrations(version, name, checksum, duration_ms) VALUES (1, 'init_scripts', $1, 0)",
+            BASELINE)
+
+        # when
+        applied = await migrate(self.conn, directory=self.directory, ctx=MigrationContext(self.conn, pause=0))
+
+        # then
+        self.assertEqual([m.version for m in applied], [2, 3])
+        self.assertTrue(all(row["applied_at"] and not row["changed"]
+                            for row in await status(self.conn, self.directory)))
+
+    async def test_index_build_keeps_runner_lock_timeout(self):
+        """동시 인덱스 생성 뒤의 마이그레이션도 실행기의 lock_timeout으로 실행되는지 테스트"""
+        # given: 0003이 create_index_concurrently를 쓴 뒤 0004가 lock_timeout을 기록
+        (self.directory / "0004_record_lock_timeout.sql").write_text(
+            "CREATE TABLE lock_timeouts AS SELECT current_setting('lock_timeout') AS value;")
+
+        # when
+        await migrate(self.conn, directory=self.directory, ctx=MigrationContext(self.conn, pause=0),
+                      lock_timeout="3s")
+
+        # then
+        self.assertEqual(await self.conn.fetchval("SELECT value FROM lock_timeouts"), "3s")
+
+    async def test_failed_migration_is_not_recorded(self):
+        """실패한 트랜잭션 마이그레이션은 롤백되고 버전이 기록되지 않는지 테스트"""
+        # given
+        (self.directory / "0004_broken.sql").write_text("ALTER TABLE items ADD COLUMN extra INT; SELECT 1/0;")
+
+        # when
+        with self.assertRaises(asyncpg.DivisionByZeroError):
+            await migrate(self.conn, directory=self.directory, ctx=MigrationContext(self.conn, pause=0))
+
+        # then
+        versions = [row["version"] for row in await self.conn.fetch("SELECT version FROM schema_migrations")]
+        self.assertEqual(sorted(versions), [1, 2, 3])
+        self.assertIsNone(await self.conn.fetchval(
+            "SELECT 1 FROM information_schema.columns WHERE table_schema = $1 AND column_name = 'extra'",
+            MIGRATE_SCHEMA))
+
+    async def test_concurrent_runners_apply_once(self):
+        """동시에 실행된 여러 실행기가 advisory lock으로 직렬화되어 각 마이그레이션을 한 번만 적용하는지 테스트"""
+        # given
+        conns = [await self.connect() for _ in range(4)]
+        try:
+            # when
+            results = await asyncio.gather(*(
+                migrate(conn, directory=self.directory, ctx=MigrationContext(conn, pause=0), lock_poll=0.05)
+                for conn in conns))
+        finally:
+            for conn in conns:
+                await conn.close()
+
+        # then
+        self.assertEqual(sorted(m.version for applied in results for m in applied), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestMigrationFiles))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestMigrate))
+    runner.run(suite)
@@ -0,0 +1,235 @@
+import json
+import logging
+import math
+import os
+import sys
+import unittest
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+from app.repositories.reservation.dbimpl import ReservationRepositoryImpl
+from app.repositories.slot.dbimpl import SlotRepositoryImpl
+from test.bench_repositories import create_schema, seed
+
+PLAN_SCHEMA = "ers_plan_test"
+SLOT_COUNT = 100_000
+RESERVATION_COUNT = 1_000_000
+USER_COUNT = 10_000
+# estimated Total Cost per statement on the dataset above; regenerate with UPDATE_PLAN_BUDGETS=1
+BUDGET_FILE = Path(__file__).resolve().parent / "query_plan_budgets.json"
+BUDGET_HEADROOM = 1.5
+
+# the statements the slot limit triggers in 04-create-reservation-table.sql run for every write
+TRIGGER_STATEMENTS = {
+    "trigger.lock_slot": "SELECT capacity FROM slots WHERE id = $1 FOR NO KEY UPDATE",
+    "trigger.confirmed_sum": "SELECT COALESCE(SUM(amount), 0) FROM reservations "
+                             "WHERE slot_id = $1 AND confirmed = TRUE",
+}
+
+
+class RecordingPool:
+    """Stands in for the pool so the repositories hand over the SQL they would run."""
+
+    def __init__(self):
+        self.queries = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, query, *args, query_name=None):
+        self.queries.append((query, args))
+        return []
+
+    async def fetchrow(self, query, *args, query_name=None):
+        self.queries.append((query, args))
+        return {}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """시간 구간 조회 쿼리가 슬롯 GiST 인덱스를 사용하는지 EXPLAIN으로 확인하는 테스트 클래스"""
+
+    logger = logging.getLogger('TestQueryPlans')
+
+    async def asyncSetUp(self):
+        """별도 스키마에 슬롯 10^5개, 예약 10^6개를 생성 (이미 있으면 재사용)"""
+        load_dotenv()
+        self.conn = await asyncpg.connect(os.getenv("DATABASE_URL"),
+                                          server_settings={"search_path": f"{PLAN_SCHEMA}, public"})
+        if await self.conn.fetchval("SELECT to_regclass($1)", f"{PLAN_SCHEMA}.slots") is None or \
+                await self.conn.fetchval(f"SELECT COUNT(*) FROM {PLAN_SCHEMA}.slots") != SLOT_COUNT or \
+                await self.conn.fetchval(f"SELECT COUNT(*) FROM {PLAN_SCHEMA}.reservations") != RESERVATION_COUNT:
+            self.logger.info("슬롯 %d개, 예약 %d개 생성 중...", SLOT_COUNT, RESERVATION_COUNT)
+            await create_schema(self.conn, PLAN_SCHEMA)
+            await seed(self.conn, SLOT_COUNT, RESERVATION_COUNT, USER_COUNT)
+
+        self.gist_index = await self.slot_index("gist (time_range)")
+        self.first_start = await self.conn.fetchval("SELECT MIN(LOWER(time_range)) FROM slots")
+        self.last_start = await self.conn.fetchval("SELECT MAX(LOWER(time_range)) FROM slots")
+        self.slot_id = await self.conn.fetchval("SELECT slot_id FROM reservations ORDER BY id LIMIT 1")
+        self.user_id = await self.conn.fetchval("SELECT user_id FROM reservations ORDER BY id LIMIT 1")
+        self.reservation_id = await self.conn.fetchval("SELECT MIN(id) FROM reservations")
+
+    async def slot_index(self, definition: str) -> str:
+        return await self.conn.fetchval(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = $1 AND tablename = 'slots' AND indexdef LIKE $2",
+            PLAN_SCHEMA, f"%{definition}%")
+
+    async def asyncTearDown(self):
+        """연결 종료 (생성한 스키마는 다음 실행을 위해 유지)"""
+        await self.conn.close()
+
+    async def explain(self, query: str, args) -> dict:
+        ret = await self.conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        return (json.loads(ret) if isinstance(ret, str) else ret)[0]["Plan"]
+
+    def assert_slot_index_used(self, plan: dict):
+        nodes = list(plan_nodes(plan))
+        seq_scans = [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "slots"]
+        index_scans = [n for n in nodes if n.get("Index Name") == self.gist_index]
+        self.assertEqual(seq_scans, [], json.dumps(plan, indent=2))
+        self.assertNotEqual(index_scans, [], json.dumps(plan, indent=2))
+
+    async def test_time_filters_use_gist_index(self):
+        """시작/종료 시각 중 하나만 주어지거나 둘 다 주어진 모든 조회가 GiST 인덱스를 사용하는지 테스트"""
+        # given
+        pool = RecordingPool()
+        slot_repo = SlotRepositoryImpl(pool)
+        reservation_repo = ReservationRepositoryImpl(pool)
+        window_start = self.first_start + timedelta(hours=SLOT_COUNT // 2)
+        shapes = {
+            "start_only": {"start_at": self.last_start - timedelta(hours=10)},
+            "end_only": {"end_at": self.first_start + timedelta(hours=10)},
+            "window": {"start_at": window_start, "end_at": window_start + timedelta(hours=24)},
+        }
+
+        for name, kwargs in shapes.items():
+            for repo_name, find in (("slot", slot_repo.find), ("reservation", reservation_repo.find)):
+                with self.subTest(shape=name, repository=repo_name):
+                    # when
+                    pool.queries.clear()
+                    await find(**kwargs)
+                    query, args = pool.queries[0]
+
+                    # then
+                    self.assert_slot_index_used(await self.explain(query, args))
+
+    async def test_bookable_filter_uses_gist_index(self):
+        """예약 가능 기간 조건(&>)과 남은 인원 HAVING, LIMIT이 붙어도 GiST 인덱스를 사용하는지 테스트"""
+        # given
+        pool = RecordingPool()
+        slot_repo = SlotRepositoryImpl(pool)
+
+        # when
+        await slot_repo.find(end_at=self.last_start - timedelta(hours=SLOT_COUNT // 2),
+                             min_remaining=1, days_left=3, limit=50)
+        query, args = pool.queries[0]
+
+        # then
+        self.assertIn("HAVING", query)
+        self.assert_slot_index_used(await self.explain(query, args))
+
+    async def test_find_nearest_walks_knn_index(self):
+        """가까운 슬롯 조회가 LOWER(time_range) GiST 인덱스를 거리 순으로 읽고 정렬 단계가 없는지 테스트"""
+        # given
+        pool = RecordingPool()
+        knn_index = await self.slot_index("gist (lower(time_range))")
+        target = self.first_start + timedelta(hours=SLOT_COUNT // 2, minutes=10)
+
+        # when
+        await SlotRepositoryImpl(pool).find_nearest(target, 1000, days_left=3, k=5)
+        query, args = pool.queries[0]
+        nodes = list(plan_nodes(await self.explain(query, args)))
+
+        # then
+        self.assertIn(knn_index, [n.get("Index Name") for n in nodes])
+        self.assertEqual([n["Node Type"] for n in nodes if n["Node Type"] in ("Sort", "Incremental Sort")], [])
+        self.assertEqual([n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "slots"], [])
+
+    async def hot_statements(self) -> dict:
+        """저장소가 실제로 보내는 SQL을 이름별로 수집"""
+        pool = RecordingPool()
+        slot_repo = SlotRepositoryImpl(pool)
+        reservation_repo = ReservationRepositoryImpl(pool)
+        middle = self.first_start + timedelta(hours=SLOT_COUNT // 2)
+        window = {"start_at": middle, "end_at": middle + timedelta(hours=24)}
+        calls = {
+            "slot.find.window": slot_repo.find(**window),
+            "slot.find.start_only": slot_repo.find(start_at=self.last_start - timedelta(hours=10)),
+            "slot.find.end_only": slot_repo.find(end_at=self.first_start + timedelta(hours=10)),
+            "slot.find.bookable": slot_repo.find(**window, min_remaining=1000, days_left=3, limit=50),
+            "slot.find_by_id": slot_repo.find_by_id(self.slot_id),
+            "slot.find_nearest": slot_repo.find_nearest(middle, 1000, days_left=3, k=5),
+            "slot.daily_totals": slot_repo.daily_totals(middle.date(), middle.date() + timedelta(days=30), "UTC"),
+            "reservation.find.user": reservation_repo.find(user_id=self.user_id),
+            "reservation.find.user_window": reservation_repo.find(user_id=self.user_id, **window),
+            "reservation.find.window": reservation_repo.find(**window),
+            "reservation.find_by_id": reservation_repo.find_by_id(self.reservation_id),
+            "reservation.find_by_id.user": reservation_repo.find_by_id(self.reservation_id, self.user_id),
+            "reservation.find_reservation_by_slot": reservation_repo.find_reservation_by_slot(self.slot_id, True),
+        }
+        statements = {}
+        for name, call in calls.items():
+            pool.queries.clear()
+            await call
+            statements[name] = pool.queries[0]
+        statements["trigger.lock_slot"] = (TRIGGER_STATEMENTS["trigger.lock_slot"], (self.slot_id,))
+        statements["trigger.confirmed_sum"] = (TRIGGER_STATEMENTS["trigger.confirmed_sum"], (self.slot_id,))
+        return statements
+
+    async def test_hot_statements_within_budget(self):
+        """핫 쿼리가 slots/reservations를 순차 스캔하지 않고 저장된 예상 비용 예산 안에 있는지 테스트"""
+        # given
+        budgets = json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+        update = os.getenv("UPDATE_PLAN_BUDGETS") == "1"
+        if not budgets and not update:
+            message = f"{BUDGET_FILE.name}가 없습니다. UPDATE_PLAN_BUDGETS=1로 생성해 커밋하세요."
+            # CI must not pass without checking costs; locally the skip shows up in the summary
+            if os.getenv("CI"):
+                self.fail(message)
+            self.skipTest(message)
+        costs = {}
+
+        for name, (query, args) in (await self.hot_statements()).items():
+            with self.subTest(statement=name):
+                # when
+                plan = await self.explain(query, args)
+                costs[name] = plan["Total Cost"]
+
+                # then
+                seq_scans = [n.get("Relation Name") for n in plan_nodes(plan)
+                             if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in ("slots", "reservations")]
+                self.assertEqual(seq_scans, [], json.dumps(plan, indent=2))
+                if not update:
+                    self.assertIn(name, budgets, f"{name}의 예산이 없습니다. UPDATE_PLAN_BUDGETS=1로 다시 기록하세요.")
+                    self.assertLessEqual(plan["Total Cost"], budgets[name], json.dumps(plan, indent=2))
+
+        if update:
+            BUDGET_FILE.write_text(json.dumps({name: math.ceil(cost * BUDGET_HEADROOM)
+                                               for name, cost in sorted(costs.items())}, indent=2) + "\n")
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestQueryPlans)
+    runner.run(suite)
@@ -0,0 +1,220 @@
+import logging
+import sys
+import unittest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from app.dependencies.config import database
+from app.models.reservation_model import Reservation, ReservationDto
+from app.monitoring.metrics import DB_QUERY_DURATION, DB_TRANSACTIONS
+from app.repositories.reservation.dbimpl_procedure import ReservationRepositoryProcedureImpl
+from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, SlotLimitExceededException, UserMismatchException
+from app.repositories.slot.exceptions import NoSuchSlotException
+
+MISSING_ID = 0  # never handed out by SERIAL
+
+
+class StatusPool:
+    """함수가 돌려줄 reservation_write_status 행을 그대로 돌려주는 풀"""
+
+    def __init__(self, status: str):
+        self.status = status
+        self.queries = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetchrow(self, query, *args, query_name=None):
+        self.queries.append((query_name, args))
+        return {"status": self.status, "id": 1 if self.status == "ok" else None}
+
+
+class TestReservationProcedureStatus(unittest.IsolatedAsyncioTestCase):
+    """저장 함수의 상태 값이 트랜잭션 구현과 같은 예외로 바뀌는지 테스트하는 클래스 (DB 불필요)"""
+
+    logger = logging.getLogger('TestReservationProcedureStatus')
+
+    async def test_status_maps_to_exceptions(self):
+        """각 상태 값이 같은 예외와 메시지로 바뀌고, ok는 id가 담긴 행을 돌려주는지 테스트"""
+        cases = {
+            "no_reservation": NoSuchReservationException(10),
+            "no_slot": NoSuchSlotException(20),
+            "user_mismatch": UserMismatchException(30),
+            "already_confirmed": ReservationAlreadyConfirmedException(10),
+            "days_not_left": DaysNotLeftEnoughException(3),
+        }
+        for status, expected in cases.items():
+            with self.subTest(status=status):
+                # given
+                repo = ReservationRepositoryProcedureImpl(StatusPool(status))
+
+                # when / then
+                with self.assertRaises(type(expected)) as raised:
+                    await repo.modify_unconfirmed_if_days_left_and_user_match(
+                        10, ReservationDto(slot_id=20, amount=1), 30, 3)
+                self.assertEqual(str(raised.exception), str(expected))
+
+        pool = StatusPool("ok")
+        self.assertEqual((await ReservationRepositoryProcedureImpl(pool).delete_unconfirmed(10, 30))["id"], 1)
+        self.assertEqual(pool.queries, [("reservation.delete_unconfirmed", (10, 30))])
+
+
+class TestReservationProcedureParity(unittest.IsolatedAsyncioTestCase):
+    """저장 함수 구현이 트랜잭션 구현과 같은 결과, 같은 예외, 같은 데이터 변경을 만드는지 비교하는 테스트 클래스"""
+
+    logger = logging.getLogger('TestReservationProcedureParity')
+
+    async def asyncSetUp(self):
+        """데이터베이스 연결 및 비교할 두 구현 생성"""
+        load_dotenv()
+        await database.connect()
+        self.pool = database.get_pool()
+        self.repos = {
+            "transaction": ReservationRepositoryTransactionImpl(self.pool),
+            "procedure": ReservationRepositoryProcedureImpl(self.pool),
+        }
+        await self.cleanup()
+
+    async def asyncTearDown(self):
+        """테스트 데이터 삭제 및 연결 해제"""
+        await self.cleanup()
+        await database.disconnect()
+
+    async def cleanup(self):
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM reservations WHERE id < 1000")
+            await conn.execute("DELETE FROM slots WHERE id < 1000")
+            await conn.execute("DELETE FROM users WHERE id < 1000")
+
+    async def fixture(self) -> dict:
+        """사용자 2명, 7일 후 슬롯, 1일 후 슬롯, 정원 10명 슬롯, 미확정/확정 예약 1건씩"""
+        async with self.pool.acquire() as conn:
+            owner, other = [(await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id", name, "test_password"))["id"]
+                            for name in ("test_owner", "test_other")]
+            now = datetime.now()
+
+            async def slot(start, capacity=50000):
+                return (await conn.fetchrow("INSERT INTO slots(time_range, capacity) VALUES($1, $2) RETURNING id",
+                                            (start, start + timedelta(hours=1)), capacity))["id"]
+
+            ids = {"owner": owner, "other": other,
+                   "slot": await slot(now + timedelta(days=7)),
+                   "other_slot": await slot(now + timedelta(days=8)),
+                   "late_slot": await slot(now + timedelta(days=1)),
+                   "small_slot": await slot(now + timedelta(days=9), capacity=10)}
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, $3, $4) RETURNING id"
+            ids["pending"] = (await conn.fetchrow(insert, owner, ids["slot"], 5, False))["id"]
+            ids["confirmed"] = (await conn.fetchrow(insert, owner, ids["slot"], 5, True))["id"]
+            await conn.fetchrow(insert, owner, ids["small_slot"], 10, True)
+        return ids
+
+    @staticmethod
+    def cases():
+        """(이름, 호출, 기대 결과): 기대 결과는 예외 클래스 또는 "ok" """
+        return [
+            ("insert.ok", lambda r, f: r.insert_if_days_left(
+                Reservation(slot_id=f["slot"], user_id=f["owner"], amount=3), 3), "ok"),
+            ("insert.no_slot", lambda r, f: r.insert_if_days_left(
+                Reservation(slot_id=MISSING_ID, user_id=f["owner"], amount=3), 3), NoSuchSlotException),
+            ("insert.days_not_left", lambda r, f: r.insert_if_days_left(
+                Reservation(slot_id=f["late_slot"], user_id=f["owner"], amount=3), 3), DaysNotLeftEnoughException),
+            ("insert.slot_limit", lambda r, f: r.insert_if_days_left(
+                Reservation(slot_id=f["small_slot"], user_id=f["owner"], amount=1), 3), SlotLimitExceededException),
+            ("modify.ok", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                f["pending"], ReservationDto(slot_id=f["other_slot"], amount=7), f["owner"], 3), "ok"),
+            ("modify.no_reservation", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                MISSING_ID, ReservationDto(slot_id=f["slot"], amount=7), f["owner"], 3), NoSuchReservationException),
+            ("modify.user_mismatch", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                f["pending"], ReservationDto(slot_id=f["slot"], amount=7), f["other"], 3), UserMismatchException),
+            ("modify.already_confirmed", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                f["confirmed"], ReservationDto(slot_id=f["slot"], amount=7), f["owner"], 3),
+             ReservationAlreadyConfirmedException),
+            ("modify.no_slot", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                f["pending"], ReservationDto(slot_id=MISSING_ID, amount=7), f["owner"], 3), NoSuchSlotException),
+            ("modify.days_not_left", lambda r, f: r.modify_unconfirmed_if_days_left_and_user_match(
+                f["pending"], ReservationDto(slot_id=f["late_slot"], amount=7), f["owner"], 3),
+             DaysNotLeftEnoughException),
+            ("delete.ok", lambda r, f: r.delete_unconfirmed(f["pending"], f["owner"]), "ok"),
+            ("delete.no_reservation", lambda r, f: r.delete_unconfirmed(MISSING_ID, f["owner"]),
+             NoSuchReservationException),
+            ("delete.user_mismatch", lambda r, f: r.delete_unconfirmed(f["pending"], f["other"]),
+             UserMismatchException),
+            ("delete.already_confirmed", lambda r, f: r.delete_unconfirmed(f["confirmed"], f["owner"]),
+             ReservationAlreadyConfirmedException),
+        ]
+
+    async def snapshot(self, fixture: dict) -> list:
+        """슬롯 id를 픽스처 이름으로 바꾼 예약 목록 (구현마다 id가 달라지므로)"""
+        names = {fixture[name]: name for name in ("slot", "other_slot", "late_slot", "small_slot")}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT slot_id, user_id = $1 AS owned, amount, confirmed FROM reservations "
+                                    "WHERE id < 1000 ORDER BY slot_id, amount, confirmed", fixture["owner"])
+        return sorted((names[r["slot_id"]], r["owned"], r["amount"], r["confirmed"]) for r in rows)
+
+    async def run_case(self, repo, call, fixture):
+        try:
+            ret = await call(repo, fixture)
+        except Exception as e:
+            return type(e), str(e)
+        self.assertIsNotNone(ret["id"])
+        return "ok", None
+
+    async def test_matches_transactional_implementation(self):
+        """모든 성공/실패 경우에 두 구현의 결과, 예외 메시지, 남은 예약이 같은지 테스트"""
+        for name, call, expected in self.cases():
+            with self.subTest(case=name):
+                outcomes = {}
+                for label, repo in self.repos.items():
+                    # given
+                    await self.cleanup()
+                    fixture = await self.fixture()
+
+                    # when
+                    outcome = await self.run_case(repo, call, fixture)
+                    outcomes[label] = (outcome, await self.snapshot(fixture))
+
+                # then
+                self.assertEqual(outcomes["procedure"][0][0], expected)
+                self.assertEqual(outcomes["procedure"], outcomes["transaction"])
+
+    async def test_procedure_is_one_round_trip(self):
+        """저장 함수 구현은 호출마다 쿼리 1개, 명시적 트랜잭션 없이 끝나는지 테스트"""
+        fixture = await self.fixture()
+        for label, (queries, transactions) in {"transaction": (2, 1), "procedure": (1, 0)}.items():
+            with self.subTest(implementation=label):
+                # given
+                queries_before = sum(DB_QUERY_DURATION.counts().values())
+                transactions_before = DB_TRANSACTIONS.get()
+
+                # when
+                ret = await self.repos[label].insert_if_days_left(
+                    Reservation(slot_id=fixture["slot"], user_id=fixture["owner"], amount=1), 3)
+
+                # then
+                self.assertIsNotNone(ret["id"])
+                self.assertEqual(sum(DB_QUERY_DURATION.counts().values()) - queries_before, queries)
+                self.assertEqual(DB_TRANSACTIONS.get() - transactions_before, transactions)
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestReservationProcedureStatus))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestReservationProcedureParity))
+    runner.run(suite)
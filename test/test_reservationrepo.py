@@ -1,16 +1,23 @@
+import asyncio
 import logging
 import sys
 import unittest
 from datetime import datetime, timedelta, timezone
+from asyncpg import PostgresError
 from dotenv import load_dotenv
 
 from app.dependencies.config import database
+from app.monitoring.metrics import DB_TRANSACTION_RETRY_GIVEUPS
 from app.repositories.reservation.dbimpl_transaction import ReservationRepositoryTransactionImpl
 from app.repositories.reservation.exceptions import (
     DaysNotLeftEnoughException, NoSuchReservationException,
-    ReservationAlreadyConfirmedException, UserMismatchException
+    ReservationAlreadyConfirmedException, SlotLimitExceededException, UserMismatchException
 )
 from app.models.reservation_model import Reservation, ReservationDto
+from app.repositories.reservation_queue.dbimpl import ReservationQueueRepositoryImpl
+from app.repositories.slot.dbimpl import SlotRepositoryImpl
+from app.repositories.slot.exceptions import NoSuchSlotException
+from app.repositories.waitlist.dbimpl import WaitlistRepositoryImpl
 
 class TestReservationRepository(unittest.IsolatedAsyncioTestCase):
     """예약 레포지토리 구현체에 대한 테스트 클래스"""
@@ -552,6 +559,306 @@ class TestReservationRepository(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(ReservationAlreadyConfirmedException):
             await self.repo.delete_unconfirmed(reservation_id, user_id)
 
+    async def test_expire_unconfirmed_skips_locked_rows(self):
+        """3일 이내 슬롯의 미확정 예약을 삭제하되, 다른 트랜잭션이 잠근 예약은 기다리지 않고 건너뛰는지 테스트"""
+        # given
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=1)  # 1일 후
+            soon_slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            later_slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, $3, $4) RETURNING id"
+            stale_id = (await conn.fetchrow(insert, user_id, soon_slot_id, 1, False))["id"]
+            locked_id = (await conn.fetchrow(insert, user_id, soon_slot_id, 1, False))["id"]
+            confirmed_id = (await conn.fetchrow(insert, user_id, soon_slot_id, 1, True))["id"]
+            later_id = (await conn.fetchrow(insert, user_id, later_slot_id, 1, False))["id"]
+
+        # when: 관리자가 locked_id를 수정하는 중
+        async with self.pool.acquire() as locker:
+            async with locker.transaction():
+                await locker.execute("SELECT 1 FROM reservations WHERE id = $1 FOR UPDATE", locked_id)
+                deleted = await self.repo.expire_unconfirmed(3, 100)
+
+        # then
+        self.assertEqual(deleted, 1)
+        async with self.pool.acquire() as conn:
+            remaining = [row["id"] for row in await conn.fetch("SELECT id FROM reservations ORDER BY id")]
+        self.assertNotIn(stale_id, remaining)
+        self.assertTrue({locked_id, confirmed_id, later_id} <= set(remaining))
+        self.assertEqual(await self.repo.expire_unconfirmed(3, 100), 1)
+
+    async def test_confirm_pending_fifo(self):
+        """대기 예약이 created_at 순서대로 정원까지만 승인되고, 동시에 들어온 개별 승인과 합쳐도 정원을 넘지 않는지 테스트"""
+        # given: 20,000명 확정 후 10,000 / 15,000 / 6,000 / 1,000명 순으로 신청, 나중에 온 5,000명은 개별 승인 시도
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed, created_at) " \
+                     "VALUES($1, $2, $3, $4, NOW() - make_interval(mins => $5)) RETURNING id"
+            await conn.fetchrow(insert, user_id, slot_id, 20000, True, 60)
+            # id 순서와 신청 순서를 일부러 다르게
+            queue = {minutes: (await conn.fetchrow(insert, user_id, slot_id, amount, False, minutes))["id"]
+                     for minutes, amount in ((30, 6000), (50, 10000), (20, 1000), (40, 15000))}
+            late_id = (await conn.fetchrow(insert, user_id, slot_id, 5000, False, 0))["id"]
+
+        # when
+        filled, _ = await asyncio.gather(self.repo.confirm_pending_fifo(slot_id),
+                                         self.repo.confirm_by_id(late_id), return_exceptions=True)
+        again = await self.repo.confirm_pending_fifo(slot_id)
+
+        # then
+        self.assertEqual([row["id"] for row in filled], [queue[50], queue[40]])
+        self.assertEqual(again, [])
+        async with self.pool.acquire() as conn:
+            total = await conn.fetchval(
+                "SELECT SUM(amount) FROM reservations WHERE slot_id = $1 AND confirmed", slot_id)
+            pending = await conn.fetchval(
+                "SELECT COUNT(*) FROM reservations WHERE slot_id = $1 AND NOT confirmed", slot_id)
+        self.assertLessEqual(total, 50000)
+        self.assertGreaterEqual(pending, 2)
+        with self.assertRaises(NoSuchSlotException):
+            await self.repo.confirm_pending_fifo(999)
+
+    async def test_fill_setting_does_not_bypass_slot_limit(self):
+        """ers.fill_slot 설정으로 확정 트리거의 정원 검사를 건너뛸 수 없는지 테스트"""
+        # given: 정원 10명 슬롯에 10명 확정, 5명 대기
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range, capacity) VALUES($1, $2) RETURNING id",
+                (start_time, start_time + timedelta(hours=1)), 10
+            ))["id"]
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, $3, $4) RETURNING id"
+            await conn.fetchrow(insert, user_id, slot_id, 10, True)
+            pending_id = (await conn.fetchrow(insert, user_id, slot_id, 5, False))["id"]
+
+            # when / then
+            with self.assertRaisesRegex(PostgresError, "SlotLimitExceeded"):
+                async with conn.transaction():
+                    await conn.execute("SELECT set_config('ers.fill_slot', $1, TRUE)", str(slot_id))
+                    await conn.execute("UPDATE reservations SET confirmed = TRUE WHERE id = $1", pending_id)
+            self.assertEqual(await conn.fetchval(
+                "SELECT SUM(amount) FROM reservations WHERE slot_id = $1 AND confirmed", slot_id), 10)
+
+    async def test_multi_row_confirm_checked_per_statement(self):
+        """한 문장으로 여러 예약을 확정할 때 각각은 정원 안이어도 합계가 넘으면 문장 전체가 거부되는지 테스트"""
+        # given: 정원 10명 슬롯에 6명, 5명 대기
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range, capacity) VALUES($1, $2) RETURNING id",
+                (start_time, start_time + timedelta(hours=1)), 10
+            ))["id"]
+            for amount in (6, 5):
+                await conn.execute("INSERT INTO reservations(user_id, slot_id, amount) VALUES($1, $2, $3)",
+                                   user_id, slot_id, amount)
+
+            # when / then
+            with self.assertRaisesRegex(PostgresError, "SlotLimitExceeded"):
+                await conn.execute("UPDATE reservations SET confirmed = TRUE WHERE slot_id = $1", slot_id)
+            self.assertEqual(await conn.fetchval(
+                "SELECT COUNT(*) FROM reservations WHERE slot_id = $1 AND confirmed", slot_id), 0)
+            await conn.execute("UPDATE reservations SET confirmed = TRUE WHERE slot_id = $1 AND amount = 6", slot_id)
+
+    async def test_reservation_queue_skips_claimed_tickets(self):
+        """다른 작업자가 가져간 신청은 기다리지 않고 건너뛰며, 나머지는 정원 규칙대로 승인/거절되는지 테스트"""
+        # given
+        queue_repo = ReservationQueueRepositoryImpl(self.pool)
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            await conn.execute("INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, $3, TRUE)",
+                               user_id, slot_id, 49990)
+        tickets = [(await queue_repo.enqueue(Reservation(slot_id=slot_id, user_id=user_id, amount=amount)))["id"]
+                   for amount in (1, 9, 11)]
+
+        # when: 다른 작업자가 첫 번째 신청을 처리하는 중
+        async with self.pool.acquire() as locker:
+            async with locker.transaction():
+                await locker.execute("SELECT 1 FROM reservation_requests WHERE id = $1 FOR UPDATE", tickets[0])
+                processed = await asyncio.wait_for(queue_repo.process(3, 10), timeout=5)
+        rest = await queue_repo.process(3, 10)
+
+        # then
+        self.assertEqual([(t["id"], t["status"]) for t in processed],
+                         [(tickets[1], "accepted"), (tickets[2], "rejected")])
+        self.assertEqual([(t["id"], t["status"]) for t in rest], [(tickets[0], "accepted")])
+        self.assertIsNotNone(rest[0]["reservation_id"])
+        self.assertEqual(await queue_repo.process(3, 10), [])
+
+    async def test_waitlist_promotes_released_seats_in_order(self):
+        """확정 예약의 삭제/감소로 생긴 자리만큼 대기 신청이 순서대로 미확정 예약으로 승격되는지 테스트"""
+        # given: 50,000명 확정된 슬롯에 30명, 10명, 5명 순으로 대기
+        waitlist = WaitlistRepositoryImpl(self.pool)
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            await conn.execute("DELETE FROM waitlist_released WHERE slot_id = $1", slot_id)
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, $3, TRUE) RETURNING id"
+            await conn.fetchrow(insert, user_id, slot_id, 49960)
+            small_id = (await conn.fetchrow(insert, user_id, slot_id, 40))["id"]
+        entries = [(await waitlist.insert(Reservation(slot_id=slot_id, user_id=user_id, amount=amount)))["id"]
+                   for amount in (30, 10, 5)]
+
+        # when
+        await self.repo.modify_from_admin(small_id, ReservationDto(slot_id=slot_id, amount=15))
+        first = await waitlist.promote(3, 10)
+        await self.repo.delete_from_admin(small_id)
+        second = await waitlist.promote(3, 10)
+
+        # then
+        self.assertEqual(first, [])
+        self.assertEqual([(e["id"], e["status"]) for e in second], [(entries[0], "promoted"), (entries[1], "promoted")])
+        async with self.pool.acquire() as conn:
+            self.assertEqual(await conn.fetchval("SELECT released FROM waitlist_released WHERE slot_id = $1", slot_id),
+                             0)
+            promoted = await conn.fetch("SELECT amount, confirmed FROM reservations WHERE id = ANY($1::INTEGER[])",
+                                        [e["reservation_id"] for e in second])
+            await conn.execute("DELETE FROM waitlist_released WHERE slot_id = $1", slot_id)
+        self.assertEqual(sorted((r["amount"], r["confirmed"]) for r in promoted), [(10, False), (30, False)])
+        self.assertEqual([e["status"] for e in await waitlist.find(user_id)], ["promoted", "promoted", "waiting"])
+
+
+    async def test_slot_capacity_checked_on_slot_row(self):
+        """슬롯별 정원으로 동시 승인이 제한되고, 확정 인원보다 작게 줄일 수 없으며, 늘린 만큼 대기열에 기록되는지 테스트"""
+        # given: 정원 100명 슬롯에 30명씩 4건 신청, 대기 1건
+        slot_repo = SlotRepositoryImpl(self.pool)
+        waitlist = WaitlistRepositoryImpl(self.pool)
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_id = (await conn.fetchrow(
+                "INSERT INTO slots(time_range, capacity) VALUES($1, 100) RETURNING id",
+                (start_time, start_time + timedelta(hours=1))
+            ))["id"]
+            await conn.execute("DELETE FROM waitlist_released WHERE slot_id = $1", slot_id)
+        ids = [(await self.repo.insert(Reservation(slot_id=slot_id, user_id=user_id, amount=30)))["id"]
+               for _ in range(4)]
+        await waitlist.insert(Reservation(slot_id=slot_id, user_id=user_id, amount=30))
+
+        # when
+        results = await asyncio.gather(*(self.repo.confirm_by_id(i) for i in ids), return_exceptions=True)
+        with self.assertRaises(SlotLimitExceededException):
+            await slot_repo.set_capacity(slot_id, 89)
+        await slot_repo.set_capacity(slot_id, 120)
+        slot = await slot_repo.find_by_id(slot_id)
+
+        # then
+        self.assertEqual(sum(isinstance(r, SlotLimitExceededException) for r in results), 1)
+        self.assertEqual((slot["capacity"], slot["amount"]), (120, 90))
+        with self.assertRaises(NoSuchSlotException):
+            await slot_repo.set_capacity(999, 100)
+        async with self.pool.acquire() as conn:
+            self.assertEqual(await conn.fetchval("SELECT released FROM waitlist_released WHERE slot_id = $1", slot_id),
+                             20)
+            await conn.execute("DELETE FROM waitlist_released WHERE slot_id = $1", slot_id)
+
+    async def test_confirmed_move_checks_target_slot(self):
+        """확정 예약을 인원 변경 없이 다른 슬롯으로 옮겨도 옮겨갈 슬롯의 정원을 검사하는지 테스트"""
+        # given: 정원 10명 슬롯 두 개에 각각 8명 확정
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_ids = [(await conn.fetchrow(
+                "INSERT INTO slots(time_range, capacity) VALUES($1, 10) RETURNING id",
+                (start_time + timedelta(hours=i), start_time + timedelta(hours=i + 1))
+            ))["id"] for i in range(2)]
+            confirmed = [(await conn.fetchrow(
+                "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, 8, TRUE) RETURNING id",
+                user_id, slot_id))["id"] for slot_id in slot_ids]
+
+        # when / then
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.modify_from_admin(confirmed[0], ReservationDto(slot_id=slot_ids[1], amount=8))
+        await self.repo.modify_from_admin(confirmed[0], ReservationDto(slot_id=slot_ids[0], amount=10))
+        async with self.pool.acquire() as conn:
+            totals = [await conn.fetchval(
+                "SELECT SUM(amount) FROM reservations WHERE slot_id = $1 AND confirmed", slot_id)
+                for slot_id in slot_ids]
+        self.assertEqual(totals, [10, 8])
+
+    async def test_cross_slot_moves_do_not_deadlock_with_fills(self):
+        """두 슬롯 사이의 양방향 이동과 두 슬롯의 FIFO 승인이 동시에 실행되어도 데드락 없이 모두 끝나는지 테스트"""
+        # given: 두 슬롯에 확정 예약 10건, 미확정 예약 10건씩
+        DB_TRANSACTION_RETRY_GIVEUPS.clear()
+        async with self.pool.acquire() as conn:
+            user_id = (await conn.fetchrow(
+                "INSERT INTO users(username, password) VALUES($1, $2) RETURNING id",
+                "test_user", "test_password"
+            ))["id"]
+            start_time = datetime.now() + timedelta(days=7)  # 7일 후
+            slot_ids = [(await conn.fetchrow(
+                "INSERT INTO slots(time_range) VALUES($1) RETURNING id",
+                (start_time + timedelta(hours=i), start_time + timedelta(hours=i + 1))
+            ))["id"] for i in range(2)]
+            insert = "INSERT INTO reservations(user_id, slot_id, amount, confirmed) VALUES($1, $2, 1, $3) RETURNING id"
+            confirmed = {slot_id: [(await conn.fetchrow(insert, user_id, slot_id, True))["id"] for _ in range(10)]
+                         for slot_id in slot_ids}
+            for slot_id in slot_ids:
+                for _ in range(10):
+                    await conn.fetchrow(insert, user_id, slot_id, False)
+        first, second = slot_ids
+        moves = [self.repo.modify_from_admin(rid, ReservationDto(slot_id=second, amount=1)) for rid in confirmed[first]]
+        moves += [self.repo.modify_from_admin(rid, ReservationDto(slot_id=first, amount=1)) for rid in confirmed[second]]
+        fills = [self.repo.confirm_pending_fifo(slot_id) for slot_id in slot_ids for _ in range(5)]
+
+        # when
+        results = await asyncio.wait_for(asyncio.gather(*moves, *fills, return_exceptions=True), timeout=30)
+
+        # then
+        self.assertEqual([r for r in results if isinstance(r, Exception)], [])
+        self.assertEqual(sum(DB_TRANSACTION_RETRY_GIVEUPS.get("reservation.modify_from_admin", state)
+                             for state in ("40001", "40P01")), 0)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT slot_id, COUNT(*) AS n FROM reservations WHERE slot_id = ANY($1::INTEGER[]) "
+                                    "AND confirmed GROUP BY slot_id", slot_ids)
+        self.assertEqual({r["slot_id"]: r["n"] for r in rows}, {first: 20, second: 20})
+
 if __name__ == '__main__':
     # 로그 설정
     logging.basicConfig(
@@ -0,0 +1,122 @@
+import logging
+import sys
+import unittest
+
+from asyncpg import DeadlockDetectedError, SerializationError, UniqueViolationError
+
+from app.database import retry
+from app.database.instrumented import query_deadline
+from app.database.retry import RetryPolicy, retry_transaction
+from app.monitoring.metrics import DB_TRANSACTION_RETRIES, DB_TRANSACTION_RETRY_GIVEUPS
+
+
+class Flaky:
+    """처음 몇 번은 지정한 오류를 내고 그 다음부터 성공하는 저장소 메서드 흉내"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    @retry_transaction("test.flaky")
+    async def write(self, value):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+class TestRetry(unittest.IsolatedAsyncioTestCase):
+    """직렬화 실패(40001)와 데드락(40P01) 재시도 정책에 대한 테스트 클래스 (DB 불필요)"""
+
+    logger = logging.getLogger('TestRetry')
+
+    def setUp(self):
+        """각 테스트 실행 전 메트릭 초기화 및 대기 시간 없는 정책으로 교체"""
+        DB_TRANSACTION_RETRIES.clear()
+        DB_TRANSACTION_RETRY_GIVEUPS.clear()
+        self.saved_policy = retry.policy
+        retry.policy = RetryPolicy(attempts=3, base_delay=0.001, budget=1.0, rng=lambda: 0.5)
+
+    def tearDown(self):
+        retry.policy = self.saved_policy
+
+    async def test_retries_serialization_failures_and_deadlocks(self):
+        """40001과 40P01은 다시 실행되고 재시도 횟수가 sqlstate별로 기록되는지 테스트"""
+        # given
+        flaky = Flaky(SerializationError("could not serialize"), DeadlockDetectedError("deadlock detected"))
+
+        # when
+        result = await flaky.write(7)
+
+        # then
+        self.assertEqual(result, 7)
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(DB_TRANSACTION_RETRIES.get("test.flaky", "40001"), 1)
+        self.assertEqual(DB_TRANSACTION_RETRIES.get("test.flaky", "40P01"), 1)
+        self.assertEqual(DB_TRANSACTION_RETRY_GIVEUPS.get("test.flaky", "40P01"), 0)
+
+    async def test_other_errors_are_not_retried(self):
+        """재시도 대상이 아닌 PostgresError는 바로 전달되는지 테스트"""
+        # given
+        flaky = Flaky(UniqueViolationError("duplicate key"))
+
+        # when / then
+        with self.assertRaises(UniqueViolationError):
+            await flaky.write(1)
+        self.assertEqual(flaky.calls, 1)
+        self.assertEqual(DB_TRANSACTION_RETRIES.get("test.flaky", "23505"), 0)
+
+    async def test_gives_up_after_attempts(self):
+        """시도 횟수를 다 쓰면 마지막 오류를 그대로 내고 포기 횟수가 기록되는지 테스트"""
+        # given
+        flaky = Flaky(*(DeadlockDetectedError("deadlock detected") for _ in range(5)))
+
+        # when / then
+        with self.assertRaises(DeadlockDetectedError):
+            await flaky.write(1)
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(DB_TRANSACTION_RETRIES.get("test.flaky", "40P01"), 2)
+        self.assertEqual(DB_TRANSACTION_RETRY_GIVEUPS.get("test.flaky", "40P01"), 1)
+
+    async def test_budget_and_deadline_stop_retries(self):
+        """대기 시간이 예산이나 요청 데드라인을 넘으면 더 시도하지 않는지 테스트"""
+        # given
+        retry.policy = RetryPolicy(attempts=10, base_delay=0.5, max_delay=0.5, budget=0.1, rng=lambda: 1.0)
+        over_budget = Flaky(SerializationError("could not serialize"))
+        within_budget = RetryPolicy(attempts=10, base_delay=0.05, max_delay=0.05, budget=10, rng=lambda: 1.0)
+        over_deadline = Flaky(SerializationError("could not serialize"))
+
+        # when / then
+        with self.assertRaises(SerializationError):
+            await over_budget.write(1)
+        retry.policy = within_budget
+        with query_deadline(0.01):
+            with self.assertRaises(SerializationError):
+                await over_deadline.write(1)
+        self.assertEqual((over_budget.calls, over_deadline.calls), (1, 1))
+        self.assertEqual(DB_TRANSACTION_RETRY_GIVEUPS.get("test.flaky", "40001"), 2)
+
+    def test_full_jitter_delay(self):
+        """재시도 대기 시간이 지수적으로 늘어난 상한 안에서 무작위로 정해지는지 테스트"""
+        # given
+        policy = RetryPolicy(base_delay=0.01, max_delay=0.05, rng=lambda: 1.0)
+
+        # then
+        self.assertEqual([round(policy.delay(n), 3) for n in range(1, 5)], [0.01, 0.02, 0.04, 0.05])
+        self.assertEqual(RetryPolicy(rng=lambda: 0.0).delay(3), 0)
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestRetry)
+    runner.run(suite)
@@ -0,0 +1,69 @@
+import logging
+import os
+import sys
+import unittest
+from unittest import mock
+
+from app import server
+
+
+class TestServer(unittest.TestCase):
+    """worker 수와 worker별 DB pool 크기 계산에 대한 테스트 클래스"""
+
+    logger = logging.getLogger('TestServer')
+
+    def test_pool_size_leaves_room_for_listener(self):
+        """worker마다 LISTEN 연결 1개를 빼고 나누며, 합계가 예산을 넘지 않는지 테스트"""
+        with mock.patch.dict(os.environ, {"DB_MAX_CONNECTIONS": "100", "DB_RESERVED_CONNECTIONS": "10",
+                                          "DB_POOL_MIN_SIZE": "5"}):
+            # when
+            min_size, max_size = server.pool_size_per_worker(8)
+
+            # then
+            self.assertEqual((min_size, max_size), (5, 10))
+            self.assertLessEqual(8 * (max_size + server.LISTENER_CONNECTIONS), 90)
+
+    def test_too_many_workers_fail_loudly(self):
+        """pool이 백그라운드 worker 4개와 요청용 1개를 못 담는 worker 수는 오류를 내고, 기본 worker 수는 예산 안으로 줄어드는지 테스트"""
+        with mock.patch.dict(os.environ, {"DB_MAX_CONNECTIONS": "100", "DB_RESERVED_CONNECTIONS": "10",
+                                          "DB_BACKEND": "postgres"}):
+            os.environ.pop("WEB_CONCURRENCY", None)
+            # then
+            with self.assertRaises(ValueError) as raised:
+                server.pool_size_per_worker(16)
+            self.assertIn("4 for background workers", str(raised.exception))
+            self.assertIn("WEB_CONCURRENCY to at most 15", str(raised.exception))
+            self.assertEqual(server.pool_size_per_worker(15)[1], 5)
+            with mock.patch.object(server, "available_cores", return_value=64):
+                self.assertEqual(server.worker_count(), 15)
+
+    def test_single_process_backends_run_one_worker(self):
+        """sqlite/memory 백엔드는 worker 1개로 시작하고, WEB_CONCURRENCY가 2 이상이면 오류를 내는지 테스트"""
+        for backend in ("sqlite", "memory"):
+            with mock.patch.dict(os.environ, {"DB_BACKEND": backend}):
+                os.environ.pop("WEB_CONCURRENCY", None)
+                # when
+                with mock.patch.object(server, "available_cores", return_value=8):
+                    workers = server.worker_count()
+
+                # then
+                self.assertEqual(workers, 1)
+                os.environ["WEB_CONCURRENCY"] = "4"
+                with self.assertRaises(ValueError):
+                    server.worker_count()
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestServer)
+    runner.run(suite)
@@ -1,14 +1,15 @@
 import logging
 import sys
 import unittest
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 from asyncpg import ExclusionViolationError, Range
 
 from app.dependencies.config import database
 from app.repositories.slot.dbimpl import SlotRepositoryImpl
 from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
-from app.models.slot_model import Slot
+from app.models.slot_model import SLOT_LIMIT, Slot
 
 
 class TestSlotRepository(unittest.IsolatedAsyncioTestCase):
@@ -60,6 +61,48 @@ class TestSlotRepository(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(slots[0]["time_range"].lower, start_time, "시작 시간이 일치해야 합니다.")
         self.assertEqual(slots[0]["time_range"].upper, end_time, "종료 시간이 일치해야 합니다.")
 
+    async def test_find_bookable_slots(self):
+        """예약 가능 기간, 남은 인원, 개수 제한 조건으로 슬롯 조회가 이루어지는지 테스트"""
+        # given
+        now = datetime.now(timezone.utc)
+        near = await self.repo.insert(Slot.create_with_time_range(now + timedelta(days=1),
+                                                                  now + timedelta(days=1, hours=1)))
+        far = await self.repo.insert(Slot.create_with_time_range(now + timedelta(days=10),
+                                                                 now + timedelta(days=10, hours=1)))
+        farther = await self.repo.insert(Slot.create_with_time_range(now + timedelta(days=11),
+                                                                     now + timedelta(days=11, hours=1)))
+
+        # when
+        bookable = await self.repo.find(start_at=now, days_left=3)
+        limited = await self.repo.find(start_at=now, days_left=3, limit=1)
+        empty_only = await self.repo.find(start_at=now, min_remaining=SLOT_LIMIT)
+
+        # then
+        self.assertEqual([row["id"] for row in bookable], [far["id"], farther["id"]], "3일 이후 슬롯만 조회되어야 합니다.")
+        self.assertEqual([row["id"] for row in limited], [far["id"]], "limit 개수만 조회되어야 합니다.")
+        self.assertEqual([row["id"] for row in empty_only][:3], [near["id"], far["id"], farther["id"]],
+                         "확정 인원이 없는 슬롯은 모두 조회되어야 합니다.")
+
+    async def test_daily_totals_by_time_zone(self):
+        """시간대의 자정 경계로 날짜별 시작 슬롯 수가 집계되는지 테스트"""
+        # given: 서울 기준 자정 직전/직후에 시작하는 두 슬롯
+        seoul = ZoneInfo("Asia/Seoul")
+        day = datetime.now(seoul).date() + timedelta(days=400)
+        await self.repo.insert(Slot.create_with_time_range(datetime.combine(day, time(23), seoul),
+                                                           datetime.combine(day, time(23, 30), seoul)))
+        await self.repo.insert(Slot.create_with_time_range(datetime.combine(day + timedelta(days=1), time(0), seoul),
+                                                           datetime.combine(day + timedelta(days=1), time(1), seoul)))
+
+        # when
+        rows = await self.repo.daily_totals(day, day + timedelta(days=2), "Asia/Seoul")
+        utc_rows = await self.repo.daily_totals(day, day + timedelta(days=1), "UTC")
+
+        # then
+        self.assertEqual([(r["day"], r["slots"]) for r in rows],
+                         [(day, 1), (day + timedelta(days=1), 1), (day + timedelta(days=2), 0)],
+                         "서울 날짜 기준으로 하루에 하나씩 집계되어야 합니다.")
+        self.assertEqual([r["slots"] for r in utc_rows], [2, 0], "UTC 기준으로는 같은 날에 집계되어야 합니다.")
+
     async def test_find_slot_by_id_success(self):
         """ID로 슬롯 조회가 성공적으로 이루어지는지 테스트"""
         # given
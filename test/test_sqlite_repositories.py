@@ -0,0 +1,385 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app.database.sqlite_db import SqlitePool
+from app.models.reservation_model import Reservation, ReservationDto
+from app.models.slot_model import Slot
+from app.repositories.reservation.exceptions import DaysNotLeftEnoughException, NoSuchReservationException, \
+    ReservationAlreadyConfirmedException, SlotLimitExceededException, UserMismatchException
+from app.repositories.reservation.sqliteimpl import ReservationRepositorySqliteImpl
+from app.repositories.reservation_queue.exceptions import NoSuchTicketException
+from app.repositories.reservation_queue.sqliteimpl import ReservationQueueRepositorySqliteImpl
+from app.repositories.slot.exceptions import NoSuchSlotException, SlotTimeRangeOverlapped
+from app.repositories.slot.sqliteimpl import SlotRepositorySqliteImpl
+from app.repositories.user.exceptions import NoSuchUserException, UserNameAlreadyExistsException
+from app.repositories.user.sqliteimpl import UserRepositorySqliteImpl
+from app.repositories.waitlist.exceptions import NoSuchWaitlistEntryException
+from app.repositories.waitlist.sqliteimpl import WaitlistRepositorySqliteImpl
+
+
+class TestSqliteRepositories(unittest.IsolatedAsyncioTestCase):
+    """SQLite 레포지토리 구현체에 대한 테스트 클래스"""
+
+    logger = logging.getLogger('TestSqliteRepositories')
+
+    async def asyncSetUp(self):
+        """각 테스트 실행 전 임시 SQLite 파일 생성 및 기본 데이터 생성"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = SqlitePool(os.path.join(self.tmpdir.name, "ers.sqlite3"), readers=2)
+        await self.pool.open()
+        self.slot_repo = SlotRepositorySqliteImpl(self.pool)
+        self.user_repo = UserRepositorySqliteImpl(self.pool)
+        self.repo = ReservationRepositorySqliteImpl(self.pool)
+
+        self.user_id = (await self.user_repo.insert("test_user", "test_password"))["id"]
+        self.other_user_id = (await self.user_repo.insert("other_user", "test_password"))["id"]
+        self.start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=10)
+        self.slot_id = await self.add_slot(self.start)
+        self.next_slot_id = await self.add_slot(self.start + timedelta(hours=1))
+
+    async def asyncTearDown(self):
+        """각 테스트 실행 후 연결 종료 및 임시 파일 삭제"""
+        await self.pool.close()
+        self.tmpdir.cleanup()
+
+    async def add_slot(self, start: datetime, hours: int = 1) -> int:
+        slot = Slot.create_with_time_range(start, start + timedelta(hours=hours))
+        return (await self.slot_repo.insert(slot))["id"]
+
+    async def test_wal_mode_and_admin_account(self):
+        """WAL 모드로 열리고, 기본 계정 없이 ensure_admin으로만 관리자가 생성되는지 테스트"""
+        self.assertEqual(await self.pool.journal_mode(), "wal")
+        for username in ("admin", "user"):
+            with self.assertRaises(NoSuchUserException):
+                await self.user_repo.find(username)
+
+        await self.pool.ensure_admin("admin", "admin_password")
+        await self.pool.ensure_admin("admin", "other_password")
+        admin = await self.user_repo.find("admin")
+        self.assertTrue(admin["admin"])
+        self.assertEqual(admin["password"], "admin_password")
+        self.assertFalse((await self.user_repo.find("test_user"))["admin"])
+        with self.assertRaises(UserNameAlreadyExistsException):
+            await self.user_repo.insert("test_user", "test_password")
+
+    async def test_slot_overlap_and_range_filters(self):
+        """겹치는 슬롯은 트리거로 거부되고, 구간 조회가 Postgres 구현과 같은 조건으로 동작하는지 테스트"""
+        with self.assertRaises(SlotTimeRangeOverlapped):
+            await self.add_slot(self.start + timedelta(minutes=30))
+        with self.assertRaises(SlotTimeRangeOverlapped):
+            await self.add_slot(self.start - timedelta(hours=1), hours=5)
+        await self.add_slot(self.start + timedelta(hours=2))
+
+        window = await self.slot_repo.find(self.start + timedelta(minutes=59), self.start + timedelta(minutes=61))
+        self.assertEqual([row["id"] for row in window], [self.slot_id, self.next_slot_id])
+        before = await self.slot_repo.find(end_at=self.start)
+        self.assertEqual([row["id"] for row in before], [self.slot_id])
+        self.assertEqual(window[0]["time_range"].lower, self.start)
+
+    async def test_bookable_slot_filters(self):
+        """남은 인원, 예약 가능 기간, 개수 제한 조건으로 슬롯을 거르는지 테스트"""
+        # given: 확정 45,000명인 슬롯과 시작까지 하루 남은 빈 슬롯
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1))
+        full = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=45000)))["id"]
+        await self.repo.confirm_by_id(full)
+
+        # when
+        roomy = await self.slot_repo.find(min_remaining=5001)
+        exact = await self.slot_repo.find(min_remaining=5000)
+        bookable = await self.slot_repo.find(days_left=3)
+        first = await self.slot_repo.find(min_remaining=5001, days_left=3, limit=1)
+
+        # then
+        self.assertEqual([row["id"] for row in roomy], [near_slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in exact], [near_slot_id, self.slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in bookable], [self.slot_id, self.next_slot_id])
+        self.assertEqual([row["id"] for row in first], [self.next_slot_id])
+        # 종료 시각만 주어진 구간 조회와 함께 써도 같은 조건
+        self.assertEqual([row["id"] for row in await self.slot_repo.find(end_at=self.start, days_left=3)],
+                         [self.slot_id])
+
+    async def test_find_nearest(self):
+        """목표 시각에 가까운 순서로, 인원이 남아 있고 예약 가능한 슬롯만 조회하는지 테스트"""
+        # given: start-1h, start, start+1h(가득 참), start+3h, 시작까지 하루 남은 슬롯
+        before_id = await self.add_slot(self.start - timedelta(hours=1))
+        after_id = await self.add_slot(self.start + timedelta(hours=3))
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1))
+        full = (await self.repo.insert(Reservation(slot_id=self.next_slot_id, user_id=self.user_id,
+                                                   amount=49000)))["id"]
+        await self.repo.confirm_by_id(full)
+        target = self.start + timedelta(hours=1, minutes=10)
+
+        # when
+        nearest = await self.slot_repo.find_nearest(target, 1001, days_left=3, k=3)
+        with_full = await self.slot_repo.find_nearest(target, 1000, days_left=3, k=1)
+        anytime = await self.slot_repo.find_nearest(datetime.now(timezone.utc), 1, k=1)
+
+        # then
+        self.assertEqual([row["id"] for row in nearest], [self.slot_id, after_id, before_id])
+        self.assertEqual([row["id"] for row in with_full], [self.next_slot_id])
+        self.assertEqual([row["id"] for row in anytime], [near_slot_id])
+        self.assertEqual(await self.slot_repo.find_nearest(target, 1, days_left=365), [])
+
+    async def test_slot_limit_and_counter(self):
+        """확정 인원 상한과 슬롯별 확정 인원 카운터가 신청, 확정, 이동, 삭제에서 유지되는지 테스트"""
+        # given
+        first = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=30000)))["id"]
+        await self.repo.confirm_by_id(first)
+        moved = (await self.repo.insert(Reservation(slot_id=self.next_slot_id, user_id=self.user_id,
+                                                    amount=20001)))["id"]
+        await self.repo.confirm_by_id(moved)
+
+        # then
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=20001))
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.modify_from_admin(moved, ReservationDto(slot_id=self.slot_id, amount=20001))
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 30000)
+
+        await self.repo.modify_from_admin(moved, ReservationDto(slot_id=self.slot_id, amount=20000))
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 50000)
+        self.assertEqual((await self.slot_repo.find_by_id(self.next_slot_id))["amount"], 0)
+
+        await self.repo.delete_from_admin(first)
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 20000)
+
+    async def test_concurrent_confirms_respect_limit(self):
+        """동시 확정 요청이 단일 writer로 직렬화되어 상한을 넘지 않는지 테스트"""
+        # given
+        ids = [(await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=3000)))["id"]
+               for _ in range(20)]
+
+        # when
+        results = await asyncio.gather(*(self.repo.confirm_by_id(i) for i in ids), return_exceptions=True)
+
+        # then
+        confirmed = [r for r in results if not isinstance(r, Exception)]
+        self.assertEqual(len(confirmed), 16)
+        self.assertTrue(all(isinstance(r, SlotLimitExceededException) for r in results if isinstance(r, Exception)))
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 48000)
+
+    async def test_user_rules_and_cascade(self):
+        """사용자 규칙 검사와 슬롯 삭제 시 예약 cascade 삭제를 테스트"""
+        near_slot_id = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        reservation_id = (await self.repo.insert_if_days_left(
+            Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=10), 3))["id"]
+
+        with self.assertRaises(DaysNotLeftEnoughException):
+            await self.repo.insert_if_days_left(Reservation(slot_id=near_slot_id, user_id=self.user_id, amount=1), 3)
+        with self.assertRaises(UserMismatchException):
+            await self.repo.delete_unconfirmed(reservation_id, self.other_user_id)
+
+        await self.repo.modify_unconfirmed_if_days_left_and_user_match(
+            reservation_id, ReservationDto(slot_id=self.next_slot_id, amount=20), self.user_id, 3)
+        row = (await self.repo.find(user_id=self.user_id))[0]
+        self.assertEqual((row["slot_id"], row["amount"], row["confirmed"]), (self.next_slot_id, 20, False))
+
+        await self.repo.confirm_by_id(reservation_id)
+        with self.assertRaises(ReservationAlreadyConfirmedException):
+            await self.repo.delete_unconfirmed(reservation_id, self.user_id)
+        self.assertIsNotNone((await self.repo.find_by_id(reservation_id))["confirmed_at"])
+
+        await self.slot_repo.delete(self.next_slot_id)
+        with self.assertRaises(NoSuchReservationException):
+            await self.repo.find_by_id(reservation_id)
+
+    async def test_expire_unconfirmed(self):
+        """시작이 3일 이내인 슬롯의 미확정 예약만 limit 개수씩 삭제되고 확정 인원 카운터는 유지되는지 테스트"""
+        # given
+        soon = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        for _ in range(3):
+            await self.repo.insert(Reservation(slot_id=soon, user_id=self.user_id, amount=1))
+        confirmed = (await self.repo.insert(Reservation(slot_id=soon, user_id=self.user_id, amount=4)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        future = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id, amount=1)))["id"]
+
+        # when
+        first = await self.repo.expire_unconfirmed(3, 2)
+        second = await self.repo.expire_unconfirmed(3, 2)
+
+        # then
+        self.assertEqual((first, second), (2, 1))
+        self.assertEqual(sorted(r["id"] for r in await self.repo.find()), [confirmed, future])
+        self.assertEqual((await self.slot_repo.find_by_id(soon))["amount"], 4)
+
+    async def test_confirm_pending_fifo(self):
+        """대기 예약이 신청 순서대로 정원까지만 한 문장으로 승인되고 확정 인원 카운터가 맞는지 테스트"""
+        # given
+        confirmed = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                        amount=20000)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        queue = [(await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                     amount=amount)))["id"] for amount in (10000, 15000, 6000, 1000)]
+
+        # when
+        filled = await self.repo.confirm_pending_fifo(self.slot_id)
+        again = await self.repo.confirm_pending_fifo(self.slot_id)
+        fillable = await self.repo.find_fillable_slot_ids(10)
+
+        # then
+        self.assertEqual(filled, [{"id": queue[0], "amount": 10000}, {"id": queue[1], "amount": 15000}])
+        self.assertEqual(again, [])
+        self.assertEqual(fillable, [self.slot_id])
+        self.assertEqual((await self.slot_repo.find_by_id(self.slot_id))["amount"], 45000)
+        self.assertIsNotNone((await self.repo.find_by_id(queue[0]))["confirmed_at"])
+        self.assertFalse((await self.repo.find_by_id(queue[3]))["confirmed"])
+        with self.assertRaises(NoSuchSlotException):
+            await self.repo.confirm_pending_fifo(9999)
+
+    async def test_reservation_queue_process(self):
+        """대기열의 신청이 접수 순서대로 limit 개씩 처리되고, 없는 슬롯/마감 임박/정원 초과는 사유와 함께 거절되는지 테스트"""
+        # given
+        queue_repo = ReservationQueueRepositorySqliteImpl(self.pool)
+        soon = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        confirmed = (await self.repo.insert(Reservation(slot_id=self.slot_id, user_id=self.user_id,
+                                                        amount=49990)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        requests = [(self.slot_id, 10), (9999, 1), (soon, 1), (self.slot_id, 11), (self.next_slot_id, 5)]
+        tickets = [(await queue_repo.enqueue(Reservation(slot_id=slot_id, user_id=self.user_id, amount=amount)))["id"]
+                   for slot_id, amount in requests]
+
+        # when
+        first = await queue_repo.process(3, 4)
+        second = await queue_repo.process(3, 4)
+        empty = await queue_repo.process(3, 4)
+
+        # then
+        self.assertEqual([t["id"] for t in first + second], tickets)
+        self.assertEqual([t["status"] for t in first + second],
+                         ["accepted", "rejected", "rejected", "rejected", "accepted"])
+        self.assertEqual(empty, [])
+        self.assertEqual((await self.repo.find_by_id(first[0]["reservation_id"]))["amount"], 10)
+        self.assertTrue(all(t["error"] for t in first[1:]))
+        self.assertIsNotNone((await queue_repo.find_by_id(tickets[0], self.user_id))["processed_at"])
+        with self.assertRaises(NoSuchTicketException):
+            await queue_repo.find_by_id(tickets[0], self.other_user_id)
+
+    async def test_waitlist_promote(self):
+        """확정 인원이 줄어든 만큼 대기 신청이 순서대로 승격되고, 마감 임박 슬롯의 대기는 만료되는지 테스트"""
+        # given
+        waitlist = WaitlistRepositorySqliteImpl(self.pool)
+        soon = await self.add_slot(datetime.now(timezone.utc) + timedelta(days=1))
+        confirmed = {}
+        for slot_id in (self.slot_id, soon):
+            confirmed[slot_id] = (await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id,
+                                                                     amount=50000)))["id"]
+            await self.repo.confirm_by_id(confirmed[slot_id])
+        entries = [(await waitlist.insert(Reservation(slot_id=slot_id, user_id=self.other_user_id,
+                                                      amount=amount)))["id"]
+                   for slot_id, amount in ((self.slot_id, 30), (self.slot_id, 10), (self.slot_id, 5), (soon, 1))]
+
+        # when
+        await self.repo.modify_from_admin(confirmed[self.slot_id], ReservationDto(slot_id=self.slot_id, amount=49975))
+        await self.repo.delete_from_admin(confirmed[soon])
+        first = await waitlist.promote(3, 10)
+        await self.repo.modify_from_admin(confirmed[self.slot_id], ReservationDto(slot_id=self.slot_id, amount=49960))
+        second = await waitlist.promote(3, 10)
+
+        # then
+        self.assertEqual(first, [])
+        self.assertEqual([e["id"] for e in second], entries[:2])
+        self.assertEqual([e["status"] for e in await waitlist.find(self.other_user_id)],
+                         ["promoted", "promoted", "waiting", "expired"])
+        self.assertEqual((await self.repo.find_by_id(second[0]["reservation_id"]))["amount"], 30)
+        with self.assertRaises(NoSuchWaitlistEntryException):
+            await waitlist.delete_waiting(entries[0], self.other_user_id)
+        await waitlist.delete_waiting(entries[2], self.other_user_id)
+        with self.assertRaises(NoSuchSlotException):
+            await waitlist.insert(Reservation(slot_id=9999, user_id=self.user_id, amount=1))
+
+    async def test_daily_totals(self):
+        """시간대별 자정 경계로 일별 슬롯 수와 확정/미확정 인원을 집계하는지 테스트"""
+        # given
+        seoul = ZoneInfo("Asia/Seoul")
+        day = self.start.astimezone(seoul).date() + timedelta(days=30)
+        late = await self.add_slot(datetime.combine(day, time(23), seoul))
+        early = await self.add_slot(datetime.combine(day + timedelta(days=1), time(0), seoul))
+        await self.repo.insert(Reservation(slot_id=late, user_id=self.user_id, amount=7))
+        confirmed = (await self.repo.insert(Reservation(slot_id=early, user_id=self.user_id, amount=5)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+
+        # when
+        rows = await self.slot_repo.daily_totals(day, day + timedelta(days=2), "Asia/Seoul")
+        utc_rows = await self.slot_repo.daily_totals(day, day + timedelta(days=1), "UTC")
+
+        # then
+        self.assertEqual([(r["day"], r["slots"], r["confirmed"], r["pending"]) for r in rows],
+                         [(day, 1, 0, 7), (day + timedelta(days=1), 1, 5, 0), (day + timedelta(days=2), 0, 0, 0)])
+        self.assertEqual([r["slots"] for r in utc_rows], [2, 0])
+
+
+    async def test_slot_capacity(self):
+        """슬롯별 정원으로 제한과 남은 인원 조회가 동작하고, 정원 변경이 확정 인원과 대기열 규칙을 따르는지 테스트"""
+        # given: 정원 100명 슬롯에 80명 확정, 30명 대기
+        waitlist = WaitlistRepositorySqliteImpl(self.pool)
+        start = self.start + timedelta(days=2)
+        slot_id = (await self.slot_repo.insert(Slot.create_with_time_range(start, start + timedelta(hours=1),
+                                                                           capacity=100)))["id"]
+        confirmed = (await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id, amount=80)))["id"]
+        await self.repo.confirm_by_id(confirmed)
+        with self.assertRaises(SlotLimitExceededException):
+            await self.repo.insert(Reservation(slot_id=slot_id, user_id=self.user_id, amount=21))
+        await waitlist.insert(Reservation(slot_id=slot_id, user_id=self.other_user_id, amount=30))
+
+        # when
+        with self.assertRaises(SlotLimitExceededException):
+            await self.slot_repo.set_capacity(slot_id, 79)
+        with self.assertRaises(NoSuchSlotException):
+            await self.slot_repo.set_capacity(9999, 100)
+        await self.slot_repo.set_capacity(slot_id, 130)
+        promoted = await waitlist.promote(3, 10)
+        filled = await self.repo.confirm_pending_fifo(slot_id)
+
+        # then
+        self.assertEqual(len(promoted), 1)
+        self.assertEqual([row["amount"] for row in filled], [30])
+        self.assertEqual({k: (await self.slot_repo.find_by_id(slot_id))[k] for k in ("capacity", "amount")},
+                         {"capacity": 130, "amount": 110})
+        window = {"start_at": start, "end_at": start + timedelta(minutes=1)}
+        self.assertEqual(await self.slot_repo.find(**window, min_remaining=21), [])
+        self.assertEqual(len(await self.slot_repo.find(**window, min_remaining=20)), 1)
+        self.assertEqual((await self.slot_repo.daily_totals(start.date(), start.date(), "UTC"))[0]["capacity"], 130)
+
+    async def test_open_adds_capacity_to_old_file(self):
+        """capacity 컬럼이 없던 파일을 열면 기본 정원으로 컬럼이 추가되는지 테스트"""
+        # given
+        path = os.path.join(self.tmpdir.name, "old.sqlite3")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE slots (id INTEGER PRIMARY KEY AUTOINCREMENT, start_at INTEGER NOT NULL, "
+                     "end_at INTEGER NOT NULL, confirmed_amount INTEGER NOT NULL DEFAULT 0)")
+        conn.execute("INSERT INTO slots(start_at, end_at) VALUES(1, 2)")
+        conn.commit()
+        conn.close()
+
+        # when
+        pool = SqlitePool(path, readers=1)
+        await pool.open()
+        try:
+            slot = await SlotRepositorySqliteImpl(pool).find_by_id(1)
+        finally:
+            await pool.close()
+
+        # then
+        self.assertEqual(slot["capacity"], 50000)
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSqliteRepositories)
+    runner.run(suite)
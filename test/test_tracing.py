@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+
+from app.monitoring.tracing import JSONResponse, TraceExporter, TracedRoute, TracingMiddleware, span
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    """요청 트레이싱 미들웨어와 span에 대한 테스트 클래스"""
+
+    logger = logging.getLogger('TestTracing')
+
+    async def asyncSetUp(self):
+        """각 테스트 실행 전 임시 트레이스 파일과 테스트용 앱 생성"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "trace.jsonl")
+
+        async def dependency():
+            with span("jwt.decode"):
+                return 1
+
+        router = APIRouter(route_class=TracedRoute)
+
+        @router.get("/items/{id}")
+        async def get_item(id: int, value=Depends(dependency)):
+            return JSONResponse(content={"id": id, "value": value})
+
+        self.app = FastAPI()
+        self.app.include_router(router)
+
+    async def asyncTearDown(self):
+        self.tmpdir.cleanup()
+
+    async def request(self, sample_rate: float):
+        app = TracingMiddleware(self.app, sample_rate=sample_rate, exporter=TraceExporter(self.path))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/items/1")
+        app.exporter.close()
+        return response
+
+    async def test_sampled_request_exported_as_trace_events(self):
+        """샘플링된 요청이 trace viewer가 읽을 수 있는 형식으로 저장되는지 테스트"""
+        # when
+        response = await self.request(sample_rate=1.0)
+
+        # then
+        self.assertEqual(response.status_code, 200)
+        with open(self.path, encoding="utf-8") as f:
+            content = f.read()
+        self.assertTrue(content.startswith("[\n"), "파일은 JSON array로 시작해야 합니다.")
+        events = json.loads(content.rstrip().rstrip(",") + "]")
+        names = {event["name"] for event in events}
+        self.assertIn("GET /items/{id}", names)
+        self.assertIn("fastapi.dependencies", names)
+        self.assertIn("jwt.decode", names)
+        self.assertIn("endpoint", names)
+        self.assertIn("json.encode", names)
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+    async def test_unsampled_request_not_exported(self):
+        """샘플링되지 않은 요청은 기록되지 않는지 테스트"""
+        # when
+        response = await self.request(sample_rate=0.0)
+
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(os.path.exists(self.path), "샘플링되지 않은 요청은 파일을 만들지 않아야 합니다.")
+
+
+if __name__ == '__main__':
+    # 로그 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    # TestRunner 설정
+    runner = unittest.TextTestRunner(verbosity=3)
+
+    # 테스트 실행
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestTracing)
+    runner.run(suite)